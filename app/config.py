@@ -56,6 +56,21 @@ class Settings:
     feature_peer_auth_queue: bool = _get_bool(os.getenv("WB_FEATURE_PEER_AUTH_QUEUE"), False)
     feature_self_auth: bool = _get_bool(os.getenv("WB_FEATURE_SELF_AUTH"), False)
     feature_nav_status_tags: bool = _get_bool(os.getenv("WB_FEATURE_NAV_STATUS_TAGS"), True)
+    chat_embedding_ann_enabled: bool = _get_bool(os.getenv("WB_CHAT_EMBEDDING_ANN"), False)
+    invite_map_warm_seconds: int = int(os.getenv("WB_INVITE_MAP_WARM_SECONDS", "60"))
+    invite_map_warm_window_minutes: int = int(os.getenv("WB_INVITE_MAP_WARM_WINDOW_MINUTES", "1440"))
+    session_touch_granularity_seconds: int = int(os.getenv("WB_SESSION_TOUCH_GRANULARITY_SECONDS", "60"))
+    session_touch_flush_seconds: int = int(os.getenv("WB_SESSION_TOUCH_FLUSH_SECONDS", "15"))
+    identity_cache_ttl_seconds: int = int(os.getenv("WB_IDENTITY_CACHE_TTL_SECONDS", "30"))
+    identity_cache_max_entries: int = int(os.getenv("WB_IDENTITY_CACHE_MAX_ENTRIES", "1024"))
+    sqlite_profile: str = os.getenv("WB_SQLITE_PROFILE", "performance")
+    sqlite_busy_timeout_ms: int = int(os.getenv("WB_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    sqlite_cache_size_mb: int = int(os.getenv("WB_SQLITE_CACHE_SIZE_MB", "32"))
+    sqlite_mmap_size_mb: int = int(os.getenv("WB_SQLITE_MMAP_SIZE_MB", "256"))
+    db_pool_size: int = int(os.getenv("WB_DB_POOL_SIZE", "20"))
+    db_max_overflow: int = int(os.getenv("WB_DB_MAX_OVERFLOW", "20"))
+    db_pool_timeout_seconds: int = int(os.getenv("WB_DB_POOL_TIMEOUT_SECONDS", "30"))
+    browse_count_limit: int = int(os.getenv("WB_BROWSE_COUNT_LIMIT", "1000"))
 
 
 @lru_cache(maxsize=1)
@@ -88,6 +103,21 @@ def _build_settings() -> Settings:
         feature_peer_auth_queue=_get_bool(os.getenv("WB_FEATURE_PEER_AUTH_QUEUE"), False),
         feature_self_auth=_get_bool(os.getenv("WB_FEATURE_SELF_AUTH"), False),
         feature_nav_status_tags=_get_bool(os.getenv("WB_FEATURE_NAV_STATUS_TAGS"), True),
+        chat_embedding_ann_enabled=_get_bool(os.getenv("WB_CHAT_EMBEDDING_ANN"), False),
+        invite_map_warm_seconds=int(os.getenv("WB_INVITE_MAP_WARM_SECONDS", "60")),
+        invite_map_warm_window_minutes=int(os.getenv("WB_INVITE_MAP_WARM_WINDOW_MINUTES", "1440")),
+        session_touch_granularity_seconds=int(os.getenv("WB_SESSION_TOUCH_GRANULARITY_SECONDS", "60")),
+        session_touch_flush_seconds=int(os.getenv("WB_SESSION_TOUCH_FLUSH_SECONDS", "15")),
+        identity_cache_ttl_seconds=int(os.getenv("WB_IDENTITY_CACHE_TTL_SECONDS", "30")),
+        identity_cache_max_entries=int(os.getenv("WB_IDENTITY_CACHE_MAX_ENTRIES", "1024")),
+        sqlite_profile=os.getenv("WB_SQLITE_PROFILE", "performance"),
+        sqlite_busy_timeout_ms=int(os.getenv("WB_SQLITE_BUSY_TIMEOUT_MS", "5000")),
+        sqlite_cache_size_mb=int(os.getenv("WB_SQLITE_CACHE_SIZE_MB", "32")),
+        sqlite_mmap_size_mb=int(os.getenv("WB_SQLITE_MMAP_SIZE_MB", "256")),
+        db_pool_size=int(os.getenv("WB_DB_POOL_SIZE", "20")),
+        db_max_overflow=int(os.getenv("WB_DB_MAX_OVERFLOW", "20")),
+        db_pool_timeout_seconds=int(os.getenv("WB_DB_POOL_TIMEOUT_SECONDS", "30")),
+        browse_count_limit=int(os.getenv("WB_BROWSE_COUNT_LIMIT", "1000")),
     )
 
 
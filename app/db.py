@@ -2,39 +2,121 @@ from __future__ import annotations
 
 from functools import lru_cache
 from pathlib import Path
-from typing import Generator
+from typing import Any, Generator
 
+from sqlalchemy import event
 from sqlalchemy.engine import Engine
 from sqlalchemy.engine.url import make_url
 from sqlmodel import Session, SQLModel, create_engine
 
-from app.config import get_settings
+from app.config import Settings, get_settings
 
 # Import models so SQLModel metadata is populated when this module loads.
 from app import models  # noqa: F401
 
+SQLITE_PROFILES = ("default", "performance")
+# Pragmas reported by `wb db-check`, in display order.
+REPORTED_PRAGMAS = ("journal_mode", "synchronous", "busy_timeout", "cache_size", "mmap_size", "temp_store")
 
-@lru_cache(maxsize=1)
-def get_engine() -> Engine:
-    settings = get_settings()
-    database_url = settings.database_url
-    connect_args: dict[str, object] = {}
 
+def sqlite_pragmas(settings: Settings) -> dict[str, Any]:
+    """Per-connection pragmas for the configured profile.
+
+    `busy_timeout` is applied in every profile so concurrent writers wait for
+    the lock instead of failing with "database is locked".
+    """
+    pragmas: dict[str, Any] = {"busy_timeout": max(0, settings.sqlite_busy_timeout_ms)}
+    if settings.sqlite_profile == "performance":
+        pragmas.update(
+            {
+                "journal_mode": "WAL",
+                "synchronous": "NORMAL",
+                # Negative cache_size is in KiB rather than pages.
+                "cache_size": -max(0, settings.sqlite_cache_size_mb) * 1024,
+                "mmap_size": max(0, settings.sqlite_mmap_size_mb) * 1024 * 1024,
+                "temp_store": "MEMORY",
+            }
+        )
+    return pragmas
+
+
+def _install_sqlite_pragmas(engine: Engine, pragmas: dict[str, Any]) -> None:
+    @event.listens_for(engine, "connect")
+    def _apply(dbapi_connection, connection_record) -> None:  # noqa: ANN001
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def build_engine(database_url: str, settings: Settings | None = None) -> Engine:
+    """Create an engine for `database_url` with the configured SQLite profile and pool sizing."""
+    settings = settings or get_settings()
+    if settings.sqlite_profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown WB_SQLITE_PROFILE {settings.sqlite_profile!r}; expected one of {SQLITE_PROFILES}")
     url = make_url(database_url)
-    if url.drivername.startswith("sqlite"):
+    connect_args: dict[str, object] = {}
+    engine_args: dict[str, object] = {}
+
+    is_sqlite = url.drivername.startswith("sqlite")
+    in_memory = is_sqlite and url.database in (None, "", ":memory:")
+    if is_sqlite:
         connect_args["check_same_thread"] = False
-        Path(url.database or "data/app.db").parent.mkdir(parents=True, exist_ok=True)
+        if not in_memory:
+            Path(url.database or "data/app.db").parent.mkdir(parents=True, exist_ok=True)
+    if not in_memory:
+        # Sync routes run in a threadpool; size the pool so they do not queue for connections.
+        engine_args.update(
+            pool_size=max(1, settings.db_pool_size),
+            max_overflow=max(0, settings.db_max_overflow),
+            pool_timeout=settings.db_pool_timeout_seconds,
+        )
+
+    engine = create_engine(database_url, echo=False, connect_args=connect_args, **engine_args)
+    if is_sqlite:
+        _install_sqlite_pragmas(engine, sqlite_pragmas(settings))
+    return engine
 
-    return create_engine(database_url, echo=False, connect_args=connect_args)
+
+@lru_cache(maxsize=1)
+def get_engine() -> Engine:
+    settings = get_settings()
+    return build_engine(settings.database_url, settings)
 
 
 def reset_engine() -> None:
     get_engine.cache_clear()
 
 
+def describe_engine(engine: Engine) -> dict[str, Any]:
+    """Effective pool and pragma settings of a live connection."""
+    pool = engine.pool
+    report: dict[str, Any] = {
+        "url": engine.url.render_as_string(hide_password=True),
+        "pool": type(pool).__name__,
+    }
+    for attribute in ("size", "timeout"):
+        method = getattr(pool, attribute, None)
+        if callable(method):
+            report[f"pool_{attribute}"] = method()
+    overflow = getattr(pool, "_max_overflow", None)
+    if overflow is not None:
+        report["pool_max_overflow"] = overflow
+    if engine.url.drivername.startswith("sqlite"):
+        with engine.connect() as connection:
+            for name in REPORTED_PRAGMAS:
+                report[name] = connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+    return report
+
+
 def init_db() -> None:
+    from app.services import request_search_index
+
     engine = get_engine()
     SQLModel.metadata.create_all(engine)
+    request_search_index.ensure_index(engine)
 
 
 def get_session() -> Generator[Session, None, None]:
@@ -11,7 +11,7 @@ from sqlmodel import Session, select
 from app.config import get_settings
 from app.db import get_session
 from app.models import User, UserSession
-from app.services import user_attribute_service
+from app.services import identity_cache_service, peer_auth_service, session_activity_service, user_attribute_service
 from app.services.auth_service import SESSION_COOKIE_NAME, touch_session
 from starlette.responses import Response
 
@@ -33,7 +33,9 @@ def get_current_session(
 
     if session_record.expires_at < datetime.utcnow():
         db.delete(session_record)
+        identity_cache_service.invalidate_session(db, session_id=session_record.id)
         db.commit()
+        session_activity_service.get_tracker().discard(cookie_value)
         return None
 
     touch_session(db, session_record=session_record)
@@ -45,6 +47,7 @@ class SessionUser:
     user: User
     session: UserSession
     avatar_url: Optional[str]
+    is_peer_auth_reviewer: bool = False
 
 
 def _get_profile_avatar_url(db: Session, user_id: int) -> Optional[str]:
@@ -55,6 +58,29 @@ def _get_profile_avatar_url(db: Session, user_id: int) -> Optional[str]:
     )
 
 
+def _load_identity(db: Session, session_record: UserSession) -> tuple[User, identity_cache_service.CachedIdentity]:
+    """Return the session's user attached to `db`, using the identity cache when possible."""
+    cache = identity_cache_service.get_cache()
+    cached = cache.get(session_record.id)
+    if cached is not None and cached.user_id == session_record.user_id:
+        return db.merge(cached.user, load=False), cached
+
+    user = db.exec(select(User).where(User.id == session_record.user_id)).first()
+    if not user:
+        cache.drop_session(session_record.id)
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+
+    identity = identity_cache_service.CachedIdentity(
+        session_id=session_record.id,
+        user_id=user.id,
+        user=identity_cache_service.snapshot_user(user),
+        avatar_url=_get_profile_avatar_url(db, user.id),
+        is_peer_auth_reviewer=peer_auth_service.user_is_peer_auth_reviewer(db, user=user),
+    )
+    cache.put(identity)
+    return user, identity
+
+
 def require_session_user(
     db: SessionDep,
     session_record: Annotated[Optional[UserSession], Depends(get_current_session)],
@@ -62,21 +88,20 @@ def require_session_user(
     if not session_record:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Authentication required")
 
-    user = db.exec(select(User).where(User.id == session_record.user_id)).first()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-
-    avatar_url = _get_profile_avatar_url(db, user.id)
-    return SessionUser(user=user, session=session_record, avatar_url=avatar_url)
+    user, identity = _load_identity(db, session_record)
+    return SessionUser(
+        user=user,
+        session=session_record,
+        avatar_url=identity.avatar_url,
+        is_peer_auth_reviewer=identity.is_peer_auth_reviewer,
+    )
 
 
 def require_authenticated_user(db: SessionDep, session_record: Annotated[Optional[UserSession], Depends(get_current_session)]) -> User:
     if not session_record or not session_record.is_fully_authenticated:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Authentication required")
 
-    user = db.exec(select(User).where(User.id == session_record.user_id)).first()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    user, _ = _load_identity(db, session_record)
     return user
 
 
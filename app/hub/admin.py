@@ -115,9 +115,8 @@ def _replay_pending_bundle(pending, peer, settings: HubSettings) -> None:
             raise SignatureVerificationError("Pending bundle signed by unexpected key")
         hub_metadata = build_metadata(peer, metadata.manifest_digest, metadata.signed_at)
         write_bundle(settings, peer, bundle_root, hub_metadata)
-        stored_bundle = get_bundle_path(settings, peer)
         ingest_bundle(
-            stored_bundle,
+            bundle_root,
             peer_name=peer.name,
             manifest_digest=metadata.manifest_digest,
             signed_at=metadata.signed_at,
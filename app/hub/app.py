@@ -46,7 +46,7 @@ def create_hub_app() -> FastAPI:
         total_bytes = 0
         if settings.storage_dir.exists():
             for peer_dir in settings.storage_dir.iterdir():
-                if peer_dir.is_dir():
+                if peer_dir.is_dir() and not peer_dir.name.startswith("."):
                     summary = summarize_bundle(peer_dir)
                     total_files += summary["file_count"]
                     total_bytes += summary["total_bytes"]
@@ -1,18 +1,18 @@
 from __future__ import annotations
 
 import logging
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, Iterable, Tuple
+from typing import Any, Dict, Iterator
 
-from sqlmodel import select
+from sqlalchemy import delete, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, select
 
 from .db import init_feed_db, session_scope
 from .models import HubFeedComment, HubFeedManifest, HubFeedRequest
 from .parser import (
-    ParsedComment,
-    ParsedRequest,
-    ParsedUser,
     iter_request_files,
     iter_user_files,
     parse_request_file,
@@ -22,6 +22,23 @@ from .parser import (
 logger = logging.getLogger("whiteballoon.hub.feed")
 
 
+# Rows per executemany call; keeps parameter lists and memory bounded.
+INGEST_BATCH_SIZE = 5000
+_KEY_CHUNK = 500
+
+_REQUEST_TABLE = HubFeedRequest.__table__
+_COMMENT_TABLE = HubFeedComment.__table__
+
+
+@dataclass
+class FeedBatches:
+    """Public rows parsed out of one bundle, ready for executemany upserts."""
+
+    requests: list[dict[str, Any]] = field(default_factory=list)
+    comments: list[dict[str, Any]] = field(default_factory=list)
+    newest_updated_at: datetime | None = None
+
+
 def ingest_bundle(
     bundle_root: Path,
     *,
@@ -29,13 +46,17 @@ def ingest_bundle(
     manifest_digest: str,
     signed_at: datetime,
 ) -> None:
-    """Parse bundle contents into the structured feed store."""
+    """Parse bundle contents into the structured feed store.
+
+    The bundle is parsed once into row batches. Requests and comments are
+    upserted with `INSERT ... ON CONFLICT` on their source unique constraints,
+    and every row written is stamped with `manifest_digest`, so whatever the
+    peer no longer publishes is removed by two set-based deletes.
+    """
 
     init_feed_db()
-    user_lookup = _build_user_lookup(bundle_root)
     now = datetime.now(timezone.utc)
-    seen_request_keys: set[Tuple[str, int]] = set()
-    newest_updated_at: datetime | None = None
+    batches = parse_bundle(bundle_root, peer_name=peer_name, manifest_digest=manifest_digest, now=now)
 
     with session_scope() as session:
         manifest = session.exec(
@@ -52,81 +73,82 @@ def ingest_bundle(
             manifest.peer_name = peer_name
             manifest.signed_at = signed_at
         manifest.ingested_at = now
+        manifest.bundle_updated_at = batches.newest_updated_at or now
         session.add(manifest)
 
-        for request_path in iter_request_files(bundle_root):
-            try:
-                parsed = parse_request_file(request_path)
-            except Exception as exc:  # pragma: no cover - defensive
-                logger.warning("Failed to parse %s: %s", request_path, exc)
-                continue
-            if parsed.sync_scope != "public":
-                continue
-            if not parsed.source_request_id or not parsed.instance:
-                continue
-
-            key = (parsed.instance, parsed.source_request_id)
-            seen_request_keys.add(key)
-
-            db_request = session.exec(
-                select(HubFeedRequest)
-                .where(HubFeedRequest.source_instance == parsed.instance)
-                .where(HubFeedRequest.source_request_id == parsed.source_request_id)
-            ).first()
-            if not db_request:
-                db_request = HubFeedRequest(
-                    peer_name=peer_name,
-                    manifest_digest=manifest_digest,
-                    source_request_id=parsed.source_request_id,
-                    source_instance=parsed.instance,
-                    title=parsed.title,
-                    description=parsed.description,
-                    status=parsed.status,
-                    sync_scope=parsed.sync_scope,
-                    contact_email=parsed.contact_email,
-                    created_by_id=parsed.created_by_id,
-                    created_by_username=parsed.created_by_username or user_lookup.get(parsed.created_by_id),
-                    updated_at=parsed.updated_at or now,
-                )
-            else:
-                db_request.peer_name = peer_name
-                db_request.manifest_digest = manifest_digest
-                db_request.title = parsed.title
-                db_request.description = parsed.description
-                db_request.status = parsed.status
-                db_request.sync_scope = parsed.sync_scope
-                db_request.contact_email = parsed.contact_email
-                db_request.created_by_id = parsed.created_by_id
-                db_request.created_by_username = parsed.created_by_username or user_lookup.get(parsed.created_by_id)
-                db_request.updated_at = parsed.updated_at or db_request.updated_at
-
-            db_request.ingested_at = now
-            session.add(db_request)
-            session.flush()
-
-            public_comments = [c for c in parsed.comments if c.sync_scope == "public"]
-            _sync_comments(
-                session,
-                db_request,
-                public_comments,
-                manifest_digest,
-                now,
-            )
+        _upsert_requests(session, batches.requests)
+        request_ids = _load_request_ids(session, manifest_digest)
+        for row in batches.comments:
+            row["request_id"] = request_ids.get((row["source_instance"], row["source_request_id"]))
+        _upsert_comments(session, batches.comments)
+        _purge_stale_rows(session, peer_name, manifest_digest)
 
-            if public_comments:
-                last_comment_at = max((c.created_at or db_request.updated_at or now) for c in public_comments)
-            else:
-                last_comment_at = None
-            db_request.comment_count = len(public_comments)
-            db_request.last_comment_at = last_comment_at
 
-            if parsed.updated_at and (not newest_updated_at or parsed.updated_at > newest_updated_at):
-                newest_updated_at = parsed.updated_at
+def parse_bundle(
+    bundle_root: Path,
+    *,
+    peer_name: str,
+    manifest_digest: str,
+    now: datetime,
+) -> FeedBatches:
+    user_lookup = _build_user_lookup(bundle_root)
+    batches = FeedBatches()
+    for request_path in iter_request_files(bundle_root):
+        try:
+            parsed = parse_request_file(request_path)
+        except Exception as exc:  # pragma: no cover - defensive
+            logger.warning("Failed to parse %s: %s", request_path, exc)
+            continue
+        if parsed.sync_scope != "public":
+            continue
+        if not parsed.source_request_id or not parsed.instance:
+            continue
 
-        _purge_missing_requests(session, peer_name, seen_request_keys)
+        public_comments = [c for c in parsed.comments if c.sync_scope == "public"]
+        fallback_at = parsed.updated_at or now
+        last_comment_at = max((c.created_at or fallback_at) for c in public_comments) if public_comments else None
+        batches.requests.append(
+            {
+                "peer_name": peer_name,
+                "manifest_digest": manifest_digest,
+                "source_request_id": parsed.source_request_id,
+                "source_instance": parsed.instance,
+                "title": parsed.title,
+                "description": parsed.description,
+                "status": parsed.status,
+                "sync_scope": parsed.sync_scope,
+                "contact_email": parsed.contact_email,
+                "created_by_id": parsed.created_by_id,
+                "created_by_username": parsed.created_by_username or user_lookup.get(parsed.created_by_id),
+                # None keeps the stored timestamp on conflict; see _upsert_requests.
+                "updated_at": parsed.updated_at,
+                "ingested_at": now,
+                "comment_count": len(public_comments),
+                "last_comment_at": last_comment_at,
+            }
+        )
+        for comment in public_comments:
+            if comment.source_comment_id is None:
+                continue
+            batches.comments.append(
+                {
+                    "request_id": None,
+                    "peer_name": peer_name,
+                    "manifest_digest": manifest_digest,
+                    "source_instance": parsed.instance,
+                    "source_request_id": parsed.source_request_id,
+                    "source_comment_id": comment.source_comment_id,
+                    "username": comment.username,
+                    "body": comment.body,
+                    "sync_scope": comment.sync_scope,
+                    "created_at": comment.created_at or fallback_at,
+                    "ingested_at": now,
+                }
+            )
 
-        manifest.bundle_updated_at = newest_updated_at or now
-        session.add(manifest)
+        if parsed.updated_at and (not batches.newest_updated_at or parsed.updated_at > batches.newest_updated_at):
+            batches.newest_updated_at = parsed.updated_at
+    return batches
 
 
 def _build_user_lookup(bundle_root: Path) -> Dict[int, str]:
@@ -145,70 +167,86 @@ def _build_user_lookup(bundle_root: Path) -> Dict[int, str]:
     return lookup
 
 
-def _sync_comments(
-    session,
-    db_request: HubFeedRequest,
-    comments: Iterable[ParsedComment],
-    manifest_digest: str,
-    now: datetime,
-) -> None:
-    existing = session.exec(
-        select(HubFeedComment)
-        .where(HubFeedComment.source_instance == db_request.source_instance)
-        .where(HubFeedComment.source_request_id == db_request.source_request_id)
-    ).all()
-    existing_map: dict[tuple[int, str], HubFeedComment] = {}
-    for db_comment in existing:
-        if db_comment.source_comment_id is None:
-            continue
-        existing_map[(db_comment.source_comment_id, db_comment.source_instance)] = db_comment
-    seen_keys: set[tuple[int | None, str]] = set()
-
-    for comment in comments:
-        if comment.source_comment_id is None:
-            continue
-        key = (comment.source_comment_id, db_request.source_instance)
-        seen_keys.add(key)
-        db_comment = existing_map.get(key)
-        created_at = comment.created_at or db_request.updated_at or now
-        if not db_comment:
-            db_comment = HubFeedComment(
-                request_id=db_request.id,
-                peer_name=db_request.peer_name,
-                manifest_digest=manifest_digest,
-                source_instance=db_request.source_instance,
-                source_request_id=db_request.source_request_id,
-                source_comment_id=comment.source_comment_id,
-                username=comment.username,
-                body=comment.body,
-                sync_scope=comment.sync_scope,
-                created_at=created_at,
-            )
-        else:
-            db_comment.request_id = db_request.id
-            db_comment.peer_name = db_request.peer_name
-            db_comment.manifest_digest = manifest_digest
-            db_comment.username = comment.username
-            db_comment.body = comment.body
-            db_comment.sync_scope = comment.sync_scope
-            db_comment.created_at = created_at
-        session.add(db_comment)
-
-    for db_comment in existing:
-        key = (db_comment.source_comment_id, db_comment.source_instance)
-        if key not in seen_keys:
-            session.delete(db_comment)
-
-
-def _purge_missing_requests(session, peer_name: str, seen_keys: set[tuple[str, int]]) -> None:
-    rows = session.exec(select(HubFeedRequest).where(HubFeedRequest.peer_name == peer_name)).all()
+def _upsert_requests(session: Session, rows: list[dict[str, Any]]) -> None:
+    if not rows:
+        return
+    # A request file without Updated-At keeps the stored value, so look up the
+    # rows that already exist (one IN query per chunk of keys) before writing.
+    stored = _load_request_updated_at(session, rows)
     for row in rows:
-        key = (row.source_instance, row.source_request_id)
-        if key in seen_keys:
-            continue
-        comments = session.exec(
-            select(HubFeedComment).where(HubFeedComment.request_id == row.id)
-        ).all()
-        for comment in comments:
-            session.delete(comment)
-        session.delete(row)
+        if row["updated_at"] is None:
+            row["updated_at"] = stored.get((row["source_instance"], row["source_request_id"])) or row["ingested_at"]
+
+    stmt = sqlite_insert(_REQUEST_TABLE)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["source_request_id", "source_instance"],
+        set_={
+            column: stmt.excluded[column]
+            for column in rows[0]
+            if column not in ("source_request_id", "source_instance")
+        },
+    )
+    for batch in _batched(rows, INGEST_BATCH_SIZE):
+        session.execute(stmt, batch)
+
+
+def _upsert_comments(session: Session, rows: list[dict[str, Any]]) -> None:
+    if not rows:
+        return
+    stmt = sqlite_insert(_COMMENT_TABLE)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["source_request_id", "source_comment_id", "source_instance"],
+        set_={
+            column: stmt.excluded[column]
+            for column in rows[0]
+            if column not in ("source_request_id", "source_comment_id", "source_instance")
+        },
+    )
+    for batch in _batched(rows, INGEST_BATCH_SIZE):
+        session.execute(stmt, batch)
+
+
+def _load_request_updated_at(session: Session, rows: list[dict[str, Any]]) -> dict[tuple[str, int], datetime]:
+    pending = [row for row in rows if row["updated_at"] is None]
+    stored: dict[tuple[str, int], datetime] = {}
+    for batch in _batched(pending, _KEY_CHUNK):
+        keys = [(row["source_instance"], row["source_request_id"]) for row in batch]
+        result = session.execute(
+            select(
+                HubFeedRequest.source_instance,
+                HubFeedRequest.source_request_id,
+                HubFeedRequest.updated_at,
+            ).where(tuple_(HubFeedRequest.source_instance, HubFeedRequest.source_request_id).in_(keys))
+        )
+        for instance, request_id, updated_at in result:
+            stored[(instance, request_id)] = updated_at
+    return stored
+
+
+def _load_request_ids(session: Session, manifest_digest: str) -> dict[tuple[str, int], int]:
+    result = session.execute(
+        select(HubFeedRequest.source_instance, HubFeedRequest.source_request_id, HubFeedRequest.id).where(
+            HubFeedRequest.manifest_digest == manifest_digest
+        )
+    )
+    return {(instance, request_id): row_id for instance, request_id, row_id in result}
+
+
+def _purge_stale_rows(session: Session, peer_name: str, manifest_digest: str) -> None:
+    """Delete the peer's rows that this bundle did not write."""
+    peer_requests = select(HubFeedRequest.id).where(HubFeedRequest.peer_name == peer_name)
+    session.execute(
+        delete(HubFeedComment)
+        .where(HubFeedComment.manifest_digest != manifest_digest)
+        .where(HubFeedComment.request_id.in_(peer_requests.scalar_subquery()))
+    )
+    session.execute(
+        delete(HubFeedRequest)
+        .where(HubFeedRequest.peer_name == peer_name)
+        .where(HubFeedRequest.manifest_digest != manifest_digest)
+    )
+
+
+def _batched(rows: list[dict[str, Any]], size: int) -> Iterator[list[dict[str, Any]]]:
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
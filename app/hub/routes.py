@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import io
 import tarfile
 import tempfile
 from datetime import datetime, timezone
@@ -9,8 +8,10 @@ from pathlib import Path
 import logging
 
 from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile, status
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from pydantic import BaseModel
 
+from app.sync.manifest_state import parse_manifest
 from app.sync.signing import (
     MANIFEST_FILENAME,
     SIGNATURE_FILENAME,
@@ -26,8 +27,14 @@ from .security import AuthContext
 from .storage import (
     build_metadata,
     bundle_exists,
+    cached_archive_path,
     get_bundle_path,
+    iter_bundle_archive,
+    link_objects,
+    manifest_digest,
+    missing_objects,
     read_metadata,
+    stream_and_cache_archive,
     summarize_bundle,
     write_bundle,
 )
@@ -89,82 +96,156 @@ def _verify_bundle(bundle_root: Path) -> SignatureMetadata:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
 
-@router.post("/{peer_name}/bundle", status_code=status.HTTP_202_ACCEPTED)
-async def upload_bundle(
-    peer_name: str,
-    request: Request,
-    bundle: UploadFile = File(..., description="Tar.gz of data/public_sync"),
-    settings: HubSettings = Depends(get_settings),
-) -> dict[str, object]:
+class BundlePlanRequest(BaseModel):
+    manifest: str
+
+
+def _resolve_push_peer(peer_name: str, request: Request, settings: HubSettings) -> tuple[HubPeer, bool]:
     peer = settings.get_peer(peer_name)
-    auto_registered = False
-    if not peer:
-        if not settings.allow_auto_register_push:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown peer")
-        token = _extract_bearer_token(request)
-        public_key = _require_public_key(request)
-        peer = HubPeer(name=peer_name, token_hash=hash_token(token), public_keys=(public_key,))
-        auto_registered = True
-    else:
-        auth = AuthContext(request, settings)
-        auth.authenticate(peer_name=peer_name)
+    if peer:
+        AuthContext(request, settings).authenticate(peer_name=peer_name)
+        return peer, False
+    if not settings.allow_auto_register_push:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown peer")
+    token = _extract_bearer_token(request)
+    public_key = _require_public_key(request)
+    return HubPeer(name=peer_name, token_hash=hash_token(token), public_keys=(public_key,)), True
 
-    with tempfile.TemporaryDirectory() as tmp:
-        tmp_path = Path(tmp)
-        bundle_root, bundle_archive = _extract_bundle(bundle, tmp_path)
-        signature_meta = _verify_bundle(bundle_root)
-        if not peer.allows_public_key(signature_meta.public_key_b64):
-            pending = queue_pending_key(
-                peer_name=peer.name,
-                presented_key=signature_meta.public_key_b64,
-                bundle_source=bundle_archive,
-                manifest_digest=signature_meta.manifest_digest,
-                signed_at=signature_meta.signed_at,
-            )
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail={
-                    "error": "peer_key_mismatch",
-                    "message": "Signature public key does not match stored keys; approval required",
-                    "peer": peer.name,
-                    "pending_id": pending.id,
-                },
-            )
-        digest = signature_meta.manifest_digest
-        signed_at = signature_meta.signed_at
-        metadata = build_metadata(peer, digest, signed_at)
-        write_bundle(settings, peer, bundle_root, metadata)
-        summary = summarize_bundle(bundle_root)
-        stored_bundle = get_bundle_path(settings, peer)
-        try:
-            ingest_bundle(
-                stored_bundle,
-                peer_name=peer.name,
-                manifest_digest=digest,
-                signed_at=signed_at,
-            )
-        except Exception as exc:  # pragma: no cover - defensive
-            logger.exception("Feed ingest failed for peer '%s'", peer.name)
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Bundle stored but feed ingest failed",
-            ) from exc
+
+def _accept_bundle(
+    settings: HubSettings,
+    peer: HubPeer,
+    bundle_root: Path,
+    bundle_archive: Path | None,
+    *,
+    auto_registered: bool,
+    known_digests: dict[str, str] | None = None,
+) -> dict[str, object]:
+    signature_meta = _verify_bundle(bundle_root)
+    if not peer.allows_public_key(signature_meta.public_key_b64):
+        if bundle_archive is None:
+            # Delta pushes hold no complete archive; pending approval replays one.
+            bundle_archive = bundle_root.parent / "assembled.tar.gz"
+            with bundle_archive.open("wb") as handle:
+                for chunk in iter_bundle_archive(bundle_root):
+                    handle.write(chunk)
+        pending = queue_pending_key(
+            peer_name=peer.name,
+            presented_key=signature_meta.public_key_b64,
+            bundle_source=bundle_archive,
+            manifest_digest=signature_meta.manifest_digest,
+            signed_at=signature_meta.signed_at,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error": "peer_key_mismatch",
+                "message": "Signature public key does not match stored keys; approval required",
+                "peer": peer.name,
+                "pending_id": pending.id,
+            },
+        )
+    digest = signature_meta.manifest_digest
+    signed_at = signature_meta.signed_at
+    metadata = build_metadata(peer, digest, signed_at)
+    summary = write_bundle(settings, peer, bundle_root, metadata, known_digests=known_digests)
+    try:
+        ingest_bundle(
+            bundle_root,
+            peer_name=peer.name,
+            manifest_digest=digest,
+            signed_at=signed_at,
+        )
+    except Exception as exc:  # pragma: no cover - defensive
+        logger.exception("Feed ingest failed for peer '%s'", peer.name)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Bundle stored but feed ingest failed",
+        ) from exc
     if auto_registered:
         if not settings.config_path:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Hub config path unavailable")
         persist_peer(settings.config_path, peer, storage_dir=settings.storage_dir, allow_push=settings.allow_auto_register_push, allow_pull=settings.allow_auto_register_pull)
         reset_settings_cache()
-        logger.info("Auto-registered peer '%s' via push", peer_name)
+        logger.info("Auto-registered peer '%s' via push", peer.name)
     return {
         "peer": peer.name,
         "manifest_digest": digest,
         "signed_at": signed_at.isoformat(),
         "stored_bytes": summary["total_bytes"],
         "stored_files": summary["file_count"],
+        "new_objects": summary["new_objects"],
         "auto_registered": auto_registered,
     }
 
 
+@router.post("/{peer_name}/bundle", status_code=status.HTTP_202_ACCEPTED)
+async def upload_bundle(
+    peer_name: str,
+    request: Request,
+    bundle: UploadFile = File(..., description="Tar.gz of data/public_sync"),
+    settings: HubSettings = Depends(get_settings),
+) -> dict[str, object]:
+    peer, auto_registered = _resolve_push_peer(peer_name, request, settings)
+    with tempfile.TemporaryDirectory() as tmp:
+        bundle_root, bundle_archive = _extract_bundle(bundle, Path(tmp))
+        return _accept_bundle(settings, peer, bundle_root, bundle_archive, auto_registered=auto_registered)
+
+
+@router.post("/{peer_name}/bundle/plan")
+async def plan_bundle_upload(
+    peer_name: str,
+    request: Request,
+    plan: BundlePlanRequest,
+    settings: HubSettings = Depends(get_settings),
+) -> dict[str, object]:
+    """First phase of a delta push: report which manifest files the hub lacks."""
+    _resolve_push_peer(peer_name, request, settings)
+    entries = parse_manifest(plan.manifest)
+    try:
+        missing = missing_objects(settings.storage_dir, entries)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    return {"peer": peer_name, "missing": missing, "known": len(entries) - len(missing)}
+
+
+@router.post("/{peer_name}/bundle/delta", status_code=status.HTTP_202_ACCEPTED)
+async def upload_bundle_delta(
+    peer_name: str,
+    request: Request,
+    bundle: UploadFile = File(..., description="Tar.gz of the manifest, signature and missing files"),
+    settings: HubSettings = Depends(get_settings),
+) -> dict[str, object]:
+    """Second phase of a delta push: rebuild the bundle from stored blobs plus the upload.
+
+    The signature is verified over the complete manifest once every listed
+    file is in place. If blobs disappeared since the plan, 409 lists them so
+    the client can fall back to a full upload.
+    """
+    peer, auto_registered = _resolve_push_peer(peer_name, request, settings)
+    # Extract next to the object store so blobs can be hard-linked instead of copied.
+    with tempfile.TemporaryDirectory(prefix=".upload-", dir=settings.storage_dir) as tmp:
+        bundle_root, _ = _extract_bundle(bundle, Path(tmp))
+        entries = parse_manifest((bundle_root / MANIFEST_FILENAME).read_text(encoding="utf-8"))
+        try:
+            linked, missing = link_objects(settings.storage_dir, bundle_root, entries)
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={"error": "missing_objects", "missing": missing},
+            )
+        return _accept_bundle(
+            settings,
+            peer,
+            bundle_root,
+            None,
+            auto_registered=auto_registered,
+            known_digests=linked,
+        )
+
+
 @router.get("/{peer_name}/bundle")
 async def download_bundle(
     peer_name: str,
@@ -189,23 +270,35 @@ async def download_bundle(
         AuthContext(request, settings).authenticate(peer_name=peer_name)
 
     bundle_root = get_bundle_path(settings, peer)
-    manifest_path = bundle_root / MANIFEST_FILENAME
-    if not manifest_path.exists():
+    digest = manifest_digest(bundle_root)
+    if digest is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No bundle available")
 
-    buffer = io.BytesIO()
-    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
-        for file_path in bundle_root.rglob("*"):
-            tar.add(file_path, arcname=file_path.relative_to(bundle_root))
-    buffer.seek(0)
+    etag = f'"{digest}"'
+    headers = {
+        "ETag": etag,
+        "X-WB-Auto-Registered": "true" if auto_registered else "false",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
     filename = f"{peer.name}_public_sync.tar.gz"
-    response = StreamingResponse(
-        buffer,
+    archive_path = cached_archive_path(settings, peer, digest)
+    if archive_path.exists():
+        return FileResponse(archive_path, media_type="application/gzip", filename=filename, headers=headers)
+    headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return StreamingResponse(
+        stream_and_cache_archive(settings, peer, bundle_root, digest),
         media_type="application/gzip",
-        headers={"Content-Disposition": f"attachment; filename={filename}"},
+        headers=headers,
     )
-    response.headers["X-WB-Auto-Registered"] = "true" if auto_registered else "false"
-    return response
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {value.strip().removeprefix("W/") for value in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
 
 
 @router.get("/{peer_name}/status")
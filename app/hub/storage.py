@@ -1,27 +1,215 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import logging
+import os
+import re
 import shutil
+import tarfile
+import tempfile
+import time
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Iterator
+
+from app.sync.manifest_state import parse_manifest
+from app.sync.signing import MANIFEST_FILENAME
 
 from .config import HubPeer, HubSettings
 
+logger = logging.getLogger("whiteballoon.hub")
+
 METADATA_FILENAME = "hub_metadata.json"
+INDEX_FILENAME = "hub_objects.json"
+# Hub-internal directories under storage_dir start with a dot so they are never
+# mistaken for peer bundles.
+ARCHIVE_DIRNAME = ".archives"
+OBJECTS_DIRNAME = ".objects"
+OBJECT_GRACE_SECONDS = 3600
+ARCHIVE_CHUNK_SIZE = 64 * 1024
+_DIGEST_PATTERN = re.compile(r"[0-9a-f]{64}")
 
 
 def _peer_storage(settings: HubSettings, peer: HubPeer) -> Path:
     return settings.storage_dir / peer.name
 
 
-def write_bundle(settings: HubSettings, peer: HubPeer, bundle_root: Path, metadata: dict[str, object]) -> None:
+def check_digest(digest: str) -> str:
+    """Return `digest` if it is a lowercase hex SHA-256; raise ValueError otherwise.
+
+    Manifest digests come from peers and become object store paths, so
+    anything else (e.g. `../secret.txt`) must never reach the filesystem.
+    """
+    if not isinstance(digest, str) or not _DIGEST_PATTERN.fullmatch(digest):
+        raise ValueError(f"Invalid object digest: {digest!r}")
+    return digest
+
+
+def object_path(storage_dir: Path, digest: str) -> Path:
+    check_digest(digest)
+    return storage_dir / OBJECTS_DIRNAME / digest[:2] / digest
+
+
+def write_bundle(
+    settings: HubSettings,
+    peer: HubPeer,
+    bundle_root: Path,
+    metadata: dict[str, object],
+    *,
+    known_digests: dict[str, str] | None = None,
+) -> dict[str, int]:
+    """Store a verified bundle for `peer` and return its summary.
+
+    Files listed in the manifest go to the shared object store under their
+    SHA-256, and only blobs the hub does not hold yet are written. The peer
+    directory keeps the manifest, signature, public keys and an index of
+    references. Digests are computed from the uploaded bytes rather than read
+    from the manifest, because blobs are shared across peers; `known_digests`
+    names files that were linked from the store and need no re-hashing.
+    """
+    known_digests = known_digests or {}
+    listed = set(parse_manifest((bundle_root / MANIFEST_FILENAME).read_text(encoding="utf-8")))
     target_dir = _peer_storage(settings, peer)
-    if target_dir.exists():
-        shutil.rmtree(target_dir)
-    shutil.copytree(bundle_root, target_dir)
-    metadata_path = target_dir / METADATA_FILENAME
-    metadata_path.write_text(json.dumps(metadata, indent=2, default=str) + "\n", encoding="utf-8")
+    staging = Path(tempfile.mkdtemp(prefix=f".{peer.name}-", dir=settings.storage_dir))
+    objects: dict[str, dict[str, object]] = {}
+    file_count = 0
+    total_bytes = 0
+    new_objects = 0
+    try:
+        for path in sorted(iter_bundle_files(bundle_root)):
+            rel = path.relative_to(bundle_root).as_posix()
+            size = path.stat().st_size
+            file_count += 1
+            total_bytes += size
+            if rel not in listed:
+                destination = staging / rel
+                destination.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(path, destination)
+                continue
+            digest = known_digests.get(rel) or _file_sha256(path)
+            if _store_object(settings.storage_dir, path, digest):
+                new_objects += 1
+            objects[rel] = {"sha256": digest, "size": size}
+        summary = {"file_count": file_count, "total_bytes": total_bytes}
+        index = {**summary, "objects": objects}
+        (staging / INDEX_FILENAME).write_text(json.dumps(index, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        (staging / METADATA_FILENAME).write_text(json.dumps(metadata, indent=2, default=str) + "\n", encoding="utf-8")
+        if target_dir.exists():
+            shutil.rmtree(target_dir)
+        staging.rename(target_dir)
+    finally:
+        if staging.exists():
+            shutil.rmtree(staging, ignore_errors=True)
+    try:
+        prune_objects(settings)
+    except OSError:
+        logger.warning("Hub object store prune failed", exc_info=True)
+    return {**summary, "new_objects": new_objects}
+
+
+def missing_objects(storage_dir: Path, entries: dict[str, str]) -> list[str]:
+    """Manifest paths whose digest has no blob in the object store.
+
+    Raises ValueError before touching the filesystem if any digest is malformed.
+    """
+    for digest in entries.values():
+        check_digest(digest)
+    return sorted(rel for rel, digest in entries.items() if not object_path(storage_dir, digest).exists())
+
+
+def link_objects(storage_dir: Path, root: Path, entries: dict[str, str]) -> tuple[dict[str, str], list[str]]:
+    """Fill manifest paths absent from `root` with blobs from the object store.
+
+    Returns the digests of the files placed and the paths no blob exists for.
+    Blobs are hard-linked where the filesystem allows it and copied otherwise.
+    Raises ValueError for an unsafe path or a malformed digest before any
+    file is placed.
+    """
+    for digest in entries.values():
+        check_digest(digest)
+    linked: dict[str, str] = {}
+    missing: list[str] = []
+    for rel, digest in sorted(entries.items()):
+        rel_path = Path(rel)
+        if rel_path.is_absolute() or ".." in rel_path.parts:
+            raise ValueError(f"Unsafe manifest path: {rel}")
+        destination = root / rel_path
+        if destination.exists():
+            continue
+        blob = object_path(storage_dir, digest)
+        if not blob.exists():
+            missing.append(rel)
+            continue
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(blob, destination)
+        except OSError:
+            shutil.copyfile(blob, destination)
+        linked[rel] = digest
+    return linked, missing
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _store_object(storage_dir: Path, source: Path, digest: str) -> bool:
+    """Copy `source` into the object store unless the blob exists; True when written."""
+    target = object_path(storage_dir, digest)
+    if target.exists():
+        # Refresh the mtime so a concurrent prune treats the blob as in use.
+        os.utime(target)
+        return False
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=target.parent, suffix=".partial")
+    os.close(fd)
+    try:
+        shutil.copyfile(source, tmp_name)
+        os.replace(tmp_name, target)
+    finally:
+        Path(tmp_name).unlink(missing_ok=True)
+    return True
+
+
+def prune_objects(settings: HubSettings, *, grace_seconds: int = OBJECT_GRACE_SECONDS) -> int:
+    """Delete blobs no peer index references; returns the number removed.
+
+    Blobs touched within `grace_seconds` are kept so a push whose index has
+    not landed yet does not lose its objects.
+    """
+    objects_root = settings.storage_dir / OBJECTS_DIRNAME
+    if not objects_root.exists():
+        return 0
+    referenced: set[str] = set()
+    for peer_dir in settings.storage_dir.iterdir():
+        if peer_dir.is_dir() and not peer_dir.name.startswith("."):
+            index = _read_index(peer_dir)
+            if index:
+                referenced.update(entry["sha256"] for entry in index["objects"].values())
+    cutoff = time.time() - grace_seconds
+    removed = 0
+    for blob in objects_root.glob("*/*"):
+        if blob.name in referenced or blob.suffix == ".partial":
+            continue
+        if blob.stat().st_mtime < cutoff:
+            blob.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+def _read_index(root: Path) -> dict[str, object] | None:
+    index_path = root / INDEX_FILENAME
+    if not index_path.exists():
+        return None
+    try:
+        return json.loads(index_path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError:
+        return None
 
 
 def read_metadata(settings: HubSettings, peer: HubPeer) -> dict[str, object] | None:
@@ -37,7 +225,7 @@ def read_metadata(settings: HubSettings, peer: HubPeer) -> dict[str, object] | N
 
 def bundle_exists(settings: HubSettings, peer: HubPeer) -> bool:
     target_dir = _peer_storage(settings, peer)
-    return (target_dir / "manifest.sync.txt").exists()
+    return (target_dir / MANIFEST_FILENAME).exists()
 
 
 def iter_bundle_files(root: Path) -> Iterable[Path]:
@@ -46,7 +234,32 @@ def iter_bundle_files(root: Path) -> Iterable[Path]:
             yield path
 
 
+def iter_stored_files(root: Path) -> Iterator[tuple[str, Path]]:
+    """Yield `(relative path, source file)` for a stored peer bundle, sorted by path.
+
+    Referenced files resolve to the object store next to the peer directory.
+    Directories written before the object store existed are walked as-is.
+    """
+    index = _read_index(root)
+    if index is None:
+        for path in sorted(iter_bundle_files(root)):
+            yield path.relative_to(root).as_posix(), path
+        return
+    entries = {rel: object_path(root.parent, entry["sha256"]) for rel, entry in index["objects"].items()}
+    for path in iter_bundle_files(root):
+        if path.name not in (INDEX_FILENAME, METADATA_FILENAME) or path.parent != root:
+            entries[path.relative_to(root).as_posix()] = path
+    for rel in sorted(entries):
+        yield rel, entries[rel]
+
+
 def summarize_bundle(root: Path) -> dict[str, object]:
+    index = _read_index(root)
+    if index is not None:
+        return {
+            "file_count": index["file_count"],
+            "total_bytes": index["total_bytes"],
+        }
     files = list(iter_bundle_files(root))
     total_bytes = sum(path.stat().st_size for path in files)
     return {
@@ -55,6 +268,86 @@ def summarize_bundle(root: Path) -> dict[str, object]:
     }
 
 
+def manifest_digest(root: Path) -> str | None:
+    """SHA-256 of the stored manifest; the same digest the bundle signature covers."""
+    manifest_path = root / MANIFEST_FILENAME
+    if not manifest_path.exists():
+        return None
+    return hashlib.sha256(manifest_path.read_bytes()).hexdigest()
+
+
+class _ChunkSink:
+    """Write-only file object that collects tar output until the caller drains it."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._size = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._size += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._size
+
+    def flush(self) -> None:
+        return None
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_bundle_archive(root: Path, *, chunk_size: int = ARCHIVE_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield a tar.gz of the bundle stored at `root` while the files are read.
+
+    Only the compressed output of the member being written is held in memory.
+    """
+    sink = _ChunkSink()
+    with tarfile.open(fileobj=sink, mode="w|gz") as tar:
+        for arcname, path in iter_stored_files(root):
+            tar.add(path, arcname=arcname, recursive=False)
+            data = sink.drain()
+            for start in range(0, len(data), chunk_size):
+                yield data[start : start + chunk_size]
+    tail = sink.drain()
+    if tail:
+        yield tail
+
+
+def cached_archive_path(settings: HubSettings, peer: HubPeer, digest: str) -> Path:
+    return settings.storage_dir / ARCHIVE_DIRNAME / peer.name / f"{digest}.tar.gz"
+
+
+def stream_and_cache_archive(settings: HubSettings, peer: HubPeer, root: Path, digest: str) -> Iterator[bytes]:
+    """Stream the bundle archive and keep a copy under the digest for later pulls.
+
+    The copy is renamed into place only once the stream completes, so an
+    interrupted download never leaves a truncated archive behind. Archives of
+    the peer's older digests are removed at that point.
+    """
+    target = cached_archive_path(settings, peer, digest)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=target.parent, suffix=".partial")
+    tmp_path = Path(tmp_name)
+    completed = False
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            for chunk in iter_bundle_archive(root):
+                handle.write(chunk)
+                yield chunk
+        os.replace(tmp_path, target)
+        completed = True
+    finally:
+        if not completed:
+            tmp_path.unlink(missing_ok=True)
+    for stale in target.parent.glob("*.tar.gz"):
+        if stale != target:
+            stale.unlink(missing_ok=True)
+
+
 def build_metadata(peer: HubPeer, manifest_digest: str, signed_at: datetime) -> dict[str, object]:
     return {
         "peer": peer.name,
@@ -70,10 +363,23 @@ def get_bundle_path(settings: HubSettings, peer: HubPeer) -> Path:
 
 __all__ = [
     "write_bundle",
+    "prune_objects",
+    "check_digest",
+    "missing_objects",
+    "link_objects",
+    "object_path",
+    "iter_stored_files",
+    "iter_bundle_archive",
+    "stream_and_cache_archive",
+    "cached_archive_path",
+    "manifest_digest",
     "read_metadata",
     "bundle_exists",
     "get_bundle_path",
     "summarize_bundle",
     "build_metadata",
     "METADATA_FILENAME",
+    "ARCHIVE_DIRNAME",
+    "INDEX_FILENAME",
+    "OBJECTS_DIRNAME",
 ]
@@ -1,6 +1,9 @@
+import logging
+
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 
+from app.db import get_engine
 from app.modules import register_modules
 from app.routes import (
     admin_jobs_api,
@@ -12,7 +15,10 @@ from app.routes import (
     rss,
     ui,
 )
-from app.scheduler import install_recurring_scheduler
+from app.scheduler import install_invite_map_warmer, install_recurring_scheduler, install_session_activity_flusher
+from app.services import request_search_index
+
+logger = logging.getLogger(__name__)
 
 
 def create_app() -> FastAPI:
@@ -34,6 +40,15 @@ def create_app() -> FastAPI:
     app.include_router(chat_ai_api.router)
     register_modules(app)
     install_recurring_scheduler(app)
+    install_invite_map_warmer(app)
+    install_session_activity_flusher(app)
+
+    @app.on_event("startup")
+    async def _ensure_search_index() -> None:  # pragma: no cover - lifecycle hook
+        try:
+            request_search_index.ensure_index(get_engine())
+        except Exception:
+            logger.warning("Request full-text index setup failed; search falls back to LIKE", exc_info=True)
 
     return app
 
@@ -6,12 +6,17 @@ from typing import Optional
 from uuid import uuid4
 import secrets
 
-from sqlalchemy import Column, Enum as SAEnum, String, Text, UniqueConstraint
+from sqlalchemy import Column, Enum as SAEnum, Index, String, Text, UniqueConstraint, text
 from sqlmodel import Field, SQLModel
 
 
 class User(SQLModel, table=True):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_created_at_id", "created_at", "id"),
+        # Normalized form for prefix searches in the member directory.
+        Index("ix_users_username_lower", text("lower(username)")),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     username: str = Field(sa_column=Column(String, unique=True, index=True))
@@ -37,6 +42,7 @@ class UserSession(SQLModel, table=True):
 
 class HelpRequest(SQLModel, table=True):
     __tablename__ = "help_requests"
+    __table_args__ = (Index("ix_help_requests_created_at_id", "created_at", "id"),)
 
     id: Optional[int] = Field(default=None, primary_key=True)
     title: Optional[str] = Field(default=None, max_length=200)
@@ -100,6 +106,7 @@ class RecurringRequestRun(SQLModel, table=True):
 
 class RequestComment(SQLModel, table=True):
     __tablename__ = "request_comments"
+    __table_args__ = (Index("ix_request_comments_created_at_id", "created_at", "id"),)
 
     id: Optional[int] = Field(default=None, primary_key=True)
     help_request_id: int = Field(foreign_key="help_requests.id", nullable=False, index=True)
@@ -201,7 +208,10 @@ class RssFeedToken(SQLModel, table=True):
 
 class UserAttribute(SQLModel, table=True):
     __tablename__ = "user_attributes"
-    __table_args__ = (UniqueConstraint("user_id", "key", name="ux_user_attributes_user_key"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="ux_user_attributes_user_key"),
+        Index("ix_user_attributes_key_user_id", "key", "user_id"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="users.id", nullable=False, index=True)
@@ -223,6 +233,14 @@ class InviteMapCache(SQLModel, table=True):
     generated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
 
 
+class InviteGraphState(SQLModel, table=True):
+    __tablename__ = "invite_graph_state"
+
+    id: int = Field(default=1, primary_key=True)
+    generation: int = Field(default=0, nullable=False)
+    updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
+
 
 class AuthRequestStatus(str, Enum):
     pending = "pending"
@@ -4,7 +4,6 @@ from datetime import datetime
 from typing import Iterable, List, Sequence
 
 from fastapi import HTTPException, status
-from sqlalchemy import func
 from sqlmodel import Session, select
 
 from app.models import (
@@ -15,7 +14,7 @@ from app.models import (
     RequestAttribute,
     User,
 )
-from app.services import request_pin_service
+from app.services import request_pin_service, request_search_index
 
 
 def list_requests(
@@ -46,13 +45,9 @@ def list_requests(
         if normalized_ids:
             statement = statement.where(HelpRequest.created_by_user_id.in_(normalized_ids))
     if search:
-        query = search.strip()
-        if query:
-            pattern = f"%{query.lower()}%"
-            statement = statement.where(
-                func.lower(HelpRequest.description).like(pattern)
-                | func.lower(HelpRequest.title).like(pattern)
-            )
+        text_condition = request_search_index.request_text_condition(session, search)
+        if text_condition is not None:
+            statement = statement.where(text_condition)
 
     statement = statement.order_by(HelpRequest.created_at.desc())
     if limit is not None:
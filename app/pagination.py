@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from typing import Any, Optional
+
+from starlette.datastructures import URL
+
+# Query parameters that position a cursor-paged view.
+PAGING_PARAMS = ("after", "before", "page")
+
+
+def encode_cursor(payload: dict[str, Any]) -> str:
+    """Opaque, URL-safe token for a keyset position."""
+    raw = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: Optional[str]) -> Optional[dict[str, Any]]:
+    """Payload of a token from `encode_cursor`; None for a missing or malformed token."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw.decode("utf-8"))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+def cursor_page_links(
+    url: URL,
+    *,
+    page: int,
+    has_prev: bool,
+    has_next: bool,
+    prev_cursor: Optional[str],
+    next_cursor: Optional[str],
+) -> dict[str, Any]:
+    """Previous/next links for a cursor-paged view of `url`, keeping its other query parameters.
+
+    Going back to the first page drops the cursor so that page is always the newest rows.
+    """
+    base_url = url.remove_query_params(PAGING_PARAMS)
+    prev_url: Optional[str] = None
+    if has_prev:
+        if page <= 2 or prev_cursor is None:
+            prev_url = str(base_url)
+        else:
+            prev_url = str(base_url.include_query_params(before=prev_cursor, page=page - 1))
+    next_url: Optional[str] = None
+    if has_next and next_cursor is not None:
+        next_url = str(base_url.include_query_params(after=next_cursor, page=page + 1))
+    return {
+        "has_prev": has_prev,
+        "has_next": next_url is not None,
+        "prev_url": prev_url,
+        "next_url": next_url,
+    }
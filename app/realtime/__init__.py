@@ -1,5 +1,6 @@
 """Realtime helpers."""
 
+from .events import JobEvent, get_event_bus, replay_since
 from .jobs import (
     JobEnvelope,
     enqueue_job,
@@ -13,10 +14,13 @@ from .jobs import (
 
 __all__ = [
     "JobEnvelope",
+    "JobEvent",
     "enqueue_job",
+    "get_event_bus",
     "get_job",
     "list_jobs",
     "load_job_history",
+    "replay_since",
     "reset",
     "serialize_job",
     "update_job",
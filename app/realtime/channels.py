@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from itertools import count
+from threading import Lock
+from typing import Any, Deque, Dict, Iterable, List, Optional, Protocol
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIPTION_BACKLOG = 256
+REPLAY_BUFFER_SIZE = 1024
+
+EVENT_COMMENT = "comment"
+EVENT_COMMENT_DELETED = "comment-deleted"
+EVENT_PRESENCE = "presence"
+# Sent instead of events a subscriber can no longer be given; clients reload the panel.
+EVENT_RESYNC = "resync"
+
+
+@dataclass(frozen=True)
+class ChannelEvent:
+    id: str
+    request_id: int
+    kind: str
+    data: Dict[str, Any] = field(default_factory=dict)
+
+
+class ChannelBroker(Protocol):
+    """Fan-out seam for request channel events.
+
+    `InProcessChannelHub` serves a single worker. A multi-worker deployment can
+    install a broker-backed implementation with `set_channel_hub`; routes and
+    services only use this interface.
+    """
+
+    def publish(self, request_id: int, kind: str, data: Dict[str, Any]) -> None: ...
+
+    def subscribe(self, request_ids: Iterable[int], *, last_event_id: Optional[str] = None) -> "ChannelSubscription": ...
+
+    def unsubscribe(self, subscription: "ChannelSubscription") -> None: ...
+
+    def has_subscribers(self, request_id: int) -> bool:
+        """Whether anyone may receive events for `request_id`; True when unknown."""
+        ...
+
+
+class ChannelSubscription:
+    """Bounded per-connection mailbox for channel events.
+
+    Comment events are queued in order. Presence events replace the pending
+    presence of the same request. A subscriber that falls more than `backlog`
+    events behind gets one `resync` event instead of the backlog.
+    """
+
+    def __init__(self, hub: ChannelBroker, request_ids: Iterable[int], *, backlog: int = SUBSCRIPTION_BACKLOG) -> None:
+        self._hub = hub
+        self.request_ids = frozenset(int(request_id) for request_id in request_ids)
+        self._backlog = backlog
+        self._loop = asyncio.get_running_loop()
+        self._queue: Deque[ChannelEvent] = deque()
+        self._ready = asyncio.Event()
+
+    def wants(self, request_id: int) -> bool:
+        return request_id in self.request_ids
+
+    def offer(self, event: ChannelEvent) -> None:
+        """Thread-safe: hand `event` to this subscriber's loop."""
+        self._loop.call_soon_threadsafe(self.deliver, event)
+
+    def deliver(self, event: ChannelEvent) -> None:
+        if event.kind == EVENT_PRESENCE:
+            stale = [queued for queued in self._queue if queued.kind == EVENT_PRESENCE and queued.request_id == event.request_id]
+            for queued in stale:
+                self._queue.remove(queued)
+        self._queue.append(event)
+        if len(self._queue) > self._backlog:
+            self._queue.clear()
+            self._queue.append(ChannelEvent(id=event.id, request_id=event.request_id, kind=EVENT_RESYNC))
+        self._ready.set()
+
+    async def next_batch(self, timeout: float) -> List[ChannelEvent]:
+        if not self._queue:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        self._ready.clear()
+        events = list(self._queue)
+        self._queue.clear()
+        return events
+
+    def close(self) -> None:
+        self._hub.unsubscribe(self)
+
+
+class InProcessChannelHub:
+    """Fan-out to the subscribers of this process, with a short replay buffer.
+
+    Event ids are `<hub epoch>-<sequence>`. A `Last-Event-ID` from another
+    process, or one older than the buffer, resolves to a single `resync`.
+    """
+
+    def __init__(self, *, replay_size: int = REPLAY_BUFFER_SIZE) -> None:
+        self._lock = Lock()
+        self._epoch = uuid.uuid4().hex[:8]
+        self._sequence = count(1)
+        self._subscribers: List[ChannelSubscription] = []
+        self._recent: Deque[tuple[int, ChannelEvent]] = deque(maxlen=replay_size)
+
+    def publish(self, request_id: int, kind: str, data: Dict[str, Any]) -> None:
+        with self._lock:
+            sequence = next(self._sequence)
+            event = ChannelEvent(id=f"{self._epoch}-{sequence}", request_id=int(request_id), kind=kind, data=data)
+            self._recent.append((sequence, event))
+            subscribers = [subscription for subscription in self._subscribers if subscription.wants(event.request_id)]
+        for subscription in subscribers:
+            try:
+                subscription.offer(event)
+            except RuntimeError:
+                self.unsubscribe(subscription)
+
+    def subscribe(self, request_ids: Iterable[int], *, last_event_id: Optional[str] = None) -> ChannelSubscription:
+        subscription = ChannelSubscription(self, request_ids)
+        with self._lock:
+            self._subscribers.append(subscription)
+            missed = self._replay_locked(subscription, last_event_id) if last_event_id else []
+        for event in missed:
+            subscription.deliver(event)
+        return subscription
+
+    def unsubscribe(self, subscription: ChannelSubscription) -> None:
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def has_subscribers(self, request_id: int) -> bool:
+        with self._lock:
+            return any(subscription.wants(request_id) for subscription in self._subscribers)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def _replay_locked(self, subscription: ChannelSubscription, last_event_id: str) -> List[ChannelEvent]:
+        epoch, _, raw_sequence = last_event_id.partition("-")
+        oldest = self._recent[0][0] if self._recent else None
+        try:
+            after = int(raw_sequence)
+        except ValueError:
+            after = -1
+        if epoch != self._epoch or after < 0 or (oldest is not None and after < oldest - 1):
+            request_id = min(subscription.request_ids) if subscription.request_ids else 0
+            return [ChannelEvent(id=f"{self._epoch}-0", request_id=request_id, kind=EVENT_RESYNC)]
+        return [event for sequence, event in self._recent if sequence > after and subscription.wants(event.request_id)]
+
+
+_HUB: ChannelBroker = InProcessChannelHub()
+
+
+def get_channel_hub() -> ChannelBroker:
+    return _HUB
+
+
+def set_channel_hub(hub: ChannelBroker) -> None:
+    global _HUB
+    _HUB = hub
+
+
+def publish_channel_event(request_id: int, kind: str, data: Optional[Dict[str, Any]] = None) -> None:
+    try:
+        _HUB.publish(request_id, kind, data or {})
+    except Exception:  # pragma: no cover - fan-out must never break the write path
+        logger.warning("Failed to publish channel event for request %s", request_id, exc_info=True)
+
+
+__all__ = [
+    "ChannelBroker",
+    "ChannelEvent",
+    "ChannelSubscription",
+    "EVENT_COMMENT",
+    "EVENT_COMMENT_DELETED",
+    "EVENT_PRESENCE",
+    "EVENT_RESYNC",
+    "InProcessChannelHub",
+    "get_channel_hub",
+    "publish_channel_event",
+    "set_channel_hub",
+]
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional
+
+from . import storage
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class JobEvent:
+    """One published job snapshot, serialized once for every subscriber."""
+
+    id: int
+    job_id: str
+    payload: str
+
+
+def event_id_for(snapshot: Dict[str, Any]) -> int:
+    """Microseconds since the epoch of the snapshot's `updated_at`.
+
+    Derived from the snapshot rather than a counter so `Last-Event-ID` stays
+    meaningful across restarts and can be resolved against the job log.
+    """
+    value = snapshot.get("updated_at")
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            value = None
+    if not isinstance(value, datetime):
+        return 0
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1_000_000)
+
+
+def build_event(snapshot: Dict[str, Any]) -> JobEvent:
+    return JobEvent(
+        id=event_id_for(snapshot),
+        job_id=str(snapshot.get("id") or ""),
+        payload=json.dumps(snapshot, ensure_ascii=False),
+    )
+
+
+class JobSubscription:
+    """Per-connection mailbox holding at most one pending event per job.
+
+    A slow client never builds a backlog: a newer snapshot of a job replaces
+    the one it has not read yet. Must be created on the event loop that reads it.
+    """
+
+    def __init__(self, bus: "JobEventBus", job_ids: Optional[Iterable[str]] = None) -> None:
+        self._bus = bus
+        self._scope = set(job_ids) if job_ids is not None else None
+        self._loop = asyncio.get_running_loop()
+        self._pending: Dict[str, JobEvent] = {}
+        self._ready = asyncio.Event()
+
+    def wants(self, job_id: str) -> bool:
+        return self._scope is None or job_id in self._scope
+
+    def offer(self, event: JobEvent) -> None:
+        """Thread-safe: hand `event` to this subscriber's loop."""
+        self._loop.call_soon_threadsafe(self._deliver, event)
+
+    def _deliver(self, event: JobEvent) -> None:
+        self._pending.pop(event.job_id, None)
+        self._pending[event.job_id] = event
+        self._ready.set()
+
+    async def next_batch(self, timeout: float) -> List[JobEvent]:
+        """Wait up to `timeout` seconds and return the pending events in order."""
+        if not self._pending:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        self._ready.clear()
+        events = list(self._pending.values())
+        self._pending.clear()
+        return events
+
+    def close(self) -> None:
+        self._bus.unsubscribe(self)
+
+
+class JobEventBus:
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._subscribers: List[JobSubscription] = []
+
+    def subscribe(self, job_ids: Optional[Iterable[str]] = None) -> JobSubscription:
+        subscription = JobSubscription(self, job_ids)
+        with self._lock:
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: JobSubscription) -> None:
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, snapshot: Dict[str, Any]) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        if not subscribers:
+            return
+        event = build_event(snapshot)
+        for subscription in subscribers:
+            if not subscription.wants(event.job_id):
+                continue
+            try:
+                subscription.offer(event)
+            except RuntimeError:
+                # The subscriber's loop has shut down; forget it.
+                self.unsubscribe(subscription)
+
+
+def replay_since(last_event_id: int, job_ids: Optional[Iterable[str]] = None) -> List[JobEvent]:
+    """Latest logged snapshot of every job that changed after `last_event_id`."""
+    scope = set(job_ids) if job_ids is not None else None
+    latest: Dict[str, JobEvent] = {}
+    for snapshot in storage.load_history():
+        event = build_event(snapshot)
+        if event.id <= last_event_id or (scope is not None and event.job_id not in scope):
+            continue
+        latest.pop(event.job_id, None)
+        latest[event.job_id] = event
+    return list(latest.values())
+
+
+_BUS = JobEventBus()
+
+
+def get_event_bus() -> JobEventBus:
+    return _BUS
+
+
+def publish_job_event(snapshot: Dict[str, Any]) -> None:
+    try:
+        _BUS.publish(snapshot)
+    except Exception:  # pragma: no cover - publishing must never break job updates
+        logger.warning("Failed to publish realtime job event", exc_info=True)
+
+
+__all__ = [
+    "JobEvent",
+    "JobEventBus",
+    "JobSubscription",
+    "build_event",
+    "event_id_for",
+    "get_event_bus",
+    "publish_job_event",
+    "replay_since",
+]
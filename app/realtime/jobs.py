@@ -7,6 +7,7 @@ from typing import Any, Dict, Iterable, List, Optional
 from uuid import uuid4
 
 from . import storage
+from .events import publish_job_event
 
 JobState = str
 _TERMINAL_STATES = {"success", "error", "warning"}
@@ -91,6 +92,8 @@ def update_job(job_id: str, **fields: Any) -> JobEnvelope:
         if not job:
             raise KeyError(f"Unknown job id '{job_id}'")
         state = fields.get("state")
+        # Ticks that keep the state are coalesced by the log; transitions are written at once.
+        coalesce = not state or state == job.state
         structured = fields.pop("structured_data", None)
         target = fields.pop("target", None)
         for key, value in fields.items():
@@ -108,7 +111,7 @@ def update_job(job_id: str, **fields: Any) -> JobEnvelope:
                 job.finished_at = now
         job.updated_at = now
         snapshot = JobEnvelope(**job.to_dict())
-    _persist_job(snapshot)
+    _persist_job(snapshot, coalesce=coalesce)
     return job
 
 
@@ -145,12 +148,14 @@ def load_job_history(limit: Optional[int] = None) -> List[dict[str, Any]]:
     return storage.load_history(limit)
 
 
-def _persist_job(job: JobEnvelope) -> None:
+def _persist_job(job: JobEnvelope, *, coalesce: bool = False) -> None:
+    snapshot = serialize_job(job)
     try:
-        storage.persist_snapshot(serialize_job(job))
+        storage.persist_snapshot(snapshot, coalesce=coalesce)
     except OSError:
         # Persistence failures should not stop realtime updates.
         pass
+    publish_job_event(snapshot)
 
 
 def _parse_datetime(value: Any) -> Optional[datetime]:
@@ -1,39 +1,213 @@
 from __future__ import annotations
 
+import atexit
 import json
+import logging
+import shutil
+from collections import deque
 from pathlib import Path
-from typing import Any, List, Optional
+from threading import Lock, Timer
+from typing import Any, Deque, Dict, List, Optional
 
+logger = logging.getLogger(__name__)
+
+LOG_DIR = Path("data/realtime_jobs")
+# Single-file log written before segmentation; adopted as the first segment.
 LOG_PATH = Path("data/realtime_jobs.jsonl")
 _MAX_RECORDS = 500
+_SEGMENT_RECORDS = 250
+_FLUSH_INTERVAL_SECONDS = 0.5
+_SEGMENT_GLOB = "segment-*.jsonl"
 
 
-def persist_snapshot(snapshot: dict[str, Any]) -> None:
-    LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
-    lines: List[str] = []
-    if LOG_PATH.exists():
-        lines = LOG_PATH.read_text(encoding="utf-8").splitlines()
-    lines.append(json.dumps(snapshot, ensure_ascii=False))
-    if len(lines) > _MAX_RECORDS:
-        lines = lines[-_MAX_RECORDS:]
-    LOG_PATH.write_text("\n".join(lines) + "\n", encoding="utf-8")
+class SegmentedJobLog:
+    """Append-only job snapshot log split into fixed-size JSONL segments.
 
+    Each write appends to the newest segment. Once a segment is full a new one
+    is started and segments that fall entirely outside the last `max_records`
+    are deleted, so compaction never rewrites live data. A torn final line
+    after a crash is skipped on load. Recent records are kept in memory, so
+    `load_history` does not touch the disk after the first call.
 
-def load_history(limit: Optional[int] = None) -> List[dict[str, Any]]:
-    if not LOG_PATH.exists():
-        return []
-    lines = LOG_PATH.read_text(encoding="utf-8").splitlines()
-    if limit:
-        lines = lines[-limit:]
-    snapshots: List[dict[str, Any]] = []
-    for line in lines:
+    Progress ticks (`coalesce=True`) are buffered per job and only the latest
+    snapshot of each job is written when the buffer is flushed. Any
+    uncoalesced write flushes the buffer first so ordering is preserved.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        legacy_path: Path | None = None,
+        max_records: int = _MAX_RECORDS,
+        segment_records: int = _SEGMENT_RECORDS,
+        flush_interval: float = _FLUSH_INTERVAL_SECONDS,
+    ) -> None:
+        self.directory = directory
+        self.legacy_path = legacy_path
+        self.max_records = max_records
+        self.segment_records = segment_records
+        self.flush_interval = flush_interval
+        self._lock = Lock()
+        self._tail: Deque[dict[str, Any]] | None = None
+        self._pending: Dict[str, dict[str, Any]] = {}
+        self._active_index = 1
+        self._active_count = 0
+        self._timer: Timer | None = None
+
+    def append(self, snapshot: dict[str, Any], *, coalesce: bool = False) -> None:
+        with self._lock:
+            self._load_locked()
+            if coalesce and snapshot.get("id"):
+                self._pending[str(snapshot["id"])] = snapshot
+                self._schedule_flush_locked()
+                return
+            records = self._drain_pending_locked()
+            records.append(snapshot)
+            self._write_locked(records)
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._pending:
+                self._write_locked(self._drain_pending_locked())
+
+    def history(self, limit: Optional[int] = None) -> List[dict[str, Any]]:
+        with self._lock:
+            self._load_locked()
+            records = list(self._tail or ()) + list(self._pending.values())
+        if limit:
+            records = records[-limit:]
+        return records
+
+    def reset(self) -> None:
+        with self._lock:
+            self._cancel_timer_locked()
+            self._pending.clear()
+            self._tail = deque(maxlen=self.max_records)
+            self._active_index = 1
+            self._active_count = 0
+            if self.directory.exists():
+                shutil.rmtree(self.directory)
+            if self.legacy_path and self.legacy_path.exists():
+                self.legacy_path.unlink()
+
+    def _segments(self) -> List[Path]:
+        return sorted(self.directory.glob(_SEGMENT_GLOB))
+
+    def _segment_path(self, index: int) -> Path:
+        return self.directory / f"segment-{index:08d}.jsonl"
+
+    def _load_locked(self) -> None:
+        if self._tail is not None:
+            return
+        self._tail = deque(maxlen=self.max_records)
+        if self.legacy_path and self.legacy_path.exists() and not self.directory.exists():
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self.legacy_path.replace(self._segment_path(1))
+        segments = self._segments()
+        if not segments:
+            return
+        for path in segments:
+            text = path.read_text(encoding="utf-8")
+            lines = text.splitlines()
+            for line in lines:
+                try:
+                    self._tail.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        self._active_index = int(segments[-1].stem.split("-", 1)[1])
+        self._active_count = len(lines)
+        if text and not text.endswith("\n"):
+            # Never append after a torn line; start the next segment instead.
+            self._active_count = self.segment_records
+
+    def _drain_pending_locked(self) -> List[dict[str, Any]]:
+        self._cancel_timer_locked()
+        records = list(self._pending.values())
+        self._pending.clear()
+        return records
+
+    def _write_locked(self, records: List[dict[str, Any]]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        while records:
+            if self._active_count >= self.segment_records:
+                self._active_index += 1
+                self._active_count = 0
+                self._compact_locked()
+            room = self.segment_records - self._active_count
+            batch, records = records[:room], records[room:]
+            payload = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in batch)
+            with self._segment_path(self._active_index).open("a", encoding="utf-8") as handle:
+                handle.write(payload)
+            self._active_count += len(batch)
+            self._tail.extend(batch)
+
+    def _compact_locked(self) -> None:
+        """Drop whole segments that only hold records beyond `max_records`.
+
+        Runs just before a new segment is started, so the full segments kept
+        here are all that backs the in-memory tail.
+        """
+        keep = -(-self.max_records // self.segment_records)
+        for path in self._segments()[:-keep]:
+            path.unlink(missing_ok=True)
+
+    def _schedule_flush_locked(self) -> None:
+        if self._timer is not None:
+            return
+        self._timer = Timer(self.flush_interval, self._flush_from_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_from_timer(self) -> None:
+        with self._lock:
+            self._timer = None
+            if not self._pending:
+                return
+            records = list(self._pending.values())
+            self._pending.clear()
+            try:
+                self._write_locked(records)
+            except OSError:
+                logger.warning("Failed to flush realtime job progress", exc_info=True)
+
+    def _cancel_timer_locked(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+
+_LOGS: Dict[Path, SegmentedJobLog] = {}
+_LOGS_LOCK = Lock()
+
+
+def _log() -> SegmentedJobLog:
+    with _LOGS_LOCK:
+        log = _LOGS.get(LOG_DIR)
+        if log is None:
+            log = SegmentedJobLog(LOG_DIR, legacy_path=LOG_PATH)
+            _LOGS[LOG_DIR] = log
+        return log
+
+
+def persist_snapshot(snapshot: dict[str, Any], *, coalesce: bool = False) -> None:
+    _log().append(snapshot, coalesce=coalesce)
+
+
+def flush_pending() -> None:
+    for log in list(_LOGS.values()):
         try:
-            snapshots.append(json.loads(line))
-        except json.JSONDecodeError:
-            continue
-    return snapshots
+            log.flush()
+        except OSError:
+            logger.warning("Failed to flush realtime job log", exc_info=True)
+
+
+def load_history(limit: Optional[int] = None) -> List[dict[str, Any]]:
+    return _log().history(limit)
 
 
 def reset_history() -> None:
-    if LOG_PATH.exists():
-        LOG_PATH.unlink()
+    _log().reset()
+
+
+atexit.register(flush_pending)
@@ -1,21 +1,20 @@
 from __future__ import annotations
 
-import asyncio
-import json
-import time
-from datetime import datetime
-from typing import Iterable, List, Optional
+from typing import Iterable, Iterator, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
 from fastapi.responses import StreamingResponse
 
 from app.dependencies import SessionUser, require_session_user
+from app.realtime import JobEvent, get_event_bus, replay_since
 from app.realtime import get_job as realtime_get_job
 from app.realtime import list_jobs as realtime_list_jobs
 from app.realtime import load_job_history as realtime_load_history
 from app.realtime import serialize_job as realtime_serialize_job
+from app.realtime.events import build_event
 
 router = APIRouter(prefix="/api/admin/jobs", tags=["admin-jobs"])
+HEARTBEAT_SECONDS = 15.0
 
 
 def _ensure_admin(session_user: SessionUser) -> None:
@@ -33,43 +32,62 @@ def list_recent_jobs(
     return {"jobs": snapshots}
 
 
-@router.get("/{job_id}")
-def fetch_job(job_id: str, session_user: SessionUser = Depends(require_session_user)) -> dict:
-    _ensure_admin(session_user)
-    job = realtime_get_job(job_id)
-    if not job:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
-    return realtime_serialize_job(job)
-
-
+# Declared before "/{job_id}" so the path is not captured as a job id.
 @router.get("/events")
 async def stream_job_updates(
     request: Request,
     job_id: Optional[List[str]] = Query(default=None),
+    last_event_id: Optional[str] = Header(default=None, alias="Last-Event-ID"),
     session_user: SessionUser = Depends(require_session_user),
 ) -> StreamingResponse:
     _ensure_admin(session_user)
     job_scope: Optional[Iterable[str]] = job_id if job_id else None
+    resume_from = _parse_event_id(last_event_id)
 
     async def event_source():
-        last_sent: dict[str, datetime] = {}
-        heartbeat_deadline = time.monotonic()
-        heartbeat_interval = 15.0
-        while True:
-            if await request.is_disconnected():
-                break
-            jobs = realtime_list_jobs(job_scope)
-            for job in jobs:
-                updated = job.updated_at
-                previous = last_sent.get(job.id)
-                if not previous or updated > previous:
-                    last_sent[job.id] = updated
-                    payload = json.dumps(realtime_serialize_job(job))
-                    yield f"event: job-update\ndata: {payload}\n\n"
-            now = time.monotonic()
-            if now - heartbeat_deadline >= heartbeat_interval:
-                heartbeat_deadline = now
-                yield "event: heartbeat\ndata: {}\n\n"
-            await asyncio.sleep(1)
+        subscription = get_event_bus().subscribe(job_scope)
+        last_sent: dict[str, int] = {}
+
+        def render(events: Iterable[JobEvent]) -> Iterator[str]:
+            for event in events:
+                if event.id <= last_sent.get(event.job_id, -1):
+                    continue
+                last_sent[event.job_id] = event.id
+                yield f"id: {event.id}\nevent: job-update\ndata: {event.payload}\n\n"
+
+        try:
+            if resume_from is not None:
+                initial = replay_since(resume_from, job_scope)
+            else:
+                initial = [build_event(realtime_serialize_job(job)) for job in realtime_list_jobs(job_scope)]
+            for chunk in render(initial):
+                yield chunk
+            while not await request.is_disconnected():
+                events = await subscription.next_batch(HEARTBEAT_SECONDS)
+                if not events:
+                    yield "event: heartbeat\ndata: {}\n\n"
+                    continue
+                for chunk in render(events):
+                    yield chunk
+        finally:
+            subscription.close()
 
     return StreamingResponse(event_source(), media_type="text/event-stream")
+
+
+def _parse_event_id(value: Optional[str]) -> Optional[int]:
+    if not value:
+        return None
+    try:
+        return int(value.strip())
+    except ValueError:
+        return None
+
+
+@router.get("/{job_id}")
+def fetch_job(job_id: str, session_user: SessionUser = Depends(require_session_user)) -> dict:
+    _ensure_admin(session_user)
+    job = realtime_get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return realtime_serialize_job(job)
@@ -16,6 +16,7 @@ from fastapi import (
     Depends,
     File,
     Form,
+    Header,
     HTTPException,
     Query,
     Request,
@@ -23,7 +24,7 @@ from fastapi import (
     UploadFile,
     status,
 )
-from fastapi.responses import JSONResponse, RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy import and_, desc, func, literal, or_, union_all
 from sqlmodel import Session, select
@@ -59,6 +60,7 @@ from app.services import (
     chat_reaction_parser,
     comment_llm_insights_service,
     comment_request_promotion_service,
+    identity_cache_service,
     recurring_template_service,
     request_chat_search_service,
     request_chat_suggestions,
@@ -76,6 +78,12 @@ from app.services import (
     rss_feed_catalog,
 )
 from app import config
+from app.realtime.channels import (
+    EVENT_COMMENT,
+    EVENT_COMMENT_DELETED,
+    get_channel_hub,
+    publish_channel_event,
+)
 from app.url_utils import build_invite_link, generate_qr_code_data_url, get_base_url
 from .helpers import describe_session_role, templates
 
@@ -993,6 +1001,87 @@ def get_request_channel_presence(
     return JSONResponse({"presence": presence})
 
 
+CHANNEL_STREAM_HEARTBEAT_SECONDS = 15.0
+CHANNEL_STREAM_MAX_IDS = 200
+
+
+@router.get("/requests/channels/stream")
+async def stream_request_channels(
+    request: Request,
+    id: list[int] = Query([], alias="id"),
+    last_event_id: Optional[str] = Header(default=None, alias="Last-Event-ID"),
+    session_user: SessionUser = Depends(require_session_user),
+) -> Response:
+    """Server-sent comment, deletion and presence events for the given requests."""
+    settings = config.get_settings()
+    if not settings.request_channels_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Request channels disabled")
+    request_ids = list(dict.fromkeys(id))[:CHANNEL_STREAM_MAX_IDS]
+    can_promote = session_user.session.is_fully_authenticated
+
+    async def event_source():
+        subscription = get_channel_hub().subscribe(request_ids, last_event_id=last_event_id)
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                events = await subscription.next_batch(CHANNEL_STREAM_HEARTBEAT_SECONDS)
+                if not events:
+                    yield "event: heartbeat\ndata: {}\n\n"
+                    continue
+                for event in events:
+                    data = dict(event.data)
+                    if event.kind == EVENT_COMMENT:
+                        # Variants are rendered once at publish time; send the viewer's. A
+                        # replayed event may lack it, and the client then reloads the panel.
+                        readonly_html = data.pop("html_readonly", None)
+                        if not can_promote:
+                            data["html"] = readonly_html
+                    payload = json.dumps({"request_id": event.request_id, **data})
+                    yield f"id: {event.id}\nevent: {event.kind}\ndata: {payload}\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _publish_channel_comment(
+    request: Request,
+    db: Session,
+    help_request: HelpRequest,
+    comment: RequestComment,
+    author: User,
+) -> Optional[str]:
+    """Fan a new comment out to the request channel; returns the author's message fragment.
+
+    Returns None when channels are disabled. The read-only variant is only
+    rendered while someone is subscribed to the request.
+    """
+    if not config.get_settings().request_channels_enabled:
+        return None
+    display_names = _load_signal_display_names_for_user_ids(db, {author.id}, _signal_display_attr_key(help_request))
+    comment_payload = request_comment_service.serialize_comment(comment, author)
+    template = templates.get_template("requests/partials/channel_message.html")
+
+    def render(can_promote: bool) -> str:
+        chat = {
+            "comment_display_names": display_names,
+            "comment_promotions": {},
+            "can_promote_comments": can_promote,
+        }
+        return template.render({"request": request, "comment": comment_payload, "chat": chat})
+
+    html = render(True)
+    data = {"comment_id": comment.id, "html": html}
+    if get_channel_hub().has_subscribers(help_request.id):
+        data["html_readonly"] = render(False)
+    publish_channel_event(help_request.id, EVENT_COMMENT, data)
+    return html
+
+
 @router.post("/requests/{request_id}/complete")
 def complete_request(
     request_id: int,
@@ -1093,9 +1182,11 @@ def request_chat_search(
     participant_id: list[int] | None = Query(None, alias="participant"),
     topic: list[str] | None = Query(None),
     limit: int = Query(request_chat_search_service.DEFAULT_RESULT_LIMIT, ge=1, le=100),
+    match: str = Query("any"),
 ) -> Response:
     help_request = request_services.get_request_by_id(db, request_id=request_id)
     query = (q or "").strip()
+    match_mode = match if match in request_chat_search_service.MATCH_MODES else "any"
     participant_ids = [pid for pid in (participant_id or []) if pid]
     topic_filters = [value.strip().lower() for value in (topic or []) if value and value.strip()]
 
@@ -1106,6 +1197,7 @@ def request_chat_search(
         participant_ids=participant_ids,
         topics=topic_filters,
         limit=limit,
+        match=match_mode,
     )
     attr_key = _signal_display_attr_key(help_request)
     display_names = _load_signal_display_names_for_user_ids(
@@ -1130,6 +1222,7 @@ def request_chat_search(
             "total_entries": index.entry_count,
             "participants": index.participants,
             "limit": limit,
+            "match": match_mode,
         },
         "display_names": {str(user_id): name for user_id, name in display_names.items()},
     }
@@ -1247,9 +1340,9 @@ async def create_request_comment(
     db.refresh(comment)
 
     try:
-        request_chat_search_service.refresh_chat_index(db, help_request.id)
+        request_chat_search_service.index_comment(db, help_request.id)
     except Exception:  # pragma: no cover - best-effort cache update
-        logger.warning("Failed to refresh chat search index for request %s", help_request.id, exc_info=True)
+        logger.warning("Failed to update chat search index for request %s", help_request.id, exc_info=True)
 
     comment_payload = request_comment_service.serialize_comment(comment, viewer)
     fragment = templates.get_template("requests/partials/comment.html").render(
@@ -1262,8 +1355,14 @@ async def create_request_comment(
         }
     )
 
+    channel_html = None
+    try:
+        channel_html = _publish_channel_comment(request, db, help_request, comment, viewer)
+    except Exception:  # pragma: no cover - best-effort fan-out
+        logger.exception("Failed to publish channel comment for request %s", help_request.id)
+
     if wants_json:
-        return JSONResponse({"html": fragment, "comment": comment_payload})
+        return JSONResponse({"html": fragment, "channel_html": channel_html, "comment": comment_payload})
 
     return RedirectResponse(url=f"/requests/{request_id}", status_code=status.HTTP_303_SEE_OTHER)
 
@@ -1289,6 +1388,13 @@ def delete_request_comment(
     request_comment_service.soft_delete_comment(db, comment_id)
     db.commit()
 
+    try:
+        request_chat_search_service.unindex_comment(help_request.id, comment_id)
+    except Exception:  # pragma: no cover - best-effort cache update
+        logger.warning("Failed to update chat search index for request %s", help_request.id, exc_info=True)
+
+    publish_channel_event(help_request.id, EVENT_COMMENT_DELETED, {"comment_id": comment_id})
+
     if _wants_json(request):
         return JSONResponse({"deleted": True, "comment_id": comment_id})
 
@@ -1325,7 +1431,7 @@ def _build_account_settings_context(
 ) -> dict[str, object]:
     user = session_user.user
     session_record = session_user.session
-    session_avatar_url = _get_account_avatar(db, user.id)
+    session_avatar_url = session_user.avatar_url
     session_role = describe_session_role(user, session_record)
 
     hide_captions = caption_preference_service.get_global_hidden(db, user.id)
@@ -1409,7 +1515,7 @@ def _build_rss_settings_context(
     user = session_user.user
     session_record = session_user.session
     session_role = describe_session_role(user, session_record)
-    session_avatar_url = _get_account_avatar(db, user.id)
+    session_avatar_url = session_user.avatar_url
     feed_entries = _load_rss_feed_entries(request, db, user)
     return {
         "request": request,
@@ -1897,6 +2003,7 @@ async def account_settings_submit(
     user = session_user.user
     user.contact_email = normalized_email or None
     db.add(user)
+    identity_cache_service.invalidate_user(db, user_id=user.id)
 
     caption_preference_service.set_global_hidden(
         db,
@@ -19,6 +19,7 @@ from sqlmodel import select
 
 from app.dependencies import SessionDep, SessionUser, get_session, require_session_user
 from app.models import HELP_REQUEST_STATUS_DRAFT, HelpRequest, InviteToken, User
+from app.pagination import cursor_page_links
 from app import config
 from app.routes.ui.helpers import friendly_time
 from app.dedalus.logging import finalize_logged_run, start_logged_run
@@ -38,6 +39,7 @@ from app.routes.ui.helpers import describe_session_role, templates
 from app.config import get_settings
 from app.services import (
     comment_llm_insights_service,
+    identity_cache_service,
     member_directory_service,
     peer_auth_ledger,
     peer_auth_service,
@@ -177,7 +179,7 @@ def admin_panel(
         "session": session,
         "session_role": describe_session_role(viewer, session),
         "session_username": viewer.username,
-        "session_avatar_url": _get_account_avatar(db, viewer.id),
+        "session_avatar_url": session_user.avatar_url,
         "admin_links": admin_links,
     }
     return templates.TemplateResponse("admin/panel.html", context)
@@ -209,7 +211,7 @@ def admin_peer_auth_ledger(
         "session": session_user.session,
         "session_role": describe_session_role(session_user.user, session_user.session),
         "session_username": session_user.user.username,
-        "session_avatar_url": _get_account_avatar(db, session_user.user.id),
+        "session_avatar_url": session_user.avatar_url,
         "latest_checksum": peer_auth_ledger.latest_checksum(),
         "ledger_entries": entries,
         "ledger_user_map": user_map,
@@ -601,6 +603,8 @@ def admin_profile_directory(
     db: SessionDep,
     session_user: SessionUser = Depends(require_session_user),
     page: int = Query(1, ge=1),
+    after: Optional[str] = Query(None),
+    before: Optional[str] = Query(None),
     q: Optional[str] = Query(None, alias="username"),
     contact: Optional[str] = None,
     role: Optional[str] = Query(None),
@@ -623,23 +627,19 @@ def admin_profile_directory(
         page=page,
         filters=filters,
         page_size=PAGE_SIZE,
+        after=after,
+        before=before,
     )
     users = directory_page.profiles
 
-    def _page_url(target_page: int) -> str:
-        url: URL = request.url.include_query_params(page=target_page)
-        return str(url)
-
-    pagination = {
-        "has_prev": directory_page.page > 1,
-        "has_next": directory_page.page < directory_page.total_pages,
-        "prev_url": _page_url(directory_page.page - 1) if directory_page.page > 1 else None,
-        "next_url": _page_url(directory_page.page + 1)
-        if directory_page.page < directory_page.total_pages
-        else None,
-    }
-
-    permission_summaries = user_permission_service.load_permission_summaries(db, users)
+    pagination = cursor_page_links(
+        request.url,
+        page=directory_page.page,
+        has_prev=directory_page.has_prev,
+        has_next=directory_page.has_next,
+        prev_cursor=directory_page.prev_cursor,
+        next_cursor=directory_page.next_cursor,
+    )
 
     filters_active = any(
         [
@@ -659,9 +659,10 @@ def admin_profile_directory(
         "session": session,
         "session_role": describe_session_role(viewer, session),
         "session_username": viewer.username,
-        "session_avatar_url": _get_account_avatar(db, viewer.id),
+        "session_avatar_url": session_user.avatar_url,
         "profiles": users,
         "profiles_total": directory_page.total_count,
+        "profiles_total_is_estimate": directory_page.total_is_estimate,
         "page": directory_page.page,
         "total_pages": directory_page.total_pages,
         "page_size": directory_page.page_size,
@@ -673,7 +674,7 @@ def admin_profile_directory(
         "filters_active": filters_active,
         "clear_filters_url": request.url.path,
         "current_url": _relative_url(request.url),
-        "permission_summaries": permission_summaries,
+        "permission_summaries": directory_page.permission_summaries,
         "flash_message": flash_message,
         "flash_severity": flash_severity,
         "profile_display_names": directory_page.display_names,
@@ -744,7 +745,7 @@ def admin_profile_detail(
         "session": session,
         "session_role": describe_session_role(viewer, session),
         "session_username": viewer.username,
-        "session_avatar_url": _get_account_avatar(db, viewer.id),
+        "session_avatar_url": session_user.avatar_url,
         "profile": profile,
         "profile_avatar_url": _get_account_avatar(db, profile.id),
         "help_requests": help_requests,
@@ -857,6 +858,7 @@ def admin_profile_permissions_action(
         else:
             target_user.is_admin = True
             db.add(target_user)
+            identity_cache_service.invalidate_user(db, user_id=target_user.id)
             db.commit()
             logger.info("Admin %s granted admin role to user %s", viewer.id, target_user.id)
             message = f"Granted admin access to @{target_user.username}."
@@ -872,6 +874,7 @@ def admin_profile_permissions_action(
         else:
             target_user.is_admin = False
             db.add(target_user)
+            identity_cache_service.invalidate_user(db, user_id=target_user.id)
             db.commit()
             logger.info("Admin %s revoked admin role from user %s", viewer.id, target_user.id)
             message = f"Removed admin access from @{target_user.username}."
@@ -1,17 +1,22 @@
 from __future__ import annotations
 
 import math
-from typing import Optional
+from datetime import datetime
+from typing import Any, NamedTuple, Optional
 
 from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import JSONResponse
 from urllib.parse import urlencode
-from sqlalchemy import desc, func, literal, or_, union_all
+from sqlalchemy import and_, func, literal, or_, union_all
+from sqlalchemy.sql import Select
 from sqlmodel import Session, select
 
+from app.config import get_settings
 from app.dependencies import SessionDep, SessionUser, require_session_user
 from app.models import HELP_REQUEST_STATUS_DRAFT, HelpRequest, RequestComment, User
+from app.pagination import PAGING_PARAMS, cursor_page_links, decode_cursor, encode_cursor
 from app.routes.ui.helpers import describe_session_role, templates
-from app.services import request_comment_service, user_attribute_service
+from app.services import request_comment_service, request_search_index, user_attribute_service
 from app.routes.ui import (
     FILTER_TOPICS,
     FILTER_TOPICS_LOOKUP,
@@ -35,12 +40,37 @@ BROWSE_TABS = [
 ]
 
 
+class FeedCursor(NamedTuple):
+    """Keyset position in the feed order (created_at, kind, id), newest first."""
+
+    created_at: datetime
+    kind: str
+    entity_id: int
+
+
+class _FeedBranch(NamedTuple):
+    kind: str
+    statement: Select
+    entity_id: Any
+    created_at: Any
+
+
+class _KeysetPage(NamedTuple):
+    rows: list
+    has_prev: bool
+    has_next: bool
+    prev_cursor: Optional[str]
+    next_cursor: Optional[str]
+
+
 @router.get("/browse")
 def browse_content(
     request: Request,
     db: SessionDep,
     session_user: SessionUser = Depends(require_session_user),
     page: int = Query(1, ge=1),
+    after: Optional[str] = Query(None),
+    before: Optional[str] = Query(None),
     q: Optional[str] = Query(None),
     content_type: Optional[str] = Query("all", alias="type"),
     status: Optional[list[str]] = Query(None),
@@ -56,12 +86,26 @@ def browse_content(
     status_filters = {value for value in _normalize_filter_values(status or []) if value in STATUS_LOOKUP}
     tag_filters = {value for value in _normalize_filter_values(tag or []) if value in FILTER_TOPICS_LOOKUP}
 
-    totals = {
-        "requests": _count_requests(db, query_text=search_query, status_filters=status_filters, tag_filters=tag_filters),
-        "comments": _count_comments(db, query_text=search_query, status_filters=status_filters, tag_filters=tag_filters),
-        "profiles": _count_profiles(db, viewer=viewer, query_text=search_query),
+    # `after` pages towards older entries, `before` back towards newer ones.
+    cursor = parse_feed_cursor(after)
+    older = True
+    if cursor is None:
+        cursor = parse_feed_cursor(before)
+        older = cursor is None
+
+    branches = {
+        "requests": _request_branch(db, query_text=search_query, status_filters=status_filters, tag_filters=tag_filters),
+        "comments": _comment_branch(db, query_text=search_query, status_filters=status_filters, tag_filters=tag_filters),
+        "profiles": _profile_branch(db, viewer=viewer, query_text=search_query),
     }
+    count_limit = get_settings().browse_count_limit
+    totals = {slug: _count_branch(db, branch, limit=count_limit) for slug, branch in branches.items()}
     totals["all"] = totals["requests"] + totals["comments"] + totals["profiles"]
+    # Counts stop just past `count_limit`; a capped tab shows "<limit>+".
+    capped = {slug for slug, total in totals.items() if count_limit > 0 and total > count_limit}
+    if capped:
+        capped.add("all")
+    tab_counts = {slug: f"{count_limit}+" if slug in capped else str(total) for slug, total in totals.items()}
 
     combined_page: Optional[dict[str, object]] = None
     requests_page: Optional[dict[str, object]] = None
@@ -69,48 +113,25 @@ def browse_content(
     profiles_page: Optional[dict[str, object]] = None
 
     if active_tab == "requests":
-        requests_page = _fetch_request_page(
-            db,
-            viewer,
-            page=page,
-            page_size=BROWSE_PAGE_SIZE,
-            query_text=search_query,
-            status_filters=status_filters,
-            tag_filters=tag_filters,
-        )
-        pagination = _build_pagination_metadata(request, requests_page["page"], requests_page["total_pages"])
+        keyset = fetch_keyset_page(db, [branches["requests"]], cursor=cursor, older=older, page_size=BROWSE_PAGE_SIZE)
+        requests_page = _fetch_request_page(db, viewer, keyset)
     elif active_tab == "comments":
-        comments_page = _fetch_comment_page(
-            db,
-            viewer,
-            page=page,
-            page_size=BROWSE_PAGE_SIZE,
-            query_text=search_query,
-            status_filters=status_filters,
-            tag_filters=tag_filters,
-        )
-        pagination = _build_pagination_metadata(request, comments_page["page"], comments_page["total_pages"])
+        keyset = fetch_keyset_page(db, [branches["comments"]], cursor=cursor, older=older, page_size=BROWSE_PAGE_SIZE)
+        comments_page = _fetch_comment_page(db, keyset)
     elif active_tab == "profiles":
-        profiles_page = _fetch_profile_page(
-            db,
-            viewer,
-            page=page,
-            page_size=BROWSE_PAGE_SIZE,
-            query_text=search_query,
-        )
-        pagination = _build_pagination_metadata(request, profiles_page["page"], profiles_page["total_pages"])
+        keyset = fetch_keyset_page(db, [branches["profiles"]], cursor=cursor, older=older, page_size=BROWSE_PAGE_SIZE)
+        profiles_page = _fetch_profile_page(db, viewer, keyset)
     else:
-        combined_page = _fetch_combined_feed(
-            db,
-            viewer,
-            page=page,
-            page_size=BROWSE_PAGE_SIZE,
-            query_text=search_query,
-            status_filters=status_filters,
-            tag_filters=tag_filters,
-            totals=totals,
-        )
-        pagination = _build_pagination_metadata(request, combined_page["page"], combined_page["total_pages"])
+        keyset = fetch_keyset_page(db, list(branches.values()), cursor=cursor, older=older, page_size=BROWSE_PAGE_SIZE)
+        combined_page = _fetch_combined_feed(db, viewer, keyset)
+
+    pagination = _build_pagination_metadata(
+        request,
+        keyset,
+        requested_page=page,
+        total=None if active_tab in capped else totals[active_tab],
+        page_size=BROWSE_PAGE_SIZE,
+    )
 
     status_options = [
         {
@@ -129,7 +150,7 @@ def browse_content(
         for topic in FILTER_TOPICS
     ]
 
-    tabs = _build_browse_tabs(request, totals, active_tab)
+    tabs = _build_browse_tabs(request, tab_counts, active_tab)
     has_filters = bool(search_query or status_filters or tag_filters)
 
     reset_items: list[tuple[str, str]] = []
@@ -163,6 +184,21 @@ def browse_content(
         "totals": totals,
         "viewer_is_admin": viewer.is_admin,
     }
+
+    accept = request.headers.get("accept", "")
+    if "application/json" in accept:
+        html = templates.get_template("browse/partials/results.html").render(context)
+        return JSONResponse(
+            {
+                "html": html,
+                "page": pagination["current"],
+                "has_prev": keyset.has_prev,
+                "has_next": keyset.has_next,
+                "prev_cursor": keyset.prev_cursor,
+                "next_cursor": keyset.next_cursor,
+                "counts": tab_counts,
+            }
+        )
     return templates.TemplateResponse("browse/index.html", context)
 
 
@@ -180,35 +216,44 @@ def _sanitize_browse_tab(value: Optional[str]) -> str:
     return value if value in BROWSE_ALLOWED_TYPES else "all"
 
 
-def _build_pagination_metadata(request: Request, current_page: int, total_pages: int) -> dict[str, object]:
-    total_pages = max(1, total_pages)
-
-    def _page_url(target_page: int) -> Optional[str]:
-        if target_page < 1 or target_page > total_pages:
-            return None
-        url = request.url.include_query_params(page=target_page)
-        return str(url)
+def _build_pagination_metadata(
+    request: Request,
+    keyset: _KeysetPage,
+    *,
+    requested_page: int,
+    total: Optional[int],
+    page_size: int,
+) -> dict[str, object]:
+    total_pages = max(1, math.ceil(total / page_size)) if total is not None else None
+    # The page number only labels the position; the cursors decide what is shown.
+    current_page = max(2, requested_page) if keyset.has_prev else 1
+    if total_pages is not None:
+        current_page = min(current_page, total_pages)
 
     return {
         "current": current_page,
         "total": total_pages,
-        "has_prev": current_page > 1,
-        "has_next": current_page < total_pages,
-        "prev_url": _page_url(current_page - 1) if current_page > 1 else None,
-        "next_url": _page_url(current_page + 1) if current_page < total_pages else None,
+        **cursor_page_links(
+            request.url,
+            page=current_page,
+            has_prev=keyset.has_prev,
+            has_next=keyset.has_next,
+            prev_cursor=keyset.prev_cursor,
+            next_cursor=keyset.next_cursor,
+        ),
     }
 
 
 def _build_browse_tab_url(request: Request, tab_slug: str) -> str:
     current_items = list(request.query_params.multi_items()) if hasattr(request.query_params, "multi_items") else list(request.query_params.items())
-    filtered = [(key, value) for key, value in current_items if key != "type"]
+    filtered = [(key, value) for key, value in current_items if key != "type" and key not in PAGING_PARAMS]
     if tab_slug != "all":
         filtered.append(("type", tab_slug))
     query = urlencode(filtered, doseq=True)
     return f"{request.url.path}?{query}" if query else request.url.path
 
 
-def _build_browse_tabs(request: Request, tab_counts: dict[str, int], active_tab: str) -> list[dict[str, object]]:
+def _build_browse_tabs(request: Request, tab_counts: dict[str, str], active_tab: str) -> list[dict[str, object]]:
     tabs: list[dict[str, object]] = []
     for tab in BROWSE_TABS:
         slug = tab["slug"]
@@ -216,7 +261,7 @@ def _build_browse_tabs(request: Request, tab_counts: dict[str, int], active_tab:
             {
                 "slug": slug,
                 "label": tab["label"],
-                "count": tab_counts.get(slug, 0),
+                "count": tab_counts.get(slug, "0"),
                 "url": _build_browse_tab_url(request, slug),
                 "active": slug == active_tab,
             }
@@ -224,27 +269,18 @@ def _build_browse_tabs(request: Request, tab_counts: dict[str, int], active_tab:
     return tabs
 
 
-def _topic_keyword_clause(columns: list, tag_filters: set[str]):  # noqa: ANN001
-    if not tag_filters:
-        return None
+def _topic_keywords(tag_filters: set[str]) -> list[str]:
     keywords: list[str] = []
     for slug in tag_filters:
         topic = FILTER_TOPICS_LOOKUP.get(slug)
         if not topic:
             continue
         keywords.extend(topic.get("keywords", []))
-    if not keywords:
-        return None
-    clauses = []
-    for column in columns:
-        for keyword in keywords:
-            clauses.append(column.ilike(f"%{keyword}%"))
-    if not clauses:
-        return None
-    return or_(*clauses)
+    return keywords
 
 
 def _build_request_browse_conditions(
+    db: Session,
     query_text: Optional[str],
     status_filters: set[str],
     tag_filters: set[str],
@@ -253,23 +289,43 @@ def _build_request_browse_conditions(
         HelpRequest.status != "pending",
         HelpRequest.status != HELP_REQUEST_STATUS_DRAFT,
     ]
-    if query_text:
-        pattern = f"%{query_text}%"
-        conditions.append(
-            or_(
-                HelpRequest.description.ilike(pattern),
-                HelpRequest.title.ilike(pattern),
-            )
-        )
+    text_clause = request_search_index.request_text_condition(db, query_text)
+    if text_clause is not None:
+        conditions.append(text_clause)
     if status_filters:
         conditions.append(HelpRequest.status.in_(list(status_filters)))
-    topic_clause = _topic_keyword_clause([HelpRequest.description], tag_filters)
+    topic_clause = request_search_index.request_text_condition(
+        db,
+        _topic_keywords(tag_filters),
+        match_all=False,
+        columns=("description",),
+    )
     if topic_clause is not None:
         conditions.append(topic_clause)
     return conditions
 
 
+def _comment_or_request_text_clause(
+    db: Session,
+    terms: str | list[str] | None,
+    *,
+    match_all: bool,
+    request_columns: tuple[str, ...],
+):
+    comment_clause = request_search_index.comment_text_condition(db, terms, match_all=match_all)
+    if comment_clause is None:
+        return None
+    request_clause = request_search_index.request_text_condition(
+        db,
+        terms,
+        match_all=match_all,
+        columns=request_columns,
+    )
+    return or_(comment_clause, request_clause)
+
+
 def _build_comment_browse_conditions(
+    db: Session,
     query_text: Optional[str],
     status_filters: set[str],
     tag_filters: set[str],
@@ -279,18 +335,22 @@ def _build_comment_browse_conditions(
         HelpRequest.status != "pending",
         HelpRequest.status != HELP_REQUEST_STATUS_DRAFT,
     ]
-    if query_text:
-        pattern = f"%{query_text}%"
-        conditions.append(
-            or_(
-                RequestComment.body.ilike(pattern),
-                HelpRequest.description.ilike(pattern),
-                HelpRequest.title.ilike(pattern),
-            )
-        )
+    text_clause = _comment_or_request_text_clause(
+        db,
+        query_text,
+        match_all=True,
+        request_columns=request_search_index.REQUEST_COLUMNS,
+    )
+    if text_clause is not None:
+        conditions.append(text_clause)
     if status_filters:
         conditions.append(HelpRequest.status.in_(list(status_filters)))
-    topic_clause = _topic_keyword_clause([RequestComment.body, HelpRequest.description], tag_filters)
+    topic_clause = _comment_or_request_text_clause(
+        db,
+        _topic_keywords(tag_filters),
+        match_all=False,
+        request_columns=("description",),
+    )
     if topic_clause is not None:
         conditions.append(topic_clause)
     return conditions
@@ -334,169 +394,178 @@ def _build_profile_browse_conditions(
     return conditions
 
 
-def _count_requests(
+def _request_branch(
     db: Session,
     *,
     query_text: Optional[str],
     status_filters: set[str],
     tag_filters: set[str],
-) -> int:
-    conditions = _build_request_browse_conditions(query_text, status_filters, tag_filters)
-    stmt = select(func.count()).select_from(HelpRequest).where(*conditions)
-    return int(db.exec(stmt).one() or 0)
+) -> _FeedBranch:
+    statement = select(
+        literal("request").label("kind"),
+        HelpRequest.id.label("entity_id"),
+        HelpRequest.created_at.label("created_at"),
+    ).where(*_build_request_browse_conditions(db, query_text, status_filters, tag_filters))
+    return _FeedBranch("request", statement, HelpRequest.id, HelpRequest.created_at)
 
 
-def _count_comments(
+def _comment_branch(
     db: Session,
     *,
     query_text: Optional[str],
     status_filters: set[str],
     tag_filters: set[str],
-) -> int:
-    conditions = _build_comment_browse_conditions(query_text, status_filters, tag_filters)
-    stmt = (
-        select(func.count())
+) -> _FeedBranch:
+    statement = (
+        select(
+            literal("comment").label("kind"),
+            RequestComment.id.label("entity_id"),
+            RequestComment.created_at.label("created_at"),
+        )
         .select_from(RequestComment)
         .join(HelpRequest, HelpRequest.id == RequestComment.help_request_id)
-        .where(*conditions)
+        .where(*_build_comment_browse_conditions(db, query_text, status_filters, tag_filters))
     )
-    return int(db.exec(stmt).one() or 0)
+    return _FeedBranch("comment", statement, RequestComment.id, RequestComment.created_at)
 
 
-def _count_profiles(
-    db: Session,
-    *,
-    viewer: User,
-    query_text: Optional[str],
-) -> int:
-    conditions = _build_profile_browse_conditions(db, viewer, query_text)
-    stmt = select(func.count()).select_from(User).where(*conditions)
+def _profile_branch(db: Session, *, viewer: User, query_text: Optional[str]) -> _FeedBranch:
+    statement = select(
+        literal("profile").label("kind"),
+        User.id.label("entity_id"),
+        User.created_at.label("created_at"),
+    ).where(*_build_profile_browse_conditions(db, viewer, query_text))
+    return _FeedBranch("profile", statement, User.id, User.created_at)
+
+
+def _count_branch(db: Session, branch: _FeedBranch, *, limit: int) -> int:
+    """Matching rows, counting at most `limit + 1` so deep result sets stay cheap (0 = exact)."""
+    source = branch.statement.limit(limit + 1) if limit > 0 else branch.statement
+    stmt = select(func.count()).select_from(source.subquery())
     return int(db.exec(stmt).one() or 0)
 
 
-def _fetch_request_page(
-    db: Session,
-    viewer: User,
-    *,
-    page: int,
-    page_size: int,
-    query_text: Optional[str],
-    status_filters: set[str],
-    tag_filters: set[str],
-) -> dict[str, object]:
-    total = _count_requests(db, query_text=query_text, status_filters=status_filters, tag_filters=tag_filters)
-    if not total:
-        return {"items": [], "page": 1, "total_pages": 1, "total": 0, "topics": {}}
+def encode_feed_cursor(created_at: datetime, kind: str, entity_id: int) -> str:
+    return encode_cursor({"c": created_at.isoformat(), "k": kind, "i": entity_id})
 
-    total_pages = max(1, math.ceil(total / page_size))
-    current_page = min(max(1, page), total_pages)
-    offset = (current_page - 1) * page_size
-    stmt = (
-        select(HelpRequest)
-        .where(*_build_request_browse_conditions(query_text, status_filters, tag_filters))
-        .order_by(HelpRequest.created_at.desc())
-        .offset(offset)
-        .limit(page_size)
-    )
-    rows = db.exec(stmt).all()
-    serialized = _serialize_requests(db, rows, viewer=viewer)
-    topics_map = {row.id: sorted(_infer_request_topics(row)) for row in rows}
-    return {
-        "items": serialized,
-        "page": current_page,
-        "total_pages": total_pages,
-        "total": total,
-        "topics": topics_map,
-    }
 
+def parse_feed_cursor(token: Optional[str]) -> Optional[FeedCursor]:
+    """Decode a feed cursor token; None when it is missing or malformed (first page)."""
+    payload = decode_cursor(token)
+    if payload is None:
+        return None
+    try:
+        return FeedCursor(datetime.fromisoformat(payload["c"]), str(payload["k"]), int(payload["i"]))
+    except (KeyError, TypeError, ValueError):
+        return None
 
-def _fetch_comment_page(
-    db: Session,
-    viewer: User,
-    *,
-    page: int,
-    page_size: int,
-    query_text: Optional[str],
-    status_filters: set[str],
-    tag_filters: set[str],
-) -> dict[str, object]:
-    total = _count_comments(db, query_text=query_text, status_filters=status_filters, tag_filters=tag_filters)
-    if not total:
-        return {"items": [], "page": 1, "total_pages": 1, "total": 0}
 
-    total_pages = max(1, math.ceil(total / page_size))
-    current_page = min(max(1, page), total_pages)
-    offset = (current_page - 1) * page_size
-    stmt = (
-        select(RequestComment, User, HelpRequest)
-        .join(User, User.id == RequestComment.user_id)
-        .join(HelpRequest, HelpRequest.id == RequestComment.help_request_id)
-        .where(*_build_comment_browse_conditions(query_text, status_filters, tag_filters))
-        .order_by(RequestComment.created_at.desc())
-        .offset(offset)
-        .limit(page_size)
-    )
-    rows = db.exec(stmt).all()
-    entries = []
-    for comment, author, help_request in rows:
-        payload = request_comment_service.serialize_comment(comment, author)
-        entries.append(
-            {
-                "comment": payload,
-                "request": {
-                    "id": help_request.id,
-                    "title": help_request.title or "Untitled request",
-                    "status": help_request.status,
-                },
-            }
+def _keyset_clause(branch: _FeedBranch, cursor: FeedCursor, *, older: bool):
+    """Rows of `branch` strictly past `cursor` in (created_at, kind, id) order.
+
+    `kind` is constant within a branch, so the tuple comparison reduces to a
+    range on (created_at, id) that the composite indexes can serve.
+    """
+    created_at, entity_id = branch.created_at, branch.entity_id
+    if older:
+        if branch.kind < cursor.kind:
+            return created_at <= cursor.created_at
+        if branch.kind > cursor.kind:
+            return created_at < cursor.created_at
+        return or_(
+            created_at < cursor.created_at,
+            and_(created_at == cursor.created_at, entity_id < cursor.entity_id),
         )
-    return {
-        "items": entries,
-        "page": current_page,
-        "total_pages": total_pages,
-        "total": total,
-    }
+    if branch.kind > cursor.kind:
+        return created_at >= cursor.created_at
+    if branch.kind < cursor.kind:
+        return created_at > cursor.created_at
+    return or_(
+        created_at > cursor.created_at,
+        and_(created_at == cursor.created_at, entity_id > cursor.entity_id),
+    )
 
 
-def _fetch_profile_page(
+def fetch_keyset_page(
     db: Session,
-    viewer: User,
+    branches: list[_FeedBranch],
     *,
-    page: int,
+    cursor: Optional[FeedCursor],
+    older: bool = True,
     page_size: int,
-    query_text: Optional[str],
-) -> dict[str, object]:
-    total = _count_profiles(db, viewer=viewer, query_text=query_text)
-    if not total:
-        return {
-            "items": [],
-            "page": 1,
-            "total_pages": 1,
-            "total": 0,
-            "avatars": {},
-        }
-
-    total_pages = max(1, math.ceil(total / page_size))
-    current_page = min(max(1, page), total_pages)
-    offset = (current_page - 1) * page_size
+) -> _KeysetPage:
+    """One page of feed rows (kind, entity_id, created_at), newest first.
+
+    Each branch reads at most `page_size + 1` rows from its index before the
+    merge, so the cost does not grow with how deep the reader has scrolled.
+    """
+    limit = page_size + 1
+    parts = []
+    for branch in branches:
+        stmt = branch.statement
+        if cursor is not None:
+            stmt = stmt.where(_keyset_clause(branch, cursor, older=older))
+        if older:
+            stmt = stmt.order_by(branch.created_at.desc(), branch.entity_id.desc())
+        else:
+            stmt = stmt.order_by(branch.created_at.asc(), branch.entity_id.asc())
+        parts.append(stmt.limit(limit).subquery())
+
+    if len(parts) == 1:
+        source = parts[0]
+    else:
+        source = union_all(*(select(part.c.kind, part.c.entity_id, part.c.created_at) for part in parts)).subquery()
+    order = [source.c.created_at, source.c.kind, source.c.entity_id]
     stmt = (
-        select(User)
-        .where(*_build_profile_browse_conditions(db, viewer, query_text))
-        .order_by(User.created_at.desc())
-        .offset(offset)
-        .limit(page_size)
+        select(source.c.kind, source.c.entity_id, source.c.created_at)
+        .order_by(*(column.desc() if older else column.asc() for column in order))
+        .limit(limit)
     )
-    rows = db.exec(stmt).all()
-    avatar_urls = user_attribute_service.load_profile_photo_urls(
-        db,
-        user_ids=[user.id for user in rows if user.id],
+    rows = list(db.exec(stmt).all())
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if not older:
+        rows.reverse()
+
+    if cursor is None:
+        has_prev, has_next = False, has_more
+    elif older:
+        has_prev, has_next = True, has_more
+    else:
+        has_prev, has_next = has_more, True
+    if not rows:
+        # A stale cursor past either end: offer the way back to the first page.
+        return _KeysetPage(rows, cursor is not None, False, None, None)
+    first, last = rows[0], rows[-1]
+    return _KeysetPage(
+        rows,
+        has_prev,
+        has_next,
+        encode_feed_cursor(first.created_at, first.kind, first.entity_id) if has_prev else None,
+        encode_feed_cursor(last.created_at, last.kind, last.entity_id) if has_next else None,
     )
+
+
+def _fetch_request_page(db: Session, viewer: User, keyset: _KeysetPage) -> dict[str, object]:
+    request_ids = [row.entity_id for row in keyset.rows]
+    lookup = _load_requests_by_ids(db, viewer, request_ids)
+    items = [lookup[request_id]["data"] for request_id in request_ids if request_id in lookup]
+    topics_map = {request_id: lookup[request_id]["topics"] for request_id in request_ids if request_id in lookup}
+    return {"items": items, "topics": topics_map}
+
+
+def _fetch_comment_page(db: Session, keyset: _KeysetPage) -> dict[str, object]:
+    comment_ids = [row.entity_id for row in keyset.rows]
+    lookup = _load_comments_by_ids(db, comment_ids)
+    return {"items": [lookup[comment_id] for comment_id in comment_ids if comment_id in lookup]}
+
+
+def _fetch_profile_page(db: Session, viewer: User, keyset: _KeysetPage) -> dict[str, object]:
+    profile_ids = [row.entity_id for row in keyset.rows]
+    lookup = _load_profiles_by_ids(db, viewer, profile_ids)
     return {
-        "items": rows,
-        "page": current_page,
-        "total_pages": total_pages,
-        "total": total,
-        "avatars": avatar_urls,
+        "items": [lookup[profile_id]["user"] for profile_id in profile_ids if profile_id in lookup],
+        "avatars": {profile_id: lookup[profile_id]["avatar_url"] for profile_id in profile_ids if profile_id in lookup},
     }
 
 
@@ -564,64 +633,8 @@ def _load_profiles_by_ids(db: Session, viewer: User, profile_ids: list[int]) ->
     }
 
 
-def _fetch_combined_feed(
-    db: Session,
-    viewer: User,
-    *,
-    page: int,
-    page_size: int,
-    query_text: Optional[str],
-    status_filters: set[str],
-    tag_filters: set[str],
-    totals: dict[str, int],
-) -> dict[str, object]:
-    total = totals.get("all", 0)
-    if not total:
-        return {"items": [], "page": 1, "total_pages": 1, "total": 0}
-
-    total_pages = max(1, math.ceil(total / page_size))
-    current_page = min(max(1, page), total_pages)
-    offset = (current_page - 1) * page_size
-
-    request_select = (
-        select(
-            literal("request").label("kind"),
-            HelpRequest.id.label("entity_id"),
-            HelpRequest.created_at.label("created_at"),
-        )
-        .where(*_build_request_browse_conditions(query_text, status_filters, tag_filters))
-    )
-    comment_select = (
-        select(
-            literal("comment").label("kind"),
-            RequestComment.id.label("entity_id"),
-            RequestComment.created_at.label("created_at"),
-        )
-        .select_from(RequestComment)
-        .join(HelpRequest, HelpRequest.id == RequestComment.help_request_id)
-        .where(*_build_comment_browse_conditions(query_text, status_filters, tag_filters))
-    )
-    profile_select = (
-        select(
-            literal("profile").label("kind"),
-            User.id.label("entity_id"),
-            User.created_at.label("created_at"),
-        )
-        .where(*_build_profile_browse_conditions(db, viewer, query_text))
-    )
-
-    combined_source = union_all(request_select, comment_select, profile_select).subquery()
-    stmt = (
-        select(
-            combined_source.c.kind,
-            combined_source.c.entity_id,
-            combined_source.c.created_at,
-        )
-        .order_by(desc(combined_source.c.created_at))
-        .offset(offset)
-        .limit(page_size)
-    )
-    rows = db.exec(stmt).all()
+def _fetch_combined_feed(db: Session, viewer: User, keyset: _KeysetPage) -> dict[str, object]:
+    rows = keyset.rows
 
     request_ids = [row.entity_id for row in rows if row.kind == "request"]
     comment_ids = [row.entity_id for row in rows if row.kind == "comment"]
@@ -682,9 +695,4 @@ def _fetch_combined_feed(
                 }
             )
 
-    return {
-        "items": entries,
-        "page": current_page,
-        "total_pages": total_pages,
-        "total": total,
-    }
+    return {"items": entries}
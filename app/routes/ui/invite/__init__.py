@@ -44,13 +44,19 @@ def invite_map(
     invite_map = invite_map_cache_service.get_cached_map(db, user_id=user.id)
     cache_hit = invite_map is not None
     if not invite_map:
+        generation = invite_map_cache_service.current_generation(db)
         invite_map = invite_graph_service.build_bidirectional_invite_map(
             db,
             root_user_id=user.id,
             max_degree=invite_graph_service.DEFAULT_MAP_DEGREE,
         )
         if invite_map:
-            invite_map_cache_service.store_cached_map(db, user_id=user.id, invite_map=invite_map)
+            invite_map_cache_service.store_cached_map(
+                db,
+                user_id=user.id,
+                invite_map=invite_map,
+                graph_generation=generation,
+            )
 
     context = {
         "request": request,
@@ -3,11 +3,10 @@ from __future__ import annotations
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
-from starlette.datastructures import URL
-
 from app.dependencies import SessionDep, SessionUser, require_session_user
+from app.pagination import cursor_page_links
 from app.routes.ui.helpers import describe_session_role, templates
-from app.services import member_directory_service, user_attribute_service
+from app.services import member_directory_service
 
 router = APIRouter(tags=["ui"])
 
@@ -18,6 +17,8 @@ def members_directory(
     db: SessionDep,
     session_user: SessionUser = Depends(require_session_user),
     page: int = Query(1, ge=1),
+    after: Optional[str] = Query(None),
+    before: Optional[str] = Query(None),
     q: Optional[str] = Query(None, alias="username"),
     contact: Optional[str] = None,
 ):
@@ -34,27 +35,19 @@ def members_directory(
         viewer=session_user.user,
         page=page,
         filters=filters,
+        after=after,
+        before=before,
     )
 
-    member_ids = [profile.id for profile in directory_page.profiles if profile.id is not None]
-    avatar_urls = user_attribute_service.load_profile_photo_urls(
-        db,
-        user_ids=member_ids,
+    pagination = cursor_page_links(
+        request.url,
+        page=directory_page.page,
+        has_prev=directory_page.has_prev,
+        has_next=directory_page.has_next,
+        prev_cursor=directory_page.prev_cursor,
+        next_cursor=directory_page.next_cursor,
     )
 
-    def _page_url(target_page: int) -> str:
-        url: URL = request.url.include_query_params(page=target_page)
-        return str(url)
-
-    pagination = {
-        "has_prev": directory_page.page > 1,
-        "has_next": directory_page.page < directory_page.total_pages,
-        "prev_url": _page_url(directory_page.page - 1) if directory_page.page > 1 else None,
-        "next_url": _page_url(directory_page.page + 1)
-        if directory_page.page < directory_page.total_pages
-        else None,
-    }
-
     context = {
         "request": request,
         "user": session_user.user,
@@ -64,6 +57,7 @@ def members_directory(
         "session_avatar_url": session_user.avatar_url,
         "profiles": directory_page.profiles,
         "profiles_total": directory_page.total_count,
+        "profiles_total_is_estimate": directory_page.total_is_estimate,
         "page": directory_page.page,
         "total_pages": directory_page.total_pages,
         "page_size": directory_page.page_size,
@@ -74,7 +68,7 @@ def members_directory(
         "clear_filters_url": request.url.path,
         "current_url": str(request.url),
         "viewer_is_admin": session_user.user.is_admin,
-        "member_avatar_urls": avatar_urls,
+        "member_avatar_urls": directory_page.avatar_urls,
         "member_display_names": directory_page.display_names,
     }
     return templates.TemplateResponse("members/index.html", context)
@@ -8,7 +8,6 @@ from app.config import get_settings
 from app.dependencies import SessionDep, SessionUser, require_session_user
 from app.captions import build_caption_payload, load_preferences as load_caption_preferences
 from app.routes.ui.helpers import describe_session_role, templates
-from app.services import peer_auth_service
 
 router = APIRouter(tags=["ui"])
 
@@ -56,7 +55,7 @@ def site_menu(
     session = session_user.session
     is_full_session = session.is_fully_authenticated
     is_admin = user.is_admin
-    is_peer_auth_reviewer = peer_auth_service.user_is_peer_auth_reviewer(db, user=user)
+    is_peer_auth_reviewer = session_user.is_peer_auth_reviewer
 
     sections = [
         {
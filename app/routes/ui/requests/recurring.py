@@ -8,7 +8,7 @@ from fastapi.responses import RedirectResponse
 
 from app.dependencies import SessionDep, SessionUser, require_session_user
 from app.models import RecurringRequestDeliveryMode
-from app.routes.ui.helpers import describe_session_role, get_account_avatar, templates
+from app.routes.ui.helpers import describe_session_role, templates
 from app.services import recurring_template_service
 
 router = APIRouter(tags=["ui"])
@@ -43,7 +43,7 @@ def recurring_requests_page(
         "session": session_record,
         "session_role": describe_session_role(viewer, session_record),
         "session_username": viewer.username,
-        "session_avatar_url": get_account_avatar(db, viewer.id),
+        "session_avatar_url": session_user.avatar_url,
         "templates": prepared_templates,
         "delivery_modes": delivery_modes,
         "interval_options": interval_options,
@@ -24,6 +24,7 @@ from app.models import (
     UserSession,
 )
 from app.routes.ui.helpers import describe_session_role, templates
+from app.services import identity_cache_service
 from app.security.csrf import generate_csrf_token, validate_csrf_token
 from app.sync import job_tracker
 from app.sync.activity_log import append_event, read_events
@@ -523,6 +524,8 @@ def update_sync_scope(
     if getattr(record, "sync_scope", cleaned_scope) != cleaned_scope:
         record.sync_scope = cleaned_scope
         db.add(record)
+        if model is User:
+            identity_cache_service.invalidate_user(db, user_id=record.id)
         db.commit()
 
     wants_json = "application/json" in (request.headers.get("accept") or "").lower()
@@ -2,13 +2,19 @@ from __future__ import annotations
 
 import asyncio
 import logging
+from datetime import datetime, timedelta
 from typing import Optional
 
 from sqlmodel import Session
 
 from app.config import get_settings
 from app.db import get_engine
-from app.services import recurring_template_executor, recurring_template_service
+from app.services import (
+    invite_map_cache_service,
+    recurring_template_executor,
+    recurring_template_service,
+    session_activity_service,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -87,3 +93,144 @@ def install_recurring_scheduler(app) -> None:
     @app.on_event("shutdown")
     async def _stop_scheduler() -> None:  # pragma: no cover - lifecycle hook
         await scheduler.stop()
+
+
+class InviteMapWarmer:
+    """Background loop that keeps invite maps cached for recently active users."""
+
+    def __init__(self, *, poll_seconds: int | None = None, window_minutes: int | None = None):
+        settings = get_settings()
+        raw_interval = settings.invite_map_warm_seconds if poll_seconds is None else poll_seconds
+        self.enabled = raw_interval > 0
+        self._poll_seconds = max(5, raw_interval)
+        self._window = timedelta(minutes=window_minutes or settings.invite_map_warm_window_minutes)
+        self._task: Optional[asyncio.Task[None]] = None
+        self._stop_event = asyncio.Event()
+
+    def start(self) -> None:
+        if not self.enabled or (self._task and not self._task.done()):
+            return
+        loop = asyncio.get_running_loop()
+        self._stop_event.clear()
+        self._task = loop.create_task(self._run_loop())
+        logger.info("Invite map warmer started (interval=%s seconds)", self._poll_seconds)
+
+    async def stop(self) -> None:
+        if not self._task:
+            return
+        self._stop_event.set()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._task = None
+            self._stop_event = asyncio.Event()
+            logger.info("Invite map warmer stopped")
+
+    async def _run_loop(self) -> None:
+        try:
+            while not self._stop_event.is_set():
+                await asyncio.to_thread(self.run_once)
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), timeout=self._poll_seconds)
+                except asyncio.TimeoutError:
+                    continue
+        except asyncio.CancelledError:
+            logger.debug("Invite map warmer cancelled")
+            raise
+        except Exception:  # pragma: no cover - safety net
+            logger.exception("Invite map warmer crashed")
+
+    def run_once(self) -> int:
+        try:
+            with Session(get_engine()) as session:
+                warmed = invite_map_cache_service.warm_recent_maps(
+                    session,
+                    active_since=datetime.utcnow() - self._window,
+                )
+        except Exception:
+            logger.exception("Invite map warmer tick failed")
+            return 0
+        if warmed:
+            logger.info("Invite map warmer cached %s map(s)", warmed)
+        return warmed
+
+
+def install_invite_map_warmer(app) -> None:
+    warmer = InviteMapWarmer()
+    app.state.invite_map_warmer = warmer
+
+    @app.on_event("startup")
+    async def _start_warmer() -> None:  # pragma: no cover - lifecycle hook
+        warmer.start()
+
+    @app.on_event("shutdown")
+    async def _stop_warmer() -> None:  # pragma: no cover - lifecycle hook
+        await warmer.stop()
+
+
+class SessionActivityFlusher:
+    """Background loop that writes buffered session `last_seen_at` updates."""
+
+    def __init__(self, *, flush_seconds: int | None = None):
+        settings = get_settings()
+        raw_interval = settings.session_touch_flush_seconds if flush_seconds is None else flush_seconds
+        self.enabled = raw_interval > 0
+        self._flush_seconds = max(1, raw_interval)
+        self._task: Optional[asyncio.Task[None]] = None
+        self._stop_event = asyncio.Event()
+
+    def start(self) -> None:
+        if not self.enabled or (self._task and not self._task.done()):
+            return
+        loop = asyncio.get_running_loop()
+        self._stop_event.clear()
+        self._task = loop.create_task(self._run_loop())
+        logger.info("Session activity flusher started (interval=%s seconds)", self._flush_seconds)
+
+    async def stop(self) -> None:
+        if self._task:
+            self._stop_event.set()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            finally:
+                self._task = None
+                self._stop_event = asyncio.Event()
+        # Whatever is still buffered is written on the way out.
+        await asyncio.to_thread(self.run_once)
+
+    async def _run_loop(self) -> None:
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), timeout=self._flush_seconds)
+                except asyncio.TimeoutError:
+                    await asyncio.to_thread(self.run_once)
+        except asyncio.CancelledError:
+            logger.debug("Session activity flusher cancelled")
+            raise
+        except Exception:  # pragma: no cover - safety net
+            logger.exception("Session activity flusher crashed")
+
+    def run_once(self) -> int:
+        try:
+            return session_activity_service.flush_pending(get_engine())
+        except Exception:
+            logger.exception("Session activity flush failed")
+            return 0
+
+
+def install_session_activity_flusher(app) -> None:
+    flusher = SessionActivityFlusher()
+    app.state.session_activity_flusher = flusher
+
+    @app.on_event("startup")
+    async def _start_flusher() -> None:  # pragma: no cover - lifecycle hook
+        flusher.start()
+
+    @app.on_event("shutdown")
+    async def _stop_flusher() -> None:  # pragma: no cover - lifecycle hook
+        await flusher.stop()
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
 from sqlalchemy import inspect, text
 from sqlalchemy.engine import Engine
@@ -16,6 +16,7 @@ class TableReport:
     name: str
     created_table: bool = False
     added_columns: List[str] = field(default_factory=list)
+    added_indexes: List[str] = field(default_factory=list)
     mismatched_columns: List[Tuple[str, str, str]] = field(default_factory=list)
     warnings: List[str] = field(default_factory=list)
 
@@ -35,11 +36,13 @@ class IntegrityReport:
     def summary_counts(self) -> Dict[str, int]:
         created = sum(1 for table in self.tables if table.created_table)
         added_columns = sum(len(table.added_columns) for table in self.tables)
+        added_indexes = sum(len(table.added_indexes) for table in self.tables)
         mismatches = sum(len(table.mismatched_columns) for table in self.tables)
         warnings = sum(len(table.warnings) for table in self.tables)
         return {
             "tables_created": created,
             "columns_added": added_columns,
+            "indexes_added": added_indexes,
             "mismatches": mismatches,
             "warnings": warnings,
         }
@@ -68,6 +71,17 @@ def _default_clause(column) -> Optional[str]:
     return f" DEFAULT {value}"
 
 
+def _index_names(connection, engine: Engine, table_name: str) -> Set[str]:
+    if engine.dialect.name == "sqlite":
+        # Reflection skips expression indexes such as lower(username); read them by name.
+        rows = connection.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table"),
+            {"table": table_name},
+        )
+        return {row[0] for row in rows}
+    return {index["name"] for index in inspect(engine).get_indexes(table_name)}
+
+
 def ensure_schema_integrity(engine: Engine) -> IntegrityReport:
     inspector = inspect(engine)
     metadata_tables = {table.name: table for table in SQLModel.metadata.sorted_tables}
@@ -131,6 +145,18 @@ def ensure_schema_integrity(engine: Engine) -> IntegrityReport:
                         (column.name, expected_type, actual_type)
                     )
 
+            # create_all() only builds indexes alongside new tables; add any
+            # declared later to tables that already existed.
+            actual_indexes = _index_names(connection, engine, table_name)
+            for index in sorted(table.indexes, key=lambda item: item.name or ""):
+                if index.name in actual_indexes:
+                    continue
+                try:
+                    index.create(bind=connection)
+                    report.added_indexes.append(index.name)
+                except SQLAlchemyError as exc:
+                    report.warnings.append(f"Could not create index '{index.name}' on '{table_name}': {exc}")
+
             table_reports.append(report)
 
     return IntegrityReport(tables=table_reports, errors=errors)
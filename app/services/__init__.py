@@ -8,6 +8,7 @@ from . import (
     comment_llm_insights_db,
     comment_attribute_service,
     comment_request_promotion_service,
+    identity_cache_service,
     invite_graph_service,
     invite_map_cache_service,
     member_directory_service,
@@ -18,11 +19,16 @@ from . import (
     request_channel_metrics,
     request_channel_presence,
     request_channel_reads,
+    request_chat_ann_index,
+    request_chat_embedding_cache,
     request_chat_embeddings,
+    request_chat_search_index,
     request_chat_search_service,
     request_chat_suggestions,
     request_comment_service,
     request_pin_service,
+    request_search_index,
+    session_activity_service,
     signal_profile_snapshot_service,
     user_permission_service,
     user_attribute_service,
@@ -40,6 +46,7 @@ __all__ = [
     "comment_llm_insights_db",
     "comment_attribute_service",
     "comment_request_promotion_service",
+    "identity_cache_service",
     "invite_graph_service",
     "invite_map_cache_service",
     "member_directory_service",
@@ -50,11 +57,16 @@ __all__ = [
     "request_channel_metrics",
     "request_channel_presence",
     "request_channel_reads",
+    "request_chat_ann_index",
+    "request_chat_embedding_cache",
     "request_chat_embeddings",
+    "request_chat_search_index",
     "request_chat_search_service",
     "request_chat_suggestions",
     "request_comment_service",
     "request_pin_service",
+    "request_search_index",
+    "session_activity_service",
     "signal_profile_snapshot_service",
     "user_permission_service",
     "user_attribute_service",
@@ -20,7 +20,7 @@ from app.models import (
     UserSession,
 )
 from app.modules.requests import services as request_services
-from app.services import peer_auth_service, user_attribute_service
+from app.services import identity_cache_service, peer_auth_service, session_activity_service, user_attribute_service
 
 SESSION_COOKIE_NAME = "wb_session_id"
 logger = logging.getLogger(__name__)
@@ -331,9 +331,20 @@ def revoke_session(session: Session, *, session_id: str) -> None:
     record = session.get(UserSession, session_id)
     if record:
         session.delete(record)
+        identity_cache_service.invalidate_session(session, session_id=session_id)
         session.commit()
+        session_activity_service.get_tracker().discard(session_id)
 
 
 def touch_session(session: Session, *, session_record: UserSession) -> None:
-    session_record.last_seen_at = datetime.utcnow()
+    """Record activity; the write is buffered unless WB_SESSION_TOUCH_FLUSH_SECONDS is 0."""
+    tracker = session_activity_service.get_tracker()
+    if session_activity_service.buffering_enabled():
+        tracker.record(session_record)
+        return
+    now = datetime.utcnow()
+    last_seen = session_record.last_seen_at
+    if last_seen is not None and now - last_seen < tracker.granularity:
+        return
+    session_record.last_seen_at = now
     session.commit()
@@ -4,16 +4,10 @@ import re
 from dataclasses import dataclass, field
 from typing import Iterable, Sequence
 
-from sqlalchemy import or_
-from sqlmodel import Session, select
+from sqlmodel import Session
 
-from app.models import (
-    HELP_REQUEST_STATUS_DRAFT,
-    HelpRequest,
-    RequestComment,
-    User,
-)
-from app.services import chat_reaction_parser
+from app.models import User
+from app.services import chat_reaction_parser, request_search_index
 
 
 @dataclass
@@ -85,23 +79,9 @@ def _search_requests(
     *,
     limit: int,
 ) -> Iterable[ChatAIContextCitation]:
-    stmt = (
-        select(HelpRequest)
-        .where(HelpRequest.status != HELP_REQUEST_STATUS_DRAFT)
-        .order_by(HelpRequest.updated_at.desc())
-    )
-    if keywords:
-        like_clauses = []
-        for token in keywords:
-            pattern = f"%{token}%"
-            like_clauses.append(HelpRequest.title.ilike(pattern))
-            like_clauses.append(HelpRequest.description.ilike(pattern))
-        stmt = stmt.where(or_(*like_clauses))
-    rows = session.exec(stmt.limit(limit * 3 if limit else 5)).all()
+    rows = request_search_index.search_requests(session, keywords, user=user, limit=limit)
     results: list[ChatAIContextCitation] = []
     for request in rows:
-        if not _request_visible(request, user):
-            continue
         caption_source = request.title or f"Request #{request.id}"
         caption_plain = _strip_reaction_suffix(_strip_markup(caption_source))
         clean_caption, _ = chat_reaction_parser.strip_reactions(caption_plain)
@@ -120,8 +100,6 @@ def _search_requests(
                 ],
             )
         )
-        if len(results) >= limit:
-            break
     return results
 
 
@@ -132,26 +110,10 @@ def _search_comments(
     *,
     limit: int,
 ) -> Iterable[ChatAIContextCitation]:
-    stmt = (
-        select(RequestComment, HelpRequest, User)
-        .join(HelpRequest, HelpRequest.id == RequestComment.help_request_id)
-        .join(User, User.id == RequestComment.user_id)
-        .where(RequestComment.deleted_at.is_(None))
-        .order_by(RequestComment.created_at.desc())
-    )
-    if keywords:
-        like_clauses = []
-        for token in keywords:
-            pattern = f"%{token}%"
-            like_clauses.append(RequestComment.body.ilike(pattern))
-        if like_clauses:
-            stmt = stmt.where(or_(*like_clauses))
-    rows = session.exec(stmt.limit(limit * 3 if limit else 5)).all()
+    rows = request_search_index.search_comments(session, keywords, user=user, limit=limit)
 
     results: list[ChatAIContextCitation] = []
     for comment, request, author in rows:
-        if not _request_visible(request, user):
-            continue
         clean_body, reactions = chat_reaction_parser.strip_reactions(comment.body or "")
         snippet = _trim_text(clean_body)
         request_ref = request.title or f"Request {request.id}"
@@ -171,21 +133,9 @@ def _search_comments(
                 ],
             )
         )
-        if len(results) >= limit:
-            break
     return results
 
 
-def _request_visible(request: HelpRequest, user: User) -> bool:
-    if user.is_admin or request.created_by_user_id == user.id:
-        return True
-    scope = (request.sync_scope or "").lower()
-    user_scope = (user.sync_scope or "").lower()
-    if scope == "public":
-        return True
-    return scope and scope == user_scope
-
-
 _HTML_TAG_PATTERN = re.compile(r"<[^>]+>")
 _REACTION_TRAIL_PATTERN = re.compile(r"\s*\(Reactions:.*$", re.IGNORECASE)
 
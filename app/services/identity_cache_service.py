@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession, make_transient_to_detached
+from sqlmodel import Session
+
+from app.config import get_settings
+from app.models import User
+
+_PENDING_KEY = "identity_cache_pending"
+
+
+@dataclass(frozen=True)
+class CachedIdentity:
+    """What `require_session_user` needs about the signed-in user.
+
+    `user` is a detached snapshot; callers merge it into their own session
+    instead of using it directly.
+    """
+
+    session_id: str
+    user_id: int
+    user: User
+    avatar_url: Optional[str]
+    is_peer_auth_reviewer: bool
+
+
+class IdentityCache:
+    """Bounded LRU of `CachedIdentity` keyed by session id, with a TTL."""
+
+    def __init__(self, *, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = Lock()
+        self._entries: OrderedDict[str, tuple[float, CachedIdentity]] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, session_id: str) -> Optional[CachedIdentity]:
+        with self._lock:
+            item = self._entries.get(session_id)
+            if item is None:
+                return None
+            expires_at, identity = item
+            if expires_at <= time.monotonic():
+                del self._entries[session_id]
+                return None
+            self._entries.move_to_end(session_id)
+            return identity
+
+    def put(self, identity: CachedIdentity) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[identity.session_id] = (time.monotonic() + self.ttl_seconds, identity)
+            self._entries.move_to_end(identity.session_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def drop_session(self, session_id: str) -> None:
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def drop_user(self, user_id: int) -> None:
+        with self._lock:
+            stale = [key for key, (_, identity) in self._entries.items() if identity.user_id == user_id]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+_CACHE: Optional[IdentityCache] = None
+_CACHE_LOCK = Lock()
+
+
+def get_cache() -> IdentityCache:
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            settings = get_settings()
+            _CACHE = IdentityCache(
+                max_entries=settings.identity_cache_max_entries,
+                ttl_seconds=settings.identity_cache_ttl_seconds,
+            )
+        return _CACHE
+
+
+def reset_cache() -> None:
+    global _CACHE
+    with _CACHE_LOCK:
+        _CACHE = None
+
+
+def snapshot_user(user: User) -> User:
+    """Detached copy of `user` that `Session.merge(..., load=False)` accepts."""
+    copy = User(**{column.key: getattr(user, column.key) for column in User.__table__.columns})
+    make_transient_to_detached(copy)
+    return copy
+
+
+def invalidate_session(session: Optional[Session], *, session_id: str) -> None:
+    """Forget a session now and again once `session` commits."""
+    get_cache().drop_session(session_id)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, []).append(("session", session_id))
+
+
+def invalidate_user(session: Optional[Session], *, user_id: int) -> None:
+    """Forget every session of a user now and again once `session` commits.
+
+    The second drop covers requests that re-cached the old row while the
+    change was still uncommitted.
+    """
+    get_cache().drop_user(user_id)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, []).append(("user", user_id))
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _apply_pending(session: OrmSession) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    cache = get_cache()
+    for kind, key in pending:
+        if kind == "user":
+            cache.drop_user(key)
+        else:
+            cache.drop_session(key)
+
+
+@event.listens_for(OrmSession, "after_soft_rollback")
+def _discard_pending(session: OrmSession, previous_transaction) -> None:  # noqa: ANN001
+    session.info.pop(_PENDING_KEY, None)
+
+
+__all__ = [
+    "CachedIdentity",
+    "IdentityCache",
+    "get_cache",
+    "invalidate_session",
+    "invalidate_user",
+    "reset_cache",
+    "snapshot_user",
+]
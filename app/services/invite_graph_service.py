@@ -1,18 +1,118 @@
 from __future__ import annotations
 
-from collections import defaultdict, deque
 from dataclasses import dataclass, field
+from datetime import datetime
 from typing import Any, Optional
 
-from sqlmodel import Session, select
+from sqlalchemy import text
+from sqlmodel import Session
 
-from app.models import User, UserAttribute
 from app.services.user_attribute_service import INVITED_BY_USER_ID_KEY, PROFILE_PHOTO_URL_KEY
 
 
 MAX_INVITE_DEGREE = 3
 DEFAULT_MAP_DEGREE = 2
 
+# Invite links are `user_attributes` rows whose text value is the inviter's id.
+# `path` holds the ids already on the walk (",1,5,9,") so cycles terminate.
+_SUBTREE_QUERY = text(
+    """
+    WITH RECURSIVE subtree(user_id, parent_id, degree, invited_at, path) AS (
+        SELECT :root_id, NULL, 0, NULL, ',' || :root_id || ','
+        UNION ALL
+        SELECT invite.user_id, subtree.user_id, subtree.degree + 1, invite.created_at,
+               subtree.path || invite.user_id || ','
+        FROM user_attributes AS invite
+        JOIN subtree ON invite.value = CAST(subtree.user_id AS TEXT)
+        WHERE invite.key = :invite_key
+          AND subtree.degree < :max_degree
+          AND instr(subtree.path, ',' || invite.user_id || ',') = 0
+    )
+    SELECT subtree.user_id, subtree.parent_id, subtree.degree, subtree.invited_at,
+           users.username, photo.value
+    FROM subtree
+    JOIN users ON users.id = subtree.user_id
+    LEFT JOIN user_attributes AS photo
+        ON photo.user_id = subtree.user_id AND photo.key = :photo_key
+    ORDER BY subtree.degree
+    """
+)
+
+# Walks inviter links upward, stopping at a non-numeric value, a missing user,
+# or a repeat, then returns each ancestor plus its invitees other than the
+# chain member it was reached from.
+_UPSTREAM_QUERY = text(
+    """
+    WITH RECURSIVE chain(user_id, degree, invited_at, child_id, path) AS (
+        SELECT inviter.id, 1, invite.created_at, invite.user_id,
+               ',' || invite.user_id || ',' || inviter.id || ','
+        FROM user_attributes AS invite
+        JOIN users AS inviter ON inviter.id = CAST(invite.value AS INTEGER)
+        WHERE invite.user_id = :start_id
+          AND invite.key = :invite_key
+          AND CAST(CAST(invite.value AS INTEGER) AS TEXT) = invite.value
+          AND inviter.id != :start_id
+        UNION ALL
+        SELECT inviter.id, chain.degree + 1, invite.created_at, invite.user_id,
+               chain.path || inviter.id || ','
+        FROM chain
+        JOIN user_attributes AS invite ON invite.user_id = chain.user_id AND invite.key = :invite_key
+        JOIN users AS inviter ON inviter.id = CAST(invite.value AS INTEGER)
+        WHERE chain.degree < :max_degree
+          AND CAST(CAST(invite.value AS INTEGER) AS TEXT) = invite.value
+          AND instr(chain.path, ',' || inviter.id || ',') = 0
+    )
+    SELECT 'ancestor', chain.user_id, chain.degree, chain.invited_at, chain.child_id,
+           users.username, photo.value
+    FROM chain
+    JOIN users ON users.id = chain.user_id
+    LEFT JOIN user_attributes AS photo ON photo.user_id = chain.user_id AND photo.key = :photo_key
+    UNION ALL
+    SELECT 'invitee', invite.user_id, chain.degree, invite.created_at, chain.user_id,
+           users.username, photo.value
+    FROM chain
+    JOIN user_attributes AS invite
+        ON invite.key = :invite_key
+       AND invite.value = CAST(chain.user_id AS TEXT)
+       AND invite.user_id != chain.child_id
+    JOIN users ON users.id = invite.user_id
+    LEFT JOIN user_attributes AS photo ON photo.user_id = invite.user_id AND photo.key = :photo_key
+    """
+)
+
+# Id-only walks used to find whose cached map a change touches.
+_DESCENDANT_IDS_QUERY = text(
+    """
+    WITH RECURSIVE down(user_id, degree, path) AS (
+        SELECT :root_id, 0, ',' || :root_id || ','
+        UNION ALL
+        SELECT invite.user_id, down.degree + 1, down.path || invite.user_id || ','
+        FROM user_attributes AS invite
+        JOIN down ON invite.value = CAST(down.user_id AS TEXT)
+        WHERE invite.key = :invite_key
+          AND down.degree < :max_degree
+          AND instr(down.path, ',' || invite.user_id || ',') = 0
+    )
+    SELECT user_id FROM down WHERE degree > 0
+    """
+)
+
+_ANCESTOR_IDS_QUERY = text(
+    """
+    WITH RECURSIVE up(user_id, degree, path) AS (
+        SELECT :start_id, 0, ',' || :start_id || ','
+        UNION ALL
+        SELECT CAST(invite.value AS INTEGER), up.degree + 1, up.path || invite.value || ','
+        FROM up
+        JOIN user_attributes AS invite ON invite.user_id = up.user_id AND invite.key = :invite_key
+        WHERE up.degree < :max_degree
+          AND CAST(CAST(invite.value AS INTEGER) AS TEXT) = invite.value
+          AND instr(up.path, ',' || invite.value || ',') = 0
+    )
+    SELECT user_id FROM up WHERE degree > 0 ORDER BY degree
+    """
+)
+
 
 @dataclass(slots=True)
 class InviteGraphNode:
@@ -48,51 +148,64 @@ def build_invite_graph(
     root_user_id: int,
     max_degree: int = MAX_INVITE_DEGREE,
 ) -> Optional[InviteGraphNode]:
-    """Return a tree of invite relationships rooted at the given user."""
-    if max_degree <= 0:
-        max_degree = 0
-
-    root = session.get(User, root_user_id)
-    if not root:
-        return None
-
-    root_node = InviteGraphNode(
-        user_id=root.id,
-        username=root.username,
-        degree=0,
-    )
+    """Return a tree of invite relationships rooted at the given user.
+
+    The whole bounded-depth subtree, with usernames and avatars, comes back from
+    a single recursive query.
+    """
+    rows = session.execute(
+        _SUBTREE_QUERY,
+        {
+            "root_id": root_user_id,
+            "max_degree": max(0, max_degree),
+            "invite_key": INVITED_BY_USER_ID_KEY,
+            "photo_key": PROFILE_PHOTO_URL_KEY,
+        },
+    ).all()
 
-    if max_degree == 0:
-        return root_node
+    nodes: dict[int, InviteGraphNode] = {}
+    parents: dict[int, int] = {}
+    for user_id, parent_id, degree, invited_at, username, avatar_url in rows:
+        if user_id in nodes:
+            continue
+        nodes[user_id] = InviteGraphNode(
+            user_id=user_id,
+            username=username,
+            degree=degree,
+            invited_at=_isoformat(invited_at),
+            avatar_url=avatar_url or None,
+        )
+        if parent_id is not None:
+            parents[user_id] = parent_id
 
-    visited: set[int] = {root.id}
-    queue = deque([(root_node, 1)])
-    node_registry: list[InviteGraphNode] = [root_node]
+    root_node = nodes.get(root_user_id)
+    if root_node is None:
+        return None
+    for user_id, parent_id in parents.items():
+        parent_node = nodes.get(parent_id)
+        if parent_node is not None:
+            parent_node.children.append(nodes[user_id])
+    for node in nodes.values():
+        node.children.sort(key=lambda child: child.username.lower())
+    return root_node
 
-    while queue:
-        parent_node, degree = queue.popleft()
-        if degree > max_degree:
-            continue
 
-        invitees = _load_invitees(session, inviter_ids=[parent_node.user_id])
-        for invitee_user, invite_attribute in invitees.get(parent_node.user_id, []):
-            if invitee_user.id in visited:
-                continue
-            child_node = InviteGraphNode(
-                user_id=invitee_user.id,
-                username=invitee_user.username,
-                degree=degree,
-                invited_at=invite_attribute.created_at.isoformat() if invite_attribute else None,
-            )
-            parent_node.children.append(child_node)
-            visited.add(invitee_user.id)
-            queue.append((child_node, degree + 1))
-            node_registry.append(child_node)
+def invite_descendant_ids(session: Session, *, user_id: int, max_depth: int) -> list[int]:
+    """Ids of the users `user_id` invited, directly or within `max_depth` hops."""
+    rows = session.execute(
+        _DESCENDANT_IDS_QUERY,
+        {"root_id": user_id, "max_degree": max(0, max_depth), "invite_key": INVITED_BY_USER_ID_KEY},
+    ).all()
+    return [row[0] for row in rows]
 
-        parent_node.children.sort(key=lambda node: node.username.lower())
 
-    _assign_avatars(session, node_registry)
-    return root_node
+def invite_ancestor_ids(session: Session, *, user_id: int, max_depth: int) -> list[int]:
+    """Ids on the inviter chain above `user_id`, nearest first."""
+    rows = session.execute(
+        _ANCESTOR_IDS_QUERY,
+        {"start_id": user_id, "max_degree": max(0, max_depth), "invite_key": INVITED_BY_USER_ID_KEY},
+    ).all()
+    return [row[0] for row in rows]
 
 
 def build_bidirectional_invite_map(
@@ -108,157 +221,73 @@ def build_bidirectional_invite_map(
         return None
 
     upstream = _load_upstream_chain(session, start_user_id=root_user_id, max_degree=max_degree)
-    if upstream:
-        _assign_ancestor_avatars(session, upstream)
-        _attach_ancestor_invitees(
-            session,
-            ancestors=upstream,
-            start_child_id=root_user_id,
-            degree_cap=max_degree,
-        )
     return InviteMapPayload(root=downstream, upstream=upstream)
 
 
-def _load_invitees(
-    session: Session,
-    *,
-    inviter_ids: list[int],
-) -> dict[int, list[tuple[User, Optional[UserAttribute]]]]:
-    if not inviter_ids:
-        return {}
-
-    inviter_lookup = {str(inviter_id) for inviter_id in inviter_ids}
-
-    rows = session.exec(
-        select(User, UserAttribute)
-        .join(UserAttribute, UserAttribute.user_id == User.id)
-        .where(UserAttribute.key == INVITED_BY_USER_ID_KEY)
-        .where(UserAttribute.value.in_(inviter_lookup))
-    ).all()
-
-    by_inviter: dict[int, list[tuple[User, Optional[UserAttribute]]]] = defaultdict(list)
-    for user, attribute in rows:
-        if not attribute or attribute.value not in inviter_lookup:
-            continue
-        try:
-            inviter_id = int(attribute.value)
-        except (TypeError, ValueError):
-            continue
-        if inviter_id not in by_inviter:
-            by_inviter[inviter_id] = []
-        by_inviter[inviter_id].append((user, attribute))
-    return by_inviter
-
-
 def _load_upstream_chain(
     session: Session,
     *,
     start_user_id: int,
     max_degree: int,
 ) -> list[InviteAncestor]:
+    """Load the inviter chain plus each ancestor's other invitees in one recursive query."""
     if max_degree <= 0:
         return []
 
-    ancestors: list[InviteAncestor] = []
-    degree = 1
-    current_user_id = start_user_id
-    visited: set[int] = {start_user_id}
-
-    while degree <= max_degree:
-        attribute = _load_inviter_attribute(session, user_id=current_user_id)
-        if not attribute or not attribute.value:
-            break
-        try:
-            inviter_id = int(attribute.value)
-        except (TypeError, ValueError):
-            break
-
-        if inviter_id in visited:
-            break
-
-        inviter = session.get(User, inviter_id)
-        if not inviter:
-            break
-
-        ancestors.append(
-            InviteAncestor(
-                user_id=inviter.id,
-                username=inviter.username,
+    rows = session.execute(
+        _UPSTREAM_QUERY,
+        {
+            "start_id": start_user_id,
+            "max_degree": max_degree,
+            "invite_key": INVITED_BY_USER_ID_KEY,
+            "photo_key": PROFILE_PHOTO_URL_KEY,
+        },
+    ).all()
+
+    ancestors: dict[int, InviteAncestor] = {}
+    invitees: list[tuple[int, InviteGraphNode]] = []
+    for kind, user_id, degree, invited_at, anchor_id, username, avatar_url in rows:
+        if kind == "ancestor":
+            ancestors[user_id] = InviteAncestor(
+                user_id=user_id,
+                username=username,
                 degree=degree,
-                invited_at=attribute.created_at.isoformat() if attribute.created_at else None,
+                invited_at=_isoformat(invited_at),
+                avatar_url=avatar_url or None,
+            )
+            continue
+        invitees.append(
+            (
+                anchor_id,
+                InviteGraphNode(
+                    user_id=user_id,
+                    username=username,
+                    degree=min(max_degree, degree),
+                    invited_at=_isoformat(invited_at),
+                    avatar_url=avatar_url or None,
+                ),
             )
         )
 
-        visited.add(inviter_id)
-        current_user_id = inviter_id
-        degree += 1
-
-    return ancestors
-
+    for ancestor_id, node in invitees:
+        ancestor = ancestors.get(ancestor_id)
+        if ancestor is not None:
+            ancestor.invitees.append(node)
+    ordered = sorted(ancestors.values(), key=lambda ancestor: ancestor.degree)
+    for ancestor in ordered:
+        ancestor.invitees.sort(key=lambda node: node.username.lower())
+    return ordered
 
-def _load_inviter_attribute(session: Session, *, user_id: int) -> Optional[UserAttribute]:
-    return session.exec(
-        select(UserAttribute)
-        .where(UserAttribute.user_id == user_id)
-        .where(UserAttribute.key == INVITED_BY_USER_ID_KEY)
-    ).first()
 
-
-def _load_profile_photos(session: Session, user_ids: list[int]) -> dict[int, str]:
-    if not user_ids:
-        return {}
-    rows = session.exec(
-        select(UserAttribute)
-        .where(UserAttribute.user_id.in_(user_ids))
-        .where(UserAttribute.key == PROFILE_PHOTO_URL_KEY)
-    ).all()
-    return {row.user_id: row.value for row in rows if row and row.value}
-
-
-def _assign_avatars(session: Session, nodes: list[InviteGraphNode]) -> None:
-    if not nodes:
-        return
-    photos = _load_profile_photos(session, [node.user_id for node in nodes])
-    for node in nodes:
-        node.avatar_url = photos.get(node.user_id)
-
-
-def _assign_ancestor_avatars(session: Session, ancestors: list[InviteAncestor]) -> None:
-    if not ancestors:
-        return
-    photos = _load_profile_photos(session, [ancestor.user_id for ancestor in ancestors])
-    for ancestor in ancestors:
-        ancestor.avatar_url = photos.get(ancestor.user_id)
-
-
-def _attach_ancestor_invitees(
-    session: Session,
-    *,
-    ancestors: list[InviteAncestor],
-    start_child_id: int,
-    degree_cap: int,
-) -> None:
-    child_in_chain = start_child_id
-    for ancestor in ancestors:
-        invitees = _load_invitees(session, inviter_ids=[ancestor.user_id])
-        nodes: list[InviteGraphNode] = []
-        invitee_ids: list[int] = []
-        for invitee_user, invite_attribute in invitees.get(ancestor.user_id, []):
-            if invitee_user.id == child_in_chain:
-                continue
-            node = InviteGraphNode(
-                user_id=invitee_user.id,
-                username=invitee_user.username,
-                degree=min(degree_cap, ancestor.degree),
-                invited_at=invite_attribute.created_at.isoformat() if invite_attribute else None,
-            )
-            nodes.append(node)
-            invitee_ids.append(invitee_user.id)
-        nodes.sort(key=lambda node: node.username.lower())
-        if invitee_ids:
-            _assign_avatars(session, nodes)
-        ancestor.invitees = nodes
-        child_in_chain = ancestor.user_id
+def _isoformat(value: object) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat()
+    try:
+        return datetime.fromisoformat(str(value)).isoformat()
+    except ValueError:
+        return str(value)
 
 
 def serialize_invite_map(payload: InviteMapPayload) -> dict[str, Any]:
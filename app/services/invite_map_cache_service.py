@@ -1,23 +1,42 @@
 from __future__ import annotations
 
 import json
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Iterable, Optional
 
-from sqlmodel import Session
+from sqlalchemy import delete, func, or_, text
+from sqlmodel import Session, select
 
-from app.models import InviteMapCache
+from app.models import InviteMapCache, UserSession
 from app.services import invite_graph_service
 
-CACHE_VERSION = "v1"
-CACHE_TTL_SECONDS = 600  # 10 minutes
+CACHE_VERSION = "v2"
+# Maps show everyone within this many invite hops, so a change to one user only
+# stales the entries of users inside that radius.
+NEIGHBOURHOOD_DEGREE = invite_graph_service.DEFAULT_MAP_DEGREE
+WARM_BATCH_LIMIT = 200
+_DELETE_CHUNK = 500
+
+_BUMP_GENERATION = text(
+    """
+    INSERT INTO invite_graph_state (id, generation, updated_at)
+    VALUES (1, 1, :now)
+    ON CONFLICT(id) DO UPDATE SET generation = generation + 1, updated_at = :now
+    """
+)
+_READ_GENERATION = text("SELECT generation FROM invite_graph_state WHERE id = 1")
+
+
+def current_generation(session: Session) -> int:
+    """Counter bumped on every invite-graph or avatar change that stales cached maps."""
+    value = session.execute(_READ_GENERATION).scalar()
+    return int(value or 0)
 
 
 def get_cached_map(
     session: Session,
     *,
     user_id: int,
-    now: Optional[datetime] = None,
 ) -> Optional[invite_graph_service.InviteMapPayload]:
     record = session.get(InviteMapCache, user_id)
     if not record:
@@ -25,10 +44,6 @@ def get_cached_map(
     if record.version != CACHE_VERSION:
         return None
 
-    now = now or datetime.utcnow()
-    if now - record.generated_at > timedelta(seconds=CACHE_TTL_SECONDS):
-        return None
-
     try:
         payload = json.loads(record.payload)
     except json.JSONDecodeError:
@@ -42,9 +57,19 @@ def store_cached_map(
     *,
     user_id: int,
     invite_map: invite_graph_service.InviteMapPayload,
+    graph_generation: Optional[int] = None,
     version: str = CACHE_VERSION,
     generated_at: Optional[datetime] = None,
-) -> InviteMapCache:
+) -> Optional[InviteMapCache]:
+    """Persist a freshly built map.
+
+    Pass the `graph_generation` read before building; if the graph changed while
+    the map was being built the entry may already be stale, so nothing is stored
+    and None is returned.
+    """
+    if graph_generation is not None and graph_generation != current_generation(session):
+        return None
+
     data = invite_graph_service.serialize_invite_map(invite_map)
     serialized = json.dumps(data, separators=(",", ":"))
     now = generated_at or datetime.utcnow()
@@ -68,12 +93,88 @@ def store_cached_map(
 
 
 def invalidate_cache(session: Session, *, user_id: int) -> None:
-    record = session.get(InviteMapCache, user_id)
-    if record:
-        session.delete(record)
-        session.flush()
+    invalidate_many(session, [user_id])
+
+
+def invalidate_many(session: Session, user_ids: Iterable[int]) -> int:
+    """Drop the entries for `user_ids` in set-based deletes and bump the generation."""
+    unique_ids = sorted({user_id for user_id in user_ids if user_id is not None})
+    if not unique_ids:
+        return 0
+    session.execute(_BUMP_GENERATION, {"now": datetime.utcnow()})
+    removed = 0
+    for start in range(0, len(unique_ids), _DELETE_CHUNK):
+        chunk = unique_ids[start : start + _DELETE_CHUNK]
+        result = session.execute(delete(InviteMapCache).where(InviteMapCache.user_id.in_(chunk)))
+        removed += result.rowcount or 0
+    return removed
 
 
-def invalidate_many(session: Session, user_ids: Iterable[int]) -> None:
-    for user_id in set(user_ids):
-        invalidate_cache(session, user_id=user_id)
+def affected_user_ids(
+    session: Session,
+    *,
+    user_id: int,
+    inviter_ids: Optional[Iterable[Optional[int]]] = None,
+) -> set[int]:
+    """Users whose cached map shows `user_id`, under any of `inviter_ids`.
+
+    Pass both the previous and the new inviter when a link moves; leave
+    `inviter_ids` unset for changes to the user's own node (such as an avatar).
+    The neighbourhood is walked in the database so links committed by other
+    workers are seen.
+    """
+    if inviter_ids is None:
+        inviter_ids = invite_graph_service.invite_ancestor_ids(session, user_id=user_id, max_depth=1)
+
+    affected = {
+        user_id,
+        *invite_graph_service.invite_descendant_ids(session, user_id=user_id, max_depth=NEIGHBOURHOOD_DEGREE),
+    }
+    for inviter_id in inviter_ids:
+        if inviter_id is None:
+            continue
+        # The inviter's upstream sees the user in its downstream tree; the
+        # inviter's other descendants list the user among an ancestor's invitees.
+        affected.add(inviter_id)
+        affected.update(
+            invite_graph_service.invite_ancestor_ids(session, user_id=inviter_id, max_depth=NEIGHBOURHOOD_DEGREE - 1)
+        )
+        affected.update(
+            invite_graph_service.invite_descendant_ids(session, user_id=inviter_id, max_depth=NEIGHBOURHOOD_DEGREE)
+        )
+    return affected
+
+
+def warm_recent_maps(
+    session: Session,
+    *,
+    active_since: datetime,
+    limit: int = WARM_BATCH_LIMIT,
+) -> int:
+    """Build maps for recently active users that have no current entry."""
+    generation = current_generation(session)
+    user_ids = session.exec(
+        select(UserSession.user_id)
+        .join(InviteMapCache, InviteMapCache.user_id == UserSession.user_id, isouter=True)
+        .where(UserSession.last_seen_at >= active_since)
+        .where(or_(InviteMapCache.user_id.is_(None), InviteMapCache.version != CACHE_VERSION))
+        .group_by(UserSession.user_id)
+        .order_by(func.max(UserSession.last_seen_at).desc())
+        .limit(limit)
+    ).all()
+
+    warmed = 0
+    for user_id in user_ids:
+        invite_map = invite_graph_service.build_bidirectional_invite_map(
+            session,
+            root_user_id=user_id,
+            max_degree=invite_graph_service.DEFAULT_MAP_DEGREE,
+        )
+        if not invite_map:
+            continue
+        if store_cached_map(session, user_id=user_id, invite_map=invite_map, graph_generation=generation) is None:
+            # The graph moved mid-batch; the next pass picks up the rest.
+            break
+        warmed += 1
+    session.commit()
+    return warmed
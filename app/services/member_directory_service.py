@@ -1,16 +1,23 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from datetime import datetime
 from math import ceil
-from typing import Optional
+from typing import NamedTuple, Optional
 
-from sqlalchemy import exists, func, or_
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import aliased
 from sqlmodel import Session, select
 
 from app.models import User, UserAttribute
-from app.services import peer_auth_service, user_attribute_service
+from app.pagination import decode_cursor, encode_cursor
+from app.services import peer_auth_service, user_attribute_service, user_permission_service
 
 DEFAULT_PAGE_SIZE = 25
+# Counting stops just past this many matches; the page then reports an estimate.
+DEFAULT_COUNT_LIMIT = 1000
+# Upper bound for prefix ranges: sorts after any character SQLite can store.
+_PREFIX_SENTINEL = "\U0010ffff"
 
 
 @dataclass(slots=True)
@@ -21,15 +28,29 @@ class MemberDirectoryFilters:
     peer_auth_reviewer: Optional[bool] = None
 
 
+class MemberCursor(NamedTuple):
+    """Keyset position in the directory order (created_at, id), newest first."""
+
+    created_at: datetime
+    user_id: int
+
+
 @dataclass(slots=True)
 class MemberDirectoryPage:
     profiles: list[User]
     total_count: int
     page: int
-    total_pages: int
+    total_pages: Optional[int]
     page_size: int
     filters: MemberDirectoryFilters
     display_names: dict[int, str]
+    total_is_estimate: bool = False
+    has_prev: bool = False
+    has_next: bool = False
+    prev_cursor: Optional[str] = None
+    next_cursor: Optional[str] = None
+    avatar_urls: dict[int, str] = field(default_factory=dict)
+    permission_summaries: dict[int, user_permission_service.UserPermissionSummary] = field(default_factory=dict)
 
 
 def list_members(
@@ -39,46 +60,72 @@ def list_members(
     page: int = 1,
     filters: Optional[MemberDirectoryFilters] = None,
     page_size: int = DEFAULT_PAGE_SIZE,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    count_limit: int = DEFAULT_COUNT_LIMIT,
 ) -> MemberDirectoryPage:
+    """One directory page, newest members first.
+
+    `after` and `before` are cursor tokens from a previous page's
+    `next_cursor` / `prev_cursor`; `page` only labels the position. Counting
+    stops past `count_limit` matches (0 counts exactly).
+    """
     page = max(page, 1)
     page_size = max(page_size, 1)
 
     normalized_filters = _normalize_filters(filters)
 
-    base_statement = select(User)
-    count_statement = select(func.count()).select_from(User)
-
-    base_statement = _apply_filters(base_statement, normalized_filters)
-    count_statement = _apply_filters(count_statement, normalized_filters)
+    base_statement = _apply_filters(select(User), normalized_filters)
+    count_source = _apply_filters(select(User.id), normalized_filters)
 
     visibility_clause = _build_visibility_clause(session, viewer)
     if visibility_clause is not None:
         base_statement = base_statement.where(visibility_clause)
-        count_statement = count_statement.where(visibility_clause)
-
-    total_count_raw = session.exec(count_statement).one()
-    total_count = _coerce_count(total_count_raw)
-
-    total_pages = max(1, ceil(total_count / page_size)) if total_count else 1
-    current_page = min(page, total_pages) if total_pages else 1
-    offset = (current_page - 1) * page_size if total_count else 0
+        count_source = count_source.where(visibility_clause)
+
+    if count_limit > 0:
+        count_source = count_source.limit(count_limit + 1)
+    total_count = _coerce_count(session.exec(select(func.count()).select_from(count_source.subquery())).one())
+    total_is_estimate = count_limit > 0 and total_count > count_limit
+    if total_is_estimate:
+        total_count = count_limit
+
+    # `after` pages towards older members, `before` back towards newer ones.
+    cursor = parse_cursor(after)
+    older = True
+    if cursor is None:
+        cursor = parse_cursor(before)
+        older = cursor is None
+
+    statement = base_statement
+    if cursor is not None:
+        statement = statement.where(_keyset_clause(cursor, older=older))
+    if older:
+        statement = statement.order_by(User.created_at.desc(), User.id.desc())
+    else:
+        statement = statement.order_by(User.created_at.asc(), User.id.asc())
+    profiles = list(session.exec(statement.limit(page_size + 1)).all())
+    has_more = len(profiles) > page_size
+    profiles = profiles[:page_size]
+    if not older:
+        profiles.reverse()
+
+    if cursor is None:
+        has_prev, has_next = False, has_more
+    elif older:
+        has_prev, has_next = True, has_more
+    else:
+        has_prev, has_next = has_more, True
+    if not profiles:
+        # A stale cursor past either end: offer the way back to the first page.
+        has_prev, has_next = cursor is not None, False
 
-    profiles = (
-        session.exec(
-            base_statement.order_by(User.created_at.desc()).offset(offset).limit(page_size)
-        ).all()
-        if total_count
-        else []
-    )
+    total_pages = None if total_is_estimate else max(1, ceil(total_count / page_size))
+    current_page = max(2, page) if has_prev else 1
+    if total_pages is not None:
+        current_page = min(current_page, total_pages)
 
-    display_name_map: dict[int, str] = {}
-    if profiles:
-        member_ids = [profile.id for profile in profiles if profile.id is not None]
-        if member_ids:
-            display_name_map = user_attribute_service.load_display_names(
-                session,
-                user_ids=member_ids,
-            )
+    display_names, avatar_urls, permission_summaries = _load_enrichment(session, profiles)
 
     return MemberDirectoryPage(
         profiles=profiles,
@@ -87,10 +134,90 @@ def list_members(
         total_pages=total_pages,
         page_size=page_size,
         filters=normalized_filters,
-        display_names=display_name_map,
+        display_names=display_names,
+        total_is_estimate=total_is_estimate,
+        has_prev=has_prev,
+        has_next=has_next,
+        prev_cursor=encode_member_cursor(profiles[0]) if has_prev and profiles else None,
+        next_cursor=encode_member_cursor(profiles[-1]) if has_next and profiles else None,
+        avatar_urls=avatar_urls,
+        permission_summaries=permission_summaries,
     )
 
 
+def encode_member_cursor(profile: User) -> str:
+    return encode_cursor({"c": profile.created_at.isoformat(), "i": profile.id})
+
+
+def parse_cursor(token: Optional[str]) -> Optional[MemberCursor]:
+    """Decode a directory cursor token; None when it is missing or malformed (first page)."""
+    payload = decode_cursor(token)
+    if payload is None:
+        return None
+    try:
+        return MemberCursor(datetime.fromisoformat(payload["c"]), int(payload["i"]))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _keyset_clause(cursor: MemberCursor, *, older: bool):
+    if older:
+        return or_(
+            User.created_at < cursor.created_at,
+            and_(User.created_at == cursor.created_at, User.id < cursor.user_id),
+        )
+    return or_(
+        User.created_at > cursor.created_at,
+        and_(User.created_at == cursor.created_at, User.id > cursor.user_id),
+    )
+
+
+def _load_enrichment(
+    session: Session,
+    profiles: list[User],
+) -> tuple[dict[int, str], dict[int, str], dict[int, user_permission_service.UserPermissionSummary]]:
+    """Display names, avatars and permission summaries for a page in one query."""
+    member_ids = [profile.id for profile in profiles if profile.id is not None]
+    if not member_ids:
+        return {}, {}, {}
+
+    updater = aliased(User)
+    rows = session.exec(
+        select(UserAttribute, updater)
+        .outerjoin(updater, updater.id == UserAttribute.updated_by_user_id)
+        .where(UserAttribute.user_id.in_(member_ids))
+        .where(
+            or_(
+                UserAttribute.key.in_(
+                    [peer_auth_service.PEER_AUTH_REVIEWER_ATTRIBUTE_KEY, user_attribute_service.PROFILE_PHOTO_URL_KEY]
+                ),
+                UserAttribute.key.like(f"{user_attribute_service.SIGNAL_DISPLAY_NAME_PREFIX}%"),
+            )
+        )
+        .order_by(UserAttribute.updated_at.desc(), UserAttribute.id.desc())
+    ).all()
+
+    display_names: dict[int, str] = {}
+    avatar_urls: dict[int, str] = {}
+    reviewer_attributes: dict[int, UserAttribute] = {}
+    updaters: dict[int, User] = {}
+    for attribute, updated_by in rows:
+        if attribute.key == peer_auth_service.PEER_AUTH_REVIEWER_ATTRIBUTE_KEY:
+            reviewer_attributes[attribute.user_id] = attribute
+            if updated_by is not None and updated_by.id is not None:
+                updaters[updated_by.id] = updated_by
+        elif not attribute.value:
+            continue
+        elif attribute.key == user_attribute_service.PROFILE_PHOTO_URL_KEY:
+            avatar_urls[attribute.user_id] = attribute.value
+        elif attribute.user_id not in display_names:
+            # Rows are newest first, matching user_attribute_service.load_display_names.
+            display_names[attribute.user_id] = attribute.value
+
+    permission_summaries = user_permission_service.build_permission_summaries(profiles, reviewer_attributes, updaters)
+    return display_names, avatar_urls, permission_summaries
+
+
 def _normalize_filters(filters: Optional[MemberDirectoryFilters]) -> MemberDirectoryFilters:
     if not filters:
         return MemberDirectoryFilters()
@@ -133,8 +260,11 @@ def _normalize_peer_auth(value: Optional[bool | str]) -> Optional[bool]:
 
 def _apply_filters(statement, filters: MemberDirectoryFilters):
     if filters.username:
-        lowered = filters.username.lower()
-        statement = statement.where(func.lower(User.username).like(f"%{lowered}%"))
+        # Prefix range on lower(username) so ix_users_username_lower serves it.
+        prefix = _sqlite_lower(filters.username)
+        normalized_username = func.lower(User.username)
+        statement = statement.where(normalized_username >= prefix)
+        statement = statement.where(normalized_username < prefix + _PREFIX_SENTINEL)
     if filters.contact:
         lowered = filters.contact.lower()
         statement = statement.where(func.lower(User.contact_email).like(f"%{lowered}%"))
@@ -144,18 +274,17 @@ def _apply_filters(statement, filters: MemberDirectoryFilters):
         statement = statement.where(User.is_admin.is_(False))
     if filters.peer_auth_reviewer is not None:
         truthy_values = [value.lower() for value in peer_auth_service.PEER_AUTH_TRUTHY_VALUES]
-        peer_auth_query = (
-            select(UserAttribute.id)
-            .where(UserAttribute.user_id == User.id)
+        # Uncorrelated so SQLite builds the reviewer set once from ix_user_attributes_key_user_id.
+        reviewer_ids = (
+            select(UserAttribute.user_id)
             .where(UserAttribute.key == peer_auth_service.PEER_AUTH_REVIEWER_ATTRIBUTE_KEY)
             .where(func.lower(UserAttribute.value).in_(truthy_values))
         )
-        peer_auth_exists = exists(peer_auth_query)
         if filters.peer_auth_reviewer:
             statement = statement.where(
                 or_(
                     User.is_admin.is_(True),
-                    peer_auth_exists,
+                    User.id.in_(reviewer_ids),
                 )
             )
         else:
@@ -165,17 +294,23 @@ def _apply_filters(statement, filters: MemberDirectoryFilters):
                     User.is_admin.is_(None),
                 )
             )
-            statement = statement.where(~peer_auth_exists)
+            statement = statement.where(User.id.not_in(reviewer_ids))
     return statement
 
 
+def _sqlite_lower(value: str) -> str:
+    """Lower-case the way SQLite's built-in lower() does (ASCII letters only)."""
+    return "".join(char.lower() if char.isascii() else char for char in value)
+
+
 def _build_visibility_clause(session: Session, viewer: User):
     if viewer.is_admin:
         return None
 
-    invitee_ids = user_attribute_service.list_invitee_user_ids(
-        session,
-        inviter_user_id=viewer.id,
+    invitee_ids = (
+        user_attribute_service.list_invitee_user_ids(session, inviter_user_id=viewer.id)
+        if viewer.id is not None
+        else []
     )
     allowed_ids = {user_id for user_id in invitee_ids if user_id is not None}
     if viewer.id is not None:
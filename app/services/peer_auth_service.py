@@ -14,10 +14,10 @@ from app.models import (
     UserSession,
 )
 
-from . import auth_service, user_attribute_service
+from . import auth_service, identity_cache_service, session_activity_service, user_attribute_service
+from .user_attribute_service import PEER_AUTH_REVIEWER_ATTRIBUTE_KEY
 
 
-PEER_AUTH_REVIEWER_ATTRIBUTE_KEY = "peer_auth_reviewer"
 DEFAULT_PAGE_LIMIT = 25
 MAX_PAGE_LIMIT = 100
 PEER_AUTH_TRUTHY_VALUES = {"1", "true", "yes", "on", "approved", "enabled"}
@@ -192,8 +192,13 @@ def deny_peer_auth_request(
     ).all()
     for record in orphaned_sessions:
         session.delete(record)
+        identity_cache_service.invalidate_session(session, session_id=record.id)
 
+    orphaned_session_ids = [record.id for record in orphaned_sessions]
     session.commit()
+    tracker = session_activity_service.get_tracker()
+    for orphaned_session_id in orphaned_session_ids:
+        tracker.discard(orphaned_session_id)
 
     return PeerAuthDecision(
         auth_request_id=summary.auth_request_id,
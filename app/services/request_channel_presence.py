@@ -6,6 +6,7 @@ from threading import Lock
 from typing import Dict, Iterable
 
 from app.models import User
+from app.realtime.channels import EVENT_PRESENCE, publish_channel_event
 
 PRESENCE_TTL = timedelta(seconds=20)
 TYPING_TTL = timedelta(seconds=6)
@@ -22,6 +23,7 @@ class _PresenceEntry:
 
 _LOCK = Lock()
 _ENTRIES: Dict[tuple[int, int], _PresenceEntry] = {}
+_PUBLISHED: Dict[int, dict[str, object]] = {}
 
 
 def mark_presence(user: User, request_id: int, *, typing: bool = False) -> None:
@@ -40,7 +42,10 @@ def mark_presence(user: User, request_id: int, *, typing: bool = False) -> None:
         if typing:
             entry.typing_until = now + TYPING_TTL
         _ENTRIES[key] = entry
-        _prune_locked(now)
+        touched = _prune_locked(now) | {request_id}
+        deltas = _collect_deltas_locked(touched, now)
+    for changed_id, payload in deltas.items():
+        publish_channel_event(changed_id, EVENT_PRESENCE, {**payload, "typing_ttl": TYPING_TTL.total_seconds()})
 
 
 def list_presence(request_ids: Iterable[int]) -> dict[int, dict[str, object]]:
@@ -59,10 +64,32 @@ def list_presence(request_ids: Iterable[int]) -> dict[int, dict[str, object]]:
         return result
 
 
-def _prune_locked(now: datetime) -> None:
+def _collect_deltas_locked(request_ids: set[int], now: datetime) -> dict[int, dict[str, object]]:
+    """Presence payloads of `request_ids` that differ from what was last published."""
+    current: dict[int, dict[str, object]] = {request_id: {"online": 0, "typing": []} for request_id in request_ids}
+    for (request_id, _), entry in _ENTRIES.items():
+        payload = current.get(request_id)
+        if payload is None:
+            continue
+        payload["online"] += 1
+        if entry.typing_until and entry.typing_until > now:
+            payload["typing"].append(entry.username)
+    deltas: dict[int, dict[str, object]] = {}
+    for request_id, payload in current.items():
+        if _PUBLISHED.get(request_id) != payload:
+            deltas[request_id] = payload
+            if payload["online"]:
+                _PUBLISHED[request_id] = payload
+            else:
+                _PUBLISHED.pop(request_id, None)
+    return deltas
+
+
+def _prune_locked(now: datetime) -> set[int]:
     expired: list[tuple[int, int]] = []
     for key, entry in _ENTRIES.items():
         if now - entry.last_seen_at > PRESENCE_TTL:
             expired.append(key)
     for key in expired:
         _ENTRIES.pop(key, None)
+    return {request_id for request_id, _ in expired}
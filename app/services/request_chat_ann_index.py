@@ -0,0 +1,347 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+import weakref
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from .request_chat_embeddings import VectorStore
+
+KIND_AGGREGATES = "aggregates"
+KIND_COMMENTS = "comments"
+KINDS = (KIND_AGGREGATES, KIND_COMMENTS)
+INDEX_DIRNAME = "ivf"
+MIN_TRAIN_ROWS = 2048
+DEFAULT_NPROBE = 16
+TRAIN_SAMPLE_ROWS = 32768
+KMEANS_ITERATIONS = 10
+RETRAIN_GROWTH = 4
+
+_FLOAT = np.dtype("<f4")
+_INT = np.dtype("<i8")
+_CENTROIDS = "centroids.f32"
+_ASSIGNMENTS = "assignments.i64"
+_META = "meta.json"
+
+_WRITE_LOCK = threading.Lock()
+_INDEX_CACHE: dict[Path, "AnnIndex"] = {}
+# Weak, so a cached mask never keeps a replaced store's memory maps open.
+_LIVE_CACHE: dict[tuple[Path, str], tuple["weakref.ref[VectorStore]", int, np.ndarray]] = {}
+
+
+@dataclass
+class AnnIndex:
+    """Inverted-file (IVF) index over the rows of one vector store matrix.
+
+    Vectors are assigned to the nearest of `nlist` spherical k-means centroids;
+    a query scores the centroids, then the rows of the `nprobe` closest lists
+    exactly. `assignments[i]` is the list of store row `i`, so rows appended to
+    the store are indexed by assigning them and appending to the file. The
+    index is retrained after a store compaction or once the store has grown
+    `RETRAIN_GROWTH` times past the rows the centroids were trained on.
+    """
+
+    path: Path
+    kind: str
+    dimensions: int
+    centroids: np.ndarray
+    assignments: np.ndarray
+    members: np.ndarray
+    offsets: np.ndarray
+    trained_rows: int
+    store_compactions: int
+
+    @property
+    def indexed_rows(self) -> int:
+        return len(self.assignments)
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+
+@dataclass(frozen=True)
+class Neighbor:
+    row: int
+    request_id: int
+    comment_id: int | None
+    score: float
+
+
+def search(
+    store: VectorStore,
+    kind: str,
+    query: np.ndarray,
+    *,
+    k: int = 10,
+    nprobe: int = DEFAULT_NPROBE,
+) -> list[Neighbor]:
+    """Return the `k` live rows most cosine-similar to `query`.
+
+    Stores smaller than `MIN_TRAIN_ROWS` are searched exactly.
+    """
+    _forget_stale(store)
+    index = ensure_index(store, kind)
+    if index is None:
+        return exact_search(store, kind, query, k=k)
+    query_vector, query_norm = _prepare_query(query, store.dimensions)
+    if not query_norm:
+        return []
+    lists = _top_indices(index.centroids @ (query_vector / query_norm), min(nprobe, index.nlist))
+    parts = [index.members[index.offsets[item] : index.offsets[item + 1]] for item in lists]
+    candidates = np.concatenate(parts) if parts else np.zeros(0, dtype=_INT)
+    live = _live_mask(store, kind)
+    candidates = candidates[live[candidates]]
+    return _rank(store, kind, candidates, query_vector, query_norm, k)
+
+
+def exact_search(store: VectorStore, kind: str, query: np.ndarray, *, k: int = 10) -> list[Neighbor]:
+    """Brute-force cosine search over every live row; the ANN baseline."""
+    _forget_stale(store)
+    query_vector, query_norm = _prepare_query(query, store.dimensions)
+    if not query_norm:
+        return []
+    candidates = np.flatnonzero(_live_mask(store, kind))
+    return _rank(store, kind, candidates, query_vector, query_norm, k)
+
+
+def ensure_index(store: VectorStore, kind: str) -> AnnIndex | None:
+    """Load the persisted index for `store`, inserting any rows appended since it was saved."""
+    _forget_stale(store)
+    vectors, _norms = _matrices(store, kind)
+    if len(vectors) < MIN_TRAIN_ROWS:
+        return None
+    with _WRITE_LOCK:
+        index_dir = store.path / INDEX_DIRNAME / kind
+        index = _INDEX_CACHE.get(index_dir) or _load(index_dir)
+        if (
+            index is None
+            or index.dimensions != store.dimensions
+            or index.store_compactions != store.compactions
+            or index.indexed_rows > len(vectors)
+            or len(vectors) > index.trained_rows * RETRAIN_GROWTH
+        ):
+            index = build_index(store, kind)
+        elif index.indexed_rows < len(vectors):
+            index = _insert(index, vectors)
+        _INDEX_CACHE[index_dir] = index
+        return index
+
+
+def build_index(store: VectorStore, kind: str, *, nlist: int | None = None, seed: int = 0) -> AnnIndex:
+    """Train centroids on a sample of the store and assign every row."""
+    vectors, _norms = _matrices(store, kind)
+    total = len(vectors)
+    nlist = max(1, min(nlist or int(4 * math.sqrt(total)), total))
+    rng = np.random.default_rng(seed)
+    sample_rows = np.sort(rng.choice(total, size=min(total, TRAIN_SAMPLE_ROWS), replace=False))
+    centroids = _kmeans(_normalize(np.asarray(vectors[sample_rows], dtype=_FLOAT)), nlist, rng)
+    assignments = _assign(vectors, centroids)
+    index_dir = store.path / INDEX_DIRNAME / kind
+    index_dir.mkdir(parents=True, exist_ok=True)
+    _write_array(index_dir / _CENTROIDS, centroids)
+    _write_array(index_dir / _ASSIGNMENTS, assignments)
+    index = _make_index(
+        index_dir,
+        kind=kind,
+        centroids=centroids,
+        assignments=assignments,
+        trained_rows=total,
+        store_compactions=store.compactions,
+    )
+    _write_meta(index)
+    return index
+
+
+def _insert(index: AnnIndex, vectors: np.ndarray) -> AnnIndex:
+    added = _assign(vectors[index.indexed_rows :], index.centroids)
+    with open(index.path / _ASSIGNMENTS, "ab") as handle:
+        handle.truncate(index.indexed_rows * _INT.itemsize)
+        handle.write(added.tobytes())
+    updated = _make_index(
+        index.path,
+        kind=index.kind,
+        centroids=index.centroids,
+        assignments=np.concatenate([index.assignments, added]),
+        trained_rows=index.trained_rows,
+        store_compactions=index.store_compactions,
+    )
+    _write_meta(updated)
+    return updated
+
+
+def _load(index_dir: Path) -> AnnIndex | None:
+    meta_path = index_dir / _META
+    if not meta_path.exists():
+        return None
+    meta = json.loads(meta_path.read_text())
+    dims = int(meta["dimensions"])
+    rows = int(meta["indexed_rows"])
+    centroids = np.fromfile(index_dir / _CENTROIDS, dtype=_FLOAT).reshape(-1, dims)
+    assignments = np.fromfile(index_dir / _ASSIGNMENTS, dtype=_INT)
+    if len(centroids) != int(meta["nlist"]) or len(assignments) < rows:
+        return None
+    return _make_index(
+        index_dir,
+        kind=meta["kind"],
+        centroids=centroids,
+        assignments=assignments[:rows],
+        trained_rows=int(meta["trained_rows"]),
+        store_compactions=int(meta["store_compactions"]),
+    )
+
+
+def _make_index(
+    index_dir: Path,
+    *,
+    kind: str,
+    centroids: np.ndarray,
+    assignments: np.ndarray,
+    trained_rows: int,
+    store_compactions: int,
+) -> AnnIndex:
+    members = np.argsort(assignments, kind="stable").astype(_INT)
+    counts = np.bincount(assignments, minlength=len(centroids))
+    offsets = np.concatenate([[0], np.cumsum(counts)]).astype(_INT)
+    return AnnIndex(
+        path=index_dir,
+        kind=kind,
+        dimensions=centroids.shape[1],
+        centroids=centroids,
+        assignments=assignments,
+        members=members,
+        offsets=offsets,
+        trained_rows=trained_rows,
+        store_compactions=store_compactions,
+    )
+
+
+def _write_meta(index: AnnIndex) -> None:
+    payload = {
+        "kind": index.kind,
+        "dimensions": index.dimensions,
+        "nlist": index.nlist,
+        "indexed_rows": index.indexed_rows,
+        "trained_rows": index.trained_rows,
+        "store_compactions": index.store_compactions,
+    }
+    tmp_path = index.path / (_META + ".tmp")
+    tmp_path.write_text(json.dumps(payload))
+    os.replace(tmp_path, index.path / _META)
+
+
+def _write_array(path: Path, array: np.ndarray) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(np.ascontiguousarray(array).tobytes())
+    os.replace(tmp_path, path)
+
+
+def _kmeans(sample: np.ndarray, nlist: int, rng: np.random.Generator) -> np.ndarray:
+    centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assignments = _assign(sample, centroids)
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=nlist)
+        filled = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts)])[filled]
+        sums = np.zeros_like(centroids)
+        sums[filled] = np.add.reduceat(sample[order], starts, axis=0)
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            sums[empty] = sample[rng.choice(len(sample), size=len(empty))]
+        centroids = _normalize(sums)
+    return centroids
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray, chunk_rows: int = 8192) -> np.ndarray:
+    assignments = np.empty(len(vectors), dtype=_INT)
+    for start in range(0, len(vectors), chunk_rows):
+        block = np.asarray(vectors[start : start + chunk_rows], dtype=_FLOAT)
+        assignments[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+
+def _rank(
+    store: VectorStore,
+    kind: str,
+    candidates: np.ndarray,
+    query_vector: np.ndarray,
+    query_norm: float,
+    k: int,
+) -> list[Neighbor]:
+    if not len(candidates) or k <= 0:
+        return []
+    vectors, norms = _matrices(store, kind)
+    candidate_norms = np.asarray(norms[candidates])
+    dots = np.asarray(vectors[candidates]) @ query_vector
+    denominators = candidate_norms * np.float32(query_norm)
+    scores = np.divide(dots, denominators, out=np.zeros_like(dots), where=denominators > 0)
+    top = _top_indices(scores, k)
+    neighbors: list[Neighbor] = []
+    for position in top:
+        row = int(candidates[position])
+        if kind == KIND_AGGREGATES:
+            request_id, comment_id = int(store.aggregate_ids[row]), None
+        else:
+            request_id, comment_id = (int(value) for value in store.comment_rows[row])
+        neighbors.append(Neighbor(row=row, request_id=request_id, comment_id=comment_id, score=float(scores[position])))
+    return neighbors
+
+
+def _top_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+def _matrices(store: VectorStore, kind: str) -> tuple[np.ndarray, np.ndarray]:
+    if kind == KIND_AGGREGATES:
+        return store.aggregate_vectors, store.aggregate_norms
+    if kind == KIND_COMMENTS:
+        return store.comment_vectors, store.comment_norms
+    raise ValueError(f"Unknown vector kind: {kind}")
+
+
+def _forget_stale(store: VectorStore) -> None:
+    """Drop cached indexes and masks built before the store's latest compaction."""
+    for key, (_ref, compactions, _live) in list(_LIVE_CACHE.items()):
+        if key[0] == store.path and compactions != store.compactions:
+            _LIVE_CACHE.pop(key, None)
+    for kind in KINDS:
+        index_dir = store.path / INDEX_DIRNAME / kind
+        cached = _INDEX_CACHE.get(index_dir)
+        if cached is not None and cached.store_compactions != store.compactions:
+            _INDEX_CACHE.pop(index_dir, None)
+
+
+def _live_mask(store: VectorStore, kind: str) -> np.ndarray:
+    """Boolean mask of store rows still referenced by a request; cached per store mapping."""
+    key = (store.path, kind)
+    cached = _LIVE_CACHE.get(key)
+    if cached and cached[0]() is store:
+        return cached[2]
+    if kind == KIND_AGGREGATES:
+        live = np.zeros(len(store.aggregate_vectors), dtype=bool)
+        live[store.live_aggregate_rows()] = True
+    else:
+        live = store.live_comment_mask()
+    _LIVE_CACHE[key] = (weakref.ref(store), store.compactions, live)
+    return live
+
+
+def _prepare_query(query: np.ndarray, dimensions: int) -> tuple[np.ndarray, float]:
+    vector = np.asarray(query, dtype=_FLOAT)
+    if vector.shape != (dimensions,):
+        return vector, 0.0
+    return vector, float(np.linalg.norm(vector))
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0).astype(_FLOAT, copy=False)
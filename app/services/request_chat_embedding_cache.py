@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Sequence
+
+import numpy as np
+
+DB_PATH = Path("storage/cache/request_chat_embeddings/text_cache.db")
+_FLOAT = np.dtype("<f4")
+_SCHEMA_QUERIES: tuple[str, ...] = (
+    """
+    CREATE TABLE IF NOT EXISTS embedding_cache (
+        model TEXT NOT NULL,
+        text_sha256 TEXT NOT NULL,
+        dimensions INTEGER NOT NULL,
+        vector BLOB NOT NULL,
+        created_at TEXT NOT NULL,
+        PRIMARY KEY (model, text_sha256)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS embedding_run_progress (
+        run_key TEXT NOT NULL,
+        request_id INTEGER NOT NULL,
+        completed_at TEXT NOT NULL,
+        PRIMARY KEY (run_key, request_id)
+    ) WITHOUT ROWID
+    """,
+)
+_LOOKUP_CHUNK = 500
+
+
+def open_connection() -> sqlite3.Connection:
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    for query in _SCHEMA_QUERIES:
+        conn.execute(query)
+    return conn
+
+
+def connection() -> closing[sqlite3.Connection]:
+    return closing(open_connection())
+
+
+def text_key(text: str) -> str:
+    """SHA-256 of the exact text sent to the provider; the model is part of the table key."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def get_vectors(conn: sqlite3.Connection, model: str, keys: Iterable[str]) -> dict[str, list[float]]:
+    unique = sorted(set(keys))
+    found: dict[str, list[float]] = {}
+    for start in range(0, len(unique), _LOOKUP_CHUNK):
+        chunk = unique[start : start + _LOOKUP_CHUNK]
+        placeholders = ",".join("?" for _ in chunk)
+        rows = conn.execute(
+            f"SELECT text_sha256, vector FROM embedding_cache WHERE model = ? AND text_sha256 IN ({placeholders})",
+            (model, *chunk),
+        )
+        for key, blob in rows:
+            found[key] = np.frombuffer(blob, dtype=_FLOAT).tolist()
+    return found
+
+
+def put_vectors(conn: sqlite3.Connection, model: str, items: Iterable[tuple[str, Sequence[float]]]) -> int:
+    created_at = datetime.utcnow().isoformat()
+    rows = [
+        (model, key, len(vector), np.asarray(vector, dtype=_FLOAT).tobytes(), created_at)
+        for key, vector in items
+    ]
+    with conn:
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO embedding_cache (model, text_sha256, dimensions, vector, created_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+    return len(rows)
+
+
+def completed_requests(conn: sqlite3.Connection, run_key: str) -> set[int]:
+    rows = conn.execute("SELECT request_id FROM embedding_run_progress WHERE run_key = ?", (run_key,))
+    return {row[0] for row in rows}
+
+
+def mark_request_complete(conn: sqlite3.Connection, run_key: str, request_id: int) -> None:
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO embedding_run_progress (run_key, request_id, completed_at) VALUES (?, ?, ?)",
+            (run_key, request_id, datetime.utcnow().isoformat()),
+        )
+
+
+def clear_run(conn: sqlite3.Connection, run_key: str) -> None:
+    with conn:
+        conn.execute("DELETE FROM embedding_run_progress WHERE run_key = ?", (run_key,))
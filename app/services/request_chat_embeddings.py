@@ -1,19 +1,48 @@
 from __future__ import annotations
 
 import json
-import math
-from dataclasses import asdict, dataclass
-from datetime import datetime
+import os
+import re
+import threading
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Iterable, Sequence
+from typing import Iterable, Iterator, Sequence
+
+import numpy as np
 
 CACHE_DIR = Path("storage/cache/request_chat_embeddings")
+STORE_DIRNAME = "vectors"
+COMPACT_MIN_DEAD_ROWS = 1024
+
+_FLOAT = np.dtype("<f4")
+_INT = np.dtype("<i8")
+_COMMENT_VECTORS = "comments.f32"
+_COMMENT_NORMS = "comment_norms.f32"
+_COMMENT_ROWS = "comment_rows.i64"
+_AGGREGATE_VECTORS = "aggregates.f32"
+_AGGREGATE_NORMS = "aggregate_norms.f32"
+_AGGREGATE_IDS = "aggregate_ids.i64"
+_REQUESTS = "requests.i64"
+_META = "meta.json"
+
+# One fixed-width row of `requests.i64` per request id (slot = request id):
+# live flag, comment row range [start, stop), aggregate row (-1 for none),
+# generated_at in microseconds since the epoch (0 when unknown), source comment count.
+_SLOT_LIVE, _SLOT_START, _SLOT_STOP, _SLOT_AGGREGATE, _SLOT_GENERATED, _SLOT_SOURCE = range(6)
+_SLOT_WIDTH = 6
+_SLOT_BYTES = _SLOT_WIDTH * _INT.itemsize
+_EPOCH = datetime(1970, 1, 1)
+
+_WRITE_LOCK = threading.Lock()
+_STORE_CACHE: dict[Path, tuple[tuple[int, int, int], "VectorStore"]] = {}
 
 
 @dataclass
 class CommentEmbedding:
     comment_id: int
-    embedding: list[float]
+    embedding: Sequence[float]
     norm: float
 
 
@@ -25,7 +54,7 @@ class RequestEmbeddingIndex:
     vector_count: int
     dimensions: int
     comments: list[CommentEmbedding]
-    aggregate: list[float]
+    aggregate: Sequence[float]
     aggregate_norm: float
     source_comment_count: int
 
@@ -36,12 +65,109 @@ class RequestEmbeddingIndex:
             "generated_at": self.generated_at,
             "vector_count": self.vector_count,
             "dimensions": self.dimensions,
-            "aggregate": self.aggregate,
+            "aggregate": [float(value) for value in self.aggregate],
             "aggregate_norm": self.aggregate_norm,
             "source_comment_count": self.source_comment_count,
-            "comments": [asdict(comment) for comment in self.comments],
+            "comments": [
+                {
+                    "comment_id": comment.comment_id,
+                    "embedding": [float(value) for value in comment.embedding],
+                    "norm": comment.norm,
+                }
+                for comment in self.comments
+            ],
+        }
+
+
+class RequestRanges(Mapping):
+    """Read-only view of the `requests.i64` slot table as {request_id: entry}.
+
+    Lookups index the table directly, so opening a store does no work in
+    proportion to the number of requests it holds. Slots are rewritten in place,
+    so a slot pointing past the rows this mapping covers belongs to a later
+    write and is treated as absent.
+    """
+
+    def __init__(self, table: np.ndarray, *, comment_count: int, aggregate_count: int) -> None:
+        self.table = table
+        self.comment_count = comment_count
+        self.aggregate_count = aggregate_count
+
+    def __getitem__(self, request_id: int) -> dict[str, object]:
+        slot = self._slot(request_id)
+        if slot is None:
+            raise KeyError(request_id)
+        return {
+            "start": int(slot[_SLOT_START]),
+            "stop": int(slot[_SLOT_STOP]),
+            "aggregate_row": int(slot[_SLOT_AGGREGATE]),
+            "generated_at": _from_micros(int(slot[_SLOT_GENERATED])),
+            "source_comment_count": int(slot[_SLOT_SOURCE]),
         }
 
+    def __contains__(self, request_id: object) -> bool:
+        return isinstance(request_id, (int, np.integer)) and self._slot(int(request_id)) is not None
+
+    def __iter__(self) -> Iterator[int]:
+        return (int(request_id) for request_id in self.live_ids())
+
+    def __len__(self) -> int:
+        return len(self.live_ids())
+
+    def live_ids(self) -> np.ndarray:
+        if not len(self.table):
+            return np.zeros(0, dtype=_INT)
+        table = np.asarray(self.table)
+        live = (
+            (table[:, _SLOT_LIVE] != 0)
+            & (table[:, _SLOT_STOP] <= self.comment_count)
+            & (table[:, _SLOT_AGGREGATE] < self.aggregate_count)
+        )
+        return np.flatnonzero(live).astype(_INT)
+
+    def _slot(self, request_id: int) -> np.ndarray | None:
+        if request_id < 0 or request_id >= len(self.table):
+            return None
+        slot = np.array(self.table[request_id])
+        if not slot[_SLOT_LIVE] or slot[_SLOT_STOP] > self.comment_count or slot[_SLOT_AGGREGATE] >= self.aggregate_count:
+            return None
+        return slot
+
+
+@dataclass
+class VectorStore:
+    """Memory-mapped float32 vectors for every request embedded with one model.
+
+    `comment_rows[i]` holds the (request_id, comment_id) pair of `comment_vectors[i]`
+    and `aggregate_ids[j]` the request of `aggregate_vectors[j]`. Rows superseded by a
+    later write stay in the files until compaction; `requests` maps each request to
+    its live rows. `compactions` counts rewrites, which renumber every row.
+    """
+
+    path: Path
+    model: str
+    dimensions: int
+    comment_vectors: np.ndarray
+    comment_norms: np.ndarray
+    comment_rows: np.ndarray
+    aggregate_vectors: np.ndarray
+    aggregate_norms: np.ndarray
+    aggregate_ids: np.ndarray
+    requests: RequestRanges
+    compactions: int = 0
+
+    def live_aggregate_rows(self) -> np.ndarray:
+        rows = np.asarray(self.requests.table[self.requests.live_ids(), _SLOT_AGGREGATE])
+        return np.sort(rows[rows >= 0]).astype(_INT, copy=False)
+
+    def live_comment_mask(self) -> np.ndarray:
+        """Boolean mask over comment rows still referenced by a request."""
+        slots = np.asarray(self.requests.table[self.requests.live_ids()])
+        edges = np.zeros(len(self.comment_vectors) + 1, dtype=_INT)
+        np.add.at(edges, slots[:, _SLOT_START], 1)
+        np.add.at(edges, slots[:, _SLOT_STOP], -1)
+        return np.cumsum(edges[:-1]) > 0
+
 
 def build_index(
     *,
@@ -79,15 +205,281 @@ def build_index(
 
 
 def write_index(index: RequestEmbeddingIndex) -> None:
-    CACHE_DIR.mkdir(parents=True, exist_ok=True)
-    payload = index.to_dict()
-    _cache_path(index.request_id).write_text(json.dumps(payload, ensure_ascii=False, indent=2))
+    """Append a request's vectors to its model store, replacing any earlier rows."""
+    with _WRITE_LOCK:
+        for store_dir in _store_dirs():
+            if store_dir != _store_dir(index.model):
+                _drop_request(store_dir, index.request_id)
+        _append_request(index)
+        legacy = _cache_path(index.request_id)
+        if legacy.exists():
+            legacy.unlink()
 
 
 def load_index(request_id: int) -> RequestEmbeddingIndex | None:
+    for store_dir in _store_dirs():
+        store = load_store_at(store_dir)
+        if store and request_id in store.requests:
+            return _index_from_store(store, request_id)
     path = _cache_path(request_id)
     if not path.exists():
         return None
+    index = _load_json_index(path)
+    write_index(index)
+    return index
+
+
+def delete_index(request_id: int) -> None:
+    with _WRITE_LOCK:
+        for store_dir in _store_dirs():
+            _drop_request(store_dir, request_id)
+        legacy = _cache_path(request_id)
+        if legacy.exists():
+            legacy.unlink()
+
+
+def list_cached_request_ids() -> list[int]:
+    ids: set[int] = set()
+    for store_dir in _store_dirs():
+        store = load_store_at(store_dir)
+        if store:
+            ids.update(store.requests)
+    if CACHE_DIR.exists():
+        for path in CACHE_DIR.glob("request_*.json"):
+            request_id = _parse_request_id(path.name)
+            if request_id:
+                ids.add(request_id)
+    return sorted(ids)
+
+
+def migrate_json_caches() -> int:
+    """Move every legacy per-request JSON cache into the binary stores."""
+    migrated = 0
+    if not CACHE_DIR.exists():
+        return migrated
+    for path in sorted(CACHE_DIR.glob("request_*.json")):
+        if not _parse_request_id(path.name):
+            continue
+        write_index(_load_json_index(path))
+        migrated += 1
+    return migrated
+
+
+def list_stores() -> list[VectorStore]:
+    stores: list[VectorStore] = []
+    for store_dir in _store_dirs():
+        store = load_store_at(store_dir)
+        if store:
+            stores.append(store)
+    return stores
+
+
+def load_store(model: str) -> VectorStore | None:
+    return load_store_at(_store_dir(model))
+
+
+def load_store_at(store_dir: Path) -> VectorStore | None:
+    """Open a model store, reusing the mapping until its metadata or slot table changes."""
+    meta_path = store_dir / _META
+    try:
+        stat = meta_path.stat()
+    except FileNotFoundError:
+        _STORE_CACHE.pop(store_dir, None)
+        return None
+    table_path = store_dir / _REQUESTS
+    table_size = table_path.stat().st_size if table_path.exists() else 0
+    stamp = (stat.st_mtime_ns, stat.st_size, table_size)
+    cached = _STORE_CACHE.get(store_dir)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    meta = json.loads(meta_path.read_text())
+    dims = int(meta["dimensions"])
+    comment_count = int(meta["comment_rows"])
+    aggregate_count = int(meta["aggregate_rows"])
+    store = VectorStore(
+        path=store_dir,
+        model=meta["model"],
+        dimensions=dims,
+        comment_vectors=_map(store_dir / _COMMENT_VECTORS, _FLOAT, (comment_count, dims)),
+        comment_norms=_map(store_dir / _COMMENT_NORMS, _FLOAT, (comment_count,)),
+        comment_rows=_map(store_dir / _COMMENT_ROWS, _INT, (comment_count, 2)),
+        aggregate_vectors=_map(store_dir / _AGGREGATE_VECTORS, _FLOAT, (aggregate_count, dims)),
+        aggregate_norms=_map(store_dir / _AGGREGATE_NORMS, _FLOAT, (aggregate_count,)),
+        aggregate_ids=_map(store_dir / _AGGREGATE_IDS, _INT, (aggregate_count,)),
+        requests=RequestRanges(
+            _map(table_path, _INT, (table_size // _SLOT_BYTES, _SLOT_WIDTH)),
+            comment_count=comment_count,
+            aggregate_count=aggregate_count,
+        ),
+        compactions=int(meta.get("compactions", 0)),
+    )
+    _STORE_CACHE[store_dir] = (stamp, store)
+    return store
+
+
+def cosine_similarity(
+    vector_a: Sequence[float],
+    vector_b: Sequence[float],
+    *,
+    norm_a: float | None = None,
+    norm_b: float | None = None,
+) -> float:
+    """Compute cosine similarity for two equal-length vectors."""
+    array_a = np.asarray(vector_a, dtype=np.float32)
+    array_b = np.asarray(vector_b, dtype=np.float32)
+    if not array_a.size or not array_b.size or array_a.shape != array_b.shape:
+        return 0.0
+    norm_a = norm_a if norm_a is not None else float(np.linalg.norm(array_a))
+    norm_b = norm_b if norm_b is not None else float(np.linalg.norm(array_b))
+    if not norm_a or not norm_b:
+        return 0.0
+    return float(np.dot(array_a, array_b)) / (norm_a * norm_b)
+
+
+def _append_request(index: RequestEmbeddingIndex) -> None:
+    store_dir = _store_dir(index.model)
+    store_dir.mkdir(parents=True, exist_ok=True)
+    meta = _read_meta(store_dir)
+    dims = index.dimensions or len(index.aggregate)
+    if meta is None:
+        meta = {"model": index.model, "dimensions": dims, "comment_rows": 0, "aggregate_rows": 0, "live_comment_rows": 0}
+    if index.vector_count and dims != int(meta["dimensions"]):
+        raise ValueError(
+            f"Embedding dimensions {dims} do not match store {meta['model']} ({meta['dimensions']})"
+        )
+    dims = int(meta["dimensions"])
+    comment_start = int(meta["comment_rows"])
+    aggregate_row = int(meta["aggregate_rows"])
+
+    vectors = np.asarray([comment.embedding for comment in index.comments], dtype=_FLOAT).reshape(-1, dims)
+    norms = np.asarray([comment.norm for comment in index.comments], dtype=_FLOAT)
+    rows = np.asarray(
+        [(index.request_id, comment.comment_id) for comment in index.comments], dtype=_INT
+    ).reshape(-1, 2)
+    _append(store_dir / _COMMENT_VECTORS, vectors, comment_start * dims * _FLOAT.itemsize)
+    _append(store_dir / _COMMENT_NORMS, norms, comment_start * _FLOAT.itemsize)
+    _append(store_dir / _COMMENT_ROWS, rows, comment_start * 2 * _INT.itemsize)
+
+    has_aggregate = len(index.aggregate) == dims and index.vector_count > 0
+    if has_aggregate:
+        _append(
+            store_dir / _AGGREGATE_VECTORS,
+            np.asarray(index.aggregate, dtype=_FLOAT).reshape(1, dims),
+            aggregate_row * dims * _FLOAT.itemsize,
+        )
+        _append(
+            store_dir / _AGGREGATE_NORMS,
+            np.asarray([index.aggregate_norm], dtype=_FLOAT),
+            aggregate_row * _FLOAT.itemsize,
+        )
+        _append(
+            store_dir / _AGGREGATE_IDS,
+            np.asarray([index.request_id], dtype=_INT),
+            aggregate_row * _INT.itemsize,
+        )
+
+    previous = _read_slot(store_dir, index.request_id)
+    meta["comment_rows"] = comment_start + len(index.comments)
+    meta["aggregate_rows"] = aggregate_row + (1 if has_aggregate else 0)
+    meta["live_comment_rows"] = int(meta["live_comment_rows"]) + len(index.comments) - _slot_length(previous)
+    # Counts first: a crash before the slot write leaves only unreferenced rows.
+    _write_meta(store_dir, meta)
+    _write_slot(
+        store_dir,
+        index.request_id,
+        (
+            1,
+            comment_start,
+            comment_start + len(index.comments),
+            aggregate_row if has_aggregate else -1,
+            _to_micros(index.generated_at),
+            index.source_comment_count,
+        ),
+    )
+    _maybe_compact(store_dir, meta)
+
+
+def _drop_request(store_dir: Path, request_id: int) -> None:
+    meta = _read_meta(store_dir)
+    previous = _read_slot(store_dir, request_id) if meta is not None else None
+    if meta is None or previous is None:
+        return
+    _write_slot(store_dir, request_id, (0,) * _SLOT_WIDTH)
+    meta["live_comment_rows"] = int(meta["live_comment_rows"]) - _slot_length(previous)
+    _write_meta(store_dir, meta)
+    _maybe_compact(store_dir, meta)
+
+
+def _maybe_compact(store_dir: Path, meta: dict[str, object]) -> None:
+    """Rewrite the store without superseded rows once they outnumber live ones."""
+    live_rows = int(meta["live_comment_rows"])
+    dead_rows = int(meta["comment_rows"]) - live_rows
+    if dead_rows < COMPACT_MIN_DEAD_ROWS or dead_rows < live_rows:
+        return
+    store = load_store_at(store_dir)
+    if store is None:
+        return
+    table = np.array(store.requests.table)
+    live_ids = store.requests.live_ids()
+    starts = table[live_ids, _SLOT_START]
+    lengths = table[live_ids, _SLOT_STOP] - starts
+    new_starts = np.cumsum(lengths) - lengths
+    # Old row of each kept comment, in request id order.
+    comment_index = np.arange(int(lengths.sum()), dtype=_INT) + np.repeat(starts - new_starts, lengths)
+    aggregates = table[live_ids, _SLOT_AGGREGATE]
+    has_aggregate = aggregates >= 0
+    aggregate_index = aggregates[has_aggregate]
+    new_aggregates = np.full(len(live_ids), -1, dtype=_INT)
+    new_aggregates[has_aggregate] = np.arange(len(aggregate_index), dtype=_INT)
+    table[live_ids, _SLOT_START] = new_starts
+    table[live_ids, _SLOT_STOP] = new_starts + lengths
+    table[live_ids, _SLOT_AGGREGATE] = new_aggregates
+
+    _replace_file(store_dir / _COMMENT_VECTORS, np.array(store.comment_vectors[comment_index]))
+    _replace_file(store_dir / _COMMENT_NORMS, np.array(store.comment_norms[comment_index]))
+    _replace_file(store_dir / _COMMENT_ROWS, np.array(store.comment_rows[comment_index]))
+    _replace_file(store_dir / _AGGREGATE_VECTORS, np.array(store.aggregate_vectors[aggregate_index]))
+    _replace_file(store_dir / _AGGREGATE_NORMS, np.array(store.aggregate_norms[aggregate_index]))
+    _replace_file(store_dir / _AGGREGATE_IDS, np.array(store.aggregate_ids[aggregate_index]))
+    _replace_file(store_dir / _REQUESTS, table)
+    meta["comment_rows"] = len(comment_index)
+    meta["aggregate_rows"] = len(aggregate_index)
+    meta["live_comment_rows"] = len(comment_index)
+    meta["compactions"] = int(meta.get("compactions", 0)) + 1
+    _write_meta(store_dir, meta)
+
+
+def _index_from_store(store: VectorStore, request_id: int) -> RequestEmbeddingIndex:
+    entry = store.requests[request_id]
+    start, stop = int(entry["start"]), int(entry["stop"])
+    comments = [
+        CommentEmbedding(
+            comment_id=int(store.comment_rows[row][1]),
+            embedding=store.comment_vectors[row],
+            norm=float(store.comment_norms[row]),
+        )
+        for row in range(start, stop)
+    ]
+    aggregate_row = int(entry["aggregate_row"])
+    if aggregate_row >= 0:
+        aggregate: Sequence[float] = store.aggregate_vectors[aggregate_row]
+        aggregate_norm = float(store.aggregate_norms[aggregate_row])
+    else:
+        aggregate, aggregate_norm = [], 0.0
+    return RequestEmbeddingIndex(
+        request_id=request_id,
+        model=store.model,
+        generated_at=str(entry.get("generated_at", "")),
+        vector_count=len(comments),
+        dimensions=store.dimensions,
+        comments=comments,
+        aggregate=aggregate,
+        aggregate_norm=aggregate_norm,
+        source_comment_count=int(entry.get("source_comment_count", len(comments))),
+    )
+
+
+def _load_json_index(path: Path) -> RequestEmbeddingIndex:
     data = json.loads(path.read_text())
     comments_payload = data.get("comments", [])
     comments: list[CommentEmbedding] = []
@@ -113,33 +505,91 @@ def load_index(request_id: int) -> RequestEmbeddingIndex | None:
     )
 
 
-def list_cached_request_ids() -> list[int]:
-    ids: list[int] = []
-    if not CACHE_DIR.exists():
-        return ids
-    for path in CACHE_DIR.glob("request_*.json"):
-        request_id = _parse_request_id(path.name)
-        if request_id:
-            ids.append(request_id)
-    return sorted(ids)
+def _map(path: Path, dtype: np.dtype, shape: tuple[int, ...]) -> np.ndarray:
+    if not shape[0]:
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=shape)
 
 
-def cosine_similarity(
-    vector_a: Sequence[float],
-    vector_b: Sequence[float],
-    *,
-    norm_a: float | None = None,
-    norm_b: float | None = None,
-) -> float:
-    """Compute cosine similarity for two equal-length vectors."""
-    if not vector_a or not vector_b or len(vector_a) != len(vector_b):
-        return 0.0
-    norm_a = norm_a if norm_a is not None else _vector_norm(vector_a)
-    norm_b = norm_b if norm_b is not None else _vector_norm(vector_b)
-    if not norm_a or not norm_b:
-        return 0.0
-    dot = sum(a * b for a, b in zip(vector_a, vector_b))
-    return dot / (norm_a * norm_b)
+def _append(path: Path, array: np.ndarray, offset: int) -> None:
+    """Write rows at `offset`, discarding bytes left behind by an interrupted write."""
+    with open(path, "ab") as handle:
+        handle.truncate(offset)
+        handle.write(np.ascontiguousarray(array).tobytes())
+
+
+def _replace_file(path: Path, array: np.ndarray) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(np.ascontiguousarray(array).tobytes())
+    os.replace(tmp_path, path)
+
+
+def _read_slot(store_dir: Path, request_id: int) -> np.ndarray | None:
+    path = store_dir / _REQUESTS
+    if request_id < 0 or not path.exists():
+        return None
+    with open(path, "rb") as handle:
+        handle.seek(request_id * _SLOT_BYTES)
+        raw = handle.read(_SLOT_BYTES)
+    if len(raw) < _SLOT_BYTES:
+        return None
+    slot = np.frombuffer(raw, dtype=_INT)
+    return slot if slot[_SLOT_LIVE] else None
+
+
+def _write_slot(store_dir: Path, request_id: int, values: Sequence[int]) -> None:
+    """Overwrite one slot in place; writing past the end leaves zero (empty) slots between."""
+    path = store_dir / _REQUESTS
+    with open(path, "r+b" if path.exists() else "w+b") as handle:
+        handle.seek(request_id * _SLOT_BYTES)
+        handle.write(np.asarray(values, dtype=_INT).tobytes())
+
+
+def _slot_length(slot: np.ndarray | None) -> int:
+    return 0 if slot is None else int(slot[_SLOT_STOP] - slot[_SLOT_START])
+
+
+def _to_micros(value: str) -> int:
+    try:
+        moment = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return 0
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return (moment - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_micros(value: int) -> str:
+    return (_EPOCH + timedelta(microseconds=value)).isoformat() if value else ""
+
+
+def _read_meta(store_dir: Path) -> dict[str, object] | None:
+    meta_path = store_dir / _META
+    if not meta_path.exists():
+        return None
+    return json.loads(meta_path.read_text())
+
+
+def _write_meta(store_dir: Path, meta: dict[str, object]) -> None:
+    tmp_path = store_dir / (_META + ".tmp")
+    tmp_path.write_text(json.dumps(meta))
+    os.replace(tmp_path, store_dir / _META)
+
+
+def _store_root() -> Path:
+    return CACHE_DIR / STORE_DIRNAME
+
+
+def _store_dirs() -> list[Path]:
+    root = _store_root()
+    if not root.exists():
+        return []
+    return sorted(path for path in root.iterdir() if (path / _META).exists())
+
+
+def _store_dir(model: str) -> Path:
+    slug = re.sub(r"[^a-z0-9]+", "-", (model or "").lower()).strip("-") or "default"
+    return _store_root() / slug
 
 
 def _average_vectors(vectors: Iterable[Sequence[float]]) -> list[float]:
@@ -147,20 +597,13 @@ def _average_vectors(vectors: Iterable[Sequence[float]]) -> list[float]:
     if not vectors:
         return []
     dims = len(vectors[0])
-    totals = [0.0] * dims
-    for vector in vectors:
-        if len(vector) != dims:
-            continue
-        for idx in range(dims):
-            totals[idx] += float(vector[idx])
-    count = len(vectors)
-    if count == 0:
-        return []
-    return [value / count for value in totals]
+    matching = [vector for vector in vectors if len(vector) == dims]
+    totals = np.sum(np.asarray(matching, dtype=np.float64), axis=0)
+    return (totals / len(vectors)).tolist()
 
 
 def _vector_norm(vector: Sequence[float]) -> float:
-    return math.sqrt(sum(value * value for value in vector)) if vector else 0.0
+    return float(np.linalg.norm(np.asarray(vector, dtype=np.float64))) if len(vector) else 0.0
 
 
 def _cache_path(request_id: int) -> Path:
@@ -0,0 +1,719 @@
+from __future__ import annotations
+
+import json
+import math
+import sqlite3
+from contextlib import closing
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Iterable, Sequence
+
+DB_PATH = Path("storage/cache/request_chats/search_index.db")
+MATCH_ANY = "any"
+MATCH_ALL = "all"
+MATCH_MODES = (MATCH_ANY, MATCH_ALL)
+BITMAP_TOPIC = "topic"
+BITMAP_PARTICIPANT = "participant"
+# Positions are renumbered once the holes left by removed entries reach this
+# many and outnumber live entries, which keeps bitmaps within ~2x the chat size.
+COMPACT_MIN_HOLES = 64
+_ENTRY_COLUMNS = "position, comment_id, user_id, username, created_at, body, tokens, topics, ai_topics"
+
+_SCHEMA_QUERIES: tuple[str, ...] = (
+    """
+    CREATE TABLE IF NOT EXISTS chat_index_meta (
+        request_id INTEGER PRIMARY KEY,
+        generated_at TEXT NOT NULL,
+        entry_count INTEGER NOT NULL,
+        next_position INTEGER NOT NULL,
+        participants TEXT NOT NULL,
+        max_comment_id INTEGER NOT NULL DEFAULT 0,
+        synced_at TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS chat_entries (
+        request_id INTEGER NOT NULL,
+        position INTEGER NOT NULL,
+        comment_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        username TEXT NOT NULL,
+        created_at TEXT,
+        body TEXT NOT NULL,
+        tokens TEXT NOT NULL,
+        topics TEXT NOT NULL,
+        ai_topics TEXT NOT NULL,
+        PRIMARY KEY (request_id, position)
+    )
+    """,
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_chat_entries_comment
+        ON chat_entries(request_id, comment_id)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS chat_postings (
+        request_id INTEGER NOT NULL,
+        token TEXT NOT NULL,
+        position INTEGER NOT NULL,
+        PRIMARY KEY (request_id, token, position)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS chat_bitmaps (
+        request_id INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        key TEXT NOT NULL,
+        bitmap BLOB NOT NULL,
+        PRIMARY KEY (request_id, kind, key)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS chat_corpus_state (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        generation INTEGER NOT NULL
+    )
+    """,
+)
+
+_ALTERS: tuple[str, ...] = (
+    "ALTER TABLE chat_index_meta ADD COLUMN max_comment_id INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE chat_index_meta ADD COLUMN synced_at TEXT",
+)
+
+_READY_PATHS: set[Path] = set()
+
+
+@dataclass(frozen=True)
+class IndexHeader:
+    request_id: int
+    generated_at: str
+    entry_count: int
+    next_position: int
+    participants: dict[str, list[str]]
+    max_comment_id: int
+    synced_at: str | None
+
+
+@dataclass(frozen=True)
+class IndexedEntry:
+    position: int
+    comment_id: int
+    user_id: int
+    username: str
+    created_at: str | None
+    body: str
+    tokens: list[str]
+    topics: list[str]
+    ai_topics: list[str]
+
+
+@dataclass(frozen=True)
+class PostingHit:
+    entry: IndexedEntry
+    matched_tokens: list[str]
+    score: float
+
+
+def open_connection() -> sqlite3.Connection:
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    needs_schema = DB_PATH not in _READY_PATHS or not DB_PATH.exists()
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("PRAGMA synchronous=NORMAL;")
+    if needs_schema:
+        conn.execute("PRAGMA journal_mode=WAL;")
+        _migrate(conn)
+        _READY_PATHS.add(DB_PATH)
+    return conn
+
+
+def connection() -> closing[sqlite3.Connection]:
+    """Context manager that opens the index database and closes it afterwards."""
+    return closing(open_connection())
+
+
+def _migrate(conn: sqlite3.Connection) -> None:
+    for query in _SCHEMA_QUERIES:
+        conn.execute(query)
+    for statement in _ALTERS:
+        try:
+            conn.execute(statement)
+        except sqlite3.OperationalError:
+            pass
+    conn.commit()
+
+
+def replace_index(
+    conn: sqlite3.Connection,
+    *,
+    request_id: int,
+    generated_at: str,
+    participants: dict[str, list[str]],
+    entries: Sequence[IndexedEntry],
+    max_comment_id: int | None = None,
+    synced_at: str | None = None,
+) -> None:
+    """Replace every posting for a request with the supplied entries.
+
+    `max_comment_id` and `synced_at` form the replay watermark, so a later sync
+    only needs to look at comments created or deleted after them.
+    """
+    entry_rows = [_entry_row(request_id, entry) for entry in entries]
+    next_position = max((entry.position for entry in entries), default=-1) + 1
+    if max_comment_id is None:
+        max_comment_id = max((entry.comment_id for entry in entries), default=0)
+    with conn:
+        _delete_request(conn, request_id)
+        conn.executemany(
+            """
+            INSERT INTO chat_entries (
+                request_id, position, comment_id, user_id, username, created_at,
+                body, tokens, topics, ai_topics
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            entry_rows,
+        )
+        _insert_postings(conn, request_id, entries)
+        conn.execute(
+            """
+            INSERT INTO chat_index_meta (
+                request_id, generated_at, entry_count, next_position, participants,
+                max_comment_id, synced_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                request_id,
+                generated_at,
+                len(entries),
+                next_position,
+                json.dumps(participants),
+                max_comment_id,
+                synced_at or generated_at,
+            ),
+        )
+        _bump_generation(conn)
+
+
+def add_entry(
+    conn: sqlite3.Connection,
+    request_id: int,
+    *,
+    comment_id: int,
+    user_id: int,
+    username: str,
+    created_at: str | None,
+    body: str,
+    tokens: list[str],
+    topics: list[str],
+    ai_topics: list[str],
+    participant_terms: list[str],
+) -> int | None:
+    """Post a single comment into an existing index and return its position.
+
+    Returns None when the request has no index yet; callers should fall back to a
+    full rebuild in that case. Re-adding an indexed comment replaces its postings.
+    The replay watermark is left alone; see `advance_watermark`.
+    """
+    with conn:
+        header = load_header(conn, request_id)
+        if header is None:
+            return None
+        if _entry_position(conn, request_id, comment_id) is not None:
+            _remove_entry(conn, header, comment_id)
+            header = load_header(conn, request_id)
+        header = _compact_if_sparse(conn, header)
+        position = header.next_position
+        entry = IndexedEntry(
+            position=position,
+            comment_id=comment_id,
+            user_id=user_id,
+            username=username,
+            created_at=created_at,
+            body=body,
+            tokens=tokens,
+            topics=topics,
+            ai_topics=ai_topics,
+        )
+        conn.execute(
+            """
+            INSERT INTO chat_entries (
+                request_id, position, comment_id, user_id, username, created_at,
+                body, tokens, topics, ai_topics
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            _entry_row(request_id, entry),
+        )
+        conn.executemany(
+            "INSERT INTO chat_postings (request_id, token, position) VALUES (?, ?, ?)",
+            [(request_id, token, position) for token in set(tokens)],
+        )
+        corpus_changed = header.entry_count == 0
+        for topic in set(topics) | set(ai_topics):
+            corpus_changed |= _update_bit(conn, request_id, BITMAP_TOPIC, topic, position, present=True)
+        _update_bit(conn, request_id, BITMAP_PARTICIPANT, str(user_id), position, present=True)
+        participants = dict(header.participants)
+        corpus_changed |= participants.get(str(user_id)) != participant_terms
+        participants[str(user_id)] = participant_terms
+        if corpus_changed:
+            _bump_generation(conn)
+        conn.execute(
+            """
+            UPDATE chat_index_meta
+            SET entry_count = ?, next_position = ?, participants = ?
+            WHERE request_id = ?
+            """,
+            (header.entry_count + 1, position + 1, json.dumps(participants), request_id),
+        )
+    return position
+
+
+def remove_entry(conn: sqlite3.Connection, request_id: int, comment_id: int) -> bool:
+    """Drop a single comment's postings. Returns False when it was not indexed."""
+    with conn:
+        header = load_header(conn, request_id)
+        if header is None:
+            return False
+        return _remove_entry(conn, header, comment_id)
+
+
+def compact_positions(conn: sqlite3.Connection, request_id: int) -> bool:
+    """Renumber a request's entries densely when removals have left too many holes.
+
+    Returns True when the request was renumbered. `add_entry` does this on its
+    own; callers that only remove entries can run it after a batch of removals.
+    """
+    with conn:
+        header = load_header(conn, request_id)
+        if header is None:
+            return False
+        return _compact_if_sparse(conn, header) is not header
+
+
+def advance_watermark(
+    conn: sqlite3.Connection,
+    request_id: int,
+    *,
+    max_comment_id: int,
+    synced_at: str | None = None,
+) -> None:
+    """Record that comments up to `max_comment_id` (and deletions before `synced_at`) are applied."""
+    with conn:
+        conn.execute(
+            """
+            UPDATE chat_index_meta
+            SET max_comment_id = MAX(max_comment_id, ?), synced_at = COALESCE(?, synced_at)
+            WHERE request_id = ?
+            """,
+            (max_comment_id, synced_at, request_id),
+        )
+
+
+def delete_index(conn: sqlite3.Connection, request_id: int) -> None:
+    with conn:
+        _delete_request(conn, request_id)
+        _bump_generation(conn)
+
+
+def corpus_generation(conn: sqlite3.Connection) -> int:
+    """Counter bumped whenever any request's topic, participant, or entry set changes."""
+    row = conn.execute("SELECT generation FROM chat_corpus_state WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+
+def load_corpus(conn: sqlite3.Connection) -> tuple[dict[int, set[str]], dict[int, set[str]]]:
+    """Return per-request topic sets and participant terms for every non-empty index."""
+    topics: dict[int, set[str]] = {}
+    participants: dict[int, set[str]] = {}
+    for request_id, raw_participants in conn.execute(
+        "SELECT request_id, participants FROM chat_index_meta WHERE entry_count > 0"
+    ):
+        topics[request_id] = set()
+        terms: set[str] = set()
+        for values in json.loads(raw_participants or "{}").values():
+            terms.update(values)
+        participants[request_id] = terms
+    for request_id, topic in conn.execute(
+        "SELECT request_id, key FROM chat_bitmaps WHERE kind = ?",
+        (BITMAP_TOPIC,),
+    ):
+        if request_id in topics:
+            topics[request_id].add(topic)
+    return topics, participants
+
+
+def first_matching_entry(
+    conn: sqlite3.Connection,
+    request_id: int,
+    *,
+    topics: Iterable[str] = (),
+    tokens: Iterable[str] = (),
+    fallback: bool = False,
+) -> IndexedEntry | None:
+    """Return the earliest entry tagged with any of `topics` or containing any of `tokens`."""
+    positions: list[int] = []
+    topic_keys = sorted(set(topics))
+    if topic_keys:
+        mask = _union_bitmaps(conn, request_id, BITMAP_TOPIC, topic_keys)
+        if mask:
+            positions.append((mask & -mask).bit_length() - 1)
+    token_keys = sorted(set(tokens))
+    if token_keys:
+        placeholders = ",".join("?" for _ in token_keys)
+        row = conn.execute(
+            f"SELECT MIN(position) FROM chat_postings WHERE request_id = ? AND token IN ({placeholders})",
+            (request_id, *token_keys),
+        ).fetchone()
+        if row and row[0] is not None:
+            positions.append(row[0])
+    if not positions and fallback:
+        positions = _first_positions(conn, request_id, None, 1)
+    if not positions:
+        return None
+    position = min(positions)
+    return _load_entries(conn, request_id, [position]).get(position)
+
+
+def load_header(conn: sqlite3.Connection, request_id: int) -> IndexHeader | None:
+    row = conn.execute(
+        """
+        SELECT request_id, generated_at, entry_count, next_position, participants,
+               max_comment_id, synced_at
+        FROM chat_index_meta WHERE request_id = ?
+        """,
+        (request_id,),
+    ).fetchone()
+    if not row:
+        return None
+    return IndexHeader(
+        request_id=row[0],
+        generated_at=row[1],
+        entry_count=row[2],
+        next_position=row[3],
+        participants=json.loads(row[4] or "{}"),
+        max_comment_id=row[5] or 0,
+        synced_at=row[6],
+    )
+
+
+def load_entries(conn: sqlite3.Connection, request_id: int) -> list[IndexedEntry]:
+    """Return every indexed entry for a request in posting order."""
+    rows = conn.execute(
+        f"""
+        SELECT {_ENTRY_COLUMNS}
+        FROM chat_entries WHERE request_id = ? ORDER BY position
+        """,
+        (request_id,),
+    )
+    return [_entry_from_row(row) for row in rows]
+
+
+def search(
+    conn: sqlite3.Connection,
+    request_id: int,
+    *,
+    query_tokens: Sequence[str],
+    participant_ids: Iterable[int] = (),
+    topics: Iterable[str] = (),
+    match: str = MATCH_ANY,
+    limit: int,
+) -> list[PostingHit]:
+    """Resolve a query against the postings and return at most `limit` ranked hits.
+
+    Token hits are ranked by summed inverse document frequency, ties falling back to
+    chronological order. Without query tokens hits are returned chronologically.
+    """
+    if limit <= 0:
+        return []
+    if match not in MATCH_MODES:
+        raise ValueError(f"Unknown match mode: {match}")
+
+    allowed: int | None = None
+    topic_keys = sorted({topic for topic in topics if topic})
+    if topic_keys:
+        allowed = _union_bitmaps(conn, request_id, BITMAP_TOPIC, topic_keys)
+    participant_keys = sorted({str(pid) for pid in participant_ids if pid})
+    if participant_keys:
+        people = _union_bitmaps(conn, request_id, BITMAP_PARTICIPANT, participant_keys)
+        allowed = people if allowed is None else allowed & people
+    if allowed == 0:
+        return []
+
+    tokens = sorted(set(query_tokens))
+    if not tokens:
+        positions = _first_positions(conn, request_id, allowed, limit)
+        entries = _load_entries(conn, request_id, positions)
+        return [
+            PostingHit(entry=entries[position], matched_tokens=[], score=0.0)
+            for position in positions
+            if position in entries
+        ]
+
+    postings = _load_postings(conn, request_id, tokens)
+    if match == MATCH_ALL:
+        if len(postings) < len(tokens):
+            return []
+        ordered = sorted(postings.values(), key=len)
+        candidates = set(ordered[0]).intersection(*ordered[1:])
+    else:
+        candidates = set().union(*postings.values()) if postings else set()
+    if allowed is not None:
+        candidates &= _bitmap_positions(allowed)
+    if not candidates:
+        return []
+
+    header = load_header(conn, request_id)
+    total = max(header.entry_count if header else 0, 1)
+    weights = {token: math.log(1.0 + total / len(hits)) for token, hits in postings.items()}
+    scored: list[tuple[float, int, list[str]]] = []
+    for position in candidates:
+        matched = [token for token in tokens if token in postings and position in postings[token]]
+        scored.append((sum(weights[token] for token in matched), position, matched))
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    top = scored[:limit]
+    entries = _load_entries(conn, request_id, [position for _, position, _ in top])
+    return [
+        PostingHit(entry=entries[position], matched_tokens=matched, score=score)
+        for score, position, matched in top
+        if position in entries
+    ]
+
+
+def _entry_row(request_id: int, entry: IndexedEntry) -> tuple:
+    return (
+        request_id,
+        entry.position,
+        entry.comment_id,
+        entry.user_id,
+        entry.username,
+        entry.created_at,
+        entry.body,
+        json.dumps(entry.tokens),
+        json.dumps(entry.topics),
+        json.dumps(entry.ai_topics),
+    )
+
+
+def _entry_from_row(row: Sequence) -> IndexedEntry:
+    return IndexedEntry(
+        position=row[0],
+        comment_id=row[1],
+        user_id=row[2],
+        username=row[3],
+        created_at=row[4],
+        body=row[5],
+        tokens=json.loads(row[6]),
+        topics=json.loads(row[7]),
+        ai_topics=json.loads(row[8]),
+    )
+
+
+def _entry_position(conn: sqlite3.Connection, request_id: int, comment_id: int) -> int | None:
+    row = conn.execute(
+        "SELECT position FROM chat_entries WHERE request_id = ? AND comment_id = ?",
+        (request_id, comment_id),
+    ).fetchone()
+    return row[0] if row else None
+
+
+def _remove_entry(conn: sqlite3.Connection, header: IndexHeader, comment_id: int) -> bool:
+    request_id = header.request_id
+    row = conn.execute(
+        f"SELECT {_ENTRY_COLUMNS} FROM chat_entries WHERE request_id = ? AND comment_id = ?",
+        (request_id, comment_id),
+    ).fetchone()
+    if not row:
+        return False
+    entry = _entry_from_row(row)
+    conn.executemany(
+        "DELETE FROM chat_postings WHERE request_id = ? AND token = ? AND position = ?",
+        [(request_id, token, entry.position) for token in set(entry.tokens)],
+    )
+    corpus_changed = header.entry_count <= 1
+    for topic in set(entry.topics) | set(entry.ai_topics):
+        corpus_changed |= _update_bit(conn, request_id, BITMAP_TOPIC, topic, entry.position, present=False)
+    user_key = str(entry.user_id)
+    participant_gone = _update_bit(conn, request_id, BITMAP_PARTICIPANT, user_key, entry.position, present=False)
+    conn.execute(
+        "DELETE FROM chat_entries WHERE request_id = ? AND position = ?",
+        (request_id, entry.position),
+    )
+    participants = dict(header.participants)
+    if participant_gone:
+        participants.pop(user_key, None)
+        corpus_changed = True
+    if corpus_changed:
+        _bump_generation(conn)
+    conn.execute(
+        "UPDATE chat_index_meta SET entry_count = ?, participants = ? WHERE request_id = ?",
+        (max(header.entry_count - 1, 0), json.dumps(participants), request_id),
+    )
+    return True
+
+
+def _compact_if_sparse(conn: sqlite3.Connection, header: IndexHeader) -> IndexHeader:
+    """Renumber positions 0..n-1 in posting order once holes pass the threshold.
+
+    Topic and participant sets are unchanged, so the corpus generation is not bumped.
+    """
+    holes = header.next_position - header.entry_count
+    if holes < COMPACT_MIN_HOLES or holes < header.entry_count:
+        return header
+    request_id = header.request_id
+    entries = load_entries(conn, request_id)
+    # Ascending order only ever moves a row into a position already vacated.
+    conn.executemany(
+        "UPDATE chat_entries SET position = ? WHERE request_id = ? AND position = ?",
+        [(position, request_id, entry.position) for position, entry in enumerate(entries) if entry.position != position],
+    )
+    renumbered = [replace(entry, position=position) for position, entry in enumerate(entries)]
+    conn.execute("DELETE FROM chat_postings WHERE request_id = ?", (request_id,))
+    conn.execute("DELETE FROM chat_bitmaps WHERE request_id = ?", (request_id,))
+    _insert_postings(conn, request_id, renumbered)
+    conn.execute(
+        "UPDATE chat_index_meta SET entry_count = ?, next_position = ? WHERE request_id = ?",
+        (len(renumbered), len(renumbered), request_id),
+    )
+    return replace(header, entry_count=len(renumbered), next_position=len(renumbered))
+
+
+def _insert_postings(conn: sqlite3.Connection, request_id: int, entries: Sequence[IndexedEntry]) -> None:
+    """Write the token postings and topic/participant bitmaps for `entries`."""
+    postings: list[tuple[int, str, int]] = []
+    topic_bits: dict[str, int] = {}
+    participant_bits: dict[str, int] = {}
+    for entry in entries:
+        postings.extend((request_id, token, entry.position) for token in set(entry.tokens))
+        bit = 1 << entry.position
+        for topic in set(entry.topics) | set(entry.ai_topics):
+            topic_bits[topic] = topic_bits.get(topic, 0) | bit
+        user_key = str(entry.user_id)
+        participant_bits[user_key] = participant_bits.get(user_key, 0) | bit
+    conn.executemany(
+        "INSERT INTO chat_postings (request_id, token, position) VALUES (?, ?, ?)",
+        postings,
+    )
+    conn.executemany(
+        "INSERT INTO chat_bitmaps (request_id, kind, key, bitmap) VALUES (?, ?, ?, ?)",
+        [(request_id, BITMAP_TOPIC, key, _encode_bitmap(value)) for key, value in topic_bits.items()]
+        + [(request_id, BITMAP_PARTICIPANT, key, _encode_bitmap(value)) for key, value in participant_bits.items()],
+    )
+
+
+def _update_bit(
+    conn: sqlite3.Connection,
+    request_id: int,
+    kind: str,
+    key: str,
+    position: int,
+    *,
+    present: bool,
+) -> bool:
+    """Set or clear one bit of a bitmap; return True when the key appeared or vanished."""
+    row = conn.execute(
+        "SELECT bitmap FROM chat_bitmaps WHERE request_id = ? AND kind = ? AND key = ?",
+        (request_id, kind, key),
+    ).fetchone()
+    previous = _decode_bitmap(row[0]) if row else 0
+    value = previous
+    if present:
+        value |= 1 << position
+    else:
+        value &= ~(1 << position)
+    if value:
+        conn.execute(
+            """
+            INSERT INTO chat_bitmaps (request_id, kind, key, bitmap) VALUES (?, ?, ?, ?)
+            ON CONFLICT(request_id, kind, key) DO UPDATE SET bitmap = excluded.bitmap
+            """,
+            (request_id, kind, key, _encode_bitmap(value)),
+        )
+    else:
+        conn.execute(
+            "DELETE FROM chat_bitmaps WHERE request_id = ? AND kind = ? AND key = ?",
+            (request_id, kind, key),
+        )
+    return bool(previous) != bool(value)
+
+
+def _bump_generation(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        INSERT INTO chat_corpus_state (id, generation) VALUES (1, 1)
+        ON CONFLICT(id) DO UPDATE SET generation = generation + 1
+        """
+    )
+
+
+def _delete_request(conn: sqlite3.Connection, request_id: int) -> None:
+    for table in ("chat_index_meta", "chat_entries", "chat_postings", "chat_bitmaps"):
+        conn.execute(f"DELETE FROM {table} WHERE request_id = ?", (request_id,))
+
+
+def _load_postings(conn: sqlite3.Connection, request_id: int, tokens: Sequence[str]) -> dict[str, set[int]]:
+    placeholders = ",".join("?" for _ in tokens)
+    rows = conn.execute(
+        f"SELECT token, position FROM chat_postings WHERE request_id = ? AND token IN ({placeholders})",
+        (request_id, *tokens),
+    )
+    postings: dict[str, set[int]] = {}
+    for token, position in rows:
+        postings.setdefault(token, set()).add(position)
+    return postings
+
+
+def _union_bitmaps(conn: sqlite3.Connection, request_id: int, kind: str, keys: Sequence[str]) -> int:
+    placeholders = ",".join("?" for _ in keys)
+    rows = conn.execute(
+        f"SELECT bitmap FROM chat_bitmaps WHERE request_id = ? AND kind = ? AND key IN ({placeholders})",
+        (request_id, kind, *keys),
+    )
+    combined = 0
+    for (blob,) in rows:
+        combined |= _decode_bitmap(blob)
+    return combined
+
+
+def _first_positions(conn: sqlite3.Connection, request_id: int, allowed: int | None, limit: int) -> list[int]:
+    if allowed is None:
+        rows = conn.execute(
+            "SELECT position FROM chat_entries WHERE request_id = ? ORDER BY position LIMIT ?",
+            (request_id, limit),
+        )
+        return [row[0] for row in rows]
+    positions: list[int] = []
+    mask = allowed
+    while mask and len(positions) < limit:
+        lowest = mask & -mask
+        positions.append(lowest.bit_length() - 1)
+        mask ^= lowest
+    return positions
+
+
+def _load_entries(conn: sqlite3.Connection, request_id: int, positions: Sequence[int]) -> dict[int, IndexedEntry]:
+    if not positions:
+        return {}
+    placeholders = ",".join("?" for _ in positions)
+    rows = conn.execute(
+        f"""
+        SELECT {_ENTRY_COLUMNS}
+        FROM chat_entries WHERE request_id = ? AND position IN ({placeholders})
+        """,
+        (request_id, *positions),
+    )
+    entries: dict[int, IndexedEntry] = {}
+    for row in rows:
+        entry = _entry_from_row(row)
+        entries[entry.position] = entry
+    return entries
+
+
+def _encode_bitmap(value: int) -> bytes:
+    return value.to_bytes(max(1, (value.bit_length() + 7) // 8), "little")
+
+
+def _decode_bitmap(blob: bytes) -> int:
+    return int.from_bytes(blob, "little")
+
+
+def _bitmap_positions(value: int) -> set[int]:
+    bits = bin(value)[:1:-1]
+    return {idx for idx, bit in enumerate(bits) if bit == "1"}
@@ -3,6 +3,7 @@ from __future__ import annotations
 import json
 import logging
 import re
+import sqlite3
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import asdict, dataclass
 from datetime import datetime
@@ -10,15 +11,17 @@ import os
 from pathlib import Path
 from typing import Callable, Sequence
 
-from sqlmodel import Session
+from sqlmodel import Session, select
 
-from . import chat_reaction_parser, request_comment_service
+from app.models import RequestComment, User
+from . import chat_reaction_parser, request_chat_search_index, request_comment_service
 
 logger = logging.getLogger(__name__)
 
 CACHE_DIR = Path("storage/cache/request_chats")
 TOKEN_PATTERN = re.compile(r"[a-z0-9@#]+")
 DEFAULT_RESULT_LIMIT = 20
+MATCH_MODES = request_chat_search_index.MATCH_MODES
 _CPU_COUNT = os.cpu_count() or 4
 DEFAULT_CLASSIFIER_WORKERS = max(2, min(8, _CPU_COUNT))
 CLASSIFIER_WORKER_LIMIT = max(
@@ -28,6 +31,9 @@ CLASSIFIER_WORKER_LIMIT = max(
 
 ClassifierFn = Callable[[int, str], list[str]]
 
+# Requests whose persisted index has been reconciled with the database by this process.
+_SYNCED_REQUEST_IDS: set[int] = set()
+
 TOPIC_KEYWORDS: dict[str, tuple[str, ...]] = {
     "housing": ("housing", "apartment", "apt", "lease", "room", "shelter"),
     "transport": ("ride", "car", "drive", "transport", "bus", "train"),
@@ -58,6 +64,16 @@ class ChatSearchIndex:
     entries: list[ChatSearchEntry]
 
 
+@dataclass
+class ChatIndexSummary:
+    """Cache metadata for a request's persisted chat index, without its entries."""
+
+    request_id: int
+    generated_at: str
+    entry_count: int
+    participants: dict[str, list[str]]
+
+
 @dataclass
 class ChatSearchResult:
     comment_id: int
@@ -78,6 +94,7 @@ def refresh_chat_index(
     extra_classifier: ClassifierFn | None = None,
 ) -> ChatSearchIndex:
     """Rebuild and persist the chat search index for a request."""
+    synced_at = datetime.utcnow()
     rows, _ = request_comment_service.list_comments(session, help_request_id)
     entries: list[ChatSearchEntry] = []
     participant_terms: dict[str, list[str]] = {}
@@ -116,11 +133,110 @@ def refresh_chat_index(
         entries=entries,
     )
     _write_cache(index)
+    _write_search_index(index, synced_at=synced_at.isoformat())
+    _SYNCED_REQUEST_IDS.add(help_request_id)
     logger.info("[%s] Request chat index refreshed (%s entries)", help_request_id, len(entries))
     return index
 
 
+def index_comment(session: Session, help_request_id: int) -> None:
+    """Post newly created comments for a request without rebuilding the whole index.
+
+    Replays every live comment above the stored `max_comment_id` watermark, which
+    is normally just the comment that was created.
+    """
+    with request_chat_search_index.connection() as conn:
+        header = request_chat_search_index.load_header(conn, help_request_id)
+        if header is None:
+            refresh_chat_index(session, help_request_id)
+            return
+        _replay_new_comments(session, conn, header)
+
+
+def unindex_comment(help_request_id: int, comment_id: int) -> bool:
+    """Remove a deleted comment's postings. Returns False when it was not indexed."""
+    with request_chat_search_index.connection() as conn:
+        return request_chat_search_index.remove_entry(conn, help_request_id, comment_id)
+
+
+def sync_chat_index(session: Session, help_request_id: int) -> ChatIndexSummary:
+    """Bring a persisted index up to date by replaying only the delta since its watermark.
+
+    New comments are those above `max_comment_id`; deletions are comments whose
+    `deleted_at` is at or after the last `synced_at`. Requests without an index
+    fall back to a JSON cache migration or a full rebuild. Entries stay in the
+    index; use `load_chat_index` when they are needed.
+    """
+    with request_chat_search_index.connection() as conn:
+        header = request_chat_search_index.load_header(conn, help_request_id)
+        if header is None:
+            cached = _load_json_cache(help_request_id)
+            if cached is None:
+                return _summarize(refresh_chat_index(session, help_request_id))
+            _write_search_index(cached)
+            header = request_chat_search_index.load_header(conn, help_request_id)
+
+        synced_at = datetime.utcnow()
+        added = _replay_new_comments(session, conn, header)
+        removed = 0
+        if header.synced_at:
+            deleted_stmt = (
+                select(RequestComment.id)
+                .where(RequestComment.help_request_id == help_request_id)
+                .where(RequestComment.deleted_at.is_not(None))
+                .where(RequestComment.deleted_at >= datetime.fromisoformat(header.synced_at))
+            )
+            for comment_id in session.exec(deleted_stmt).all():
+                if request_chat_search_index.remove_entry(conn, help_request_id, comment_id):
+                    removed += 1
+            if removed:
+                request_chat_search_index.compact_positions(conn, help_request_id)
+        request_chat_search_index.advance_watermark(
+            conn,
+            help_request_id,
+            max_comment_id=header.max_comment_id,
+            synced_at=synced_at.isoformat(),
+        )
+        header = request_chat_search_index.load_header(conn, help_request_id)
+
+    _SYNCED_REQUEST_IDS.add(help_request_id)
+    if added or removed:
+        logger.info(
+            "[%s] Request chat index synced (+%s/-%s entries)",
+            help_request_id,
+            added,
+            removed,
+        )
+    return _summary_from_header(header)
+
+
 def load_chat_index(help_request_id: int) -> ChatSearchIndex | None:
+    with request_chat_search_index.connection() as conn:
+        header = request_chat_search_index.load_header(conn, help_request_id)
+        if header is not None:
+            return ChatSearchIndex(
+                request_id=header.request_id,
+                generated_at=header.generated_at,
+                entry_count=header.entry_count,
+                participants=header.participants,
+                entries=[
+                    ChatSearchEntry(
+                        comment_id=entry.comment_id,
+                        user_id=entry.user_id,
+                        username=entry.username,
+                        created_at=entry.created_at,
+                        body=entry.body,
+                        tokens=entry.tokens,
+                        topics=entry.topics,
+                        ai_topics=entry.ai_topics,
+                    )
+                    for entry in request_chat_search_index.load_entries(conn, help_request_id)
+                ],
+            )
+    return _load_json_cache(help_request_id)
+
+
+def _load_json_cache(help_request_id: int) -> ChatSearchIndex | None:
     cache_path = _cache_path(help_request_id)
     if not cache_path.exists():
         return None
@@ -149,7 +265,34 @@ def load_chat_index(help_request_id: int) -> ChatSearchIndex | None:
     )
 
 
+def ensure_chat_synced(session: Session, help_request_id: int) -> None:
+    """Sync a request's index once per process; later calls are no-ops."""
+    if help_request_id not in _SYNCED_REQUEST_IDS:
+        sync_chat_index(session, help_request_id)
+
+
+def migrate_json_caches() -> int:
+    """Copy every legacy JSON chat cache that has no persisted index into SQLite."""
+    migrated = 0
+    if not CACHE_DIR.exists():
+        return migrated
+    with request_chat_search_index.connection() as conn:
+        for path in sorted(CACHE_DIR.glob("request_*.json")):
+            number = path.stem[len("request_") :]
+            if not number.isdigit():
+                continue
+            if request_chat_search_index.load_header(conn, int(number)) is not None:
+                continue
+            cached = _load_json_cache(int(number))
+            if cached is None:
+                continue
+            _write_search_index(cached)
+            migrated += 1
+    return migrated
+
+
 def ensure_chat_index(session: Session, help_request_id: int) -> ChatSearchIndex:
+    ensure_chat_synced(session, help_request_id)
     index = load_chat_index(help_request_id)
     if index:
         return index
@@ -164,37 +307,44 @@ def search_chat(
     participant_ids: Sequence[int] | None = None,
     topics: Sequence[str] | None = None,
     limit: int = DEFAULT_RESULT_LIMIT,
-) -> tuple[ChatSearchIndex, list[ChatSearchResult]]:
-    index = ensure_chat_index(session, help_request_id)
+    match: str = request_chat_search_index.MATCH_ANY,
+) -> tuple[ChatIndexSummary, list[ChatSearchResult]]:
+    """Search a request chat through its inverted index.
+
+    `match="any"` returns comments containing at least one query token and
+    `match="all"` requires every token. Alongside the hits it returns the index
+    summary (entry count, participants), not the entries themselves.
+    """
     query_tokens = _extract_tokens(query.lower()) if query else []
-    participant_filter = set(participant_ids or [])
     topic_filter = {topic.lower() for topic in topics or [] if topic}
-    matches: list[ChatSearchResult] = []
-
-    for entry in index.entries:
-        if participant_filter and entry.user_id not in participant_filter:
-            continue
-        candidate_topics = set(entry.topics) | set(entry.ai_topics)
-        if topic_filter and not (topic_filter & candidate_topics):
-            continue
-        matched_tokens = _match_tokens(entry.tokens, query_tokens)
-        if query_tokens and not matched_tokens:
-            continue
-        result = ChatSearchResult(
-            comment_id=entry.comment_id,
-            user_id=entry.user_id,
-            username=entry.username,
-            created_at=entry.created_at,
-            body=entry.body,
-            topics=entry.topics,
-            ai_topics=entry.ai_topics,
-            matched_tokens=matched_tokens,
-            anchor=f"comment-{entry.comment_id}",
+    index = _load_search_header(help_request_id) if help_request_id in _SYNCED_REQUEST_IDS else None
+    if index is None:
+        index = sync_chat_index(session, help_request_id)
+    with request_chat_search_index.connection() as conn:
+        hits = request_chat_search_index.search(
+            conn,
+            help_request_id,
+            query_tokens=query_tokens,
+            participant_ids=participant_ids or [],
+            topics=topic_filter,
+            match=match,
+            limit=limit,
         )
-        matches.append(result)
-        if len(matches) >= limit:
-            break
 
+    matches = [
+        ChatSearchResult(
+            comment_id=hit.entry.comment_id,
+            user_id=hit.entry.user_id,
+            username=hit.entry.username,
+            created_at=hit.entry.created_at,
+            body=hit.entry.body,
+            topics=hit.entry.topics,
+            ai_topics=hit.entry.ai_topics,
+            matched_tokens=hit.matched_tokens,
+            anchor=f"comment-{hit.entry.comment_id}",
+        )
+        for hit in hits
+    ]
     return index, matches
 
 
@@ -255,13 +405,6 @@ def _detect_topics(text: str) -> list[str]:
     return found
 
 
-def _match_tokens(entry_tokens: list[str], query_tokens: list[str]) -> list[str]:
-    if not query_tokens:
-        return []
-    entry_set = set(entry_tokens)
-    return sorted(token for token in query_tokens if token in entry_set)
-
-
 def _write_cache(index: ChatSearchIndex) -> None:
     CACHE_DIR.mkdir(parents=True, exist_ok=True)
     payload = {
@@ -274,5 +417,94 @@ def _write_cache(index: ChatSearchIndex) -> None:
     _cache_path(index.request_id).write_text(json.dumps(payload, ensure_ascii=False, indent=2))
 
 
+def _write_search_index(index: ChatSearchIndex, *, synced_at: str | None = None) -> None:
+    with request_chat_search_index.connection() as conn:
+        request_chat_search_index.replace_index(
+            conn,
+            request_id=index.request_id,
+            generated_at=index.generated_at,
+            participants=index.participants,
+            entries=[
+                request_chat_search_index.IndexedEntry(
+                    position=position,
+                    comment_id=entry.comment_id,
+                    user_id=entry.user_id,
+                    username=entry.username,
+                    created_at=entry.created_at,
+                    body=entry.body,
+                    tokens=entry.tokens,
+                    topics=entry.topics,
+                    ai_topics=entry.ai_topics,
+                )
+                for position, entry in enumerate(index.entries)
+            ],
+            synced_at=synced_at,
+        )
+
+
+def _replay_new_comments(
+    session: Session,
+    conn: sqlite3.Connection,
+    header: request_chat_search_index.IndexHeader,
+) -> int:
+    stmt = (
+        select(RequestComment, User)
+        .join(User, User.id == RequestComment.user_id)
+        .where(RequestComment.help_request_id == header.request_id)
+        .where(RequestComment.id > header.max_comment_id)
+        .order_by(RequestComment.created_at.asc(), RequestComment.id.asc())
+    )
+    rows = session.exec(stmt).all()
+    added = 0
+    max_comment_id = header.max_comment_id
+    for comment, user in rows:
+        max_comment_id = max(max_comment_id, comment.id)
+        if comment.deleted_at is not None:
+            continue
+        normalized_body = (comment.body or "").strip()
+        lowered = normalized_body.lower()
+        request_chat_search_index.add_entry(
+            conn,
+            header.request_id,
+            comment_id=comment.id,
+            user_id=user.id,
+            username=user.username,
+            created_at=comment.created_at.isoformat() if comment.created_at else None,
+            body=normalized_body,
+            tokens=_extract_tokens(lowered),
+            topics=_detect_topics(lowered),
+            ai_topics=[],
+            participant_terms=_participant_terms(user.username),
+        )
+        added += 1
+    if max_comment_id != header.max_comment_id:
+        request_chat_search_index.advance_watermark(conn, header.request_id, max_comment_id=max_comment_id)
+    return added
+
+
+def _load_search_header(help_request_id: int) -> ChatIndexSummary | None:
+    with request_chat_search_index.connection() as conn:
+        header = request_chat_search_index.load_header(conn, help_request_id)
+    return _summary_from_header(header) if header else None
+
+
+def _summary_from_header(header: request_chat_search_index.IndexHeader) -> ChatIndexSummary:
+    return ChatIndexSummary(
+        request_id=header.request_id,
+        generated_at=header.generated_at,
+        entry_count=header.entry_count,
+        participants=header.participants,
+    )
+
+
+def _summarize(index: ChatSearchIndex) -> ChatIndexSummary:
+    return ChatIndexSummary(
+        request_id=index.request_id,
+        generated_at=index.generated_at,
+        entry_count=index.entry_count,
+        participants=index.participants,
+    )
+
+
 def _cache_path(help_request_id: int) -> Path:
     return CACHE_DIR / f"request_{help_request_id}.json"
@@ -1,17 +1,49 @@
 from __future__ import annotations
 
-from collections import defaultdict
+import heapq
+import sqlite3
+from collections import Counter
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable
 
+import numpy as np
 from sqlmodel import Session, select
 
+from app.config import get_settings
 from app.models import HELP_REQUEST_STATUS_DRAFT, HelpRequest
-from . import request_chat_embeddings, request_chat_search_service
+from . import request_chat_ann_index, request_chat_embeddings, request_chat_search_index, request_chat_search_service
 
-CACHE_DIR = request_chat_search_service.CACHE_DIR
 EMBEDDING_WEIGHT = 4.0
 EMBEDDING_ONLY_MIN_SIMILARITY = 0.78
+ANN_CANDIDATES = 64
+
+
+@dataclass
+class RelatedCorpus:
+    """Topic and participant inverted sets over every indexed request chat.
+
+    Rebuilt only when the search index's corpus generation moves, so scoring a
+    request is a handful of set lookups instead of a pass over every chat cache.
+    """
+
+    generation: int
+    topics: dict[int, set[str]]
+    participants: dict[int, set[str]]
+    topic_index: dict[str, set[int]]
+    participant_index: dict[str, set[int]]
+
+
+@dataclass
+class _AggregateMatrix:
+    store: request_chat_embeddings.VectorStore
+    request_ids: np.ndarray
+    vectors: np.ndarray
+    norms: np.ndarray
+
+
+_CORPUS_CACHE: dict[Path, RelatedCorpus] = {}
+_AGGREGATE_CACHE: dict[Path, _AggregateMatrix] = {}
+_JSON_MIGRATED: set[Path] = set()
 
 
 def suggest_related_requests(
@@ -22,133 +54,221 @@ def suggest_related_requests(
     min_overlap: int = 2,
 ) -> list[dict[str, object]]:
     """Return related chat snippets from other requests based on topic/entity overlap."""
-    current_index = request_chat_search_service.ensure_chat_index(session, help_request_id)
+    request_chat_search_service.ensure_chat_synced(session, help_request_id)
     current_embeddings = request_chat_embeddings.load_index(help_request_id)
-    current_topics = _aggregate_topics(current_index)
-    current_participants = _aggregate_participants(current_index)
-
-    if not current_topics and not current_participants and not (
-        current_embeddings and current_embeddings.aggregate
-    ):
-        return []
-
-    scores: list[tuple[int, float, dict[str, object]]] = []
-    for cache_file in CACHE_DIR.glob("request_*.json"):
-        other_id = _parse_request_id(cache_file.name)
-        if not other_id or other_id == help_request_id:
-            continue
-        other_index = request_chat_search_service.load_chat_index(other_id)
-        if not other_index or not other_index.entries:
-            continue
-        overlap_topics = current_topics & _aggregate_topics(other_index)
-        overlap_people = current_participants & _aggregate_participants(other_index)
-        other_embeddings = request_chat_embeddings.load_index(other_id) if current_embeddings else None
-        base_score = len(overlap_topics) * 1.5 + len(overlap_people)
-        similarity = _embedding_similarity(current_embeddings, other_embeddings)
-        combined_score = base_score
-        if similarity:
-            combined_score += similarity * EMBEDDING_WEIGHT
-        include = base_score >= min_overlap
-        match_type = "overlap" if include else None
-        fallback_snippet = False
-        if similarity and similarity >= EMBEDDING_ONLY_MIN_SIMILARITY:
-            if include:
-                match_type = "hybrid"
-            else:
-                include = True
-                match_type = "semantic"
-                fallback_snippet = True
-        if not include:
-            continue
-        snippet = _top_snippet(
-            other_index,
-            overlap_topics,
-            overlap_people,
-            fallback=fallback_snippet,
-        )
-        scores.append(
-            (
-                other_id,
-                combined_score,
-                {
-                    "request_id": other_id,
-                    "score": combined_score,
-                    "topics": sorted(overlap_topics),
-                    "participants": sorted(overlap_people),
-                    "snippet": snippet,
-                    "embedding_similarity": similarity,
-                    "match_type": match_type,
-                },
-            )
+    with request_chat_search_index.connection() as conn:
+        corpus = load_corpus(conn)
+        current_topics = corpus.topics.get(help_request_id, set())
+        current_participants = corpus.participants.get(help_request_id, set())
+
+        if not current_topics and not current_participants and not (
+            current_embeddings and len(current_embeddings.aggregate)
+        ):
+            return []
+
+        topic_hits: Counter[int] = Counter()
+        for topic in current_topics:
+            topic_hits.update(corpus.topic_index.get(topic, ()))
+        people_hits: Counter[int] = Counter()
+        for term in current_participants:
+            people_hits.update(corpus.participant_index.get(term, ()))
+
+        candidates = set(topic_hits) | set(people_hits)
+        similarities = _embedding_similarities(current_embeddings, candidates)
+        candidates.update(
+            request_id
+            for request_id, similarity in similarities.items()
+            if similarity >= EMBEDDING_ONLY_MIN_SIMILARITY
         )
+        candidates.discard(help_request_id)
+
+        heap: list[tuple[float, int, str, bool, float]] = []
+        for other_id in candidates:
+            if other_id not in corpus.topics:
+                continue
+            base_score = topic_hits[other_id] * 1.5 + people_hits[other_id]
+            similarity = similarities.get(other_id, 0.0)
+            combined_score = base_score
+            if similarity:
+                combined_score += similarity * EMBEDDING_WEIGHT
+            include = base_score >= min_overlap
+            match_type = "overlap" if include else None
+            fallback_snippet = False
+            if similarity and similarity >= EMBEDDING_ONLY_MIN_SIMILARITY:
+                if include:
+                    match_type = "hybrid"
+                else:
+                    include = True
+                    match_type = "semantic"
+                    fallback_snippet = True
+            if not include:
+                continue
+            heap.append((-combined_score, other_id, match_type, fallback_snippet, similarity))
+        heapq.heapify(heap)
 
-    scores.sort(key=lambda item: item[1], reverse=True)
-    related: list[dict[str, object]] = []
-    for other_id, _score, payload in scores[:limit]:
-        request_payload = _serialize_request(session, other_id)
-        if not request_payload:
-            continue
-        payload["request"] = request_payload
-        related.append(payload)
+        related: list[dict[str, object]] = []
+        while heap and len(related) < limit:
+            batch = [heapq.heappop(heap) for _ in range(min(limit - len(related), len(heap)))]
+            requests = _load_requests(session, [item[1] for item in batch])
+            for negative_score, other_id, match_type, fallback_snippet, similarity in batch:
+                request_payload = _serialize_request(requests.get(other_id))
+                if not request_payload:
+                    continue
+                overlap_topics = current_topics & corpus.topics[other_id]
+                overlap_people = current_participants & corpus.participants[other_id]
+                entry = request_chat_search_index.first_matching_entry(
+                    conn,
+                    other_id,
+                    topics=overlap_topics,
+                    tokens=overlap_people,
+                    fallback=fallback_snippet,
+                )
+                related.append(
+                    {
+                        "request_id": other_id,
+                        "score": -negative_score,
+                        "topics": sorted(overlap_topics),
+                        "participants": sorted(overlap_people),
+                        "snippet": _serialize_snippet(entry),
+                        "embedding_similarity": similarity,
+                        "match_type": match_type,
+                        "request": request_payload,
+                    }
+                )
     return related
 
 
-def _aggregate_topics(index: request_chat_search_service.ChatSearchIndex) -> set[str]:
-    topics: set[str] = set()
-    for entry in index.entries:
-        topics.update(entry.topics)
-        topics.update(entry.ai_topics)
-    return topics
+def load_corpus(conn: sqlite3.Connection) -> RelatedCorpus:
+    """Return the cached corpus for the current index generation, rebuilding if stale."""
+    db_path = request_chat_search_index.DB_PATH
+    if db_path not in _JSON_MIGRATED:
+        request_chat_search_service.migrate_json_caches()
+        _JSON_MIGRATED.add(db_path)
+    generation = request_chat_search_index.corpus_generation(conn)
+    cached = _CORPUS_CACHE.get(db_path)
+    if cached and cached.generation == generation:
+        return cached
+    topics, participants = request_chat_search_index.load_corpus(conn)
+    corpus = RelatedCorpus(
+        generation=generation,
+        topics=topics,
+        participants=participants,
+        topic_index=_invert(topics),
+        participant_index=_invert(participants),
+    )
+    _CORPUS_CACHE[db_path] = corpus
+    return corpus
 
 
-def _aggregate_participants(index: request_chat_search_service.ChatSearchIndex) -> set[str]:
-    names: set[str] = set()
-    for terms in index.participants.values():
-        names.update(terms)
-    return names
+def _invert(sets: dict[int, set[str]]) -> dict[str, set[int]]:
+    inverted: dict[str, set[int]] = {}
+    for request_id, keys in sets.items():
+        for key in keys:
+            inverted.setdefault(key, set()).add(request_id)
+    return inverted
 
 
-def _parse_request_id(filename: str) -> int | None:
-    if not filename.startswith("request_") or not filename.endswith(".json"):
-        return None
-    number = filename[len("request_") : -len(".json")]
-    if not number.isdigit():
+def _embedding_similarities(
+    current: request_chat_embeddings.RequestEmbeddingIndex | None,
+    candidates: set[int],
+) -> dict[int, float]:
+    """Score requests embedded with the current model against its aggregate vector.
+
+    Exact mode scores every request in one matrix-vector product. With the ANN
+    index enabled, only the nearest `ANN_CANDIDATES` requests plus the overlap
+    `candidates` are scored, which keeps large federated stores fast.
+    """
+    if not current or not len(current.aggregate) or not current.aggregate_norm:
+        return {}
+    store = request_chat_embeddings.load_store(current.model)
+    if not store or store.dimensions != len(current.aggregate):
+        return {}
+    query = np.asarray(current.aggregate, dtype=np.float32)
+    if get_settings().chat_embedding_ann_enabled:
+        if request_chat_ann_index.ensure_index(store, request_chat_ann_index.KIND_AGGREGATES) is not None:
+            return _ann_similarities(store, query, float(current.aggregate_norm), candidates)
+    matrix = _aggregate_matrix(store)
+    if not len(matrix.request_ids):
+        return {}
+    scores = _cosine_rows(matrix.vectors, matrix.norms, query, float(current.aggregate_norm))
+    return {
+        int(request_id): float(score)
+        for request_id, score in zip(matrix.request_ids, scores)
+        if score
+    }
+
+
+def _ann_similarities(
+    store: request_chat_embeddings.VectorStore,
+    query: np.ndarray,
+    query_norm: float,
+    candidates: set[int],
+) -> dict[int, float]:
+    neighbors = request_chat_ann_index.search(
+        store,
+        request_chat_ann_index.KIND_AGGREGATES,
+        query,
+        k=ANN_CANDIDATES,
+    )
+    similarities = {neighbor.request_id: neighbor.score for neighbor in neighbors if neighbor.score}
+    pending = [
+        (request_id, int(store.requests[request_id]["aggregate_row"]))
+        for request_id in candidates
+        if request_id not in similarities
+        and request_id in store.requests
+        and int(store.requests[request_id]["aggregate_row"]) >= 0
+    ]
+    if pending:
+        rows = np.array([row for _request_id, row in pending], dtype=np.int64)
+        scores = _cosine_rows(store.aggregate_vectors[rows], store.aggregate_norms[rows], query, query_norm)
+        for (request_id, _row), score in zip(pending, scores):
+            if score:
+                similarities[request_id] = float(score)
+    return similarities
+
+
+def _cosine_rows(vectors: np.ndarray, norms: np.ndarray, query: np.ndarray, query_norm: float) -> np.ndarray:
+    denominators = np.asarray(norms) * np.float32(query_norm)
+    dots = np.asarray(vectors) @ query
+    return np.divide(dots, denominators, out=np.zeros_like(dots), where=denominators > 0)
+
+
+def _aggregate_matrix(store: request_chat_embeddings.VectorStore) -> _AggregateMatrix:
+    cached = _AGGREGATE_CACHE.get(store.path)
+    if cached and cached.store is store:
+        return cached
+    rows = store.live_aggregate_rows()
+    matrix = _AggregateMatrix(
+        store=store,
+        request_ids=np.asarray(store.aggregate_ids[rows]),
+        vectors=np.asarray(store.aggregate_vectors[rows]),
+        norms=np.asarray(store.aggregate_norms[rows]),
+    )
+    _AGGREGATE_CACHE[store.path] = matrix
+    return matrix
+
+
+def _load_requests(session: Session, request_ids: list[int]) -> dict[int, HelpRequest]:
+    if not request_ids:
+        return {}
+    stmt = select(HelpRequest).where(HelpRequest.id.in_(request_ids))
+    return {request.id: request for request in session.exec(stmt).all()}
+
+
+def _serialize_snippet(entry: request_chat_search_index.IndexedEntry | None) -> dict[str, object] | None:
+    if entry is None:
         return None
-    return int(number)
+    return {
+        "body": entry.body,
+        "anchor": f"comment-{entry.comment_id}",
+        "topics": entry.topics,
+        "ai_topics": entry.ai_topics,
+        "username": entry.username,
+        "created_at": entry.created_at,
+    }
 
 
-def _top_snippet(
-    index: request_chat_search_service.ChatSearchIndex,
-    overlap_topics: set[str],
-    overlap_people: set[str],
-    *,
-    fallback: bool = False,
-) -> dict[str, object] | None:
-    for entry in index.entries:
-        if overlap_topics.intersection(entry.topics) or overlap_people.intersection(entry.tokens):
-            return {
-                "body": entry.body,
-                "anchor": f"comment-{entry.comment_id}",
-                "topics": entry.topics,
-                "ai_topics": entry.ai_topics,
-                "username": entry.username,
-                "created_at": entry.created_at,
-            }
-    if fallback and index.entries:
-        entry = index.entries[0]
-        return {
-            "body": entry.body,
-            "anchor": f"comment-{entry.comment_id}",
-            "topics": entry.topics,
-            "ai_topics": entry.ai_topics,
-            "username": entry.username,
-            "created_at": entry.created_at,
-        }
-    return None
-
-
-def _serialize_request(session: Session, request_id: int) -> dict[str, object] | None:
-    request = session.get(HelpRequest, request_id)
+def _serialize_request(request: HelpRequest | None) -> dict[str, object] | None:
     if not request:
         return None
     if request.status == HELP_REQUEST_STATUS_DRAFT:
@@ -158,17 +278,3 @@ def _serialize_request(session: Session, request_id: int) -> dict[str, object] |
         "title": request.title,
         "status": request.status,
     }
-
-
-def _embedding_similarity(
-    current: request_chat_embeddings.RequestEmbeddingIndex | None,
-    other: request_chat_embeddings.RequestEmbeddingIndex | None,
-) -> float:
-    if not current or not current.aggregate or not other or not other.aggregate:
-        return 0.0
-    return request_chat_embeddings.cosine_similarity(
-        current.aggregate,
-        other.aggregate,
-        norm_a=current.aggregate_norm,
-        norm_b=other.aggregate_norm,
-    )
@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import logging
+import re
+import weakref
+from threading import Lock
+from typing import Iterable, Optional, Sequence, Union
+
+from sqlalchemy import Float, Integer, and_, bindparam, func, or_, select as sa_select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.sql.elements import ColumnElement
+from sqlmodel import Session, select
+
+from app.models import HELP_REQUEST_STATUS_DRAFT, HelpRequest, RequestComment, User
+
+logger = logging.getLogger(__name__)
+
+REQUESTS_FTS_TABLE = "help_requests_fts"
+COMMENTS_FTS_TABLE = "request_comments_fts"
+REQUEST_COLUMNS = ("title", "description")
+# bm25 column weights: a title hit counts more than a description hit.
+_REQUEST_WEIGHTS = "10.0, 1.0"
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# External-content tables: the text lives in the source tables and triggers keep the
+# index current for every writer (routes, services, sync imports).
+_SCHEMA_QUERIES: tuple[str, ...] = (
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {REQUESTS_FTS_TABLE} USING fts5(
+        title, description,
+        content='help_requests', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {REQUESTS_FTS_TABLE}_ai AFTER INSERT ON help_requests BEGIN
+        INSERT INTO {REQUESTS_FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {REQUESTS_FTS_TABLE}_ad AFTER DELETE ON help_requests BEGIN
+        INSERT INTO {REQUESTS_FTS_TABLE}({REQUESTS_FTS_TABLE}, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {REQUESTS_FTS_TABLE}_au AFTER UPDATE OF title, description ON help_requests BEGIN
+        INSERT INTO {REQUESTS_FTS_TABLE}({REQUESTS_FTS_TABLE}, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {REQUESTS_FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {COMMENTS_FTS_TABLE} USING fts5(
+        body,
+        content='request_comments', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {COMMENTS_FTS_TABLE}_ai AFTER INSERT ON request_comments BEGIN
+        INSERT INTO {COMMENTS_FTS_TABLE}(rowid, body) VALUES (new.id, new.body);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {COMMENTS_FTS_TABLE}_ad AFTER DELETE ON request_comments BEGIN
+        INSERT INTO {COMMENTS_FTS_TABLE}({COMMENTS_FTS_TABLE}, rowid, body) VALUES ('delete', old.id, old.body);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {COMMENTS_FTS_TABLE}_au AFTER UPDATE OF body ON request_comments BEGIN
+        INSERT INTO {COMMENTS_FTS_TABLE}({COMMENTS_FTS_TABLE}, rowid, body) VALUES ('delete', old.id, old.body);
+        INSERT INTO {COMMENTS_FTS_TABLE}(rowid, body) VALUES (new.id, new.body);
+    END
+    """,
+)
+
+_AVAILABLE: "weakref.WeakKeyDictionary[Engine, bool]" = weakref.WeakKeyDictionary()
+_AVAILABLE_LOCK = Lock()
+
+Terms = Union[str, Iterable[str], None]
+
+
+def ensure_index(engine: Engine) -> bool:
+    """Create the FTS5 tables and triggers if needed; False when FTS5 is unavailable.
+
+    A newly created index is filled from the existing rows.
+    """
+    if engine.dialect.name != "sqlite":
+        _remember(engine, False)
+        return False
+    try:
+        with engine.begin() as connection:
+            created = not _index_exists(connection)
+            for query in _SCHEMA_QUERIES:
+                connection.exec_driver_sql(query)
+            if created:
+                connection.exec_driver_sql(f"INSERT INTO {REQUESTS_FTS_TABLE}({REQUESTS_FTS_TABLE}) VALUES ('rebuild')")
+                connection.exec_driver_sql(f"INSERT INTO {COMMENTS_FTS_TABLE}({COMMENTS_FTS_TABLE}) VALUES ('rebuild')")
+    except OperationalError:
+        logger.warning("SQLite FTS5 unavailable; request search uses LIKE matching", exc_info=True)
+        _remember(engine, False)
+        return False
+    if created:
+        logger.info("Request full-text index built")
+    _remember(engine, True)
+    return True
+
+
+def is_available(session: Session) -> bool:
+    engine = session.get_bind()
+    available = _AVAILABLE.get(engine)
+    if available is None:
+        available = engine.dialect.name == "sqlite" and _index_exists(session.connection())
+        _remember(engine, available)
+    return available
+
+
+def reset() -> None:
+    with _AVAILABLE_LOCK:
+        _AVAILABLE.clear()
+
+
+def _remember(engine: Engine, available: bool) -> None:
+    with _AVAILABLE_LOCK:
+        _AVAILABLE[engine] = available
+
+
+def _index_exists(connection: Connection) -> bool:
+    row = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (COMMENTS_FTS_TABLE,),
+    ).first()
+    return row is not None
+
+
+def tokenize(terms: Terms) -> list[str]:
+    """Lower-cased word tokens of a query string or keyword list, without duplicates."""
+    if terms is None:
+        return []
+    if isinstance(terms, str):
+        terms = [terms]
+    tokens: list[str] = []
+    for term in terms:
+        for token in _TOKEN_PATTERN.findall((term or "").lower()):
+            if token not in tokens:
+                tokens.append(token)
+    return tokens
+
+
+def build_match_expression(
+    tokens: Sequence[str],
+    *,
+    match_all: bool = True,
+    columns: Optional[Sequence[str]] = None,
+) -> Optional[str]:
+    """FTS5 MATCH string with each token as a quoted prefix query."""
+    if not tokens:
+        return None
+    joiner = " AND " if match_all else " OR "
+    expression = joiner.join(f'"{token}"*' for token in tokens)
+    if columns:
+        expression = "{" + " ".join(columns) + "} : (" + expression + ")"
+    return expression
+
+
+def _hits(table: str, match: str, *, weights: str = ""):
+    score = f"bm25({table}, {weights})" if weights else f"bm25({table})"
+    return (
+        text(f"SELECT rowid AS id, {score} AS score FROM {table} WHERE {table} MATCH :match")
+        .bindparams(bindparam("match", match, unique=True))
+        .columns(id=Integer, score=Float)
+        .subquery()
+    )
+
+
+def _like_condition(columns: Sequence, tokens: Sequence[str], *, match_all: bool) -> ColumnElement:
+    per_token = [or_(*(column.ilike(f"%{token}%") for column in columns)) for token in tokens]
+    return and_(*per_token) if match_all else or_(*per_token)
+
+
+def request_text_condition(
+    session: Session,
+    terms: Terms,
+    *,
+    match_all: bool = True,
+    columns: Sequence[str] = REQUEST_COLUMNS,
+) -> Optional[ColumnElement]:
+    """WHERE clause matching help requests by title/description text; None when `terms` is empty."""
+    tokens = tokenize(terms)
+    if not tokens:
+        return None
+    if is_available(session):
+        hits = _hits(REQUESTS_FTS_TABLE, build_match_expression(tokens, match_all=match_all, columns=columns))
+        return HelpRequest.id.in_(sa_select(hits.c.id))
+    return _like_condition([getattr(HelpRequest, name) for name in columns], tokens, match_all=match_all)
+
+
+def comment_text_condition(session: Session, terms: Terms, *, match_all: bool = True) -> Optional[ColumnElement]:
+    """WHERE clause matching request comments by body text; None when `terms` is empty."""
+    tokens = tokenize(terms)
+    if not tokens:
+        return None
+    if is_available(session):
+        hits = _hits(COMMENTS_FTS_TABLE, build_match_expression(tokens, match_all=match_all))
+        return RequestComment.id.in_(sa_select(hits.c.id))
+    return _like_condition([RequestComment.body], tokens, match_all=match_all)
+
+
+def request_visibility_clause(user: User) -> Optional[ColumnElement]:
+    """SQL form of who may see a request: admins, its author, public scope, or a shared scope."""
+    if user.is_admin:
+        return None
+    scope = func.lower(func.coalesce(HelpRequest.sync_scope, ""))
+    clauses = [HelpRequest.created_by_user_id == user.id, scope == "public"]
+    user_scope = (user.sync_scope or "").lower()
+    if user_scope:
+        clauses.append(scope == user_scope)
+    return or_(*clauses)
+
+
+def search_requests(session: Session, terms: Terms, *, user: User, limit: int, match_all: bool = False) -> list[HelpRequest]:
+    """Visible, non-draft requests matching `terms`, best bm25 match first.
+
+    Without FTS5 (or without terms) the newest updates come first.
+    """
+    tokens = tokenize(terms)
+    stmt = select(HelpRequest).where(HelpRequest.status != HELP_REQUEST_STATUS_DRAFT)
+    visibility = request_visibility_clause(user)
+    if visibility is not None:
+        stmt = stmt.where(visibility)
+    if tokens and is_available(session):
+        hits = _hits(
+            REQUESTS_FTS_TABLE,
+            build_match_expression(tokens, match_all=match_all),
+            weights=_REQUEST_WEIGHTS,
+        )
+        stmt = stmt.join(hits, hits.c.id == HelpRequest.id).order_by(hits.c.score, HelpRequest.updated_at.desc())
+    else:
+        if tokens:
+            stmt = stmt.where(_like_condition([HelpRequest.title, HelpRequest.description], tokens, match_all=match_all))
+        stmt = stmt.order_by(HelpRequest.updated_at.desc())
+    return list(session.exec(stmt.limit(limit)).all())
+
+
+def search_comments(
+    session: Session,
+    terms: Terms,
+    *,
+    user: User,
+    limit: int,
+    match_all: bool = False,
+) -> list[tuple[RequestComment, HelpRequest, User]]:
+    """Visible, undeleted comments matching `terms` with their request and author, best match first."""
+    tokens = tokenize(terms)
+    stmt = (
+        select(RequestComment, HelpRequest, User)
+        .join(HelpRequest, HelpRequest.id == RequestComment.help_request_id)
+        .join(User, User.id == RequestComment.user_id)
+        .where(RequestComment.deleted_at.is_(None))
+    )
+    visibility = request_visibility_clause(user)
+    if visibility is not None:
+        stmt = stmt.where(visibility)
+    if tokens and is_available(session):
+        hits = _hits(COMMENTS_FTS_TABLE, build_match_expression(tokens, match_all=match_all))
+        stmt = stmt.join(hits, hits.c.id == RequestComment.id).order_by(hits.c.score, RequestComment.created_at.desc())
+    else:
+        if tokens:
+            stmt = stmt.where(_like_condition([RequestComment.body], tokens, match_all=match_all))
+        stmt = stmt.order_by(RequestComment.created_at.desc())
+    return list(session.exec(stmt.limit(limit)).all())
+
+
+__all__ = [
+    "COMMENTS_FTS_TABLE",
+    "REQUESTS_FTS_TABLE",
+    "build_match_expression",
+    "comment_text_condition",
+    "ensure_index",
+    "is_available",
+    "request_text_condition",
+    "request_visibility_clause",
+    "reset",
+    "search_comments",
+    "search_requests",
+    "tokenize",
+]
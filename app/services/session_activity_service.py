@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Dict, Optional
+
+from sqlalchemy import bindparam, or_, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.config import get_settings
+from app.models import UserSession
+
+logger = logging.getLogger(__name__)
+
+_SESSIONS = UserSession.__table__
+_UPDATE_LAST_SEEN = (
+    update(_SESSIONS)
+    .where(_SESSIONS.c.id == bindparam("b_id"))
+    .where(or_(_SESSIONS.c.last_seen_at.is_(None), _SESSIONS.c.last_seen_at < bindparam("b_seen")))
+    .values(last_seen_at=bindparam("b_seen"))
+)
+
+
+class SessionActivityTracker:
+    """Buffers `last_seen_at` moves and writes them in one batched UPDATE.
+
+    A request only queues a write when the stored value is older than
+    `granularity`. Until the next flush the newer value is set on the loaded
+    record without marking it dirty, so the request sees it but does not write
+    it. The UPDATE never moves a value backwards.
+    """
+
+    def __init__(self, *, granularity: timedelta) -> None:
+        self.granularity = granularity
+        self._lock = Lock()
+        self._pending: Dict[str, datetime] = {}
+
+    def record(self, session_record: UserSession, *, now: Optional[datetime] = None) -> bool:
+        """Note activity on `session_record`; True when a write was queued."""
+        now = now or datetime.utcnow()
+        last_seen = session_record.last_seen_at
+        with self._lock:
+            pending = self._pending.get(session_record.id)
+            if pending is not None:
+                self._pending[session_record.id] = max(pending, now)
+                queued = True
+            elif last_seen is None or now - last_seen >= self.granularity:
+                self._pending[session_record.id] = now
+                queued = True
+            else:
+                queued = False
+        if queued:
+            set_committed_value(session_record, "last_seen_at", now)
+        return queued
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self, engine: Engine) -> int:
+        """Write every buffered value; returns the number of sessions written."""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+        rows = [{"b_id": session_id, "b_seen": seen_at} for session_id, seen_at in batch.items()]
+        try:
+            with engine.begin() as connection:
+                connection.execute(_UPDATE_LAST_SEEN, rows)
+        except Exception:
+            with self._lock:
+                for session_id, seen_at in batch.items():
+                    current = self._pending.get(session_id)
+                    self._pending[session_id] = seen_at if current is None else max(current, seen_at)
+            raise
+        return len(rows)
+
+    def discard(self, session_id: str) -> None:
+        """Drop the buffered write for a session that has been deleted."""
+        with self._lock:
+            self._pending.pop(session_id, None)
+
+
+_TRACKER: Optional[SessionActivityTracker] = None
+_TRACKER_LOCK = Lock()
+
+
+def get_tracker() -> SessionActivityTracker:
+    global _TRACKER
+    with _TRACKER_LOCK:
+        if _TRACKER is None:
+            settings = get_settings()
+            _TRACKER = SessionActivityTracker(
+                granularity=timedelta(seconds=max(0, settings.session_touch_granularity_seconds)),
+            )
+        return _TRACKER
+
+
+def reset_tracker() -> None:
+    global _TRACKER
+    with _TRACKER_LOCK:
+        _TRACKER = None
+
+
+def buffering_enabled() -> bool:
+    return get_settings().session_touch_flush_seconds > 0
+
+
+def flush_pending(engine: Engine) -> int:
+    return get_tracker().flush(engine)
+
+
+__all__ = [
+    "SessionActivityTracker",
+    "buffering_enabled",
+    "flush_pending",
+    "get_tracker",
+    "reset_tracker",
+]
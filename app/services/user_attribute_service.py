@@ -12,7 +12,11 @@ INVITE_TOKEN_USED_KEY = "invite_token_used"
 PROFILE_PHOTO_URL_KEY = "profile_photo_url"
 UI_HIDE_CAPTIONS_KEY = "ui_hide_captions"
 UI_CAPTION_DISMISSALS_KEY = "ui_caption_dismissals"
-_SIGNAL_DISPLAY_NAME_PREFIX = "signal_display_name:"
+PEER_AUTH_REVIEWER_ATTRIBUTE_KEY = "peer_auth_reviewer"
+# Public so member_directory_service can match display names in its enrichment query.
+SIGNAL_DISPLAY_NAME_PREFIX = "signal_display_name:"
+# Keys folded into the cached session identity (avatar, peer-auth reviewer flag).
+_IDENTITY_KEYS = (PROFILE_PHOTO_URL_KEY, PEER_AUTH_REVIEWER_ATTRIBUTE_KEY)
 
 
 def get_attribute(session: Session, *, user_id: int, key: str) -> Optional[str]:
@@ -53,10 +57,10 @@ def load_display_names(
         UserAttribute.user_id.in_(user_ids)
     )
     if group_slug:
-        key = f"{_SIGNAL_DISPLAY_NAME_PREFIX}{group_slug}"
+        key = f"{SIGNAL_DISPLAY_NAME_PREFIX}{group_slug}"
         statement = statement.where(UserAttribute.key == key)
     else:
-        statement = statement.where(UserAttribute.key.like(f"{_SIGNAL_DISPLAY_NAME_PREFIX}%"))
+        statement = statement.where(UserAttribute.key.like(f"{SIGNAL_DISPLAY_NAME_PREFIX}%"))
     statement = statement.order_by(UserAttribute.updated_at.desc(), UserAttribute.id.desc())
 
     rows = session.exec(statement).all()
@@ -126,18 +130,8 @@ def set_attribute(
 
     session.flush()
 
-    if key == INVITED_BY_USER_ID_KEY:
-        affected_user_ids = {user_id}
-        for raw_value in (value, previous_value):
-            if not raw_value:
-                continue
-            try:
-                affected_user_ids.add(int(raw_value))
-            except (TypeError, ValueError):
-                continue
-        from app.services import invite_map_cache_service
-
-        invite_map_cache_service.invalidate_many(session, affected_user_ids)
+    _invalidate_invite_maps(session, user_id=user_id, key=key, previous_value=previous_value, value=value)
+    _invalidate_identity(session, user_id=user_id, key=key, previous_value=previous_value, value=value)
 
     return record
 
@@ -150,5 +144,53 @@ def delete_attribute(session: Session, *, user_id: int, key: str) -> None:
         )
     ).first()
     if record:
+        previous_value = record.value
         session.delete(record)
         session.flush()
+        _invalidate_invite_maps(session, user_id=user_id, key=key, previous_value=previous_value, value=None)
+        _invalidate_identity(session, user_id=user_id, key=key, previous_value=previous_value, value=None)
+
+
+def _invalidate_invite_maps(
+    session: Session,
+    *,
+    user_id: int,
+    key: str,
+    previous_value: Optional[str],
+    value: Optional[str],
+) -> None:
+    """Drop cached invite maps that display this user's link or avatar."""
+    if key not in (INVITED_BY_USER_ID_KEY, PROFILE_PHOTO_URL_KEY) or previous_value == value:
+        return
+    from app.services import invite_map_cache_service
+
+    inviter_ids = None
+    if key == INVITED_BY_USER_ID_KEY:
+        inviter_ids = [_parse_user_id(previous_value), _parse_user_id(value)]
+    affected = invite_map_cache_service.affected_user_ids(session, user_id=user_id, inviter_ids=inviter_ids)
+    invite_map_cache_service.invalidate_many(session, affected)
+
+
+def _invalidate_identity(
+    session: Session,
+    *,
+    user_id: int,
+    key: str,
+    previous_value: Optional[str],
+    value: Optional[str],
+) -> None:
+    """Drop cached session identities that show this user's avatar or reviewer flag."""
+    if key not in _IDENTITY_KEYS or previous_value == value:
+        return
+    from app.services import identity_cache_service
+
+    identity_cache_service.invalidate_user(session, user_id=user_id)
+
+
+def _parse_user_id(value: Optional[str]) -> Optional[int]:
+    if not value:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
@@ -63,6 +63,15 @@ def load_permission_summaries(
             if updater.id is not None:
                 updater_map[updater.id] = updater
 
+    return build_permission_summaries(users, attribute_map, updater_map)
+
+
+def build_permission_summaries(
+    users: Iterable[User],
+    attribute_map: dict[int, UserAttribute],
+    updater_map: dict[int, User],
+) -> dict[int, UserPermissionSummary]:
+    """Summaries from already-loaded reviewer attributes (by user id) and their updaters (by id)."""
     summaries: dict[int, UserPermissionSummary] = {}
     for user in users:
         if user.id is None:
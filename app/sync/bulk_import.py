@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+
+from sqlalchemy import insert, update
+from sqlmodel import Session, SQLModel, select
+
+from app.models import HelpRequest, InviteToken, RequestComment, User
+from app.sync.export_import import (
+    MANIFEST_NAME,
+    _maybe_int,
+    _parse_datetime,
+    _parse_request_body,
+    _parse_sync_file,
+)
+
+DEFAULT_CHUNK_SIZE = 2000
+# SQLite caps bound parameters per statement; stay well under the old 999 limit.
+_IN_CHUNK = 500
+
+ProgressCallback = Callable[["BulkImportStats"], None]
+
+
+@dataclass
+class BulkImportStats:
+    files: int = 0
+    chunks: int = 0
+    inserted: Counter = field(default_factory=Counter)
+    updated: Counter = field(default_factory=Counter)
+
+    def summary(self) -> str:
+        parts = [
+            f"{entity} +{self.inserted[entity]}/~{self.updated[entity]}"
+            for entity in ("user", "request", "comment", "invite")
+            if self.inserted[entity] or self.updated[entity]
+        ]
+        return f"{self.files} files in {self.chunks} chunk(s)" + (f" ({', '.join(parts)})" if parts else "")
+
+
+class BulkSyncImporter:
+    """Streams sync files into per-entity buffers and applies them in bulk.
+
+    Each flush prefetches the primary keys already present with chunked `IN`
+    queries, then issues one executemany INSERT and one bulk UPDATE per entity
+    type, and commits. Rows keep the semantics of the per-row importer: users
+    match by id then username and only overwrite the fields the file carries;
+    requests, comments and invites replace the stored row.
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        *,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        progress: Optional[ProgressCallback] = None,
+    ) -> None:
+        self.session = session
+        self.chunk_size = max(1, chunk_size)
+        self.progress = progress
+        self.stats = BulkImportStats()
+        self._users: dict[Any, dict[str, Any]] = {}
+        self._requests: dict[Any, dict[str, Any]] = {}
+        self._comments: dict[Any, dict[str, Any]] = {}
+        self._invites: dict[Any, dict[str, Any]] = {}
+        self._anonymous = 0
+
+    def run(self, paths: Iterable[Path]) -> BulkImportStats:
+        for path in paths:
+            self.add_file(path)
+        self.flush()
+        return self.stats
+
+    def add_file(self, path: Path) -> None:
+        headers, body = _parse_sync_file(path)
+        entity = headers.get("Entity")
+        if entity == "user":
+            self._add_user(headers)
+        elif entity == "request":
+            self._add_request(headers, body)
+        elif entity == "invite":
+            self._add_invite(headers)
+        self.stats.files += 1
+        if self._buffered() >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffered():
+            return
+        self._flush_users()
+        self._flush_replacements("request", HelpRequest, HelpRequest.id, self._requests)
+        self._flush_replacements("comment", RequestComment, RequestComment.id, self._comments)
+        self._flush_replacements("invite", InviteToken, InviteToken.token, self._invites)
+        self.session.commit()
+        self.stats.chunks += 1
+        if self.progress:
+            self.progress(self.stats)
+
+    def _buffered(self) -> int:
+        return len(self._users) + len(self._requests) + len(self._comments) + len(self._invites)
+
+    def _key(self, value: Any) -> Any:
+        if value is not None:
+            return value
+        # Rows without a key are always inserts; give each its own buffer slot.
+        self._anonymous += 1
+        return ("new", self._anonymous)
+
+    def _add_user(self, headers: dict[str, str]) -> None:
+        row: dict[str, Any] = {
+            "id": _maybe_int(headers.get("ID")),
+            "username": headers.get("Username"),
+            "sync_scope": headers.get("Sync-Scope", "public"),
+        }
+        if "Contact-Email" in headers:
+            row["contact_email"] = headers.get("Contact-Email") or None
+        created_at = _parse_datetime(headers.get("Updated-At"))
+        if created_at:
+            row["created_at"] = created_at
+        self._users[self._key(row["id"])] = row
+
+    def _add_request(self, headers: dict[str, str], body_text: str) -> None:
+        created_at = _parse_datetime(headers.get("Created-At"))
+        updated_at = _parse_datetime(headers.get("Updated-At"))
+        description, comments = _parse_request_body(body_text)
+        request_obj = HelpRequest(
+            id=_maybe_int(headers.get("ID")),
+            title=headers.get("Title"),
+            description=description,
+            status=headers.get("Status", "open"),
+            contact_email=headers.get("Contact-Email") or None,
+            created_by_user_id=_maybe_int(headers.get("Created-By")),
+            created_at=created_at or datetime.utcnow(),
+            updated_at=updated_at or created_at or datetime.utcnow(),
+            completed_at=_parse_datetime(headers.get("Completed-At")),
+            sync_scope=headers.get("Sync-Scope", "public"),
+        )
+        self._requests[self._key(request_obj.id)] = _row(request_obj)
+
+        for comment in comments:
+            comment_obj = RequestComment(
+                id=comment.get("id"),
+                help_request_id=request_obj.id,
+                user_id=comment.get("user_id"),
+                body=comment.get("body", ""),
+                created_at=_parse_datetime(comment.get("created_at")) or datetime.utcnow(),
+                sync_scope=comment.get("sync_scope", "public"),
+            )
+            self._comments[self._key(comment_obj.id)] = _row(comment_obj)
+
+    def _add_invite(self, headers: dict[str, str]) -> None:
+        invite = InviteToken(
+            token=headers.get("ID"),
+            created_by_user_id=_maybe_int(headers.get("Created-By")),
+            created_at=_parse_datetime(headers.get("Updated-At")) or datetime.utcnow(),
+            expires_at=_parse_datetime(headers.get("Expires-At")),
+            max_uses=_maybe_int(headers.get("Max-Uses")) or 1,
+            use_count=_maybe_int(headers.get("Use-Count")) or 0,
+            auto_approve=headers.get("Auto-Approve", "True").lower() == "true",
+            suggested_username=headers.get("Suggested-Username"),
+            sync_scope=headers.get("Sync-Scope", "public"),
+        )
+        self._invites[self._key(invite.token)] = _row(invite)
+
+    def _flush_users(self) -> None:
+        rows = list(self._users.values())
+        self._users.clear()
+        if not rows:
+            return
+        by_id = set(_existing(self.session, User.id, [row["id"] for row in rows if row["id"] is not None]))
+        unmatched_names = [row["username"] for row in rows if row["id"] not in by_id and row["username"]]
+        by_name = dict(_existing(self.session, User.username, unmatched_names, User.id))
+
+        inserts: list[dict[str, Any]] = []
+        updates: list[dict[str, Any]] = []
+        for row in rows:
+            target_id = row["id"] if row["id"] in by_id else by_name.get(row["username"])
+            if target_id is None:
+                new_user = User(
+                    id=row["id"],
+                    username=row["username"],
+                    contact_email=row.get("contact_email"),
+                    created_at=row.get("created_at") or datetime.utcnow(),
+                    sync_scope=row["sync_scope"],
+                )
+                inserts.append(_row(new_user))
+                continue
+            changes = {key: value for key, value in row.items() if key != "id" and (value or key == "contact_email")}
+            updates.append({"id": target_id, **changes})
+
+        self._apply("user", User, inserts, updates)
+
+    def _flush_replacements(
+        self,
+        entity: str,
+        model: type[SQLModel],
+        key_column: Any,
+        buffer: dict[Any, dict[str, Any]],
+    ) -> None:
+        rows = list(buffer.values())
+        buffer.clear()
+        if not rows:
+            return
+        key_name = key_column.key
+        keys = [row[key_name] for row in rows if row.get(key_name) is not None]
+        existing = set(_existing(self.session, key_column, keys))
+        inserts = [row for row in rows if row.get(key_name) not in existing]
+        updates = [row for row in rows if row.get(key_name) in existing]
+        self._apply(entity, model, inserts, updates)
+
+    def _apply(
+        self,
+        entity: str,
+        model: type[SQLModel],
+        inserts: list[dict[str, Any]],
+        updates: list[dict[str, Any]],
+    ) -> None:
+        if inserts:
+            self.session.execute(insert(model), inserts)
+            self.stats.inserted[entity] += len(inserts)
+        if updates:
+            self.session.execute(update(model), updates)
+            self.stats.updated[entity] += len(updates)
+
+
+def bulk_import_sync_data(
+    session: Session,
+    input_dir: Path,
+    *,
+    files: Optional[Iterable[Path]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    progress: Optional[ProgressCallback] = None,
+) -> BulkImportStats:
+    """Import `files` (default: every sync file under `input_dir`) in bounded chunks."""
+    if not input_dir.exists():
+        raise FileNotFoundError(f"Sync directory not found: {input_dir}")
+    if files is None:
+        files = sorted(path for path in input_dir.rglob("*.sync.txt") if path.name != MANIFEST_NAME)
+    importer = BulkSyncImporter(session, chunk_size=chunk_size, progress=progress)
+    return importer.run(files)
+
+
+def withdraw_sync_files(session: Session, rel_paths: Iterable[str]) -> int:
+    """Mark the entities behind removed bundle files (`users/user_<id>.sync.txt`, ...) private.
+
+    A withdrawn request takes its comments with it.
+    """
+    user_ids: list[int] = []
+    request_ids: list[int] = []
+    tokens: list[str] = []
+    for rel in rel_paths:
+        name = Path(rel).name
+        if not name.endswith(".sync.txt"):
+            continue
+        stem = name[: -len(".sync.txt")]
+        kind, _, key = stem.partition("_")
+        if kind == "user" and _maybe_int(key) is not None:
+            user_ids.append(int(key))
+        elif kind == "request" and _maybe_int(key) is not None:
+            request_ids.append(int(key))
+        elif kind == "invite" and key:
+            tokens.append(key)
+
+    withdrawn = 0
+    for column, values in (
+        (User.id, user_ids),
+        (HelpRequest.id, request_ids),
+        (RequestComment.help_request_id, request_ids),
+        (InviteToken.token, tokens),
+    ):
+        model = column.class_
+        for start in range(0, len(values), _IN_CHUNK):
+            chunk = values[start : start + _IN_CHUNK]
+            result = session.execute(
+                update(model)
+                .where(column.in_(chunk))
+                .values(sync_scope="private")
+                .execution_options(synchronize_session=False)
+            )
+            withdrawn += result.rowcount or 0
+    session.commit()
+    return withdrawn
+
+
+def _row(obj: SQLModel) -> dict[str, Any]:
+    """Column values of a model instance, omitting an unset autoincrement id."""
+    row = {column.key: getattr(obj, column.key) for column in obj.__table__.columns}
+    if "id" in row and row["id"] is None:
+        del row["id"]
+    return row
+
+
+def _existing(session: Session, column: Any, values: list[Any], *extra: Any) -> list[Any]:
+    """Values of `column` (plus any `extra` columns) already stored, queried in IN chunks."""
+    found: list[Any] = []
+    unique = list(dict.fromkeys(values))
+    for start in range(0, len(unique), _IN_CHUNK):
+        chunk = unique[start : start + _IN_CHUNK]
+        found.extend(session.exec(select(column, *extra).where(column.in_(chunk))).all())
+    return found
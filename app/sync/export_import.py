@@ -1,11 +1,12 @@
 from __future__ import annotations
 
-from __future__ import annotations
-
+import json
+import logging
+from dataclasses import dataclass, field
 from datetime import datetime
 from hashlib import sha256
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Iterator
 
 from sqlmodel import Session, select
 
@@ -20,37 +21,137 @@ from app.models import (
 )
 from app.services.request_comment_service import serialize_comment
 
+logger = logging.getLogger(__name__)
+
 SCHEMA_VERSION = "1"
+MANIFEST_NAME = "manifest.sync.txt"
+# Hash index of the last export per output directory. It lives outside the bundle
+# so it is never pushed or signed.
+EXPORT_INDEX_DIR = Path("storage/cache/sync_export")
+EXPORT_INDEX_VERSION = 1
+
+
+@dataclass
+class SyncExportResult:
+    files: list[Path] = field(default_factory=list)
+    written: list[Path] = field(default_factory=list)
+    removed: list[Path] = field(default_factory=list)
+    unchanged: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.files)} files: {len(self.written)} written, "
+            f"{self.unchanged} unchanged, {len(self.removed)} removed"
+        )
 
 
 def _iso(dt: datetime | None) -> str | None:
     return dt.isoformat() + "Z" if dt else None
 
 
-def _write_sync_file(path: Path, headers: dict[str, str], body: str) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as fh:
-        for key, value in headers.items():
-            fh.write(f"{key}: {value}\n")
-        fh.write("\n")
-        if body:
-            fh.write(body.rstrip() + "\n")
+def _render_sync_file(headers: dict[str, str], body: str) -> bytes:
+    lines = [f"{key}: {value}\n" for key, value in headers.items()]
+    lines.append("\n")
+    if body:
+        lines.append(body.rstrip() + "\n")
+    return "".join(lines).encode("utf-8")
+
+
+def export_sync_data(session: Session, output_dir: Path, *, incremental: bool = False) -> list[Path]:
+    """Write the public bundle to `output_dir` and return every file in it.
 
+    The default mode wipes and rewrites the directory. `incremental=True` only
+    touches files whose content changed; see `export_sync_data_incremental`.
+    """
+    if incremental:
+        return export_sync_data_incremental(session, output_dir).files
 
-def export_sync_data(session: Session, output_dir: Path) -> list[Path]:
     if output_dir.exists():
         for existing in output_dir.rglob("*.sync.txt"):
             existing.unlink()
     output_dir.mkdir(parents=True, exist_ok=True)
 
+    digests: dict[str, str] = {}
+    exported: list[Path] = []
+    for rel, content in _iter_sync_files(session):
+        path = output_dir / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        digests[rel] = sha256(content).hexdigest()
+        exported.append(path)
+
+    manifest_path = output_dir / MANIFEST_NAME
+    manifest_bytes = _render_manifest(digests)
+    manifest_path.write_bytes(manifest_bytes)
+    exported.append(manifest_path)
+
+    entries = {rel: _index_entry(output_dir / rel, digest) for rel, digest in digests.items()}
+    entries[MANIFEST_NAME] = _index_entry(manifest_path, sha256(manifest_bytes).hexdigest())
+    _save_export_index(output_dir, entries)
+    return exported
+
+
+def export_sync_data_incremental(session: Session, output_dir: Path) -> SyncExportResult:
+    """Render every public entity in memory and write only the files whose hash changed.
+
+    Digests come from the persisted index of the previous export, so unchanged
+    files are neither rewritten nor re-read. A file is rewritten anyway when its
+    size or mtime no longer matches the index (edited or deleted by hand).
+    Files of entities that left public scope are deleted.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    previous = _load_export_index(output_dir)
+    result = SyncExportResult()
+    digests: dict[str, str] = {}
+    entries: dict[str, list] = {}
+
+    for rel, content in _iter_sync_files(session):
+        path = output_dir / rel
+        digest = sha256(content).hexdigest()
+        digests[rel] = digest
+        result.files.append(path)
+        known = previous.get(rel)
+        if known and known[0] == digest and _stat_matches(path, known):
+            entries[rel] = known
+            result.unchanged += 1
+            continue
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        entries[rel] = _index_entry(path, digest)
+        result.written.append(path)
+
+    for existing in output_dir.rglob("*.sync.txt"):
+        rel = existing.relative_to(output_dir).as_posix()
+        if rel == MANIFEST_NAME or rel in digests:
+            continue
+        existing.unlink()
+        result.removed.append(existing)
+
+    manifest_path = output_dir / MANIFEST_NAME
+    manifest_bytes = _render_manifest(digests)
+    manifest_digest = sha256(manifest_bytes).hexdigest()
+    known = previous.get(MANIFEST_NAME)
+    if known and known[0] == manifest_digest and _stat_matches(manifest_path, known):
+        entries[MANIFEST_NAME] = known
+        result.unchanged += 1
+    else:
+        manifest_path.write_bytes(manifest_bytes)
+        entries[MANIFEST_NAME] = _index_entry(manifest_path, manifest_digest)
+        result.written.append(manifest_path)
+    result.files.append(manifest_path)
+
+    _save_export_index(output_dir, entries)
+    return result
+
+
+def _iter_sync_files(session: Session) -> Iterator[tuple[str, bytes]]:
+    """Yield `(relative path, rendered bytes)` for every public entity."""
     settings = get_settings()
     instance_id = settings.site_url or "local-instance"
-    exported: list[Path] = []
 
     # Users
     users = session.exec(select(User).where(User.sync_scope == "public")).all()
     for user in users:
-        body = ""
         headers = {
             "Entity": "user",
             "ID": str(user.id),
@@ -61,9 +162,7 @@ def export_sync_data(session: Session, output_dir: Path) -> list[Path]:
             "Username": user.username,
             "Contact-Email": user.contact_email or "",
         }
-        path = output_dir / "users" / f"user_{user.id}.sync.txt"
-        _write_sync_file(path, headers, body)
-        exported.append(path)
+        yield f"users/user_{user.id}.sync.txt", _render_sync_file(headers, "")
 
     # Requests + comments
     requests = session.exec(
@@ -79,6 +178,7 @@ def export_sync_data(session: Session, output_dir: Path) -> list[Path]:
             .join(User, User.id == RequestComment.user_id)
             .where(RequestComment.help_request_id.in_(request_ids))
             .where(RequestComment.sync_scope == "public")
+            .order_by(RequestComment.created_at, RequestComment.id)
         ).all()
         for comment, author in rows:
             payload = serialize_comment(comment, author)
@@ -98,9 +198,7 @@ def export_sync_data(session: Session, output_dir: Path) -> list[Path]:
             "Contact-Email": request_obj.contact_email or "",
             "Created-By": str(request_obj.created_by_user_id or ""),
         }
-        path = output_dir / "requests" / f"request_{request_obj.id}.sync.txt"
-        _write_sync_file(path, headers, body)
-        exported.append(path)
+        yield f"requests/request_{request_obj.id}.sync.txt", _render_sync_file(headers, body)
 
     # Invites
     invites = session.exec(select(InviteToken).where(InviteToken.sync_scope == "public")).all()
@@ -123,21 +221,54 @@ def export_sync_data(session: Session, output_dir: Path) -> list[Path]:
             "Auto-Approve": str(invite.auto_approve),
             "Suggested-Username": invite.suggested_username or "",
         }
-        path = output_dir / "invites" / f"invite_{invite.token}.sync.txt"
-        _write_sync_file(path, headers, body)
-        exported.append(path)
+        yield f"invites/invite_{invite.token}.sync.txt", _render_sync_file(headers, body)
 
-    # Manifest
-    manifest_path = output_dir / "manifest.sync.txt"
-    lines: list[str] = []
-    for path in sorted(exported):
-        rel = path.relative_to(output_dir)
-        digest = sha256(path.read_bytes()).hexdigest()
-        lines.append(f"{digest}  {rel.as_posix()}")
-    manifest_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
-    exported.append(manifest_path)
 
-    return exported
+def _render_manifest(digests: dict[str, str]) -> bytes:
+    lines = [f"{digests[rel]}  {rel}" for rel in sorted(digests)]
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _export_index_path(output_dir: Path) -> Path:
+    key = sha256(str(output_dir.resolve()).encode("utf-8")).hexdigest()[:16]
+    return EXPORT_INDEX_DIR / f"{key}.json"
+
+
+def _load_export_index(output_dir: Path) -> dict[str, list]:
+    path = _export_index_path(output_dir)
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        logger.warning("Ignoring unreadable sync export index %s", path, exc_info=True)
+        return {}
+    if data.get("version") != EXPORT_INDEX_VERSION:
+        return {}
+    return data.get("files") or {}
+
+
+def _save_export_index(output_dir: Path, entries: dict[str, list]) -> None:
+    path = _export_index_path(output_dir)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"version": EXPORT_INDEX_VERSION, "output_dir": str(output_dir.resolve()), "files": entries}
+        path.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+    except OSError:
+        logger.warning("Failed to write sync export index %s", path, exc_info=True)
+
+
+def _index_entry(path: Path, digest: str) -> list:
+    stat = path.stat()
+    return [digest, stat.st_size, stat.st_mtime_ns]
+
+
+def _stat_matches(path: Path, entry: list) -> bool:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return False
+    return stat.st_size == entry[1] and stat.st_mtime_ns == entry[2]
 
 
 def _parse_sync_file(path: Path) -> tuple[dict[str, str], str]:
@@ -155,111 +286,46 @@ def _parse_sync_file(path: Path) -> tuple[dict[str, str], str]:
     return headers, body_text
 
 
-def import_sync_data(session: Session, input_dir: Path) -> int:
+def import_sync_data(
+    session: Session,
+    input_dir: Path,
+    *,
+    peer_name: str | None = None,
+    full: bool = False,
+) -> int:
+    """Import the bundle in `input_dir`; returns the number of files imported.
+
+    With `peer_name`, the bundle manifest is diffed against the last manifest
+    imported from that peer: only new or changed files are parsed (and checked
+    against their manifest digest), and entities whose files disappeared are
+    withdrawn from public scope. `full=True` re-imports every listed file.
+    """
+    from app.sync import manifest_state
+    from app.sync.bulk_import import bulk_import_sync_data, withdraw_sync_files
+
     if not input_dir.exists():
         raise FileNotFoundError(f"Sync directory not found: {input_dir}")
-    count = 0
-    files = sorted(p for p in input_dir.rglob("*.sync.txt") if p.name != "manifest.sync.txt")
-    for path in files:
-        headers, body = _parse_sync_file(path)
-        entity = headers.get("Entity")
-        if entity == "user":
-            _import_user(session, headers)
-        elif entity == "request":
-            _import_request(session, headers, body)
-        elif entity == "invite":
-            _import_invite(session, headers, body)
-        count += 1
-    session.commit()
-    return count
-
-
-def _import_user(session: Session, headers: dict[str, str]) -> None:
-    created_at = _parse_datetime(headers.get("Updated-At"))
-    user_id = _maybe_int(headers.get("ID"))
-    username = headers.get("Username")
-    contact_email_present = "Contact-Email" in headers
-    contact_email = headers.get("Contact-Email") or None
-    sync_scope = headers.get("Sync-Scope", "public")
-
-    existing: User | None = None
-    if user_id is not None:
-        existing = session.get(User, user_id)
-    if existing is None and username:
-        existing = session.exec(select(User).where(User.username == username)).first()
-
-    if existing:
-        if username:
-            existing.username = username
-        if contact_email_present:
-            existing.contact_email = contact_email
-        if created_at:
-            existing.created_at = created_at
-        if sync_scope:
-            existing.sync_scope = sync_scope
-        session.add(existing)
-    else:
-        new_user = User(
-            id=user_id,
-            username=username,
-            contact_email=contact_email,
-            created_at=created_at or datetime.utcnow(),
-            sync_scope=sync_scope,
-        )
-        session.add(new_user)
-
-
-def _import_request(session: Session, headers: dict[str, str], body_text: str) -> None:
-    created_at = _parse_datetime(headers.get("Created-At"))
-    updated_at = _parse_datetime(headers.get("Updated-At"))
-    completed_at = _parse_datetime(headers.get("Completed-At"))
-    description, comments = _parse_request_body(body_text)
-    request_obj = HelpRequest(
-        id=_maybe_int(headers.get("ID")),
-        title=headers.get("Title"),
-        description=description,
-        status=headers.get("Status", "open"),
-        contact_email=headers.get("Contact-Email") or None,
-        created_by_user_id=_maybe_int(headers.get("Created-By")),
-        created_at=created_at or datetime.utcnow(),
-        updated_at=updated_at or created_at or datetime.utcnow(),
-        completed_at=completed_at,
-        sync_scope=headers.get("Sync-Scope", "public"),
-    )
-    session.merge(request_obj)
-
-    for comment in comments:
-        created_at = _parse_datetime(comment.get("created_at"))
-        comment_obj = RequestComment(
-            id=comment.get("id"),
-            help_request_id=request_obj.id,
-            user_id=comment.get("user_id"),
-            body=comment.get("body", ""),
-            created_at=created_at or datetime.utcnow(),
-            sync_scope=comment.get("sync_scope", "public"),
-        )
-        session.merge(comment_obj)
-
-
-def _import_invite(session: Session, headers: dict[str, str], body_text: str) -> None:
-    created_at = _parse_datetime(headers.get("Updated-At"))
-    expires_at = _parse_datetime(headers.get("Expires-At"))
-    invite = InviteToken(
-        token=headers.get("ID"),
-        created_by_user_id=_maybe_int(headers.get("Created-By")),
-        created_at=created_at or datetime.utcnow(),
-        expires_at=expires_at,
-        max_uses=_maybe_int(headers.get("Max-Uses")) or 1,
-        use_count=_maybe_int(headers.get("Use-Count")) or 0,
-        auto_approve=headers.get("Auto-Approve", "True").lower() == "true",
-        suggested_username=headers.get("Suggested-Username"),
-        sync_scope=headers.get("Sync-Scope", "public"),
-    )
-    session.merge(invite)
-
-    if body_text.strip():
-        # For now, body text contains personalization snippet; no import needed yet.
-        pass
+    manifest = manifest_state.read_bundle_manifest(input_dir) if peer_name else None
+    if manifest is None:
+        return bulk_import_sync_data(session, input_dir).files
+
+    previous = {} if full else manifest_state.load_imported_manifest(peer_name)
+    diff = manifest_state.diff_manifests(previous, manifest)
+    files = [_verified_sync_file(input_dir, rel, manifest[rel]) for rel in diff.to_import]
+    stats = bulk_import_sync_data(session, input_dir, files=files)
+    withdraw_sync_files(session, diff.removed)
+    manifest_state.save_imported_manifest(peer_name, input_dir)
+    return stats.files
+
+
+def _verified_sync_file(input_dir: Path, rel: str, digest: str) -> Path:
+    root = input_dir.resolve()
+    path = (input_dir / rel).resolve()
+    if root not in path.parents or not path.name.endswith(".sync.txt"):
+        raise ValueError(f"Manifest entry outside the bundle: {rel}")
+    if not path.exists() or sha256(path.read_bytes()).hexdigest() != digest:
+        raise ValueError(f"Sync file does not match its manifest digest: {rel}")
+    return path
 
 
 def _parse_datetime(value: object) -> datetime | None:
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from app.sync.signing import MANIFEST_FILENAME, SYNC_ROOT_ENV
+
+IMPORTS_DIRNAME = "imports"
+_SAFE_NAME = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+@dataclass
+class ManifestDiff:
+    added: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def to_import(self) -> list[str]:
+        return sorted(self.added + self.changed)
+
+
+def parse_manifest(text: str) -> dict[str, str]:
+    """Map relative path -> SHA-256 from `manifest.sync.txt` lines (`<digest>  <path>`)."""
+    entries: dict[str, str] = {}
+    for line in text.splitlines():
+        digest, sep, rel = line.strip().partition("  ")
+        if sep and digest and rel:
+            entries[rel.strip()] = digest
+    return entries
+
+
+def read_bundle_manifest(bundle_dir: Path) -> dict[str, str] | None:
+    path = bundle_dir / MANIFEST_FILENAME
+    if not path.exists():
+        return None
+    return parse_manifest(path.read_text(encoding="utf-8"))
+
+
+def diff_manifests(previous: dict[str, str], current: dict[str, str]) -> ManifestDiff:
+    diff = ManifestDiff()
+    for rel, digest in current.items():
+        known = previous.get(rel)
+        if known is None:
+            diff.added.append(rel)
+        elif known != digest:
+            diff.changed.append(rel)
+        else:
+            diff.unchanged += 1
+    diff.removed = sorted(rel for rel in previous if rel not in current)
+    return diff
+
+
+def load_imported_manifest(peer_name: str) -> dict[str, str]:
+    """Manifest of the last bundle fully imported from `peer_name` (empty if none)."""
+    path = _state_path(peer_name)
+    if not path.exists():
+        return {}
+    return parse_manifest(path.read_text(encoding="utf-8"))
+
+
+def save_imported_manifest(peer_name: str, bundle_dir: Path) -> None:
+    source = bundle_dir / MANIFEST_FILENAME
+    target = _state_path(peer_name)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_suffix(".tmp")
+    tmp.write_bytes(source.read_bytes())
+    tmp.replace(target)
+
+
+def clear_imported_manifest(peer_name: str) -> None:
+    path = _state_path(peer_name)
+    if path.exists():
+        path.unlink()
+
+
+def _state_path(peer_name: str) -> Path:
+    root = Path(os.environ.get(SYNC_ROOT_ENV) or ".sync")
+    safe_name = _SAFE_NAME.sub("_", peer_name) or "peer"
+    return root / IMPORTS_DIRNAME / f"{safe_name}.{MANIFEST_FILENAME}"
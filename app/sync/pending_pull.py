@@ -138,7 +138,7 @@ def approve_pending_pull(entry: PendingPullEntry) -> tuple[str, int, bool]:
         verify_bundle_signature(bundle_dir, expected_public_key=entry.presented_key)
         engine = get_engine()
         with Session(engine) as session:
-            count = import_sync_data(session, bundle_dir)
+            count = import_sync_data(session, bundle_dir, peer_name=entry.peer_name)
     remove_pending_pull(entry)
     return target.name, count, key_updated
 
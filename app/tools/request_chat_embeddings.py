@@ -3,18 +3,23 @@ from __future__ import annotations
 import argparse
 import asyncio
 import hashlib
+import json
 import random
-from typing import Iterable, Sequence
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, Sequence
 
 from sqlmodel import Session, select
 
 from app.config import get_settings
 from app.db import get_engine
 from app.models import HelpRequest
-from app.services import request_chat_embeddings, request_chat_search_service
+from app.services import request_chat_embedding_cache, request_chat_embeddings, request_chat_search_service
 
 DEFAULT_MAX_COMMENTS = 40
 DEFAULT_BATCH_SIZE = 16
+DEFAULT_CONCURRENCY = 4
 LOCAL_EMBEDDING_DIMENSIONS = 384
 
 
@@ -24,6 +29,9 @@ class EmbeddingAdapter:
     def embed(self, texts: Sequence[str]) -> list[list[float]]:  # pragma: no cover - interface
         raise NotImplementedError
 
+    async def embed_async(self, texts: Sequence[str]) -> list[list[float]]:
+        return await asyncio.to_thread(self.embed, texts)
+
 
 class DedalusEmbeddingAdapter(EmbeddingAdapter):
     def __init__(self, model: str | None = None) -> None:
@@ -46,7 +54,7 @@ class DedalusEmbeddingAdapter(EmbeddingAdapter):
         self._model = model or "text-embedding-3-large"
         self.label = f"dedalus:{self._model}"
 
-    async def _embed_async(self, texts: Sequence[str]) -> list[list[float]]:
+    async def embed_async(self, texts: Sequence[str]) -> list[list[float]]:
         if not texts:
             return []
         response = await self._client.embeddings.create(model=self._model, input=list(texts))
@@ -60,7 +68,7 @@ class DedalusEmbeddingAdapter(EmbeddingAdapter):
         return vectors
 
     def embed(self, texts: Sequence[str]) -> list[list[float]]:
-        return asyncio.run(self._embed_async(texts))
+        return asyncio.run(self.embed_async(texts))
 
 
 class LocalEmbeddingAdapter(EmbeddingAdapter):
@@ -71,6 +79,9 @@ class LocalEmbeddingAdapter(EmbeddingAdapter):
     def embed(self, texts: Sequence[str]) -> list[list[float]]:
         return [self._hash_embedding(text) for text in texts]
 
+    async def embed_async(self, texts: Sequence[str]) -> list[list[float]]:
+        return self.embed(texts)
+
     def _hash_embedding(self, text: str) -> list[float]:
         digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
         rng = random.Random(digest)
@@ -109,14 +120,286 @@ def build_parser() -> argparse.ArgumentParser:
         default=LOCAL_EMBEDDING_DIMENSIONS,
         help="Local adapter vector dimensions (default: %(default)s)",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="Requests and embedding batches in flight at once (default: %(default)s)",
+    )
     parser.add_argument(
         "--force",
         action="store_true",
         help="Recompute even if an embedding cache already exists",
     )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore progress saved by an interrupted run with the same options",
+    )
     return parser
 
 
+@dataclass
+class PipelineStats:
+    requests_total: int = 0
+    requests_embedded: int = 0
+    requests_skipped: int = 0
+    requests_resumed: int = 0
+    requests_failed: int = 0
+    texts: int = 0
+    cache_hits: int = 0
+    embedded_texts: int = 0
+    batches: int = 0
+    started_at: float = 0.0
+    finished_at: float = 0.0
+
+    @property
+    def elapsed(self) -> float:
+        end = self.finished_at or time.perf_counter()
+        return max(end - self.started_at, 1e-9) if self.started_at else 0.0
+
+    @property
+    def texts_per_second(self) -> float:
+        return self.texts / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def cache_hit_rate(self) -> float:
+        return self.cache_hits / self.texts if self.texts else 0.0
+
+    def summary(self) -> str:
+        return (
+            "{embedded}/{total} requests embedded ({skipped} skipped, {resumed} resumed, {failed} failed); "
+            "{texts} texts in {elapsed:.1f}s = {rate:.1f} texts/sec; cache hits {hits} ({hit_rate:.0%}); "
+            "{sent} texts sent in {batches} batches"
+        ).format(
+            embedded=self.requests_embedded,
+            total=self.requests_total,
+            skipped=self.requests_skipped,
+            resumed=self.requests_resumed,
+            failed=self.requests_failed,
+            texts=self.texts,
+            elapsed=self.elapsed,
+            rate=self.texts_per_second,
+            hits=self.cache_hits,
+            hit_rate=self.cache_hit_rate,
+            sent=self.embedded_texts,
+            batches=self.batches,
+        )
+
+
+@dataclass
+class RequestJob:
+    request_id: int
+    texts: list[tuple[int, str]]
+    source_count: int
+
+
+class EmbeddingPipeline:
+    """Embeds texts through a content-hash cache with bounded batch concurrency.
+
+    Vectors are keyed on the SHA-256 of the text plus the adapter label, so a
+    body repeated across comments, requests, or runs is sent to the provider
+    once. Concurrent requests that need the same uncached text share one
+    in-flight future instead of embedding it twice.
+    """
+
+    def __init__(
+        self,
+        adapter: EmbeddingAdapter,
+        cache: sqlite3.Connection,
+        *,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        stats: PipelineStats | None = None,
+    ) -> None:
+        self.adapter = adapter
+        self.cache = cache
+        self.batch_size = max(1, batch_size)
+        self.stats = stats or PipelineStats()
+        self._slots = asyncio.Semaphore(max(1, concurrency))
+        self._inflight: dict[str, asyncio.Future[list[float]]] = {}
+        self._tasks: set[asyncio.Future[None]] = set()
+
+    async def embed_texts(self, texts: Sequence[str]) -> list[list[float]]:
+        keys = [request_chat_embedding_cache.text_key(text) for text in texts]
+        cached = request_chat_embedding_cache.get_vectors(
+            self.cache,
+            self.adapter.label,
+            [key for key in keys if key not in self._inflight],
+        )
+        loop = asyncio.get_running_loop()
+        waiting: dict[str, asyncio.Future[list[float]]] = {}
+        pending: list[tuple[str, str]] = []
+        self.stats.texts += len(texts)
+        for key, text in zip(keys, texts):
+            if key in cached or key in waiting:
+                self.stats.cache_hits += 1
+                continue
+            if key in self._inflight:
+                self.stats.cache_hits += 1
+                waiting[key] = self._inflight[key]
+                continue
+            waiting[key] = self._inflight[key] = loop.create_future()
+            pending.append((key, text))
+        for start in range(0, len(pending), self.batch_size):
+            task = asyncio.ensure_future(self._run_batch(pending[start : start + self.batch_size]))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        vectors: list[list[float]] = []
+        for key in keys:
+            vectors.append(cached[key] if key in cached else await waiting[key])
+        return vectors
+
+    async def _run_batch(self, batch: list[tuple[str, str]]) -> None:
+        futures = [self._inflight[key] for key, _text in batch]
+        try:
+            async with self._slots:
+                vectors = await self.adapter.embed_async([text for _key, text in batch])
+            if len(vectors) != len(batch):
+                raise RuntimeError("Embedding provider returned mismatched batch size")
+            request_chat_embedding_cache.put_vectors(
+                self.cache,
+                self.adapter.label,
+                [(key, vector) for (key, _text), vector in zip(batch, vectors)],
+            )
+        except asyncio.CancelledError:
+            for future in futures:
+                future.cancel()
+            raise
+        except Exception as exc:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(exc)
+                    future.exception()  # waiters still raise; only silences the unretrieved warning
+            return
+        finally:
+            for key, _text in batch:
+                self._inflight.pop(key, None)
+        self.stats.batches += 1
+        self.stats.embedded_texts += len(batch)
+        for future, vector in zip(futures, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+    async def embed_request(self, job: RequestJob) -> request_chat_embeddings.RequestEmbeddingIndex:
+        vectors = await self.embed_texts([text for _comment_id, text in job.texts])
+        return request_chat_embeddings.build_index(
+            request_id=job.request_id,
+            model=self.adapter.label,
+            comment_vectors=[(comment_id, vector) for (comment_id, _text), vector in zip(job.texts, vectors)],
+            source_count=job.source_count,
+        )
+
+
+async def run_pipeline(
+    jobs: Iterable[RequestJob | int],
+    pipeline: EmbeddingPipeline,
+    *,
+    run_key: str,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    log: Callable[[str], None] = print,
+) -> PipelineStats:
+    """Embed and store each job with at most `concurrency` requests in flight.
+
+    `jobs` yields prepared `RequestJob`s, or a bare request ID for requests that
+    were skipped while preparing. Finished requests are checkpointed under
+    `run_key` so an interrupted run can resume where it stopped.
+    """
+    stats = pipeline.stats
+    stats.started_at = stats.started_at or time.perf_counter()
+    queue: asyncio.Queue[RequestJob | None] = asyncio.Queue(maxsize=max(1, concurrency) * 2)
+    workers_count = max(1, concurrency)
+
+    async def worker() -> None:
+        while True:
+            job = await queue.get()
+            if job is None:
+                return
+            try:
+                index = await pipeline.embed_request(job)
+            except Exception as exc:  # pragma: no cover - provider failures are logged and retried next run
+                stats.requests_failed += 1
+                log(f"[chat-embed] Request {job.request_id}: embedding failed ({exc})")
+                continue
+            if not index.vector_count:
+                stats.requests_skipped += 1
+                log(f"[chat-embed] Request {job.request_id}: embedding generation returned zero vectors")
+                continue
+            request_chat_embeddings.write_index(index)
+            request_chat_embedding_cache.mark_request_complete(pipeline.cache, run_key, job.request_id)
+            stats.requests_embedded += 1
+            log(
+                "[chat-embed] Request {request} stored {count} vectors via {label} (source comments: {source})".format(
+                    request=job.request_id,
+                    count=index.vector_count,
+                    label=pipeline.adapter.label,
+                    source=index.source_comment_count,
+                )
+            )
+
+    workers = [asyncio.create_task(worker()) for _ in range(workers_count)]
+    try:
+        for job in jobs:
+            stats.requests_total += 1
+            if isinstance(job, int):
+                continue
+            await queue.put(job)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers:
+            task.cancel()
+        stats.finished_at = time.perf_counter()
+    return stats
+
+
+def _prepare_jobs(
+    session: Session,
+    request_ids: Sequence[int],
+    *,
+    max_comments: int,
+    force: bool,
+    completed: set[int],
+    stats: PipelineStats,
+    log: Callable[[str], None] = print,
+) -> Iterable[RequestJob | int]:
+    cached_ids = set(request_chat_embeddings.list_cached_request_ids()) if not force else set()
+    for request_id in request_ids:
+        if request_id in completed:
+            stats.requests_resumed += 1
+            yield request_id
+            continue
+        if request_id in cached_ids:
+            stats.requests_skipped += 1
+            log(f"[chat-embed] Request {request_id}: cache exists (use --force to rebuild)")
+            yield request_id
+            continue
+        index = request_chat_search_service.ensure_chat_index(session, request_id)
+        entries = _select_entries(index, max_comments=max(0, max_comments))
+        texts: list[tuple[int, str]] = []
+        for entry in entries:
+            body = (entry.body or "").strip()
+            if body:
+                texts.append((entry.comment_id, body))
+        if not texts:
+            stats.requests_skipped += 1
+            log(f"[chat-embed] Request {request_id}: no comment text to embed")
+            yield request_id
+            continue
+        yield RequestJob(request_id=request_id, texts=texts, source_count=len(entries))
+
+
+def _run_key(adapter: EmbeddingAdapter, request_ids: Sequence[int], ns: argparse.Namespace) -> str:
+    payload = {
+        "adapter": adapter.label,
+        "request_ids": list(request_ids),
+        "max_comments": ns.max_comments,
+        "force": bool(ns.force),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
 def _resolve_request_ids(session: Session, raw_ids: Iterable[int] | None, include_all: bool) -> list[int]:
     resolved = set(filter(None, raw_ids or []))
     if include_all or not resolved:
@@ -136,17 +419,6 @@ def _select_entries(
     return entries
 
 
-def _chunked(items: Sequence[tuple[int, str]], size: int) -> Iterable[list[tuple[int, str]]]:
-    chunk = []
-    for item in items:
-        chunk.append(item)
-        if len(chunk) >= size:
-            yield chunk
-            chunk = []
-    if chunk:
-        yield chunk
-
-
 def _coerce_vector(item: object) -> list[float]:
     if item is None:
         raise RuntimeError("Embedding payload missing vector data")
@@ -183,59 +455,43 @@ def main(argv: list[str] | None = None) -> int:
         parser.error(str(exc))
 
     engine = get_engine()
-    try:
-        with Session(engine) as session:
-            request_ids = _resolve_request_ids(session, ns.request_ids, ns.all)
-            if not request_ids:
-                parser.error("No matching requests found")
-
-            for request_id in request_ids:
-                existing_index = request_chat_embeddings.load_index(request_id)
-                if existing_index and not ns.force:
-                    print(f"[chat-embed] Request {request_id}: cache exists (use --force to rebuild)")
-                    continue
-                index = request_chat_search_service.ensure_chat_index(session, request_id)
-                entries = _select_entries(index, max_comments=max(0, ns.max_comments))
-                tasks: list[tuple[int, str]] = []
-                for entry in entries:
-                    body = (entry.body or "").strip()
-                    if body:
-                        tasks.append((entry.comment_id, body))
-                if not tasks:
-                    print(f"[chat-embed] Request {request_id}: no comment text to embed")
-                    continue
-                vectors: list[tuple[int, list[float]]] = []
-                batch_size = max(1, ns.batch_size)
-                for batch in _chunked(tasks, batch_size):
-                    batch_ids = [comment_id for comment_id, _ in batch]
-                    batch_texts = [text for _, text in batch]
-                    embeddings = adapter.embed(batch_texts)
-                    if len(embeddings) != len(batch_ids):
-                        raise RuntimeError("Embedding provider returned mismatched batch size")
-                    for comment_id, vector in zip(batch_ids, embeddings):
-                        vectors.append((comment_id, vector))
-                embedding_index = request_chat_embeddings.build_index(
-                    request_id=request_id,
-                    model=adapter.label,
-                    comment_vectors=vectors,
-                    source_count=len(entries),
-                )
-                if not embedding_index.vector_count:
-                    print(f"[chat-embed] Request {request_id}: embedding generation returned zero vectors")
-                    continue
-                request_chat_embeddings.write_index(embedding_index)
-                print(
-                    "[chat-embed] Request {request} stored {count} vectors via {label} (source comments: {source})".format(
-                        request=request_id,
-                        count=embedding_index.vector_count,
-                        label=adapter.label,
-                        source=embedding_index.source_comment_count,
-                    )
-                )
-    except KeyboardInterrupt:
-        print("\n[chat-embed] Interrupted; stopping embedding generation.")
-        return 0
-
+    stats = PipelineStats()
+    with Session(engine) as session, request_chat_embedding_cache.connection() as cache:
+        request_ids = _resolve_request_ids(session, ns.request_ids, ns.all)
+        if not request_ids:
+            parser.error("No matching requests found")
+
+        run_key = _run_key(adapter, request_ids, ns)
+        if ns.restart:
+            request_chat_embedding_cache.clear_run(cache, run_key)
+        completed = request_chat_embedding_cache.completed_requests(cache, run_key)
+        if completed:
+            print(f"[chat-embed] Resuming run {run_key}: {len(completed)} requests already done")
+        pipeline = EmbeddingPipeline(
+            adapter,
+            cache,
+            batch_size=ns.batch_size,
+            concurrency=ns.concurrency,
+            stats=stats,
+        )
+        jobs = _prepare_jobs(
+            session,
+            request_ids,
+            max_comments=ns.max_comments,
+            force=ns.force,
+            completed=completed,
+            stats=stats,
+        )
+        try:
+            asyncio.run(run_pipeline(jobs, pipeline, run_key=run_key, concurrency=ns.concurrency))
+        except KeyboardInterrupt:
+            print("\n[chat-embed] Interrupted; re-run the same command to resume.")
+            print(f"[chat-embed] {stats.summary()}")
+            return 0
+        if not stats.requests_failed:
+            request_chat_embedding_cache.clear_run(cache, run_key)
+
+    print(f"[chat-embed] {stats.summary()}")
     return 0
 
 
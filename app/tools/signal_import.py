@@ -611,7 +611,7 @@ def ingest_messages(export: SignalExport, *, dry_run: bool) -> MessageImportSumm
         if not dry_run:
             session.commit()
             if request.id:
-                request_chat_search_service.refresh_chat_index(session, request.id)
+                request_chat_search_service.sync_chat_index(session, request.id)
 
         return MessageImportSummary(
             total_messages=len(export.messages),
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""Time hub feed ingestion of a synthetic bundle (fresh load, unchanged re-ingest, churned re-ingest)."""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from sqlalchemy import func  # noqa: E402
+from sqlmodel import select  # noqa: E402
+
+from app.hub.feed import db as feed_db  # noqa: E402
+from app.hub.feed import HubFeedComment, HubFeedRequest, ingest_bundle, session_scope  # noqa: E402
+
+INSTANCE = "https://bench.example"
+
+
+def _write_bundle(root: Path, requests: int, comments: int, *, seed: int, drop: float = 0.0) -> None:
+    """Spread `comments` over `requests` files; `drop` removes that share of requests."""
+    rng = random.Random(seed)
+    per_request = [comments // requests] * requests
+    for index in range(comments % requests):
+        per_request[index] += 1
+    base = datetime(2024, 1, 1)
+    request_dir = root / "requests"
+    request_dir.mkdir(parents=True, exist_ok=True)
+    for stale in request_dir.glob("*.sync.txt"):
+        stale.unlink()
+    comment_id = 0
+    for request_id in range(1, requests + 1):
+        count = per_request[request_id - 1]
+        if drop and rng.random() < drop:
+            comment_id += count
+            continue
+        lines = [
+            "Entity: request",
+            f"ID: {request_id}",
+            f"Instance: {INSTANCE}",
+            f"Title: Synthetic request {request_id}",
+            "Status: open",
+            "Sync-Scope: public",
+            "Created-By: 1",
+            f"Updated-At: {(base + timedelta(minutes=request_id)).isoformat()}Z",
+            "",
+            "Description:",
+            f"Synthetic description {request_id} {seed}",
+            "",
+            "Comments:",
+        ]
+        for _ in range(count):
+            comment_id += 1
+            lines += [
+                "---",
+                f"Comment-ID: {comment_id}",
+                "User-ID: 1",
+                "Username: bench",
+                f"Created-At: {(base + timedelta(seconds=comment_id)).isoformat()}Z",
+                "Sync-Scope: public",
+                "",
+                f"comment {comment_id} seed {seed}",
+                "",
+            ]
+        (request_dir / f"request_{request_id}.sync.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def _ingest(bundle: Path, digest: str) -> float:
+    started = time.perf_counter()
+    ingest_bundle(bundle, peer_name="bench", manifest_digest=digest, signed_at=datetime.now(timezone.utc))
+    return time.perf_counter() - started
+
+
+def _counts() -> tuple[int, int]:
+    with session_scope() as session:
+        requests = session.exec(select(func.count()).select_from(HubFeedRequest)).one()
+        comments = session.exec(select(func.count()).select_from(HubFeedComment)).one()
+    return requests, comments
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--comments", type=int, default=50000)
+    parser.add_argument("--drop", type=float, default=0.05, help="Share of requests withdrawn in the churn pass")
+    parser.add_argument("--seed", type=int, default=7)
+    ns = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        feed_db.DEFAULT_FEED_DB_PATH = root / "hub_feed.db"
+        feed_db.get_feed_engine.cache_clear()
+        bundle = root / "bundle"
+        _write_bundle(bundle, ns.requests, ns.comments, seed=ns.seed)
+
+        print(f"{'pass':<12} {'seconds':>8} {'comments/s':>11} {'requests':>9} {'comments':>9}")
+        passes = [("fresh", "digest-1"), ("unchanged", "digest-2"), ("churned", "digest-3")]
+        for label, digest in passes:
+            if label == "churned":
+                _write_bundle(bundle, ns.requests, ns.comments, seed=ns.seed + 1, drop=ns.drop)
+            elapsed = _ingest(bundle, digest)
+            requests, comments = _counts()
+            print(f"{label:<12} {elapsed:>8.2f} {ns.comments / elapsed:>11.0f} {requests:>9} {comments:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""Measure recall and latency of the IVF embedding index against exact search."""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from app.services import request_chat_ann_index, request_chat_embeddings  # noqa: E402
+
+MODEL = "benchmark:synthetic"
+
+
+def _populate(requests: int, comments: int, dims: int, clusters: int, seed: int) -> None:
+    """Write clustered synthetic vectors, roughly the shape of topical chat embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dims)).astype(np.float32)
+    for request_id in range(1, requests + 1):
+        center = centers[rng.integers(clusters)]
+        vectors = center + 0.6 * rng.normal(size=(comments, dims)).astype(np.float32)
+        index = request_chat_embeddings.build_index(
+            request_id=request_id,
+            model=MODEL,
+            comment_vectors=[(request_id * comments + offset, vector) for offset, vector in enumerate(vectors)],
+            source_count=comments,
+        )
+        request_chat_embeddings.write_index(index)
+
+
+def _measure(store, kind: str, queries: np.ndarray, k: int, nprobe: int) -> tuple[float, float, float, float]:
+    exact_ms: list[float] = []
+    ann_ms: list[float] = []
+    hits = 0
+    for query in queries:
+        started = time.perf_counter()
+        exact = request_chat_ann_index.exact_search(store, kind, query, k=k)
+        exact_ms.append((time.perf_counter() - started) * 1000)
+        started = time.perf_counter()
+        approx = request_chat_ann_index.search(store, kind, query, k=k, nprobe=nprobe)
+        ann_ms.append((time.perf_counter() - started) * 1000)
+        hits += len({item.row for item in exact} & {item.row for item in approx})
+    recall = hits / (len(queries) * k)
+    return float(np.mean(exact_ms)), float(np.mean(ann_ms)), float(np.percentile(ann_ms, 95)), recall
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=1000, help="Synthetic requests (one aggregate each)")
+    parser.add_argument("--comments", type=int, default=100, help="Comment vectors per request")
+    parser.add_argument("--dimensions", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=200, help="Topic clusters the vectors are drawn around")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, action="append", help="Lists probed per query (repeatable)")
+    parser.add_argument("--seed", type=int, default=7)
+    ns = parser.parse_args(argv)
+    nprobes = ns.nprobe or [4, 16, 64]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        request_chat_embeddings.CACHE_DIR = Path(tmp)
+        started = time.perf_counter()
+        _populate(ns.requests, ns.comments, ns.dimensions, ns.clusters, ns.seed)
+        print(f"populated {ns.requests * ns.comments} comment vectors in {time.perf_counter() - started:.1f}s")
+        store = request_chat_embeddings.load_store(MODEL)
+        rng = np.random.default_rng(ns.seed + 1)
+
+        print(f"{'kind':<11} {'rows':>8} {'build s':>8} {'nprobe':>7} {'exact ms':>9} {'ann ms':>8} {'ann p95':>8} {'recall':>7}")
+        for kind in request_chat_ann_index.KINDS:
+            vectors = store.aggregate_vectors if kind == request_chat_ann_index.KIND_AGGREGATES else store.comment_vectors
+            started = time.perf_counter()
+            index = request_chat_ann_index.ensure_index(store, kind)
+            build_s = time.perf_counter() - started
+            if index is None:
+                print(f"{kind:<11} {len(vectors):>8} below MIN_TRAIN_ROWS={request_chat_ann_index.MIN_TRAIN_ROWS}; exact only")
+                continue
+            picks = rng.integers(len(vectors), size=ns.queries)
+            queries = np.asarray(vectors[picks]) + 0.3 * rng.normal(size=(ns.queries, ns.dimensions)).astype(np.float32)
+            for nprobe in nprobes:
+                exact_ms, ann_ms, ann_p95, recall = _measure(store, kind, queries, ns.k, nprobe)
+                print(
+                    f"{kind:<11} {len(vectors):>8} {build_s:>8.2f} {nprobe:>7} "
+                    f"{exact_ms:>9.2f} {ann_ms:>8.2f} {ann_p95:>8.2f} {recall:>7.3f}"
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
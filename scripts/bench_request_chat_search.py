@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""Compare request chat search over the JSON cache with the inverted index."""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from sqlmodel import Session, SQLModel, create_engine  # noqa: E402
+
+from app import models  # noqa: E402,F401
+from app.services import request_chat_search_index, request_chat_search_service  # noqa: E402
+from app.services.request_chat_search_service import ChatSearchEntry, ChatSearchIndex  # noqa: E402
+
+VOCABULARY = [
+    "ride", "clinic", "groceries", "rent", "apartment", "bus", "water", "doctor", "cash",
+    "tomorrow", "tonight", "thanks", "available", "pickup", "dropoff", "school", "kids",
+    "shelter", "medicine", "payment", "train", "lease", "food", "supplies", "volunteer",
+]
+QUERIES = ["ride clinic", "groceries", "rent apartment lease", "volunteer", "medicine doctor tonight"]
+
+
+def _synthetic_index(request_id: int, entries: int, participants: int, seed: int) -> ChatSearchIndex:
+    rng = random.Random(seed)
+    rows: list[ChatSearchEntry] = []
+    filler = [f"word{idx}" for idx in range(5000)]
+    for comment_id in range(1, entries + 1):
+        words = rng.sample(VOCABULARY, 3) + rng.sample(filler, 12)
+        body = " ".join(words)
+        user_id = rng.randint(1, participants)
+        rows.append(
+            ChatSearchEntry(
+                comment_id=comment_id,
+                user_id=user_id,
+                username=f"member{user_id}",
+                created_at=None,
+                body=body,
+                tokens=request_chat_search_service._extract_tokens(body),
+                topics=request_chat_search_service._detect_topics(body),
+                ai_topics=[],
+            )
+        )
+    return ChatSearchIndex(
+        request_id=request_id,
+        generated_at=datetime.utcnow().isoformat(),
+        entry_count=len(rows),
+        participants={str(pid): [f"member{pid}"] for pid in range(1, participants + 1)},
+        entries=rows,
+    )
+
+
+def _json_scan(request_id: int, query: str, limit: int) -> int:
+    """The pre-index search path: parse the JSON cache and scan every entry."""
+    index = request_chat_search_service._load_json_cache(request_id)
+    query_tokens = request_chat_search_service._extract_tokens(query.lower())
+    matches = 0
+    for entry in index.entries:
+        entry_tokens = set(entry.tokens)
+        if not any(token in entry_tokens for token in query_tokens):
+            continue
+        matches += 1
+        if matches >= limit:
+            break
+    return matches
+
+
+def _time(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=20000, help="Comments in the synthetic chat")
+    parser.add_argument("--participants", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=request_chat_search_service.DEFAULT_RESULT_LIMIT)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    ns = parser.parse_args(argv)
+
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with tempfile.TemporaryDirectory() as tmp, Session(engine) as session:
+        request_chat_search_service.CACHE_DIR = Path(tmp)
+        request_chat_search_index.DB_PATH = Path(tmp) / "search_index.db"
+        index = _synthetic_index(1, ns.entries, ns.participants, ns.seed)
+        request_chat_search_service._write_cache(index)
+        request_chat_search_service._write_search_index(index)
+
+        print(f"entries={ns.entries} limit={ns.limit} repeat={ns.repeat}")
+        print(f"{'query':<28} {'json scan ms':>14} {'index any ms':>14} {'index all ms':>14}")
+        for query in QUERIES:
+            json_ms = _time(lambda: _json_scan(1, query, ns.limit), ns.repeat)
+            any_ms = _time(
+                lambda: request_chat_search_service.search_chat(session, 1, query=query, limit=ns.limit),
+                ns.repeat,
+            )
+            all_ms = _time(
+                lambda: request_chat_search_service.search_chat(
+                    session, 1, query=query, limit=ns.limit, match="all"
+                ),
+                ns.repeat,
+            )
+            print(f"{query:<28} {json_ms:>14.2f} {any_ms:>14.2f} {all_ms:>14.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""Compare concurrent read/write throughput of the main engine under each SQLite profile.
+
+The `baseline` row is a plain engine with SQLite defaults and SQLAlchemy's default pool,
+which is how the main engine was built before profiles existed.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import replace
+from datetime import datetime
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlmodel import Session, SQLModel, create_engine, select  # noqa: E402
+
+from app.config import get_settings  # noqa: E402
+from app.db import SQLITE_PROFILES, build_engine  # noqa: E402
+from app.models import HelpRequest, User, UserSession  # noqa: E402
+
+
+def _seed(engine, users: int) -> list[str]:  # noqa: ANN001
+    session_ids: list[str] = []
+    with Session(engine) as session:
+        for index in range(users):
+            user = User(username=f"bench{index}")
+            session.add(user)
+            session.flush()
+            record = UserSession(user_id=user.id, is_fully_authenticated=True)
+            session.add(record)
+            session_ids.append(record.id)
+            session.add(HelpRequest(title=f"Request {index}", description="bench", created_by_user_id=user.id))
+        session.commit()
+    return session_ids
+
+
+def _worker(engine, session_ids: list[str], *, seconds: float, write_ratio: float, seed: int, totals: dict) -> None:  # noqa: ANN001
+    rng = random.Random(seed)
+    reads = writes = locked = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        session_id = rng.choice(session_ids)
+        try:
+            with Session(engine) as session:
+                record = session.get(UserSession, session_id)
+                if rng.random() < write_ratio:
+                    record.last_seen_at = datetime.utcnow()
+                    session.add(HelpRequest(title="bench write", description="bench", created_by_user_id=record.user_id))
+                    session.commit()
+                    writes += 1
+                else:
+                    session.exec(select(User).where(User.id == record.user_id)).first()
+                    session.exec(select(HelpRequest).order_by(HelpRequest.id.desc()).limit(20)).all()
+                    reads += 1
+        except OperationalError:
+            locked += 1
+    with totals["lock"]:
+        totals["reads"] += reads
+        totals["writes"] += writes
+        totals["locked"] += locked
+
+
+def _run(profile: str, root: Path, ns: argparse.Namespace) -> dict:
+    url = f"sqlite:///{root / f'{profile}.db'}"
+    if profile == "baseline":
+        engine = create_engine(url, echo=False, connect_args={"check_same_thread": False})
+    else:
+        settings = replace(get_settings(), sqlite_profile=profile, sqlite_busy_timeout_ms=ns.busy_timeout_ms)
+        engine = build_engine(url, settings)
+    SQLModel.metadata.create_all(engine)
+    session_ids = _seed(engine, ns.users)
+    totals = {"reads": 0, "writes": 0, "locked": 0, "lock": threading.Lock()}
+    threads = [
+        threading.Thread(
+            target=_worker,
+            args=(engine, session_ids),
+            kwargs={"seconds": ns.seconds, "write_ratio": ns.write_ratio, "seed": ns.seed + index, "totals": totals},
+        )
+        for index in range(ns.threads)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+    return totals
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--write-ratio", type=float, default=0.2, help="Share of operations that commit a write")
+    parser.add_argument("--busy-timeout-ms", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=7)
+    ns = parser.parse_args(argv)
+
+    print(f"{'profile':<12} {'reads/s':>9} {'writes/s':>9} {'locked':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile in ("baseline", *SQLITE_PROFILES):
+            totals = _run(profile, Path(tmp), ns)
+            print(
+                f"{profile:<12} {totals['reads'] / ns.seconds:>9.0f} "
+                f"{totals['writes'] / ns.seconds:>9.0f} {totals['locked']:>7}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
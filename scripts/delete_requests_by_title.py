@@ -22,9 +22,11 @@ from app.models import (  # noqa: E402
     RequestAttribute,
     RequestComment,
 )
+from app.services import request_chat_embeddings, request_chat_search_index  # noqa: E402
 
 CHAT_CACHE_DIR = REPO_ROOT / "storage" / "cache" / "request_chats"
 CHAT_EMBED_CACHE_DIR = REPO_ROOT / "storage" / "cache" / "request_chat_embeddings"
+CHAT_SEARCH_INDEX_DB = CHAT_CACHE_DIR / "search_index.db"
 
 
 def _count_rows(session: Session, statement) -> int:
@@ -85,16 +87,23 @@ def _delete_requests(session: Session, request_ids: list[int]) -> int:
 
 
 def _remove_cache_files(request_ids: Iterable[int]) -> dict[str, int]:
+    request_ids = list(request_ids)
+    request_chat_embeddings.CACHE_DIR = CHAT_EMBED_CACHE_DIR
+    embedded_ids = set(request_chat_embeddings.list_cached_request_ids())
     deleted_counts = {"chat_index": 0, "chat_embeddings": 0}
     for request_id in request_ids:
         chat_cache = CHAT_CACHE_DIR / f"request_{request_id}.json"
         if chat_cache.exists():
             chat_cache.unlink()
             deleted_counts["chat_index"] += 1
-        embed_cache = CHAT_EMBED_CACHE_DIR / f"request_{request_id}.json"
-        if embed_cache.exists():
-            embed_cache.unlink()
+        if request_id in embedded_ids:
+            request_chat_embeddings.delete_index(request_id)
             deleted_counts["chat_embeddings"] += 1
+    if CHAT_SEARCH_INDEX_DB.exists():
+        request_chat_search_index.DB_PATH = CHAT_SEARCH_INDEX_DB
+        with request_chat_search_index.connection() as conn:
+            for request_id in request_ids:
+                request_chat_search_index.delete_index(conn, request_id)
     return deleted_counts
 
 
@@ -49,6 +49,9 @@
   var typingIndicator = null;
   var announcer = null;
   let jumpButton = null;
+  let channelStream = null;
+  let channelStreamKey = '';
+  let channelStreamOpen = false;
 
   if (Array.isArray(state.requests)) {
     state.requests.forEach(registerChannel);
@@ -293,6 +296,7 @@
     syncButtonCache();
     applyFilters();
     announceResults(rows.length);
+    connectChannelStream();
   }
 
   function updateChannelQuery(channelId) {
@@ -409,12 +413,16 @@
   const heartbeat = setInterval(pingPresenceHeartbeat, presenceHeartbeatInterval);
   const presencePoller = setInterval(refreshPresence, presencePollInterval);
   refreshPresence();
+  connectChannelStream();
   window.addEventListener('storage', handlePresenceStorage);
   window.addEventListener('pagehide', clearPresenceScope);
   window.addEventListener('beforeunload', () => {
     clearInterval(heartbeat);
     clearInterval(presencePoller);
     clearPresenceScope();
+    if (channelStream) {
+      channelStream.close();
+    }
   });
 
   function buildQueryKey(filter = activeFilter, term = searchTerm) {
@@ -472,6 +480,7 @@
     }
     loadChannel(channelId, { preserveScroll: false });
     sendPresencePing(false);
+    connectChannelStream();
   }
 
   function updateRelativeTime(button) {
@@ -638,7 +647,11 @@
       }
       form.reset();
       showComposerErrors(errorsBox, []);
-      await loadChannel(channelId);
+      if (payload.channel_html && payload.comment) {
+        appendChannelMessage(channelId, payload.comment.id, payload.channel_html, { stick: true });
+      } else {
+        await loadChannel(channelId);
+      }
       announce('Message sent');
     } catch (error) {
       form.submit();
@@ -957,6 +970,10 @@
       return;
     }
     upsertPresenceScope(ids);
+    if (channelStreamOpen) {
+      // Presence deltas arrive on the channel stream.
+      return;
+    }
     const scopeIds = readPresenceScopeIds();
     const pollIds = scopeIds.length ? scopeIds : ids;
     if (!pollIds.length) return;
@@ -1016,6 +1033,142 @@
     });
   }
 
+  function connectChannelStream() {
+    if (typeof window.EventSource !== 'function') return;
+    const ids = buildPresenceIdList().sort((a, b) => a - b);
+    const key = ids.join(',');
+    if (channelStream && key === channelStreamKey) return;
+    if (channelStream) {
+      channelStream.close();
+      channelStream = null;
+      channelStreamOpen = false;
+    }
+    channelStreamKey = key;
+    if (!ids.length) return;
+    const params = ids.map((id) => `id=${id}`).join('&');
+    const source = new EventSource(`/requests/channels/stream?${params}`);
+    source.addEventListener('open', () => {
+      channelStreamOpen = true;
+    });
+    source.addEventListener('error', () => {
+      channelStreamOpen = false;
+    });
+    source.addEventListener('comment', (event) => {
+      const data = parseStreamEvent(event);
+      if (!data) return;
+      if (Number(data.request_id) === Number(state.active_channel_id)) {
+        if (!data.html) {
+          loadChannel(Number(state.active_channel_id));
+          return;
+        }
+        appendChannelMessage(data.request_id, data.comment_id, data.html, { stick: false });
+      } else {
+        adjustChannelReplies(data.request_id, 1);
+      }
+    });
+    source.addEventListener('comment-deleted', (event) => {
+      const data = parseStreamEvent(event);
+      if (!data) return;
+      const removed = removeChannelMessage(data.request_id, data.comment_id);
+      if (removed || Number(data.request_id) !== Number(state.active_channel_id)) {
+        adjustChannelReplies(data.request_id, -1);
+      }
+    });
+    source.addEventListener('presence', (event) => {
+      const data = parseStreamEvent(event);
+      if (!data) return;
+      updatePresenceIndicators({ [data.request_id]: data });
+      scheduleTypingExpiry(data);
+    });
+    source.addEventListener('resync', () => {
+      if (state.active_channel_id) {
+        loadChannel(Number(state.active_channel_id));
+      }
+    });
+    channelStream = source;
+  }
+
+  function parseStreamEvent(event) {
+    try {
+      return JSON.parse(event.data);
+    } catch (error) {
+      return null;
+    }
+  }
+
+  let typingExpiryTimer = null;
+
+  function scheduleTypingExpiry(data) {
+    if (Number(data.request_id) !== Number(state.active_channel_id)) return;
+    if (typingExpiryTimer) {
+      clearTimeout(typingExpiryTimer);
+      typingExpiryTimer = null;
+    }
+    if (!Array.isArray(data.typing) || !data.typing.length) return;
+    const ttl = (Number(data.typing_ttl) || 6) * 1000;
+    typingExpiryTimer = setTimeout(() => {
+      typingExpiryTimer = null;
+      updatePresenceIndicators({ [data.request_id]: { ...data, typing: [] } });
+    }, ttl);
+  }
+
+  function appendChannelMessage(channelId, commentId, html, options = {}) {
+    if (!chatPane || !html) return false;
+    const pane = chatPane.querySelector('[data-channel-chat]');
+    if (!pane || Number(pane.dataset.channelId) !== Number(channelId)) return false;
+    const log = pane.querySelector('[data-channel-log]');
+    if (!log) return false;
+    if (commentId && log.querySelector(`[data-comment-id="${commentId}"]`)) return false;
+    let list = log.querySelector('.channel-chat__list');
+    if (!list) {
+      list = document.createElement('ul');
+      list.className = 'channel-chat__list';
+      log.innerHTML = '';
+      log.appendChild(list);
+    }
+    const stick = options.stick || isNearBottom(log);
+    const template = document.createElement('template');
+    template.innerHTML = html.trim();
+    const node = template.content.firstElementChild;
+    if (!node) return false;
+    const pending = list.querySelector('.channel-message--pending');
+    list.insertBefore(node, pending || null);
+    if (stick) {
+      log.scrollTo({ top: log.scrollHeight });
+    } else {
+      setJumpVisibility(true);
+    }
+    adjustChannelReplies(channelId, 1);
+    announce('New message');
+    return true;
+  }
+
+  function removeChannelMessage(channelId, commentId) {
+    if (!chatPane || !commentId) return false;
+    const pane = chatPane.querySelector('[data-channel-chat]');
+    if (!pane || Number(pane.dataset.channelId) !== Number(channelId)) return false;
+    const node = pane.querySelector(`[data-comment-id="${commentId}"]`);
+    if (!node) return false;
+    node.remove();
+    return true;
+  }
+
+  function adjustChannelReplies(channelId, delta) {
+    const id = Number(channelId);
+    const existing = channelStore.get(id) || channelMeta[id];
+    if (!existing) return;
+    const count = Math.max(0, (Number(existing.comment_count) || 0) + delta);
+    registerChannel({ ...existing, comment_count: count });
+    const button = buttons.find((btn) => Number(btn.dataset.channelId) === id);
+    const badge = button?.querySelector('[data-channel-replies]');
+    if (!badge) return;
+    if (count > 0) {
+      badge.textContent = `${count} replies`;
+    } else {
+      badge.remove();
+    }
+  }
+
   function addOptimisticMessage(log, body) {
     if (!log || !body) return null;
     let list = log.querySelector('.channel-chat__list');
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import tarfile
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.hub.app import create_hub_app
+from app.hub.config import reset_settings_cache
+from app.hub.feed import db as feed_db
+from app.hub.storage import object_path
+from app.sync import signing
+
+HEADERS = {"Authorization": "Bearer secret-token"}
+
+
+@pytest.fixture()
+def hub(monkeypatch: pytest.MonkeyPatch, tmp_path: Path):
+    config_path = tmp_path / "hub_config.json"
+    storage_dir = tmp_path / "store"
+    monkeypatch.setenv("WB_HUB_CONFIG", str(config_path))
+    monkeypatch.setenv("WB_SYNC_HOME", str(tmp_path / ".sync"))
+    monkeypatch.setattr(feed_db, "DEFAULT_FEED_DB_PATH", tmp_path / "hub_feed.db")
+    feed_db.get_feed_engine.cache_clear()
+    key = signing.generate_keypair(force=True)
+    config = {
+        "storage_dir": str(storage_dir),
+        "peers": [{"name": "alpha", "token": "secret-token", "public_key": key.public_key_b64}],
+    }
+    config_path.write_text(json.dumps(config, indent=2) + "\n", encoding="utf-8")
+    reset_settings_cache()
+    yield TestClient(create_hub_app()), storage_dir, key
+    reset_settings_cache()
+    feed_db.get_feed_engine.cache_clear()
+
+
+def _sign(bundle: Path, files: dict[str, str], key: signing.SigningKey) -> str:
+    lines = []
+    for rel, text in sorted(files.items()):
+        path = bundle / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+        lines.append(f"{hashlib.sha256(text.encode('utf-8')).hexdigest()}  {rel}")
+    manifest = "\n".join(lines) + "\n"
+    (bundle / signing.MANIFEST_FILENAME).write_text(manifest, encoding="utf-8")
+    signing.sign_bundle(bundle, key)
+    return manifest
+
+
+def _tar(bundle: Path, skip: set[str] = frozenset()) -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        for path in sorted(bundle.rglob("*")):
+            rel = path.relative_to(bundle).as_posix()
+            if path.is_file() and rel not in skip:
+                tar.add(path, arcname=rel)
+    return buffer.getvalue()
+
+
+def _upload(client: TestClient, suffix: str, payload: bytes):
+    return client.post(
+        f"/api/v1/sync/alpha/{suffix}",
+        headers=HEADERS,
+        files={"bundle": ("bundle.tar.gz", payload, "application/gzip")},
+    )
+
+
+def test_delta_push_uploads_only_missing_files(hub, tmp_path: Path) -> None:
+    client, storage_dir, key = hub
+    bundle = tmp_path / "bundle"
+    files = {
+        "users/user_1.sync.txt": "Entity: user\nID: 1\nUsername: one\n\n",
+        "users/user_2.sync.txt": "Entity: user\nID: 2\nUsername: two\n\n",
+    }
+    _sign(bundle, files, key)
+    assert _upload(client, "bundle", _tar(bundle)).status_code == 202
+
+    files["users/user_2.sync.txt"] = "Entity: user\nID: 2\nUsername: deux\n\n"
+    files["users/user_3.sync.txt"] = "Entity: user\nID: 3\nUsername: three\n\n"
+    manifest = _sign(bundle, files, key)
+
+    plan = client.post("/api/v1/sync/alpha/bundle/plan", headers=HEADERS, json={"manifest": manifest})
+    assert plan.status_code == 200
+    assert plan.json()["missing"] == ["users/user_2.sync.txt", "users/user_3.sync.txt"]
+    assert plan.json()["known"] == 1
+
+    delta = _upload(client, "bundle/delta", _tar(bundle, skip={"users/user_1.sync.txt"}))
+    assert delta.status_code == 202, delta.text
+    assert delta.json()["new_objects"] == 2
+    assert delta.json()["manifest_digest"] == hashlib.sha256(manifest.encode("utf-8")).hexdigest()
+
+    download = client.get("/api/v1/sync/alpha/bundle", headers=HEADERS)
+    with tarfile.open(fileobj=io.BytesIO(download.content), mode="r:gz") as tar:
+        members = {member.name: tar.extractfile(member).read().decode("utf-8") for member in tar.getmembers()}
+    for rel, text in files.items():
+        assert members[rel] == text
+    assert not any(path.name.startswith(".upload-") for path in storage_dir.iterdir())
+
+
+def test_delta_push_reports_blobs_that_disappeared(hub, tmp_path: Path) -> None:
+    client, storage_dir, key = hub
+    bundle = tmp_path / "bundle"
+    files = {"users/user_1.sync.txt": "Entity: user\nID: 1\n\n"}
+    _sign(bundle, files, key)
+    assert _upload(client, "bundle", _tar(bundle)).status_code == 202
+    object_path(storage_dir, hashlib.sha256(files["users/user_1.sync.txt"].encode("utf-8")).hexdigest()).unlink()
+
+    delta = _upload(client, "bundle/delta", _tar(bundle, skip=set(files)))
+
+    assert delta.status_code == 409
+    assert delta.json()["detail"] == {"error": "missing_objects", "missing": ["users/user_1.sync.txt"]}
+
+
+def test_delta_push_rejects_traversal_digests(hub, tmp_path: Path) -> None:
+    client, storage_dir, key = hub
+    bundle = tmp_path / "bundle"
+    _sign(bundle, {"users/user_1.sync.txt": "Entity: user\nID: 1\n\n"}, key)
+    assert _upload(client, "bundle", _tar(bundle)).status_code == 202
+    (storage_dir / "secret.txt").write_text("TOP-SECRET", encoding="utf-8")
+
+    evil = tmp_path / "evil"
+    evil.mkdir()
+    manifest = "../secret.txt  public/x.txt\n"
+    (evil / signing.MANIFEST_FILENAME).write_text(manifest, encoding="utf-8")
+    signing.sign_bundle(evil, key)
+
+    plan = client.post("/api/v1/sync/alpha/bundle/plan", headers=HEADERS, json={"manifest": manifest})
+    assert plan.status_code == 400
+    delta = _upload(client, "bundle/delta", _tar(evil))
+    assert delta.status_code == 400
+    assert "Invalid object digest" in delta.json()["detail"]
+
+    download = client.get("/api/v1/sync/alpha/bundle", headers=HEADERS)
+    with tarfile.open(fileobj=io.BytesIO(download.content), mode="r:gz") as tar:
+        assert "public/x.txt" not in tar.getnames()
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import shutil
+import tarfile
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.hub.app import create_hub_app
+from app.hub.config import reset_settings_cache
+from app.hub.storage import ARCHIVE_DIRNAME, iter_bundle_archive
+from app.sync import signing
+
+
+@pytest.fixture()
+def hub_client(monkeypatch: pytest.MonkeyPatch, tmp_path: Path):
+    config_path = tmp_path / "hub_config.json"
+    storage_dir = tmp_path / "store"
+    monkeypatch.setenv("WB_HUB_CONFIG", str(config_path))
+    monkeypatch.setenv("WB_SYNC_HOME", str(tmp_path / ".sync"))
+
+    bundle_dir = tmp_path / "bundle"
+    (bundle_dir / "users").mkdir(parents=True)
+    (bundle_dir / "users" / "user_1.sync.txt").write_text("Entity: user\nID: 1\n\n", encoding="utf-8")
+    (bundle_dir / signing.MANIFEST_FILENAME).write_text("abc  users/user_1.sync.txt\n", encoding="utf-8")
+    key = signing.generate_keypair(force=True)
+    signing.sign_bundle(bundle_dir, key)
+    shutil.copytree(bundle_dir, storage_dir / "alpha")
+
+    config = {
+        "storage_dir": str(storage_dir),
+        "peers": [{"name": "alpha", "token": "secret-token", "public_key": key.public_key_b64}],
+    }
+    config_path.write_text(json.dumps(config, indent=2) + "\n", encoding="utf-8")
+    reset_settings_cache()
+    yield TestClient(create_hub_app()), storage_dir
+    reset_settings_cache()
+
+
+def _members(payload: bytes) -> dict[str, bytes]:
+    with tarfile.open(fileobj=io.BytesIO(payload), mode="r:gz") as tar:
+        return {member.name: tar.extractfile(member).read() for member in tar.getmembers() if member.isfile()}
+
+
+def test_iter_bundle_archive_streams_each_file_once(tmp_path: Path) -> None:
+    root = tmp_path / "bundle"
+    (root / "requests").mkdir(parents=True)
+    for index in range(3):
+        (root / "requests" / f"request_{index}.sync.txt").write_bytes(bytes([index]) * 200_000)
+
+    chunks = list(iter_bundle_archive(root, chunk_size=4096))
+
+    assert max(len(chunk) for chunk in chunks) <= 4096
+    members = _members(b"".join(chunks))
+    assert sorted(members) == [f"requests/request_{index}.sync.txt" for index in range(3)]
+    assert members["requests/request_2.sync.txt"] == b"\x02" * 200_000
+
+
+def test_download_is_cached_by_manifest_digest_and_revalidated(hub_client) -> None:
+    client, storage_dir = hub_client
+    headers = {"Authorization": "Bearer secret-token"}
+    digest = hashlib.sha256((storage_dir / "alpha" / signing.MANIFEST_FILENAME).read_bytes()).hexdigest()
+
+    first = client.get("/api/v1/sync/alpha/bundle", headers=headers)
+    assert first.status_code == 200
+    assert first.headers["etag"] == f'"{digest}"'
+    assert "users/user_1.sync.txt" in _members(first.content)
+    cached = storage_dir / ARCHIVE_DIRNAME / "alpha" / f"{digest}.tar.gz"
+    assert cached.read_bytes() == first.content
+
+    second = client.get("/api/v1/sync/alpha/bundle", headers=headers)
+    assert second.status_code == 200
+    assert second.content == first.content
+    assert second.headers["content-length"] == str(len(first.content))
+
+    not_modified = client.get("/api/v1/sync/alpha/bundle", headers={**headers, "If-None-Match": f'"{digest}"'})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    home = client.get("/")
+    assert home.status_code == 200
+    assert ARCHIVE_DIRNAME not in home.text
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event
+from sqlmodel import select
+
+from app.hub.feed import db as feed_db
+from app.hub.feed import HubFeedComment, HubFeedRequest, ingest_bundle, session_scope
+
+
+@pytest.fixture(autouse=True)
+def feed_database(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(feed_db, "DEFAULT_FEED_DB_PATH", tmp_path / "hub_feed.db")
+    feed_db.get_feed_engine.cache_clear()
+    yield
+    feed_db.get_feed_engine.cache_clear()
+
+
+def _write_request(bundle: Path, request_id: int, comments: list[tuple[int, str]], *, updated_at: str | None) -> None:
+    lines = [
+        "Entity: request",
+        f"ID: {request_id}",
+        "Instance: https://alpha.example",
+        f"Title: Request {request_id}",
+        "Status: open",
+        "Sync-Scope: public",
+        "Created-By: 1",
+    ]
+    if updated_at:
+        lines.append(f"Updated-At: {updated_at}")
+    lines += ["", "Description:", f"Need help {request_id}", ""]
+    if comments:
+        lines.append("Comments:")
+        for comment_id, body in comments:
+            lines += [
+                "---",
+                f"Comment-ID: {comment_id}",
+                "User-ID: 1",
+                "Username: helper",
+                "Created-At: 2024-03-01T10:00:00Z",
+                "Sync-Scope: public",
+                "",
+                body,
+                "",
+            ]
+    path = bundle / "requests" / f"request_{request_id}.sync.txt"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def _ingest(bundle: Path, digest: str) -> None:
+    ingest_bundle(bundle, peer_name="alpha", manifest_digest=digest, signed_at=datetime.now(timezone.utc))
+
+
+def test_ingest_upserts_and_purges_set_based(tmp_path: Path) -> None:
+    bundle = tmp_path / "bundle"
+    _write_request(bundle, 1, [(10, "first"), (11, "second")], updated_at="2024-03-02T00:00:00Z")
+    _write_request(bundle, 2, [(20, "other")], updated_at="2024-03-03T00:00:00Z")
+    _write_request(bundle, 3, [], updated_at="2024-03-04T00:00:00Z")
+    _ingest(bundle, "digest-1")
+
+    _write_request(bundle, 1, [(10, "first, edited")], updated_at=None)
+    (bundle / "requests" / "request_2.sync.txt").unlink()
+
+    statements: list[str] = []
+    engine = feed_db.get_feed_engine()
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        _ingest(bundle, "digest-2")
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    with session_scope() as session:
+        requests = {row.source_request_id: row for row in session.exec(select(HubFeedRequest)).all()}
+        comments = session.exec(select(HubFeedComment)).all()
+
+        assert sorted(requests) == [1, 3]
+        assert requests[1].comment_count == 1
+        assert requests[1].updated_at == datetime(2024, 3, 2)
+        assert requests[1].manifest_digest == "digest-2"
+        assert [(comment.source_comment_id, comment.body) for comment in comments] == [(10, "first, edited")]
+        assert comments[0].request_id == requests[1].id
+
+    assert sum(sql.lstrip().upper().startswith("DELETE") for sql in statements) == 2
+    assert sum(sql.lstrip().upper().startswith("INSERT INTO HUB_FEED_COMMENT") for sql in statements) == 1
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import tarfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.hub.config import HubPeer, HubSettings
+from app.hub.storage import (
+    OBJECTS_DIRNAME,
+    build_metadata,
+    iter_bundle_archive,
+    object_path,
+    prune_objects,
+    summarize_bundle,
+    write_bundle,
+)
+from app.sync import signing
+
+
+def _settings(storage_dir: Path) -> HubSettings:
+    storage_dir.mkdir(parents=True, exist_ok=True)
+    return HubSettings(storage_dir=storage_dir, peers={}, token_index={}, admin_tokens={}, admin_token_index={})
+
+
+def _bundle(root: Path, files: dict[str, str]) -> Path:
+    lines = []
+    for rel, text in sorted(files.items()):
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+        lines.append(f"{hashlib.sha256(text.encode('utf-8')).hexdigest()}  {rel}")
+    (root / signing.MANIFEST_FILENAME).write_text("\n".join(lines) + "\n", encoding="utf-8")
+    (root / signing.SIGNATURE_FILENAME).write_text("Signature-Version: 1\n", encoding="utf-8")
+    return root
+
+
+def _write(settings: HubSettings, name: str, bundle: Path) -> dict[str, int]:
+    peer = HubPeer(name=name, token_hash="x", public_keys=())
+    return write_bundle(settings, peer, bundle, build_metadata(peer, "digest", datetime.now(timezone.utc)))
+
+
+def test_write_bundle_dedups_blobs_across_peers_and_pushes(tmp_path: Path) -> None:
+    settings = _settings(tmp_path / "store")
+    shared = "Entity: user\nID: 1\n\n"
+    alpha = _bundle(tmp_path / "alpha", {"users/user_1.sync.txt": shared, "requests/request_1.sync.txt": "alpha"})
+    beta = _bundle(tmp_path / "beta", {"users/user_1.sync.txt": shared})
+
+    first = _write(settings, "alpha", alpha)
+    assert first["new_objects"] == 2
+    assert first["file_count"] == 4
+    assert _write(settings, "beta", beta)["new_objects"] == 0
+    assert _write(settings, "alpha", alpha)["new_objects"] == 0
+
+    blobs = sorted((settings.storage_dir / OBJECTS_DIRNAME).glob("*/*"))
+    assert len(blobs) == 2
+    peer_dir = settings.storage_dir / "alpha"
+    assert not (peer_dir / "users").exists()
+    assert summarize_bundle(peer_dir) == {"file_count": 4, "total_bytes": first["total_bytes"]}
+
+    payload = b"".join(iter_bundle_archive(peer_dir))
+    with tarfile.open(fileobj=io.BytesIO(payload), mode="r:gz") as tar:
+        members = {member.name: tar.extractfile(member).read() for member in tar.getmembers()}
+    assert sorted(members) == [
+        signing.SIGNATURE_FILENAME,
+        signing.MANIFEST_FILENAME,
+        "requests/request_1.sync.txt",
+        "users/user_1.sync.txt",
+    ]
+    assert members["users/user_1.sync.txt"] == shared.encode("utf-8")
+
+
+def test_prune_objects_drops_unreferenced_blobs(tmp_path: Path) -> None:
+    settings = _settings(tmp_path / "store")
+    _write(settings, "alpha", _bundle(tmp_path / "v1", {"requests/request_1.sync.txt": "old"}))
+    _write(settings, "alpha", _bundle(tmp_path / "v2", {"requests/request_1.sync.txt": "new"}))
+    old_blob = object_path(settings.storage_dir, hashlib.sha256(b"old").hexdigest())
+    assert old_blob.exists()
+
+    assert prune_objects(settings, grace_seconds=0) == 1
+    assert not old_blob.exists()
+    assert object_path(settings.storage_dir, hashlib.sha256(b"new").hexdigest()).exists()
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.realtime import channels
+from app.realtime.channels import (
+    EVENT_COMMENT,
+    EVENT_PRESENCE,
+    EVENT_RESYNC,
+    ChannelSubscription,
+    InProcessChannelHub,
+)
+from app.services import request_channel_presence
+
+
+def test_hub_fans_out_per_request_and_coalesces_presence() -> None:
+    async def scenario():
+        hub = InProcessChannelHub()
+        first = hub.subscribe([1])
+        both = hub.subscribe([1, 2])
+        hub.publish(1, EVENT_COMMENT, {"comment_id": 10})
+        hub.publish(1, EVENT_PRESENCE, {"online": 1})
+        hub.publish(2, EVENT_COMMENT, {"comment_id": 20})
+        hub.publish(1, EVENT_PRESENCE, {"online": 2})
+        await asyncio.sleep(0)
+        return await first.next_batch(1.0), await both.next_batch(1.0)
+
+    first_events, both_events = asyncio.run(scenario())
+
+    assert [(event.kind, event.data) for event in first_events] == [
+        (EVENT_COMMENT, {"comment_id": 10}),
+        (EVENT_PRESENCE, {"online": 2}),
+    ]
+    assert [event.request_id for event in both_events] == [1, 2, 1]
+
+
+def test_has_subscribers_tracks_open_subscriptions() -> None:
+    async def scenario():
+        hub = InProcessChannelHub()
+        before = hub.has_subscribers(1)
+        subscription = hub.subscribe([1])
+        during = (hub.has_subscribers(1), hub.has_subscribers(2))
+        subscription.close()
+        return before, during, hub.has_subscribers(1)
+
+    assert asyncio.run(scenario()) == (False, (True, False), False)
+
+
+def test_lagging_subscriber_gets_a_single_resync() -> None:
+    async def scenario():
+        hub = InProcessChannelHub()
+        subscription = ChannelSubscription(hub, [1], backlog=3)
+        for index in range(5):
+            subscription.deliver(channels.ChannelEvent(id=str(index), request_id=1, kind=EVENT_COMMENT))
+        return await subscription.next_batch(1.0)
+
+    assert [(event.kind, event.id) for event in asyncio.run(scenario())] == [(EVENT_RESYNC, "3"), (EVENT_COMMENT, "4")]
+
+
+def test_last_event_id_replays_missed_events_or_asks_for_resync() -> None:
+    async def scenario():
+        hub = InProcessChannelHub(replay_size=3)
+        live = hub.subscribe([1])
+        for comment_id in range(1, 4):
+            hub.publish(1, EVENT_COMMENT, {"comment_id": comment_id})
+        await asyncio.sleep(0)
+        seen = (await live.next_batch(1.0))[0].id
+        resumed = hub.subscribe([1], last_event_id=seen)
+        foreign = hub.subscribe([1], last_event_id="other-1")
+        for comment_id in range(4, 7):
+            hub.publish(1, EVENT_COMMENT, {"comment_id": comment_id})
+        stale = hub.subscribe([1], last_event_id=seen)
+        await asyncio.sleep(0)
+        return await resumed.next_batch(1.0), await foreign.next_batch(1.0), await stale.next_batch(1.0)
+
+    resumed, foreign, stale = asyncio.run(scenario())
+
+    assert [event.data["comment_id"] for event in resumed] == [2, 3, 4, 5, 6]
+    assert [event.kind for event in foreign][0] == EVENT_RESYNC
+    assert [event.kind for event in stale][0] == EVENT_RESYNC
+
+
+def test_presence_service_publishes_only_deltas(monkeypatch: pytest.MonkeyPatch) -> None:
+    published: list[tuple[int, str, dict]] = []
+    monkeypatch.setattr(request_channel_presence, "_ENTRIES", {})
+    monkeypatch.setattr(request_channel_presence, "_PUBLISHED", {})
+    monkeypatch.setattr(
+        request_channel_presence,
+        "publish_channel_event",
+        lambda request_id, kind, data: published.append((request_id, kind, data)),
+    )
+    alice = SimpleNamespace(id=1, username="alice")
+
+    request_channel_presence.mark_presence(alice, 7)
+    request_channel_presence.mark_presence(alice, 7)
+    request_channel_presence.mark_presence(alice, 7, typing=True)
+
+    assert [(request_id, data["online"], data["typing"]) for request_id, _, data in published] == [
+        (7, 1, []),
+        (7, 1, ["alice"]),
+    ]
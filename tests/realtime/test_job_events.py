@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from app.realtime import events, storage
+from app.realtime.events import JobEventBus, event_id_for, replay_since
+
+
+def _snapshot(job_id: str, progress: float, *, at: datetime) -> dict:
+    return {"id": job_id, "state": "running", "progress": progress, "updated_at": at.isoformat()}
+
+
+def test_slow_subscriber_receives_only_latest_snapshot_per_job() -> None:
+    base = datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+    async def scenario() -> tuple[list, list]:
+        bus = JobEventBus()
+        everything = bus.subscribe()
+        scoped = bus.subscribe(["b"])
+
+        def publisher() -> None:
+            for step in range(100):
+                bus.publish(_snapshot("a", step / 100, at=base + timedelta(seconds=step)))
+            bus.publish(_snapshot("b", 0.5, at=base))
+
+        thread = threading.Thread(target=publisher)
+        thread.start()
+        thread.join()
+        await asyncio.sleep(0)
+        batch = await everything.next_batch(1.0)
+        scoped_batch = await scoped.next_batch(1.0)
+        everything.close()
+        scoped.close()
+        assert bus.subscriber_count() == 0
+        return batch, scoped_batch
+
+    batch, scoped_batch = asyncio.run(scenario())
+
+    assert [(event.job_id, json.loads(event.payload)["progress"]) for event in batch] == [("a", 0.99), ("b", 0.5)]
+    assert [event.job_id for event in scoped_batch] == ["b"]
+
+
+def test_next_batch_times_out_empty() -> None:
+    async def scenario() -> list:
+        subscription = JobEventBus().subscribe()
+        return await subscription.next_batch(0.01)
+
+    assert asyncio.run(scenario()) == []
+
+
+def test_replay_since_resumes_from_the_job_log(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(storage, "LOG_DIR", tmp_path / "jobs")
+    monkeypatch.setattr(storage, "LOG_PATH", tmp_path / "legacy.jsonl")
+    base = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    seen = _snapshot("a", 0.1, at=base)
+    for snapshot in (
+        seen,
+        _snapshot("a", 0.2, at=base + timedelta(seconds=1)),
+        _snapshot("b", 0.3, at=base + timedelta(seconds=2)),
+        _snapshot("a", 0.4, at=base + timedelta(seconds=3)),
+    ):
+        storage.persist_snapshot(snapshot)
+
+    replayed = replay_since(event_id_for(seen))
+
+    assert [(event.job_id, json.loads(event.payload)["progress"]) for event in replayed] == [("b", 0.3), ("a", 0.4)]
+    assert [event.job_id for event in replay_since(event_id_for(seen), ["b"])] == ["b"]
+    assert events.replay_since(replayed[-1].id) == []
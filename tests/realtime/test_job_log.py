@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from app.realtime.storage import SegmentedJobLog
+
+
+def _lines(directory: Path) -> list[dict]:
+    records = []
+    for path in sorted(directory.glob("segment-*.jsonl")):
+        records += [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    return records
+
+
+def test_log_appends_to_segments_and_compacts_old_ones(tmp_path: Path) -> None:
+    log = SegmentedJobLog(tmp_path / "jobs", max_records=4, segment_records=2)
+    for index in range(9):
+        log.append({"id": f"job-{index}", "state": "queued"})
+
+    segments = sorted(path.name for path in (tmp_path / "jobs").glob("segment-*.jsonl"))
+    assert segments == ["segment-00000003.jsonl", "segment-00000004.jsonl", "segment-00000005.jsonl"]
+    assert [record["id"] for record in log.history()] == [f"job-{index}" for index in range(5, 9)]
+    assert [record["id"] for record in log.history(limit=2)] == ["job-7", "job-8"]
+
+    reloaded = SegmentedJobLog(tmp_path / "jobs", max_records=4, segment_records=2)
+    assert reloaded.history() == log.history()
+    reloaded.append({"id": "job-9", "state": "queued"})
+    assert _lines(tmp_path / "jobs")[-1]["id"] == "job-9"
+
+
+def test_progress_ticks_are_coalesced_until_a_state_change(tmp_path: Path) -> None:
+    log = SegmentedJobLog(tmp_path / "jobs", flush_interval=60)
+    log.append({"id": "a", "state": "running", "progress": 0.0})
+    for step in range(1, 50):
+        log.append({"id": "a", "state": "running", "progress": step / 50}, coalesce=True)
+
+    assert len(_lines(tmp_path / "jobs")) == 1
+    assert log.history()[-1]["progress"] == 49 / 50
+
+    log.append({"id": "a", "state": "success", "progress": 1.0})
+    assert [(record["state"], record["progress"]) for record in _lines(tmp_path / "jobs")] == [
+        ("running", 0.0),
+        ("running", 49 / 50),
+        ("success", 1.0),
+    ]
+
+
+def test_legacy_single_file_log_is_adopted_and_torn_lines_skipped(tmp_path: Path) -> None:
+    legacy = tmp_path / "realtime_jobs.jsonl"
+    legacy.write_text('{"id": "old"}\n{"id": "tor', encoding="utf-8")
+
+    log = SegmentedJobLog(tmp_path / "jobs", legacy_path=legacy)
+
+    assert log.history() == [{"id": "old"}]
+    assert not legacy.exists()
+    log.append({"id": "new"})
+    assert SegmentedJobLog(tmp_path / "jobs").history() == [{"id": "old"}, {"id": "new"}]
+    log.reset()
+    assert log.history() == []
+    assert not (tmp_path / "jobs").exists()
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.config import get_settings
+from app.db import get_session
+from app.main import create_app
+from app.models import HelpRequest, RequestComment, User, UserSession
+from app.pagination import decode_cursor, encode_cursor
+from app.routes.ui.browse import routes as browse_routes
+from app.services.auth_service import SESSION_COOKIE_NAME
+
+BASE_TIME = datetime(2024, 5, 1, 12, 0, 0)
+
+
+def _build_engine():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def _seed(engine) -> tuple[User, str, set[tuple[str, int]]]:
+    """Admin viewer plus requests, comments and profiles that share timestamps."""
+    expected: set[tuple[str, int]] = set()
+    with Session(engine) as session:
+        admin = User(username="admin", is_admin=True, created_at=BASE_TIME - timedelta(days=1))
+        session.add(admin)
+        session.flush()
+        expected.add(("profile", admin.id))
+        for index in range(9):
+            # Three entries per timestamp so page boundaries fall inside ties.
+            created_at = BASE_TIME + timedelta(minutes=index // 3)
+            help_request = HelpRequest(
+                title=f"Request {index}",
+                description="Need a hand",
+                created_by_user_id=admin.id,
+                status="open",
+                created_at=created_at,
+            )
+            session.add(help_request)
+            session.flush()
+            comment = RequestComment(help_request_id=help_request.id, user_id=admin.id, body="On it", created_at=created_at)
+            member = User(username=f"member{index}", created_at=created_at)
+            session.add(comment)
+            session.add(member)
+            session.flush()
+            expected.update({("request", help_request.id), ("comment", comment.id), ("profile", member.id)})
+        record = UserSession(user_id=admin.id, is_fully_authenticated=True)
+        session.add(record)
+        session.commit()
+        session.refresh(admin)
+        session.expunge(admin)
+        return admin, record.id, expected
+
+
+def _branches(session: Session, viewer: User) -> list:
+    return [
+        browse_routes._request_branch(session, query_text=None, status_filters=set(), tag_filters=set()),
+        browse_routes._comment_branch(session, query_text=None, status_filters=set(), tag_filters=set()),
+        browse_routes._profile_branch(session, viewer=viewer, query_text=None),
+    ]
+
+
+def test_cursor_tokens_round_trip_and_reject_garbage() -> None:
+    token = browse_routes.encode_feed_cursor(BASE_TIME, "comment", 42)
+    assert browse_routes.parse_feed_cursor(token) == browse_routes.FeedCursor(BASE_TIME, "comment", 42)
+    assert decode_cursor(encode_cursor({"a": 1})) == {"a": 1}
+    assert browse_routes.parse_feed_cursor("not a cursor") is None
+    assert browse_routes.parse_feed_cursor(encode_cursor({"c": "yesterday", "k": "x", "i": 1})) is None
+    assert browse_routes.parse_feed_cursor(None) is None
+
+
+def test_keyset_pages_walk_forward_and_back_without_gaps() -> None:
+    engine = _build_engine()
+    viewer, _, expected = _seed(engine)
+
+    with Session(engine) as session:
+        branches = _branches(session, viewer)
+        pages: list[list[tuple[str, int]]] = []
+        cursor = None
+        while True:
+            page = browse_routes.fetch_keyset_page(session, branches, cursor=cursor, page_size=4)
+            pages.append([(row.kind, row.entity_id) for row in page.rows])
+            if not page.has_next:
+                break
+            cursor = browse_routes.parse_feed_cursor(page.next_cursor)
+
+        seen = [key for rows in pages for key in rows]
+        assert len(seen) == len(set(seen))
+        assert set(seen) == expected
+
+        # Paging backwards from the last page reproduces the earlier pages.
+        previous = browse_routes.fetch_keyset_page(
+            session,
+            branches,
+            cursor=browse_routes.parse_feed_cursor(page.prev_cursor),
+            older=False,
+            page_size=4,
+        )
+        assert [(row.kind, row.entity_id) for row in previous.rows] == pages[-2]
+        assert previous.has_next is True
+
+
+def test_browse_json_pages_and_capped_counts(monkeypatch) -> None:  # noqa: ANN001
+    engine = _build_engine()
+    _, session_id, expected = _seed(engine)
+    settings = replace(get_settings(), browse_count_limit=5)
+    monkeypatch.setattr(browse_routes, "get_settings", lambda: settings)
+
+    app = create_app()
+
+    def override_session():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override_session
+    client = TestClient(app)
+    client.cookies.set(SESSION_COOKIE_NAME, session_id)
+
+    first = client.get("/browse", headers={"Accept": "application/json"})
+    assert first.status_code == 200
+    payload = first.json()
+    assert payload["page"] == 1
+    assert payload["has_prev"] is False
+    assert payload["counts"]["requests"] == "5+"
+    assert payload["counts"]["all"] == "5+"
+    assert "browse-card" in payload["html"]
+
+    second = client.get(
+        "/browse",
+        params={"after": payload["next_cursor"], "page": 2},
+        headers={"Accept": "application/json"},
+    )
+    assert second.json()["page"] == 2
+    assert second.json()["has_prev"] is True
+
+    html = client.get("/browse", params={"after": payload["next_cursor"], "page": 2})
+    assert html.status_code == 200
+    assert "Page 2</p>" in html.text
+    assert len(expected) > browse_routes.BROWSE_PAGE_SIZE
+
+    app.dependency_overrides.clear()
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+from dataclasses import replace
+
 from fastapi.testclient import TestClient
 from sqlalchemy.pool import StaticPool
 from sqlmodel import Session, SQLModel, create_engine, select
 
+from app import config
 from app.db import get_session
 from app.main import create_app
+from app.routes import ui as ui_routes
 from app.models import HelpRequest, RequestComment, User, UserSession
 from app.services import request_comment_service
 from app.services.auth_service import SESSION_COOKIE_NAME
@@ -76,6 +80,57 @@ def test_create_comment_returns_json():
     app.dependency_overrides.clear()
 
 
+def test_create_comment_skips_channel_fan_out_when_channels_disabled(monkeypatch):
+    app, engine = build_app_and_engine()
+    client = TestClient(app)
+    _, session_id, request_id = create_user_with_session(engine)
+    settings = replace(config.get_settings(), request_channels_enabled=False)
+    monkeypatch.setattr(config, "get_settings", lambda: settings)
+    published = []
+    monkeypatch.setattr(ui_routes, "publish_channel_event", lambda *args: published.append(args))
+
+    client.cookies.set(SESSION_COOKIE_NAME, session_id)
+    response = client.post(
+        f"/requests/{request_id}/comments",
+        headers={"X-Requested-With": "Fetch", "Accept": "application/json"},
+        data={"body": "Quiet channel"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["channel_html"] is None
+    assert published == []
+
+    app.dependency_overrides.clear()
+
+
+def test_channel_fan_out_failure_keeps_saved_comment(monkeypatch):
+    app, engine = build_app_and_engine()
+    client = TestClient(app)
+    _, session_id, request_id = create_user_with_session(engine)
+    settings = replace(config.get_settings(), request_channels_enabled=True)
+    monkeypatch.setattr(config, "get_settings", lambda: settings)
+
+    def broken_publish(*args):
+        raise RuntimeError("fan-out down")
+
+    monkeypatch.setattr(ui_routes, "publish_channel_event", broken_publish)
+
+    client.cookies.set(SESSION_COOKIE_NAME, session_id)
+    response = client.post(
+        f"/requests/{request_id}/comments",
+        headers={"X-Requested-With": "Fetch", "Accept": "application/json"},
+        data={"body": "Still saved"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["channel_html"] is None
+    with Session(engine) as session:
+        stored = session.exec(select(RequestComment).where(RequestComment.help_request_id == request_id)).all()
+        assert [comment.body for comment in stored] == ["Still saved"]
+
+    app.dependency_overrides.clear()
+
+
 def test_create_comment_validates_body():
     app, engine = build_app_and_engine()
     client = TestClient(app)
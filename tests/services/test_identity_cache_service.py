@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+
+import pytest
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app import models  # noqa: F401
+from app.dependencies import require_session_user
+from app.models import User, UserSession
+from app.services import identity_cache_service, peer_auth_service, user_attribute_service
+from app.services.identity_cache_service import CachedIdentity, IdentityCache, snapshot_user
+
+
+@pytest.fixture()
+def engine():
+    engine = create_engine("sqlite:///:memory:", echo=False)
+    SQLModel.metadata.create_all(engine)
+    identity_cache_service.reset_cache()
+    yield engine
+    identity_cache_service.reset_cache()
+
+
+def _identity(session_id: str, user_id: int) -> CachedIdentity:
+    user = User(id=user_id, username=f"user{user_id}")
+    return CachedIdentity(
+        session_id=session_id,
+        user_id=user_id,
+        user=snapshot_user(user),
+        avatar_url=None,
+        is_peer_auth_reviewer=False,
+    )
+
+
+def test_cache_evicts_least_recently_used_and_drops_by_user() -> None:
+    cache = IdentityCache(max_entries=2, ttl_seconds=60)
+    cache.put(_identity("a", 1))
+    cache.put(_identity("b", 2))
+    assert cache.get("a") is not None
+    cache.put(_identity("c", 1))
+
+    assert cache.get("b") is None
+    assert len(cache) == 2
+    cache.drop_user(1)
+    assert len(cache) == 0
+
+
+def test_cache_disabled_when_ttl_is_zero() -> None:
+    cache = IdentityCache(max_entries=10, ttl_seconds=0)
+    cache.put(_identity("a", 1))
+    assert cache.get("a") is None
+
+
+def test_require_session_user_reuses_identity_until_avatar_changes(engine) -> None:
+    with Session(engine) as session:
+        user = User(username="member", is_admin=False)
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+        record = UserSession(user_id=user.id, is_fully_authenticated=True)
+        session.add(record)
+        session.commit()
+        user_id, session_id = user.id, record.id
+
+    statements: list[str] = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    with Session(engine) as session:
+        first = require_session_user(session, session.get(UserSession, session_id))
+        assert first.avatar_url is None
+    assert any("FROM users" in statement for statement in statements)
+
+    statements.clear()
+    with Session(engine) as session:
+        second = require_session_user(session, session.get(UserSession, session_id))
+        assert second.user.username == "member"
+        assert second.user in session
+    assert not any("FROM users" in statement or "user_attributes" in statement for statement in statements)
+
+    with Session(engine) as session:
+        user_attribute_service.set_attribute(
+            session,
+            user_id=user_id,
+            key=user_attribute_service.PROFILE_PHOTO_URL_KEY,
+            value="/static/uploads/me.png",
+            actor_user_id=user_id,
+        )
+        session.commit()
+
+    with Session(engine) as session:
+        third = require_session_user(session, session.get(UserSession, session_id))
+        assert third.avatar_url == "/static/uploads/me.png"
+
+
+def test_reviewer_grant_drops_cached_identity(engine) -> None:
+    with Session(engine) as session:
+        user = User(username="member", is_admin=False)
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+        record = UserSession(user_id=user.id, is_fully_authenticated=True)
+        session.add(record)
+        session.commit()
+        user_id, session_id = user.id, record.id
+
+    with Session(engine) as session:
+        assert require_session_user(session, session.get(UserSession, session_id)).is_peer_auth_reviewer is False
+
+    with Session(engine) as session:
+        assert peer_auth_service.grant_peer_auth_reviewer(session, user=session.get(User, user_id)) is True
+        session.commit()
+
+    with Session(engine) as session:
+        assert require_session_user(session, session.get(UserSession, session_id)).is_peer_auth_reviewer is True
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import pytest
+from sqlalchemy import event
 from sqlmodel import Session, SQLModel, create_engine
 
 from app import models  # noqa: F401
@@ -139,3 +140,56 @@ def test_build_bidirectional_invite_map_stops_on_cycles(session: Session) -> Non
 
     assert invite_map is not None
     assert [ancestor.user_id for ancestor in invite_map.upstream] == [user_b.id]
+
+
+def test_invite_map_uses_two_queries_and_includes_avatars(session: Session) -> None:
+    parent = create_user(session, "parent")
+    root = create_user(session, "root")
+    sibling = create_user(session, "sibling")
+    link_invite(session, root, parent)
+    link_invite(session, sibling, parent)
+    children = []
+    for index in range(6):
+        child = create_user(session, f"child-{index}")
+        link_invite(session, child, root)
+        children.append(child)
+        for grand_index in range(3):
+            link_invite(session, create_user(session, f"grand-{index}-{grand_index}"), child)
+    for user in (parent, sibling, children[0]):
+        user_attribute_service.set_attribute(
+            session,
+            user_id=user.id,
+            key=user_attribute_service.PROFILE_PHOTO_URL_KEY,
+            value=f"/static/uploads/{user.username}.png",
+            actor_user_id=user.id,
+        )
+    session.commit()
+    root_id = root.id
+
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):  # noqa: ANN001
+        statements.append(statement)
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        invite_map = invite_graph_service.build_bidirectional_invite_map(
+            session,
+            root_user_id=root_id,
+            max_degree=2,
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert len(statements) == 2
+    assert [node.username for node in invite_map.root.children] == [f"child-{index}" for index in range(6)]
+    assert all(len(node.children) == 3 for node in invite_map.root.children)
+    assert invite_map.root.children[0].avatar_url == "/static/uploads/child-0.png"
+    assert invite_map.root.children[1].avatar_url is None
+    assert invite_map.root.children[0].invited_at is not None
+    ancestor = invite_map.upstream[0]
+    assert ancestor.avatar_url == "/static/uploads/parent.png"
+    assert [(node.username, node.avatar_url) for node in ancestor.invitees] == [
+        ("sibling", "/static/uploads/sibling.png")
+    ]
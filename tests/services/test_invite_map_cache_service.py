@@ -6,8 +6,8 @@ import pytest
 from sqlmodel import Session, SQLModel, create_engine
 
 from app import models  # noqa: F401
-from app.models import User
-from app.services import invite_graph_service, invite_map_cache_service
+from app.models import User, UserAttribute, UserSession
+from app.services import invite_graph_service, invite_map_cache_service, user_attribute_service
 
 
 @pytest.fixture(name="session")
@@ -47,20 +47,32 @@ def test_store_and_get_cached_map(session: Session) -> None:
     assert cached.upstream == []
 
 
-def test_cached_map_expires_after_ttl(session: Session) -> None:
-    user = _create_user(session, "expired-user")
+def test_cached_map_survives_until_invalidated(session: Session) -> None:
+    user = _create_user(session, "long-lived-user")
     payload = _basic_invite_map(user)
 
-    record = invite_map_cache_service.store_cached_map(
+    record = invite_map_cache_service.store_cached_map(session, user_id=user.id, invite_map=payload)
+    record.generated_at = datetime.utcnow() - timedelta(days=30)
+    session.add(record)
+    session.commit()
+
+    assert invite_map_cache_service.get_cached_map(session, user_id=user.id) is not None
+
+
+def test_store_skips_maps_built_before_a_graph_change(session: Session) -> None:
+    user = _create_user(session, "racing-user")
+    generation = invite_map_cache_service.current_generation(session)
+    invite_map_cache_service.invalidate_many(session, [user.id])
+
+    stored = invite_map_cache_service.store_cached_map(
         session,
         user_id=user.id,
-        invite_map=payload,
+        invite_map=_basic_invite_map(user),
+        graph_generation=generation,
     )
 
-    record.generated_at = datetime.utcnow() - timedelta(seconds=invite_map_cache_service.CACHE_TTL_SECONDS + 5)
-    session.add(record)
-    session.commit()
-
+    assert stored is None
+    assert invite_map_cache_service.current_generation(session) == generation + 1
     assert invite_map_cache_service.get_cached_map(session, user_id=user.id) is None
 
 
@@ -72,3 +84,96 @@ def test_invalidate_cache_removes_entry(session: Session) -> None:
     invite_map_cache_service.invalidate_cache(session, user_id=user.id)
 
     assert invite_map_cache_service.get_cached_map(session, user_id=user.id) is None
+
+
+def _link(session: Session, invitee: User, inviter: User) -> None:
+    user_attribute_service.set_attribute(
+        session,
+        user_id=invitee.id,
+        key=user_attribute_service.INVITED_BY_USER_ID_KEY,
+        value=str(inviter.id),
+        actor_user_id=inviter.id,
+    )
+    session.commit()
+
+
+def test_link_change_invalidates_only_the_neighbourhood(session: Session) -> None:
+    # a -> b -> c -> d -> e, plus an unrelated f
+    users = {name: _create_user(session, name) for name in "abcdef"}
+    for invitee, inviter in ("ba", "cb", "dc", "ed"):
+        _link(session, users[invitee], users[inviter])
+    for user in users.values():
+        invite_map_cache_service.store_cached_map(session, user_id=user.id, invite_map=_basic_invite_map(user))
+    session.commit()
+
+    # e moves from d to f: d and c lose e downstream, f gains it; a and b are too far away.
+    _link(session, users["e"], users["f"])
+
+    stale = {
+        name
+        for name, user in users.items()
+        if invite_map_cache_service.get_cached_map(session, user_id=user.id) is None
+    }
+    assert stale == {"c", "d", "e", "f"}
+
+
+def test_avatar_change_invalidates_maps_that_show_it(session: Session) -> None:
+    users = {name: _create_user(session, name) for name in "abcd"}
+    for invitee, inviter in ("ba", "cb", "dc"):
+        _link(session, users[invitee], users[inviter])
+    for user in users.values():
+        invite_map_cache_service.store_cached_map(session, user_id=user.id, invite_map=_basic_invite_map(user))
+    session.commit()
+
+    user_attribute_service.set_attribute(
+        session,
+        user_id=users["d"].id,
+        key=user_attribute_service.PROFILE_PHOTO_URL_KEY,
+        value="/static/uploads/d.png",
+        actor_user_id=users["d"].id,
+    )
+    session.commit()
+
+    assert invite_map_cache_service.get_cached_map(session, user_id=users["a"].id) is not None
+    assert invite_map_cache_service.get_cached_map(session, user_id=users["b"].id) is None
+    assert invite_map_cache_service.get_cached_map(session, user_id=users["c"].id) is None
+
+
+def test_neighbourhood_includes_links_this_process_has_not_seen(session: Session) -> None:
+    users = {name: _create_user(session, name) for name in "abc"}
+    _link(session, users["b"], users["a"])
+    # Another worker links c under b; nothing in this process hears of it.
+    session.execute(
+        UserAttribute.__table__.insert().values(
+            user_id=users["c"].id,
+            key=user_attribute_service.INVITED_BY_USER_ID_KEY,
+            value=str(users["b"].id),
+            created_at=datetime.utcnow(),
+            updated_at=datetime.utcnow(),
+        )
+    )
+    session.commit()
+
+    affected = invite_map_cache_service.affected_user_ids(session, user_id=users["a"].id)
+
+    assert affected == {users["a"].id, users["b"].id, users["c"].id}
+
+
+def test_warm_recent_maps_fills_active_users(session: Session) -> None:
+    inviter = _create_user(session, "warm-inviter")
+    active = _create_user(session, "warm-active")
+    idle = _create_user(session, "warm-idle")
+    _link(session, active, inviter)
+    now = datetime.utcnow()
+    session.add(UserSession(user_id=active.id, last_seen_at=now))
+    session.add(UserSession(user_id=idle.id, last_seen_at=now - timedelta(days=3)))
+    session.commit()
+
+    warmed = invite_map_cache_service.warm_recent_maps(session, active_since=now - timedelta(hours=1))
+
+    assert warmed == 1
+    cached = invite_map_cache_service.get_cached_map(session, user_id=active.id)
+    assert cached is not None
+    assert [ancestor.user_id for ancestor in cached.upstream] == [inviter.id]
+    assert invite_map_cache_service.get_cached_map(session, user_id=idle.id) is None
+    assert invite_map_cache_service.warm_recent_maps(session, active_since=now - timedelta(hours=1)) == 0
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.models import User, UserAttribute
+from app.services import member_directory_service, user_attribute_service
+
+BASE_TIME = datetime(2024, 3, 1, 9, 0, 0)
+
+
+@pytest.fixture()
+def engine():
+    engine = create_engine("sqlite:///:memory:", echo=False)
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def _seed(engine) -> dict[str, int]:
+    with Session(engine) as session:
+        admin = User(username="admin", is_admin=True, created_at=BASE_TIME - timedelta(days=1))
+        session.add(admin)
+        for index in range(7):
+            # Pairs share a timestamp so page boundaries fall inside ties.
+            session.add(User(username=f"Member{index}", created_at=BASE_TIME + timedelta(minutes=index // 2)))
+        session.add(User(username="other", created_at=BASE_TIME))
+        session.flush()
+        reviewer = session.exec(select(User).where(User.username == "Member3")).one()
+        session.add(UserAttribute(user_id=reviewer.id, key="peer_auth_reviewer", value="true", updated_by_user_id=admin.id))
+        session.add(UserAttribute(user_id=reviewer.id, key="signal_display_name:group", value="Three"))
+        session.add(UserAttribute(user_id=reviewer.id, key="profile_photo_url", value="/static/three.png"))
+        session.commit()
+        return {"admin": admin.id, "reviewer": reviewer.id}
+
+
+def test_prefix_search_walks_keyset_pages_without_gaps(engine) -> None:
+    _seed(engine)
+    filters = member_directory_service.MemberDirectoryFilters(username="mem")
+
+    with Session(engine) as session:
+        viewer = session.get(User, 1)
+        seen: list[str] = []
+        after = None
+        while True:
+            page = member_directory_service.list_members(
+                session, viewer=viewer, filters=filters, page_size=3, after=after
+            )
+            seen.extend(profile.username for profile in page.profiles)
+            if not page.has_next:
+                break
+            after = page.next_cursor
+
+        assert seen == [f"Member{index}" for index in reversed(range(7))]
+        assert page.total_count == 7
+        assert page.total_pages == 3
+
+        previous = member_directory_service.list_members(
+            session, viewer=viewer, filters=filters, page=2, page_size=3, before=page.prev_cursor
+        )
+        assert [profile.username for profile in previous.profiles] == seen[3:6]
+        assert previous.page == 2
+        assert previous.has_next is True
+
+
+def test_count_is_capped_and_reported_as_estimate(engine) -> None:
+    _seed(engine)
+    with Session(engine) as session:
+        viewer = session.get(User, 1)
+        page = member_directory_service.list_members(session, viewer=viewer, page_size=2, count_limit=4)
+
+    assert page.total_is_estimate is True
+    assert page.total_count == 4
+    assert page.total_pages is None
+    assert page.has_next is True
+
+
+def test_page_enrichment_is_a_single_query(engine) -> None:
+    ids = _seed(engine)
+    filters = member_directory_service.MemberDirectoryFilters(peer_auth_reviewer="true")
+    statements: list[str] = []
+
+    with Session(engine) as session:
+        viewer = session.get(User, ids["admin"])
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        page = member_directory_service.list_members(session, viewer=viewer, filters=filters)
+
+    assert {profile.id for profile in page.profiles} == {ids["admin"], ids["reviewer"]}
+    summary = page.permission_summaries[ids["reviewer"]]
+    assert summary.peer_auth_reviewer is True
+    assert summary.peer_auth_updated_by_user.id == ids["admin"]
+    assert page.permission_summaries[ids["admin"]].peer_auth_reviewer_via_admin is True
+    assert page.display_names == {ids["reviewer"]: "Three"}
+    assert page.avatar_urls == {ids["reviewer"]: "/static/three.png"}
+    # Count, page, and one enrichment query.
+    assert len(statements) == 3
+
+
+def test_members_see_invitees_linked_by_another_process(engine) -> None:
+    with Session(engine) as session:
+        inviter = User(username="inviter", sync_scope="private")
+        invitee = User(username="invitee", sync_scope="private")
+        session.add(inviter)
+        session.add(invitee)
+        session.commit()
+        # Written without this process's after_commit hook, as another worker would.
+        session.execute(
+            UserAttribute.__table__.insert().values(
+                user_id=invitee.id,
+                key=user_attribute_service.INVITED_BY_USER_ID_KEY,
+                value=str(inviter.id),
+                created_at=datetime.utcnow(),
+                updated_at=datetime.utcnow(),
+            )
+        )
+        session.commit()
+
+        page = member_directory_service.list_members(session, viewer=inviter)
+
+    assert {profile.username for profile in page.profiles} == {"inviter", "invitee"}
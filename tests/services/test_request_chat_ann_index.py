@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import gc
+import weakref
+
+import numpy as np
+import pytest
+
+from app.services import request_chat_ann_index, request_chat_embeddings
+
+MODEL = "local:test"
+
+
+@pytest.fixture()
+def store_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(request_chat_embeddings, "CACHE_DIR", tmp_path)
+    monkeypatch.setattr(request_chat_ann_index, "MIN_TRAIN_ROWS", 64)
+    monkeypatch.setattr(request_chat_ann_index, "_INDEX_CACHE", {})
+    monkeypatch.setattr(request_chat_ann_index, "_LIVE_CACHE", {})
+    return tmp_path
+
+
+def write_requests(request_ids, *, comments: int = 8, dims: int = 16, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(6, dims))
+    for request_id in request_ids:
+        center = centers[request_id % len(centers)]
+        vectors = center + 0.2 * rng.normal(size=(comments, dims))
+        index = request_chat_embeddings.build_index(
+            request_id=request_id,
+            model=MODEL,
+            comment_vectors=[(request_id * 100 + offset, vector) for offset, vector in enumerate(vectors)],
+            source_count=comments,
+        )
+        request_chat_embeddings.write_index(index)
+
+
+def test_ann_search_matches_exact_search(store_dir):
+    write_requests(range(1, 21))
+    store = request_chat_embeddings.load_store(MODEL)
+    query = np.asarray(store.comment_vectors[5])
+
+    exact = request_chat_ann_index.exact_search(store, request_chat_ann_index.KIND_COMMENTS, query, k=5)
+    approx = request_chat_ann_index.search(store, request_chat_ann_index.KIND_COMMENTS, query, k=5, nprobe=4)
+
+    assert exact[0].row == 5
+    assert exact[0].score == pytest.approx(1.0)
+    assert (exact[0].request_id, exact[0].comment_id) == (1, 105)
+    assert len({item.row for item in approx} & {item.row for item in exact}) >= 4
+    assert (store_dir / "vectors" / "local-test" / "ivf" / "comments" / "meta.json").exists()
+
+
+def test_small_stores_use_exact_search(store_dir):
+    write_requests(range(1, 4))
+    store = request_chat_embeddings.load_store(MODEL)
+
+    assert request_chat_ann_index.ensure_index(store, request_chat_ann_index.KIND_AGGREGATES) is None
+    results = request_chat_ann_index.search(
+        store,
+        request_chat_ann_index.KIND_AGGREGATES,
+        np.asarray(store.aggregate_vectors[1]),
+        k=1,
+    )
+    assert [item.request_id for item in results] == [2]
+
+
+def test_incremental_insert_is_persisted(store_dir, monkeypatch):
+    write_requests(range(1, 13))
+    store = request_chat_embeddings.load_store(MODEL)
+    first = request_chat_ann_index.ensure_index(store, request_chat_ann_index.KIND_COMMENTS)
+    assert first.indexed_rows == 96
+
+    def fail_rebuild(*args, **kwargs):
+        raise AssertionError("appending rows should not retrain the index")
+
+    monkeypatch.setattr(request_chat_ann_index, "build_index", fail_rebuild)
+    write_requests([13], seed=13)
+    monkeypatch.setattr(request_chat_ann_index, "_INDEX_CACHE", {})
+    store = request_chat_embeddings.load_store(MODEL)
+    grown = request_chat_ann_index.ensure_index(store, request_chat_ann_index.KIND_COMMENTS)
+
+    assert grown.indexed_rows == 104
+    assert np.array_equal(grown.centroids, first.centroids)
+    assert grown.offsets[-1] == 104
+    results = request_chat_ann_index.search(
+        store,
+        request_chat_ann_index.KIND_COMMENTS,
+        np.asarray(store.comment_vectors[100]),
+        k=1,
+    )
+    assert results[0].request_id == 13
+
+
+def test_dead_rows_are_skipped_and_compaction_retrains(store_dir, monkeypatch):
+    monkeypatch.setattr(request_chat_embeddings, "COMPACT_MIN_DEAD_ROWS", 1)
+    write_requests(range(1, 13))
+    store = request_chat_embeddings.load_store(MODEL)
+    query = np.asarray(store.comment_vectors[0])
+    request_chat_ann_index.ensure_index(store, request_chat_ann_index.KIND_COMMENTS)
+
+    request_chat_embeddings.delete_index(1)
+    store = request_chat_embeddings.load_store(MODEL)
+    results = request_chat_ann_index.search(store, request_chat_ann_index.KIND_COMMENTS, query, k=10, nprobe=64)
+    assert 1 not in {item.request_id for item in results}
+
+    for request_id in range(2, 8):
+        request_chat_embeddings.delete_index(request_id)
+    store = request_chat_embeddings.load_store(MODEL)
+    assert store.compactions == 1
+    monkeypatch.setattr(request_chat_ann_index, "MIN_TRAIN_ROWS", 32)
+    rebuilt = request_chat_ann_index.ensure_index(store, request_chat_ann_index.KIND_COMMENTS)
+    assert rebuilt.store_compactions == 1
+    assert rebuilt.indexed_rows == 48
+
+
+def test_caches_drop_stores_from_before_a_compaction(store_dir, monkeypatch):
+    monkeypatch.setattr(request_chat_embeddings, "COMPACT_MIN_DEAD_ROWS", 1)
+    write_requests(range(1, 13))
+    store = request_chat_embeddings.load_store(MODEL)
+    query = np.asarray(store.comment_vectors[0])
+    request_chat_ann_index.search(store, request_chat_ann_index.KIND_COMMENTS, query, k=3)
+    old_index_dir = store.path / request_chat_ann_index.INDEX_DIRNAME / request_chat_ann_index.KIND_COMMENTS
+    assert old_index_dir in request_chat_ann_index._INDEX_CACHE
+    stale = weakref.ref(store)
+
+    for request_id in range(1, 8):
+        request_chat_embeddings.delete_index(request_id)
+    store = request_chat_embeddings.load_store(MODEL)
+    assert store.compactions == 1
+    gc.collect()
+    # Neither cache pins the mapping of the pre-compaction files.
+    assert stale() is None
+
+    request_chat_ann_index.exact_search(store, request_chat_ann_index.KIND_COMMENTS, query, k=3)
+
+    assert old_index_dir not in request_chat_ann_index._INDEX_CACHE
+    assert all(compactions == 1 for _ref, compactions, _live in request_chat_ann_index._LIVE_CACHE.values())
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import json
+
+import numpy as np
 import pytest
 
 from app.services import request_chat_embeddings
@@ -34,3 +37,95 @@ def test_build_and_load_embedding_index(tmp_path, monkeypatch):
     assert similarity == pytest.approx(1.0)
     mismatch = request_chat_embeddings.cosine_similarity([1.0, 0.0], [1.0, 0.0, 0.0])
     assert mismatch == 0.0
+
+
+def test_load_index_migrates_json_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(request_chat_embeddings, "CACHE_DIR", tmp_path)
+    index = request_chat_embeddings.build_index(
+        request_id=9,
+        model="local:test",
+        comment_vectors=[(901, [0.0, 2.0]), (902, [2.0, 0.0])],
+        source_count=2,
+    )
+    legacy_path = tmp_path / "request_9.json"
+    legacy_path.write_text(json.dumps(index.to_dict()))
+
+    migrated = request_chat_embeddings.load_index(9)
+
+    assert migrated is not None
+    assert not legacy_path.exists()
+    store = request_chat_embeddings.load_store("local:test")
+    assert store is not None
+    assert store.comment_vectors.dtype == np.float32
+    assert store.comment_rows.tolist() == [[9, 901], [9, 902]]
+    assert store.comment_norms.tolist() == pytest.approx([2.0, 2.0])
+    reloaded = request_chat_embeddings.load_index(9)
+    assert [comment.comment_id for comment in reloaded.comments] == [901, 902]
+    assert list(reloaded.aggregate) == pytest.approx([1.0, 1.0])
+
+
+def test_rewrite_supersedes_rows_and_compacts(tmp_path, monkeypatch):
+    monkeypatch.setattr(request_chat_embeddings, "CACHE_DIR", tmp_path)
+    monkeypatch.setattr(request_chat_embeddings, "COMPACT_MIN_DEAD_ROWS", 2)
+    for request_id in (1, 2):
+        request_chat_embeddings.write_index(
+            request_chat_embeddings.build_index(
+                request_id=request_id,
+                model="local:test",
+                comment_vectors=[(request_id * 10, [1.0, 0.0]), (request_id * 10 + 1, [0.0, 1.0])],
+                source_count=2,
+            )
+        )
+    request_chat_embeddings.write_index(
+        request_chat_embeddings.build_index(
+            request_id=1,
+            model="local:test",
+            comment_vectors=[(12, [3.0, 4.0])],
+            source_count=3,
+        )
+    )
+    store = request_chat_embeddings.load_store("local:test")
+    assert store.comment_vectors.shape == (5, 2)
+
+    request_chat_embeddings.delete_index(2)
+
+    store = request_chat_embeddings.load_store("local:test")
+    assert store.comment_vectors.shape == (1, 2)
+    assert store.aggregate_ids.tolist() == [1]
+    updated = request_chat_embeddings.load_index(1)
+    assert [comment.comment_id for comment in updated.comments] == [12]
+    assert updated.aggregate_norm == pytest.approx(5.0)
+    assert request_chat_embeddings.load_index(2) is None
+    assert request_chat_embeddings.list_cached_request_ids() == [1]
+
+
+def test_request_ranges_live_in_slot_table_not_meta(tmp_path, monkeypatch):
+    monkeypatch.setattr(request_chat_embeddings, "CACHE_DIR", tmp_path)
+
+    def write(request_id):
+        index = request_chat_embeddings.build_index(
+            request_id=request_id,
+            model="local:test",
+            comment_vectors=[(request_id * 10, [1.0, float(request_id)])],
+            source_count=3,
+        )
+        request_chat_embeddings.write_index(index)
+        return index
+
+    first = write(1)
+    store_dir = request_chat_embeddings.load_store("local:test").path
+    meta_size = (store_dir / "meta.json").stat().st_size
+    snapshot = request_chat_embeddings.load_store("local:test")
+    for request_id in range(2, 40):
+        write(request_id)
+
+    meta = json.loads((store_dir / "meta.json").read_text())
+    assert "requests" not in meta
+    assert (store_dir / "meta.json").stat().st_size <= meta_size + 8
+    loaded = request_chat_embeddings.load_index(1)
+    assert loaded.generated_at == first.generated_at
+    assert loaded.source_comment_count == 3
+    assert request_chat_embeddings.list_cached_request_ids() == list(range(1, 40))
+    # A mapping opened earlier keeps to the rows it covers.
+    assert list(snapshot.requests) == [1]
+    assert 39 not in snapshot.requests
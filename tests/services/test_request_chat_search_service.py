@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+
+from app import models  # noqa: F401
+from app.models import HelpRequest, User
+from app.services import request_chat_search_index, request_chat_search_service, request_comment_service
+
+
+@pytest.fixture()
+def session(tmp_path, monkeypatch):
+    monkeypatch.setattr(request_chat_search_service, "CACHE_DIR", tmp_path)
+    monkeypatch.setattr(request_chat_search_index, "DB_PATH", tmp_path / "search_index.db")
+    monkeypatch.setattr(request_chat_search_service, "_SYNCED_REQUEST_IDS", set())
+    engine = create_engine("sqlite:///:memory:", echo=False)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def seed_chat(session: Session) -> tuple[int, User, User]:
+    alice = User(username="alice")
+    bob = User(username="bob")
+    session.add(alice)
+    session.add(bob)
+    session.commit()
+    help_request = HelpRequest(description="Need help", created_by_user_id=alice.id)
+    session.add(help_request)
+    session.commit()
+    bodies = [
+        (alice, "Looking for a ride to the clinic"),
+        (bob, "I can drive you to the clinic tomorrow"),
+        (alice, "Thanks! Also need groceries"),
+        (bob, "Groceries and a ride, on it"),
+    ]
+    for author, body in bodies:
+        request_comment_service.add_comment(
+            session,
+            help_request_id=help_request.id,
+            user_id=author.id,
+            body=body,
+        )
+    return help_request.id, alice, bob
+
+
+def test_search_any_ranks_rarer_tokens_first(session: Session) -> None:
+    request_id, _alice, _bob = seed_chat(session)
+
+    index, results = request_chat_search_service.search_chat(session, request_id, query="ride clinic drive")
+
+    assert index.entry_count == 4
+    assert isinstance(index, request_chat_search_service.ChatIndexSummary)
+    assert not hasattr(index, "entries")
+    assert [result.body for result in results] == [
+        "I can drive you to the clinic tomorrow",
+        "Looking for a ride to the clinic",
+        "Groceries and a ride, on it",
+    ]
+    assert results[0].matched_tokens == ["clinic", "drive"]
+
+
+def test_search_all_intersects_postings(session: Session) -> None:
+    request_id, _alice, _bob = seed_chat(session)
+
+    _, results = request_chat_search_service.search_chat(
+        session,
+        request_id,
+        query="ride groceries",
+        match="all",
+    )
+
+    assert [result.body for result in results] == ["Groceries and a ride, on it"]
+
+
+def test_search_filters_and_limit(session: Session) -> None:
+    request_id, alice, bob = seed_chat(session)
+
+    _, by_bob = request_chat_search_service.search_chat(session, request_id, participant_ids=[bob.id])
+    assert [result.user_id for result in by_bob] == [bob.id, bob.id]
+
+    _, supplies = request_chat_search_service.search_chat(session, request_id, topics=["supplies"])
+    assert [result.body for result in supplies] == [
+        "Thanks! Also need groceries",
+        "Groceries and a ride, on it",
+    ]
+
+    _, limited = request_chat_search_service.search_chat(
+        session,
+        request_id,
+        participant_ids=[alice.id],
+        topics=["transport", "medical"],
+        limit=1,
+    )
+    assert [result.body for result in limited] == ["Looking for a ride to the clinic"]
+
+
+def test_search_migrates_json_cache(session: Session) -> None:
+    request_id, _alice, _bob = seed_chat(session)
+    request_chat_search_service.refresh_chat_index(session, request_id)
+    with request_chat_search_index.connection() as conn:
+        request_chat_search_index.delete_index(conn, request_id)
+
+    _, results = request_chat_search_service.search_chat(session, request_id, query="tomorrow")
+
+    assert [result.anchor for result in results] == [f"comment-{results[0].comment_id}"]
+    with request_chat_search_index.connection() as conn:
+        assert request_chat_search_index.load_header(conn, request_id) is not None
+
+
+def test_index_and_unindex_single_comment(session: Session) -> None:
+    request_id, alice, _bob = seed_chat(session)
+    request_chat_search_service.refresh_chat_index(session, request_id)
+
+    comment = request_comment_service.add_comment(
+        session,
+        help_request_id=request_id,
+        user_id=alice.id,
+        body="Found a shelter bed tonight",
+    )
+    session.commit()
+    request_chat_search_service.index_comment(session, request_id)
+
+    index, results = request_chat_search_service.search_chat(session, request_id, query="shelter")
+    assert index.entry_count == 5
+    assert [result.comment_id for result in results] == [comment.id]
+    _, housing = request_chat_search_service.search_chat(session, request_id, topics=["housing"])
+    assert [result.comment_id for result in housing] == [comment.id]
+
+    request_comment_service.soft_delete_comment(session, comment.id)
+    session.commit()
+    assert request_chat_search_service.unindex_comment(request_id, comment.id) is True
+
+    index, results = request_chat_search_service.search_chat(session, request_id, query="shelter")
+    assert index.entry_count == 4
+    assert results == []
+    _, housing = request_chat_search_service.search_chat(session, request_id, topics=["housing"])
+    assert housing == []
+
+
+def test_cold_start_replays_only_the_delta(session: Session, monkeypatch) -> None:
+    request_id, alice, bob = seed_chat(session)
+    request_chat_search_service.refresh_chat_index(session, request_id)
+    rows, _ = request_comment_service.list_comments(session, request_id)
+    first_comment_id = rows[0][0].id
+
+    added = request_comment_service.add_comment(
+        session,
+        help_request_id=request_id,
+        user_id=bob.id,
+        body="Bus pass available",
+    )
+    request_comment_service.soft_delete_comment(session, first_comment_id)
+    session.commit()
+
+    monkeypatch.setattr(request_chat_search_service, "_SYNCED_REQUEST_IDS", set())
+
+    def fail_rebuild(*args, **kwargs):
+        raise AssertionError("cold start should not rebuild the whole index")
+
+    monkeypatch.setattr(request_chat_search_service, "refresh_chat_index", fail_rebuild)
+
+    index, results = request_chat_search_service.search_chat(session, request_id, query="bus clinic")
+
+    assert index.entry_count == 4
+    assert [result.comment_id for result in results] == [rows[1][0].id, added.id]
+    with request_chat_search_index.connection() as conn:
+        header = request_chat_search_index.load_header(conn, request_id)
+    assert header.max_comment_id == added.id
+
+
+def test_churn_renumbers_positions_and_bounds_bitmaps(session: Session) -> None:
+    def add(conn, comment_id: int) -> None:
+        request_chat_search_index.add_entry(
+            conn,
+            1,
+            comment_id=comment_id,
+            user_id=7,
+            username="alice",
+            created_at=None,
+            body=f"ride number {comment_id}",
+            tokens=["ride", f"n{comment_id}"],
+            topics=["transport"],
+            ai_topics=[],
+            participant_terms=["alice"],
+        )
+
+    with request_chat_search_index.connection() as conn:
+        request_chat_search_index.replace_index(
+            conn, request_id=1, generated_at="2024-01-01T00:00:00", participants={}, entries=[]
+        )
+        add(conn, 1)
+        largest = 0
+        for comment_id in range(2, 1000):
+            add(conn, comment_id)
+            request_chat_search_index.remove_entry(conn, 1, comment_id - 1)
+            (largest_now,) = conn.execute("SELECT MAX(LENGTH(bitmap)) FROM chat_bitmaps WHERE request_id = 1").fetchone()
+            largest = max(largest, largest_now)
+
+        header = request_chat_search_index.load_header(conn, 1)
+        hits = request_chat_search_index.search(conn, 1, query_tokens=["ride"], topics=["transport"], limit=5)
+
+    assert largest <= (2 * request_chat_search_index.COMPACT_MIN_HOLES) // 8 + 1
+    assert header.entry_count == 1
+    assert header.next_position <= request_chat_search_index.COMPACT_MIN_HOLES + 1
+    assert [hit.entry.comment_id for hit in hits] == [999]
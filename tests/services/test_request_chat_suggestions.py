@@ -3,8 +3,47 @@ from __future__ import annotations
 import math
 
 import pytest
+from sqlmodel import Session, SQLModel, create_engine
 
-from app.services import request_chat_embeddings, request_chat_search_service, request_chat_suggestions
+from app import models  # noqa: F401
+from app.config import reset_settings_cache
+from app.models import HELP_REQUEST_STATUS_DRAFT, HelpRequest
+from app.services import (
+    request_chat_ann_index,
+    request_chat_embeddings,
+    request_chat_search_index,
+    request_chat_search_service,
+    request_chat_suggestions,
+)
+
+
+@pytest.fixture()
+def session(tmp_path, monkeypatch):
+    monkeypatch.setattr(request_chat_search_service, "CACHE_DIR", tmp_path / "chats")
+    monkeypatch.setattr(request_chat_search_index, "DB_PATH", tmp_path / "chats" / "search_index.db")
+    monkeypatch.setattr(request_chat_search_service, "_SYNCED_REQUEST_IDS", set())
+    monkeypatch.setattr(request_chat_embeddings, "CACHE_DIR", tmp_path / "embeddings")
+    engine = create_engine("sqlite:///:memory:", echo=False)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def seed(
+    session: Session,
+    chat_indexes: dict[int, request_chat_search_service.ChatSearchIndex],
+    embeddings: dict[int, request_chat_embeddings.RequestEmbeddingIndex],
+    *,
+    statuses: dict[int, str] | None = None,
+) -> None:
+    for request_id in chat_indexes:
+        status = (statuses or {}).get(request_id, "open")
+        session.add(HelpRequest(id=request_id, title=f"Request {request_id}", status=status))
+    session.commit()
+    for index in chat_indexes.values():
+        request_chat_search_service._write_search_index(index)
+    for index in embeddings.values():
+        request_chat_embeddings.write_index(index)
 
 
 def make_entry(*, comment_id: int, user_id: int, username: str, body: str, topics: list[str] | None = None) -> request_chat_search_service.ChatSearchEntry:
@@ -57,10 +96,7 @@ def make_embedding(request_id: int, vector: list[float]) -> request_chat_embeddi
     )
 
 
-def test_semantic_matches_surface_without_overlap(tmp_path, monkeypatch):
-    monkeypatch.setattr(request_chat_suggestions, "CACHE_DIR", tmp_path)
-    (tmp_path / "request_2.json").write_text("{}")
-
+def test_semantic_matches_surface_without_overlap(session):
     current_entry = make_entry(comment_id=101, user_id=1, username="Alpha", body="Checking new updates")
     other_entry = make_entry(comment_id=201, user_id=2, username="Beta", body="Similar phrasing shows up here")
 
@@ -73,16 +109,9 @@ def test_semantic_matches_surface_without_overlap(tmp_path, monkeypatch):
         2: make_embedding(2, [1.0, 0.0, 0.0]),
     }
 
-    monkeypatch.setattr(request_chat_search_service, "ensure_chat_index", lambda session, rid: chat_indexes[rid])
-    monkeypatch.setattr(request_chat_search_service, "load_chat_index", lambda rid: chat_indexes.get(rid))
-    monkeypatch.setattr(request_chat_embeddings, "load_index", lambda rid: embeddings.get(rid))
-    monkeypatch.setattr(
-        request_chat_suggestions,
-        "_serialize_request",
-        lambda session, rid: {"id": rid, "title": f"Request {rid}", "status": "open"},
-    )
+    seed(session, chat_indexes, embeddings)
 
-    results = request_chat_suggestions.suggest_related_requests(session=None, help_request_id=1)
+    results = request_chat_suggestions.suggest_related_requests(session, help_request_id=1)
     assert len(results) == 1
     result = results[0]
     assert result["request_id"] == 2
@@ -93,11 +122,7 @@ def test_semantic_matches_surface_without_overlap(tmp_path, monkeypatch):
     assert result["snippet"]["body"] == other_entry.body
 
 
-def test_hybrid_matches_include_embedding_metadata(tmp_path, monkeypatch):
-    monkeypatch.setattr(request_chat_suggestions, "CACHE_DIR", tmp_path)
-    (tmp_path / "request_2.json").write_text("{}")
-    (tmp_path / "request_3.json").write_text("{}")
-
+def test_hybrid_matches_include_embedding_metadata(session):
     current_entry = make_entry(
         comment_id=101,
         user_id=1,
@@ -130,16 +155,9 @@ def test_hybrid_matches_include_embedding_metadata(tmp_path, monkeypatch):
         2: make_embedding(2, [0.92, 0.08, 0.0]),
     }
 
-    monkeypatch.setattr(request_chat_search_service, "ensure_chat_index", lambda session, rid: chat_indexes[rid])
-    monkeypatch.setattr(request_chat_search_service, "load_chat_index", lambda rid: chat_indexes.get(rid))
-    monkeypatch.setattr(request_chat_embeddings, "load_index", lambda rid: embeddings.get(rid))
-    monkeypatch.setattr(
-        request_chat_suggestions,
-        "_serialize_request",
-        lambda session, rid: {"id": rid, "title": f"Request {rid}", "status": "open"},
-    )
+    seed(session, chat_indexes, embeddings)
 
-    results = request_chat_suggestions.suggest_related_requests(session=None, help_request_id=1, limit=5)
+    results = request_chat_suggestions.suggest_related_requests(session, help_request_id=1, limit=5)
     assert [item["request_id"] for item in results] == [2, 3]
 
     hybrid = results[0]
@@ -152,3 +170,103 @@ def test_hybrid_matches_include_embedding_metadata(tmp_path, monkeypatch):
     assert overlap_only["match_type"] == "overlap"
     assert overlap_only["embedding_similarity"] == 0.0
     assert overlap_only["snippet"]["body"] == other_no_embedding.body
+
+
+def test_drafts_are_skipped_and_the_next_candidate_fills_the_slot(session):
+    entries = {
+        request_id: make_entry(
+            comment_id=request_id * 100,
+            user_id=request_id,
+            username="Alex",
+            body=f"Alex needs housing {request_id}",
+            topics=["housing"],
+        )
+        for request_id in (1, 2, 3, 4)
+    }
+    chat_indexes = {
+        request_id: make_index(request_id, [entry], {str(request_id): ["alex"]})
+        for request_id, entry in entries.items()
+    }
+    embeddings = {
+        1: make_embedding(1, [1.0, 0.0]),
+        2: make_embedding(2, [1.0, 0.0]),
+        3: make_embedding(3, [0.0, 1.0]),
+    }
+    seed(session, chat_indexes, embeddings, statuses={2: HELP_REQUEST_STATUS_DRAFT})
+
+    results = request_chat_suggestions.suggest_related_requests(session, help_request_id=1, limit=1)
+
+    assert [item["request_id"] for item in results] == [3]
+    assert results[0]["request"] == {"id": 3, "title": "Request 3", "status": "open"}
+
+
+def test_corpus_is_reused_until_the_generation_moves(session):
+    first = make_entry(comment_id=101, user_id=1, username="Alex", body="Need housing", topics=["housing"])
+    chat_indexes = {1: make_index(1, [first], {"1": ["alex"]})}
+    seed(session, chat_indexes, {})
+
+    with request_chat_search_index.connection() as conn:
+        corpus = request_chat_suggestions.load_corpus(conn)
+        assert request_chat_suggestions.load_corpus(conn) is corpus
+        request_chat_search_index.add_entry(
+            conn,
+            1,
+            comment_id=102,
+            user_id=1,
+            username="Alex",
+            created_at=None,
+            body="Still need housing",
+            tokens=["still", "need", "housing"],
+            topics=["housing"],
+            ai_topics=[],
+            participant_terms=["alex"],
+        )
+        assert request_chat_suggestions.load_corpus(conn) is corpus
+        request_chat_search_index.add_entry(
+            conn,
+            1,
+            comment_id=103,
+            user_id=1,
+            username="Alex",
+            created_at=None,
+            body="Clinic visit",
+            tokens=["clinic", "visit"],
+            topics=["medical"],
+            ai_topics=[],
+            participant_terms=["alex"],
+        )
+        refreshed = request_chat_suggestions.load_corpus(conn)
+
+    assert refreshed is not corpus
+    assert refreshed.topic_index["medical"] == {1}
+
+
+def test_ann_mode_matches_exact_results(session, monkeypatch):
+    chat_indexes = {}
+    embeddings = {}
+    for request_id in range(1, 41):
+        entry = make_entry(
+            comment_id=request_id * 100,
+            user_id=request_id,
+            username=f"member{request_id}",
+            body=f"Update {request_id}",
+        )
+        chat_indexes[request_id] = make_index(request_id, [entry], {str(request_id): [f"member{request_id}"]})
+        angle = request_id / 40
+        embeddings[request_id] = make_embedding(request_id, [1.0, angle, 0.0] if request_id % 2 else [0.0, angle, 1.0])
+    seed(session, chat_indexes, embeddings)
+    exact = request_chat_suggestions.suggest_related_requests(session, help_request_id=1, limit=5)
+
+    monkeypatch.setattr(request_chat_ann_index, "MIN_TRAIN_ROWS", 16)
+    monkeypatch.setenv("WB_CHAT_EMBEDDING_ANN", "true")
+    reset_settings_cache()
+    try:
+        approx = request_chat_suggestions.suggest_related_requests(session, help_request_id=1, limit=5)
+    finally:
+        monkeypatch.delenv("WB_CHAT_EMBEDDING_ANN")
+        reset_settings_cache()
+
+    store = request_chat_embeddings.load_store("local:test")
+    assert (store.path / "ivf" / "aggregates" / "meta.json").exists()
+    assert [item["request_id"] for item in approx] == [item["request_id"] for item in exact]
+    assert all(item["match_type"] == "semantic" for item in approx)
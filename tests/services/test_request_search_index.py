@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from datetime import datetime
+from pathlib import Path
+import sys
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app import models  # noqa: F401
+from app.models import HelpRequest, RequestComment, User
+from app.modules.requests import services as request_services
+from app.services import request_search_index
+
+
+@pytest.fixture()
+def engine():
+    engine = create_engine("sqlite:///:memory:", echo=False)
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def _seed(engine) -> dict[str, int]:
+    with Session(engine) as session:
+        author = User(username="author", sync_scope="private")
+        viewer = User(username="viewer", sync_scope="public")
+        session.add(author)
+        session.add(viewer)
+        session.flush()
+        public = HelpRequest(
+            title="Groceries for the week",
+            description="Need a ride to the food bank",
+            created_by_user_id=author.id,
+            status="open",
+            sync_scope="public",
+        )
+        private = HelpRequest(
+            title="Private groceries",
+            description="Groceries delivered to my door",
+            created_by_user_id=author.id,
+            status="open",
+            sync_scope="private",
+        )
+        session.add(public)
+        session.add(private)
+        session.flush()
+        session.add(RequestComment(help_request_id=public.id, user_id=viewer.id, body="I can drive you tomorrow"))
+        session.commit()
+        return {"author": author.id, "viewer": viewer.id, "public": public.id, "private": private.id}
+
+
+@pytest.mark.parametrize("with_index", [True, False])
+def test_search_ranks_and_filters_visibility_in_sql(engine, with_index: bool) -> None:
+    ids = _seed(engine)
+    if with_index:
+        assert request_search_index.ensure_index(engine) is True
+
+    with Session(engine) as session:
+        assert request_search_index.is_available(session) is with_index
+        viewer = session.get(User, ids["viewer"])
+        author = session.get(User, ids["author"])
+
+        visible = request_search_index.search_requests(session, ["groceries"], user=viewer, limit=5)
+        assert [row.id for row in visible] == [ids["public"]]
+        owned = request_search_index.search_requests(session, ["groceries"], user=author, limit=5)
+        assert {row.id for row in owned} == {ids["public"], ids["private"]}
+
+        comments = request_search_index.search_comments(session, ["drive"], user=viewer, limit=5)
+        assert [comment.body for comment, _, _ in comments] == ["I can drive you tomorrow"]
+
+        listed = request_services.list_requests(session, search="food ride")
+        assert [row.id for row in listed] == [ids["public"]]
+
+
+def test_index_follows_inserts_updates_and_deletes(engine) -> None:
+    ids = _seed(engine)
+    request_search_index.ensure_index(engine)
+
+    with Session(engine) as session:
+        viewer = session.get(User, ids["viewer"])
+        help_request = session.get(HelpRequest, ids["public"])
+        help_request.description = "Looking for a carpool"
+        session.add(
+            HelpRequest(
+                title="Babysitter",
+                description="Carpool to school",
+                created_by_user_id=ids["author"],
+                status="open",
+                sync_scope="public",
+                created_at=datetime(2024, 1, 1),
+            )
+        )
+        session.commit()
+
+        matches = request_search_index.search_requests(session, ["carpool"], user=viewer, limit=5)
+        assert len(matches) == 2
+        assert request_search_index.search_requests(session, ["food"], user=viewer, limit=5) == []
+
+        session.delete(help_request)
+        session.commit()
+        remaining = request_search_index.search_requests(session, ["carpool"], user=viewer, limit=5)
+        assert [row.title for row in remaining] == ["Babysitter"]
+
+
+def test_build_match_expression_quotes_prefix_tokens() -> None:
+    tokens = request_search_index.tokenize(['Food "bank"', "food"])
+    assert tokens == ["food", "bank"]
+    assert request_search_index.build_match_expression(tokens) == '"food"* AND "bank"*'
+    assert (
+        request_search_index.build_match_expression(tokens, match_all=False, columns=("description",))
+        == '{description} : ("food"* OR "bank"*)'
+    )
+    assert request_search_index.build_match_expression([]) is None
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from pathlib import Path
+import sys
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app import models  # noqa: F401
+from app.models import User, UserSession
+from app.dependencies import get_current_session
+from app.services import auth_service, session_activity_service
+from app.services.session_activity_service import SessionActivityTracker
+
+
+@pytest.fixture()
+def engine():
+    engine = create_engine("sqlite:///:memory:", echo=False)
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def _session_record(engine, *, last_seen_at: datetime) -> str:
+    with Session(engine) as session:
+        user = User(username="member", is_admin=False)
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+        record = UserSession(user_id=user.id, last_seen_at=last_seen_at)
+        session.add(record)
+        session.commit()
+        return record.id
+
+
+def test_record_skips_moves_within_granularity(engine) -> None:
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    session_id = _session_record(engine, last_seen_at=start)
+    tracker = SessionActivityTracker(granularity=timedelta(seconds=60))
+
+    with Session(engine) as session:
+        record = session.get(UserSession, session_id)
+        assert tracker.record(record, now=start + timedelta(seconds=30)) is False
+        assert tracker.pending_count() == 0
+
+        assert tracker.record(record, now=start + timedelta(seconds=90)) is True
+        assert record.last_seen_at == start + timedelta(seconds=90)
+        assert record not in session.dirty
+        session.commit()
+
+    with Session(engine) as session:
+        assert session.get(UserSession, session_id).last_seen_at == start
+
+
+def test_flush_writes_batch_and_never_moves_backwards(engine) -> None:
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    first = _session_record(engine, last_seen_at=start)
+    with Session(engine) as session:
+        newer = UserSession(user_id=1, last_seen_at=start + timedelta(hours=1))
+        session.add(newer)
+        session.commit()
+        second = newer.id
+    tracker = SessionActivityTracker(granularity=timedelta(seconds=60))
+
+    with Session(engine) as session:
+        tracker.record(session.get(UserSession, first), now=start + timedelta(minutes=5))
+        stale = session.get(UserSession, second)
+        stale.last_seen_at = None
+        tracker.record(stale, now=start + timedelta(minutes=5))
+
+    assert tracker.flush(engine) == 2
+    assert tracker.pending_count() == 0
+    with Session(engine) as session:
+        assert session.get(UserSession, first).last_seen_at == start + timedelta(minutes=5)
+        assert session.get(UserSession, second).last_seen_at == start + timedelta(hours=1)
+    assert tracker.flush(engine) == 0
+
+
+def test_deleted_sessions_drop_their_pending_write(engine) -> None:
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    revoked = _session_record(engine, last_seen_at=start)
+    with Session(engine) as session:
+        expired = UserSession(user_id=1, last_seen_at=start, expires_at=start)
+        session.add(expired)
+        session.commit()
+        expired_id = expired.id
+    session_activity_service.reset_tracker()
+    tracker = session_activity_service.get_tracker()
+
+    try:
+        with Session(engine) as session:
+            tracker.record(session.get(UserSession, revoked), now=start + timedelta(hours=1))
+            tracker.record(session.get(UserSession, expired_id), now=start + timedelta(hours=1))
+            assert tracker.pending_count() == 2
+
+            auth_service.revoke_session(session, session_id=revoked)
+            assert get_current_session(session, None, session_id=expired_id) is None
+        assert tracker.pending_count() == 0
+    finally:
+        session_activity_service.reset_tracker()
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app import models  # noqa: F401
+from app.models import HelpRequest, InviteToken, RequestComment, User
+from app.sync import export_import
+from app.sync.bulk_import import bulk_import_sync_data
+from app.sync.export_import import export_sync_data
+
+
+@pytest.fixture(autouse=True)
+def export_index_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(export_import, "EXPORT_INDEX_DIR", tmp_path / "export_index")
+
+
+def _export_bundle(output: Path, *, requests: int, comments_per_request: int) -> None:
+    engine = create_engine("sqlite:///:memory:", echo=False)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        author = User(username="author", contact_email="author@example.org", sync_scope="public")
+        session.add(author)
+        session.commit()
+        session.refresh(author)
+        for index in range(requests):
+            request = HelpRequest(description=f"request {index}", created_by_user_id=author.id, sync_scope="public")
+            session.add(request)
+            session.commit()
+            session.refresh(request)
+            for offset in range(comments_per_request):
+                session.add(
+                    RequestComment(
+                        help_request_id=request.id,
+                        user_id=author.id,
+                        body=f"comment {index}.{offset}",
+                        sync_scope="public",
+                    )
+                )
+        session.add(InviteToken(token="invite-abc", created_by_user_id=author.id, sync_scope="public"))
+        session.commit()
+        export_sync_data(session, output)
+
+
+def test_bulk_import_commits_in_chunks_with_bounded_statements(tmp_path: Path) -> None:
+    bundle = tmp_path / "bundle"
+    _export_bundle(bundle, requests=12, comments_per_request=3)
+
+    engine = create_engine("sqlite:///:memory:", echo=False)
+    SQLModel.metadata.create_all(engine)
+    statements: list[str] = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    progress: list[int] = []
+    with Session(engine) as session:
+        stats = bulk_import_sync_data(
+            session,
+            bundle,
+            chunk_size=10,
+            progress=lambda current: progress.append(current.files),
+        )
+
+        assert stats.files == 14
+        assert stats.inserted == {"user": 1, "request": 12, "comment": 36, "invite": 1}
+        assert stats.chunks == len(progress) > 1
+        assert progress == sorted(progress)
+        assert len(session.exec(select(RequestComment)).all()) == 36
+        # One INSERT per entity per chunk, however many rows it carries.
+        assert sum(1 for sql in statements if sql.startswith("INSERT INTO request_comments")) <= stats.chunks
+
+    with Session(engine) as session:
+        second = bulk_import_sync_data(session, bundle, chunk_size=500)
+        assert second.inserted == {}
+        assert second.updated == {"user": 1, "request": 12, "comment": 36, "invite": 1}
+        assert len(session.exec(select(HelpRequest)).all()) == 12
+
+
+def test_bulk_import_matches_users_by_username_and_keeps_missing_fields(tmp_path: Path) -> None:
+    bundle = tmp_path / "bundle"
+    (bundle / "users").mkdir(parents=True)
+    (bundle / "users" / "user_40.sync.txt").write_text(
+        "Entity: user\nID: 40\nUsername: river\nSync-Scope: public\n\n",
+        encoding="utf-8",
+    )
+
+    engine = create_engine("sqlite:///:memory:", echo=False)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        local = User(username="river", contact_email="river@example.org", is_admin=True)
+        session.add(local)
+        session.commit()
+        session.refresh(local)
+
+        stats = bulk_import_sync_data(session, bundle)
+
+        users = session.exec(select(User)).all()
+        assert stats.updated == {"user": 1}
+        assert [user.id for user in users] == [local.id]
+        session.refresh(users[0])
+        assert users[0].contact_email == "river@example.org"
+        assert users[0].sync_scope == "public"
+        assert users[0].is_admin is True
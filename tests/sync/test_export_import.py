@@ -2,11 +2,20 @@ from __future__ import annotations
 
 from pathlib import Path
 
+import pytest
 from sqlmodel import Session, SQLModel, create_engine
 
 from app import models  # noqa: F401
 from app.models import HelpRequest, RequestComment, User
-from app.sync.export_import import export_sync_data, import_sync_data
+from app.sync import export_import
+from app.sync.export_import import export_sync_data, export_sync_data_incremental, import_sync_data
+
+
+@pytest.fixture(autouse=True)
+def export_index_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    index_dir = tmp_path / "export_index"
+    monkeypatch.setattr(export_import, "EXPORT_INDEX_DIR", index_dir)
+    return index_dir
 
 
 def test_export_import_round_trip(tmp_path: Path) -> None:
@@ -53,3 +62,69 @@ def test_export_import_round_trip(tmp_path: Path) -> None:
         comments = session.query(RequestComment).all()
         assert len(comments) == 1
         assert comments[0].body == "cheering"
+
+
+def test_incremental_export_writes_only_changed_files(tmp_path: Path) -> None:
+    engine = create_engine("sqlite:///:memory:", echo=False)
+    SQLModel.metadata.create_all(engine)
+    output = tmp_path / "bundle"
+    with Session(engine) as session:
+        user = User(username="founder", sync_scope="public")
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+        first = HelpRequest(description="First", created_by_user_id=user.id, sync_scope="public")
+        second = HelpRequest(description="Second", created_by_user_id=user.id, sync_scope="public")
+        session.add(first)
+        session.add(second)
+        session.commit()
+
+        export_sync_data(session, output)
+        full_manifest = (output / "manifest.sync.txt").read_bytes()
+
+        unchanged = export_sync_data_incremental(session, output)
+        assert unchanged.written == []
+        assert unchanged.unchanged == len(unchanged.files) == 4
+
+        session.add(RequestComment(help_request_id=first.id, user_id=user.id, body="on it", sync_scope="public"))
+        second.sync_scope = "private"
+        session.add(second)
+        session.commit()
+
+        first_id, second_id = first.id, second.id
+
+        result = export_sync_data_incremental(session, output)
+
+    assert sorted(path.relative_to(output).as_posix() for path in result.written) == [
+        "manifest.sync.txt",
+        f"requests/request_{first_id}.sync.txt",
+    ]
+    assert [path.name for path in result.removed] == [f"request_{second_id}.sync.txt"]
+    assert not (output / "requests" / f"request_{second_id}.sync.txt").exists()
+    assert "on it" in (output / "requests" / f"request_{first_id}.sync.txt").read_text(encoding="utf-8")
+    manifest = (output / "manifest.sync.txt").read_bytes()
+    assert manifest != full_manifest
+    for line in manifest.decode("utf-8").splitlines():
+        digest, rel = line.split("  ", 1)
+        assert export_import.sha256((output / rel).read_bytes()).hexdigest() == digest
+
+
+def test_incremental_export_rewrites_files_edited_on_disk(tmp_path: Path) -> None:
+    engine = create_engine("sqlite:///:memory:", echo=False)
+    SQLModel.metadata.create_all(engine)
+    output = tmp_path / "bundle"
+    with Session(engine) as session:
+        user = User(username="founder", sync_scope="public")
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+
+        export_sync_data_incremental(session, output)
+        user_file = output / "users" / f"user_{user.id}.sync.txt"
+        original = user_file.read_bytes()
+        user_file.write_text("tampered\n", encoding="utf-8")
+
+        result = export_sync_data_incremental(session, output)
+
+    assert result.written == [user_file]
+    assert user_file.read_bytes() == original
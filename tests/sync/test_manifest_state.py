@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app import models  # noqa: F401
+from app.models import HelpRequest, RequestComment, User
+from app.sync import export_import, manifest_state
+from app.sync.export_import import export_sync_data_incremental, import_sync_data
+
+
+@pytest.fixture(autouse=True)
+def sync_home(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setattr(export_import, "EXPORT_INDEX_DIR", tmp_path / "export_index")
+    monkeypatch.setenv("WB_SYNC_HOME", str(tmp_path / ".sync"))
+    return tmp_path / ".sync"
+
+
+def _engine():
+    engine = create_engine("sqlite:///:memory:", echo=False)
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def test_diff_manifests_classifies_entries() -> None:
+    previous = {"a": "1", "b": "2", "c": "3"}
+    current = {"a": "1", "b": "9", "d": "4"}
+
+    diff = manifest_state.diff_manifests(previous, current)
+
+    assert diff.added == ["d"]
+    assert diff.changed == ["b"]
+    assert diff.removed == ["c"]
+    assert diff.unchanged == 1
+    assert diff.to_import == ["b", "d"]
+
+
+def test_pull_imports_only_changed_files_and_withdraws_removed(tmp_path: Path) -> None:
+    bundle = tmp_path / "bundle"
+    source = _engine()
+    with Session(source) as session:
+        author = User(username="author", sync_scope="public")
+        session.add(author)
+        session.commit()
+        session.refresh(author)
+        keep = HelpRequest(description="keep", created_by_user_id=author.id, sync_scope="public")
+        edit = HelpRequest(description="edit", created_by_user_id=author.id, sync_scope="public")
+        gone = HelpRequest(description="gone", created_by_user_id=author.id, sync_scope="public")
+        session.add_all([keep, edit, gone])
+        session.commit()
+        session.add(RequestComment(help_request_id=gone.id, user_id=author.id, body="hi", sync_scope="public"))
+        session.commit()
+        export_sync_data_incremental(session, bundle)
+        edit_id, gone_id = edit.id, gone.id
+
+    target = _engine()
+    with Session(target) as session:
+        assert import_sync_data(session, bundle, peer_name="river") == 4
+    assert manifest_state.load_imported_manifest("river") == manifest_state.read_bundle_manifest(bundle)
+
+    with Session(source) as session:
+        edited = session.get(HelpRequest, edit_id)
+        edited.description = "edited upstream"
+        withdrawn = session.get(HelpRequest, gone_id)
+        withdrawn.sync_scope = "private"
+        session.add_all([edited, withdrawn])
+        session.commit()
+        export_sync_data_incremental(session, bundle)
+
+    with Session(target) as session:
+        assert import_sync_data(session, bundle, peer_name="river") == 1
+        assert session.get(HelpRequest, edit_id).description == "edited upstream"
+        assert session.get(HelpRequest, gone_id).sync_scope == "private"
+        comments = session.exec(select(RequestComment)).all()
+        assert [comment.sync_scope for comment in comments] == ["private"]
+
+        assert import_sync_data(session, bundle, peer_name="river") == 0
+        assert import_sync_data(session, bundle, peer_name="river", full=True) == 3
+
+
+def test_pull_rejects_files_that_do_not_match_the_manifest(tmp_path: Path) -> None:
+    bundle = tmp_path / "bundle"
+    with Session(_engine()) as session:
+        session.add(User(username="author", sync_scope="public"))
+        session.commit()
+        export_sync_data_incremental(session, bundle)
+    user_file = next((bundle / "users").glob("*.sync.txt"))
+    user_file.write_text(user_file.read_text(encoding="utf-8").replace("author", "mallory"), encoding="utf-8")
+
+    with Session(_engine()) as session, pytest.raises(ValueError):
+        import_sync_data(session, bundle, peer_name="river")
+    assert manifest_state.load_imported_manifest("river") == {}
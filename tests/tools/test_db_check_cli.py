@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from app import db
+from app.config import get_settings
+from tools import dev
+
+
+def test_performance_profile_applies_pragmas_and_pool_sizing(tmp_path: Path) -> None:
+    settings = replace(get_settings(), sqlite_profile="performance", db_pool_size=7, db_max_overflow=3)
+    engine = db.build_engine(f"sqlite:///{tmp_path / 'app.db'}", settings)
+
+    report = db.describe_engine(engine)
+    engine.dispose()
+
+    assert report["journal_mode"] == "wal"
+    assert report["synchronous"] == 1
+    assert report["busy_timeout"] == settings.sqlite_busy_timeout_ms
+    assert report["temp_store"] == 2
+    assert report["pool_size"] == 7
+    assert report["pool_max_overflow"] == 3
+
+
+def test_default_profile_keeps_sqlite_journal(tmp_path: Path) -> None:
+    settings = replace(get_settings(), sqlite_profile="default")
+    engine = db.build_engine(f"sqlite:///{tmp_path / 'app.db'}", settings)
+
+    report = db.describe_engine(engine)
+    engine.dispose()
+
+    assert report["journal_mode"] == "delete"
+    assert report["busy_timeout"] == settings.sqlite_busy_timeout_ms
+
+
+def test_db_check_reports_effective_settings(tmp_path: Path, monkeypatch) -> None:  # noqa: ANN001
+    settings = replace(get_settings(), database_url=f"sqlite:///{tmp_path / 'app.db'}")
+    engine = db.build_engine(settings.database_url, settings)
+    monkeypatch.setattr(dev, "get_settings", lambda: settings)
+    monkeypatch.setattr(dev, "get_engine", lambda: engine)
+
+    result = CliRunner().invoke(dev.cli, ["db-check"])
+    engine.dispose()
+
+    assert result.exit_code == 0, result.output
+    assert "journal_mode: wal" in result.output
+    assert "All profile pragmas are in effect." in result.output
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Sequence
+
+import pytest
+
+from app.services import request_chat_embedding_cache, request_chat_embeddings
+from app.tools import request_chat_embeddings as cli
+
+
+class CountingAdapter(cli.LocalEmbeddingAdapter):
+    def __init__(self) -> None:
+        super().__init__(dimensions=32)
+        self.calls: list[list[str]] = []
+        self.active = 0
+        self.peak = 0
+
+    async def embed_async(self, texts: Sequence[str]) -> list[list[float]]:
+        self.calls.append(list(texts))
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return self.embed(texts)
+
+
+@pytest.fixture()
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(request_chat_embeddings, "CACHE_DIR", tmp_path / "embeddings")
+    monkeypatch.setattr(request_chat_embedding_cache, "DB_PATH", tmp_path / "text_cache.db")
+    with request_chat_embedding_cache.connection() as conn:
+        yield conn
+
+
+def make_jobs() -> list[cli.RequestJob]:
+    return [
+        cli.RequestJob(request_id=1, texts=[(11, "need a ride"), (12, "thanks!"), (13, "thanks!")], source_count=3),
+        cli.RequestJob(request_id=2, texts=[(21, "thanks!"), (22, "groceries on tuesday")], source_count=2),
+        cli.RequestJob(request_id=3, texts=[(31, "need a ride"), (32, "clinic at noon")], source_count=2),
+    ]
+
+
+def test_pipeline_dedupes_texts_and_bounds_concurrency(cache):
+    adapter = CountingAdapter()
+    pipeline = cli.EmbeddingPipeline(adapter, cache, batch_size=1, concurrency=2)
+
+    stats = asyncio.run(cli.run_pipeline(make_jobs(), pipeline, run_key="run", concurrency=2, log=lambda _m: None))
+
+    sent = sorted(text for call in adapter.calls for text in call)
+    assert sent == ["clinic at noon", "groceries on tuesday", "need a ride", "thanks!"]
+    assert adapter.peak <= 2
+    assert stats.requests_embedded == 3
+    assert stats.texts == 7
+    assert stats.cache_hits == 3
+    assert stats.embedded_texts == 4
+    stored = request_chat_embeddings.load_index(2)
+    assert [comment.comment_id for comment in stored.comments] == [21, 22]
+    assert list(stored.comments[0].embedding) == pytest.approx(adapter.embed(["thanks!"])[0])
+    assert request_chat_embedding_cache.completed_requests(cache, "run") == {1, 2, 3}
+
+
+def test_cache_is_shared_across_runs(cache):
+    first = CountingAdapter()
+    asyncio.run(
+        cli.run_pipeline(make_jobs(), cli.EmbeddingPipeline(first, cache), run_key="a", log=lambda _m: None)
+    )
+
+    second = CountingAdapter()
+    stats = asyncio.run(
+        cli.run_pipeline(make_jobs(), cli.EmbeddingPipeline(second, cache), run_key="b", log=lambda _m: None)
+    )
+
+    assert second.calls == []
+    assert stats.cache_hit_rate == 1.0
+    assert stats.texts_per_second > 0
+
+
+def test_failed_batches_leave_the_request_unfinished(cache):
+    class FlakyAdapter(CountingAdapter):
+        async def embed_async(self, texts: Sequence[str]) -> list[list[float]]:
+            if "clinic at noon" in texts:
+                raise RuntimeError("provider timeout")
+            return await super().embed_async(texts)
+
+    pipeline = cli.EmbeddingPipeline(FlakyAdapter(), cache, batch_size=1)
+    stats = asyncio.run(cli.run_pipeline(make_jobs(), pipeline, run_key="run", log=lambda _m: None))
+
+    assert stats.requests_failed == 1
+    assert request_chat_embedding_cache.completed_requests(cache, "run") == {1, 2}
+    assert request_chat_embeddings.load_index(3) is None
@@ -26,7 +26,7 @@ from sqlalchemy import inspect
 from sqlalchemy.engine.url import make_url
 from sqlmodel import Session, SQLModel, select
 
-from app.db import get_engine, init_db
+from app.db import describe_engine, get_engine, init_db, sqlite_pragmas
 from app.config import get_settings
 from app.models import AuthRequestStatus, AuthenticationRequest, User, UserSession
 from app.modules.messaging.db import init_messaging_db
@@ -34,7 +34,9 @@ from app.modules.requests import services as request_services
 from app.schema_utils import ensure_schema_integrity
 from app.services import auth_service, comment_llm_insights_db, peer_auth_service, vouch_service
 from app.url_utils import build_invite_link
-from app.sync.export_import import export_sync_data, import_sync_data
+from app.sync.bulk_import import bulk_import_sync_data
+from app.sync.export_import import export_sync_data, export_sync_data_incremental, import_sync_data
+from app.sync.manifest_state import parse_manifest
 from app.sync.peers import Peer, get_peer, load_peers, save_peers
 from app.sync.pending_pull import (
     cache_pending_pull,
@@ -43,6 +45,7 @@ from app.sync.pending_pull import (
     approve_pending_pull,
 )
 from app.sync.signing import (
+    MANIFEST_FILENAME as SYNC_MANIFEST_FILENAME,
     SignatureVerificationError,
     SigningKey,
     ensure_local_keypair,
@@ -179,11 +182,20 @@ def _ensure_peer_path(peer: Peer) -> Path:
     return peer.path
 
 
-def _bundle_tarball(bundle_dir: Path) -> bytes:
+def _bundle_tarball(bundle_dir: Path, only: set[str] | None = None) -> bytes:
+    """Tar.gz of the bundle; with `only`, manifest-listed files outside it are left out."""
+    listed: set[str] = set()
+    if only is not None:
+        listed = set(parse_manifest((bundle_dir / SYNC_MANIFEST_FILENAME).read_text(encoding="utf-8")))
     buffer = io.BytesIO()
     with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
-        for file_path in bundle_dir.rglob("*"):
-            tar.add(file_path, arcname=file_path.relative_to(bundle_dir))
+        for file_path in sorted(bundle_dir.rglob("*")):
+            if not file_path.is_file():
+                continue
+            rel = file_path.relative_to(bundle_dir).as_posix()
+            if only is not None and rel in listed and rel not in only:
+                continue
+            tar.add(file_path, arcname=rel, recursive=False)
     buffer.seek(0)
     return buffer.getvalue()
 
@@ -208,33 +220,68 @@ def _hub_headers(peer: Peer, include_public_key: bool = True) -> dict[str, str]:
     return headers
 
 
+def _raise_hub_upload_error(peer: Peer, response: httpx.Response) -> None:
+    detail_text = response.text
+    payload_obj: dict | None = None
+    pending_detail: dict | None = None
+    try:
+        payload_obj = response.json()
+        detail_obj = payload_obj.get("detail") if isinstance(payload_obj, dict) else None
+        if isinstance(detail_obj, dict) and detail_obj.get("error") == "peer_key_mismatch":
+            pending_detail = detail_obj
+        elif isinstance(detail_obj, str):
+            detail_text = detail_obj
+    except Exception:
+        pass
+    if pending_detail:
+        pending_id = pending_detail.get("pending_id") or "unknown"
+        raise PendingApprovalError(peer.name, str(pending_id), pending_detail.get("message"))
+    raise click.ClickException(f"Hub upload failed ({response.status_code}): {detail_text}")
+
+
+def _push_delta_to_hub(client: httpx.Client, peer: Peer, bundle_dir: Path, headers: dict[str, str]) -> httpx.Response | None:
+    """Two-phase push: ask the hub which files it lacks, then upload only those.
+
+    Returns None when the hub cannot take a delta (older hub, or blobs pruned
+    between the two phases) so the caller falls back to a full upload.
+    """
+    manifest_text = (bundle_dir / SYNC_MANIFEST_FILENAME).read_text(encoding="utf-8")
+    plan = client.post(_hub_endpoint(peer, "bundle/plan"), headers=headers, json={"manifest": manifest_text})
+    if plan.status_code in (404, 405):
+        return None
+    if plan.status_code >= 400:
+        _raise_hub_upload_error(peer, plan)
+    missing = set(plan.json().get("missing") or [])
+    payload = _bundle_tarball(bundle_dir, only=missing)
+    click.secho(
+        f"Hub has {plan.json().get('known', 0)} files already; uploading {len(missing)} ({len(payload)} bytes).",
+        fg="cyan",
+    )
+    response = client.post(
+        _hub_endpoint(peer, "bundle/delta"),
+        headers=headers,
+        files={"bundle": ("bundle.tar.gz", payload, "application/gzip")},
+    )
+    if response.status_code == 409:
+        click.secho("Hub no longer holds some files; sending the full bundle.", fg="yellow")
+        return None
+    return response
+
+
 def _push_to_hub(peer: Peer, bundle_dir: Path) -> None:
-    payload = _bundle_tarball(bundle_dir)
     url = _hub_endpoint(peer, "bundle")
     headers = _hub_headers(peer)
     click.secho(f"Uploading bundle to hub peer '{peer.name}'...", fg="cyan")
     try:
         with httpx.Client(timeout=120.0) as client:
-            response = client.post(url, headers=headers, files={"bundle": ("bundle.tar.gz", payload, "application/gzip")})
+            response = _push_delta_to_hub(client, peer, bundle_dir, headers)
+            if response is None:
+                payload = _bundle_tarball(bundle_dir)
+                response = client.post(url, headers=headers, files={"bundle": ("bundle.tar.gz", payload, "application/gzip")})
     except httpx.HTTPError as exc:
         raise click.ClickException(f"Hub upload failed: {exc}") from exc
     if response.status_code >= 400:
-        detail_text = response.text
-        payload_obj: dict | None = None
-        pending_detail: dict | None = None
-        try:
-            payload_obj = response.json()
-            detail_obj = payload_obj.get("detail") if isinstance(payload_obj, dict) else None
-            if isinstance(detail_obj, dict) and detail_obj.get("error") == "peer_key_mismatch":
-                pending_detail = detail_obj
-            elif isinstance(detail_obj, str):
-                detail_text = detail_obj
-        except Exception:
-            pass
-        if pending_detail:
-            pending_id = pending_detail.get("pending_id") or "unknown"
-            raise PendingApprovalError(peer.name, str(pending_id), pending_detail.get("message"))
-        raise click.ClickException(f"Hub upload failed ({response.status_code}): {detail_text}")
+        _raise_hub_upload_error(peer, response)
     data = response.json()
     click.secho(
         f"Hub accepted bundle (digest {data.get('manifest_digest')}, files {data.get('stored_files')}).",
@@ -324,13 +371,23 @@ def _update_peer_public_key(peer_name: str, new_key: str) -> Peer:
     type=click.Path(path_type=Path),
     help="Directory to write .sync.txt files",
 )
-def sync_export(output: Path) -> None:
+@click.option(
+    "--full",
+    is_flag=True,
+    default=False,
+    help="Wipe and rewrite every file instead of only the ones that changed",
+)
+def sync_export(output: Path, full: bool) -> None:
     keypair = _ensure_signing_key(auto_generate=True)
     engine = get_engine()
     with Session(engine) as session:
-        files = export_sync_data(session, output)
+        if full:
+            files = export_sync_data(session, output)
+            summary = f"{len(files)} files"
+        else:
+            summary = export_sync_data_incremental(session, output).summary()
     sig_path = sign_bundle(output, keypair)
-    click.secho(f"Wrote {len(files)} files to {output}", fg="green")
+    click.secho(f"Exported {summary} to {output}", fg="green")
     click.secho(f"Signed manifest ({sig_path})", fg="cyan")
 
 
@@ -353,8 +410,12 @@ def sync_import(input_dir: Path, peer_name: str | None, allow_unsigned: bool) ->
     _verify_bundle_dir(input_dir, peer=peer, allow_unsigned=allow_unsigned)
     engine = get_engine()
     with Session(engine) as session:
-        count = import_sync_data(session, Path(input_dir))
-    click.secho(f"Imported {count} records from {input_dir}", fg="green")
+        stats = bulk_import_sync_data(
+            session,
+            Path(input_dir),
+            progress=lambda progress: click.echo(f"  committed {progress.summary()}"),
+        )
+    click.secho(f"Imported {stats.files} records from {input_dir}", fg="green")
 
 
 @sync_group.command(name="push")
@@ -367,7 +428,8 @@ def sync_push(peer_name: str) -> None:
     engine = get_engine()
     with Session(engine) as session:
         temp_dir = Path("data/public_sync")
-        files = export_sync_data(session, temp_dir)
+        export_result = export_sync_data_incremental(session, temp_dir)
+    click.secho(f"Exported {export_result.summary()}", fg="cyan")
     sign_bundle(temp_dir, keypair)
     if _peer_uses_hub(peer):
         _push_to_hub(peer, temp_dir)
@@ -396,11 +458,18 @@ def sync_push(peer_name: str) -> None:
 )
 @click.option("--approve", "pending_id", default=None, help="Approve a pending pull ID")
 @click.option("--pending", "show_pending", is_flag=True, help="List pending pull approvals")
+@click.option(
+    "--full",
+    is_flag=True,
+    default=False,
+    help="Re-import every file instead of only those changed since the last pull",
+)
 def sync_pull(
     peer_name: str | None,
     allow_unsigned: bool,
     pending_id: str | None = None,
     show_pending: bool = False,
+    full: bool = False,
 ) -> None:
     if show_pending:
         _print_pending_pull_entries()
@@ -429,7 +498,7 @@ def sync_pull(
             bundle_dir = _pull_from_hub(peer, tmp_path, allow_unsigned)
             engine = get_engine()
             with Session(engine) as session:
-                count = import_sync_data(session, bundle_dir)
+                count = import_sync_data(session, bundle_dir, peer_name=peer.name, full=full)
     else:
         source = _ensure_peer_path(peer)
         if not source.exists():
@@ -437,7 +506,7 @@ def sync_pull(
         _verify_bundle_dir(source, peer=peer, allow_unsigned=allow_unsigned)
         engine = get_engine()
         with Session(engine) as session:
-            count = import_sync_data(session, source)
+            count = import_sync_data(session, source, peer_name=peer.name, full=full)
     click.secho(f"Pulled {count} records from peer '{peer_name}'", fg="green")
 
 
@@ -601,6 +670,7 @@ def init_db_command() -> None:
     click.echo("Schema integrity summary:")
     click.echo(
         f"  Tables created during check: {summary['tables_created']} | Columns added: {summary['columns_added']}"
+        f" | Indexes added: {summary['indexes_added']}"
     )
     if summary["mismatches"]:
         click.secho(f"  Column type mismatches detected: {summary['mismatches']}", fg="yellow")
@@ -615,6 +685,8 @@ def init_db_command() -> None:
             details.append(
                 "added columns: " + ", ".join(table.added_columns)
             )
+        if table.added_indexes:
+            details.append("added indexes: " + ", ".join(table.added_indexes))
         if table.mismatched_columns:
             mismatch_text = ", ".join(
                 f"{name} (expected {expected}, found {actual})"
@@ -654,6 +726,45 @@ def init_db_command() -> None:
         click.secho("Database ready and schema verified.", fg="green")
 
 
+def _pragma_display_value(name: str, value: object) -> str:
+    """Normalize a configured pragma to what `PRAGMA <name>` reports."""
+    named = {
+        "synchronous": {"off": "0", "normal": "1", "full": "2", "extra": "3"},
+        "temp_store": {"default": "0", "file": "1", "memory": "2"},
+    }
+    text = str(value).lower()
+    return named.get(name, {}).get(text, text)
+
+
+@cli.command(name="db-check")
+def db_check_command() -> None:
+    """Report the effective engine pool and SQLite pragma settings."""
+
+    settings = get_settings()
+    try:
+        report = describe_engine(get_engine())
+    except Exception as exc:  # pragma: no cover - protective logging
+        click.secho("Failed to open the database.", fg="red", err=True)
+        raise click.ClickException(str(exc))
+
+    click.secho(f"Database engine ({settings.sqlite_profile} profile)", fg="cyan")
+    for key, value in report.items():
+        click.echo(f"  {key}: {value}")
+
+    if not make_url(settings.database_url).drivername.startswith("sqlite"):
+        return
+    expected = sqlite_pragmas(settings)
+    mismatches = [
+        f"{name} (expected {value}, found {report.get(name)})"
+        for name, value in expected.items()
+        if str(report.get(name)).lower() != _pragma_display_value(name, value)
+    ]
+    if mismatches:
+        click.secho("  Pragmas not in effect: " + ", ".join(mismatches), fg="yellow")
+    else:
+        click.secho("  All profile pragmas are in effect.", fg="green")
+
+
 @cli.command(name="create-admin")
 @click.argument("username")
 def create_admin(username: str) -> None:
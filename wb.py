@@ -716,6 +716,7 @@ def print_help() -> None:
     print("  generate-requirements Regenerate requirements.txt from pyproject.toml")
     print("  runserver [--opts]    Start the development server")
     print("  init-db               Initialize the SQLite database")
+    print("  db-check              Show effective database pool and SQLite pragmas")
     print("  create-admin USER     Promote a user to admin")
     print("  create-invite [opts]  Generate invite tokens")
     print("  import-signal-group   Import a Signal Desktop group export (local seed)")
@@ -748,6 +749,7 @@ def main(argv: list[str] | None = None) -> int:
     subparsers.add_parser("generate-requirements")
     subparsers.add_parser("runserver")
     subparsers.add_parser("init-db")
+    subparsers.add_parser("db-check")
     subparsers.add_parser("create-admin")
     subparsers.add_parser("create-invite")
     subparsers.add_parser("session")
@@ -816,7 +818,7 @@ def main(argv: list[str] | None = None) -> int:
         return cmd_profile_glaze(passthrough)
 
     # Known commands path
-    if ns.command in {"runserver", "init-db", "create-admin", "create-invite", "session", "peer-auth", "sync", "skins", "messaging"}:
+    if ns.command in {"runserver", "init-db", "db-check", "create-admin", "create-invite", "session", "peer-auth", "sync", "skins", "messaging"}:
         if ns.command in {"session", "peer-auth", "sync", "messaging"}:
             if not passthrough:
                 passthrough = ["--help"]